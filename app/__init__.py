@@ -10,7 +10,6 @@ from flask_login import LoginManager
 from flask_mail import Mail
 from flask_bootstrap import Bootstrap
 from datetime import datetime, timedelta
-from pymongo import MongoClient
 from flask_wtf.csrf import CSRFProtect, CSRFError
 from dotenv import load_dotenv
 import logging
@@ -100,7 +99,55 @@ def create_app(test_config=None):
     app.json.encoder = MongoJSONEncoder
     
     # Uzantıları başlat
-    mongo.init_app(app)
+    # Tüm model ve yardımcılar bu tek bağlantı havuzunu kullanır
+    from .utils.db import client_options
+    mongo.init_app(app, **client_options(app.config))
+    
+    # Player long-poll izleyicisi
+    from .utils.manifest_watcher import manifest_watcher
+    manifest_watcher.poll_interval = app.config.get('MANIFEST_WATCH_INTERVAL', 2)
+    
+    # API anahtarı önbelleği
+    from .models import screen as screen_model
+    screen_model._api_key_cache.maxsize = app.config.get('SCREEN_CACHE_SIZE', 10000)
+    screen_model._api_key_cache.ttl = app.config.get('SCREEN_CACHE_TTL', 30)
+    
+    # last_active heartbeat tamponu
+    from .utils.heartbeat import heartbeat_buffer
+    heartbeat_buffer.flush_interval = app.config.get('HEARTBEAT_FLUSH_INTERVAL', 15)
+    
+    # Ekran telemetri tamponu
+    from .utils.telemetry import telemetry_buffer
+    telemetry_buffer.flush_interval = app.config.get('TELEMETRY_FLUSH_INTERVAL', 30)
+    telemetry_buffer.raw_retention_days = app.config.get('TELEMETRY_RAW_RETENTION_DAYS', 7)
+    telemetry_buffer.retention_days = app.config.get('TELEMETRY_RETENTION_DAYS', 90)
+    
+    # Model ve API izleme katmanı
+    from .utils.tracing import tracer
+    tracer.configure(
+        enabled=app.config.get('TRACE_ENABLED', False),
+        level=app.config.get('TRACE_LEVEL', 'DEBUG'),
+        sample_rate=app.config.get('TRACE_SAMPLE_RATE', 1.0)
+    )
+    
+    # Dashboard sayaçları
+    from .utils.counters import counters
+    counters.ttl = app.config.get('COUNTERS_CACHE_TTL', 30)
+    
+    # İstek başına veritabanı komut muhasebesi
+    from .utils import db_metrics
+    db_metrics.init_app(app)
+    
+    # Veritabanı bakım komutları (flask ensure-indexes, flask index-report, flask reconcile-counters)
+    from .cli import register_commands
+    register_commands(app)
+    
+    # Eksik indeks kontrolü isteği bekletmemesi için arka planda yapılır
+    if app.config.get('INDEX_VERIFY_ON_STARTUP') and not app.config.get('TESTING'):
+        import threading
+        from .utils.indexes import verify_indexes
+        threading.Thread(target=verify_indexes, args=(app,), name='index-verify', daemon=True).start()
+    
     login_manager.init_app(app)
     mail.init_app(app)
     bootstrap.init_app(app)
@@ -0,0 +1,95 @@
+"""
+Flask CLI komutları: Dağıtım sırasında çalıştırılan veritabanı bakım komutları
+"""
+import sys
+
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('ensure-indexes')
+@click.option('--dry-run', is_flag=True, help='İndeks oluşturmadan yalnızca eksikleri listele')
+@click.option('--report', is_flag=True, help='Ardından sık sorguların explain() raporunu göster')
+@with_appcontext
+def ensure_indexes_command(dry_run, report):
+    """Model sınıflarında tanımlanan indeksleri oluştur"""
+    from app import mongo
+    from app.utils.indexes import ensure_indexes
+
+    results = ensure_indexes(mongo.db, dry_run=dry_run)
+    failed = False
+    for result in results:
+        line = f"{result['status']:<9} {result['collection']}.{result['name']}"
+        if result['detail']:
+            line += f" ({result['detail']})"
+        click.echo(line)
+        if result['status'] in ('conflict', 'error'):
+            failed = True
+
+    created = sum(1 for result in results if result['status'] == 'created')
+    click.echo(f"{len(results)} indeks kontrol edildi, {created} indeks oluşturuldu.")
+
+    if report:
+        failed = _print_index_report() or failed
+
+    if failed:
+        sys.exit(1)
+
+
+@click.command('index-report')
+@with_appcontext
+def index_report_command():
+    """Sık sorguların indeks kullanımını explain() ile raporla"""
+    if _print_index_report():
+        sys.exit(1)
+
+
+def _print_index_report():
+    """
+    explain() raporunu yazdır
+
+    Returns:
+        İndeksle karşılanmayan sorgu varsa True
+    """
+    from app import mongo
+    from app.utils.indexes import explain_hot_queries
+
+    report = explain_hot_queries(mongo.db)
+    flagged = [entry for entry in report if entry['issues']]
+
+    for entry in report:
+        status = 'UYARI' if entry['issues'] else 'ok'
+        indexes = ', '.join(entry['indexes']) or '-'
+        click.echo(f"{status:<5} {entry['name']} [{entry['collection']}] indeks: {indexes}")
+        for issue in entry['issues']:
+            click.echo(f"      {issue}; plan: {' > '.join(stage for stage in entry['stages'] if stage)}")
+
+    click.echo(f"{len(report)} sorgu incelendi, {len(flagged)} sorgu indeksle karşılanmıyor.")
+    return bool(flagged)
+
+
+@click.command('reconcile-counters')
+@click.option('--dry-run', is_flag=True, help='Hiçbir sayacı düzeltmeden playlist medya sayısı farklarını listele')
+@with_appcontext
+def reconcile_counters_command(dry_run):
+    """Artımlı dashboard sayaçlarını ve playlist medya sayılarını kaynak koleksiyonlardan yeniden hesapla"""
+    from app.models.playlist import Playlist
+    from app.utils.counters import counters
+
+    if not dry_run:
+        for name, previous, values in counters.reconcile():
+            status = 'aynı' if previous == values else 'düzeltildi'
+            click.echo(f"{status:<10} {name}: {previous} -> {values}")
+
+    result = Playlist.reconcile_media_counts(dry_run=dry_run)
+    status = 'fark' if dry_run else 'düzeltildi'
+    for item in result['corrections']:
+        click.echo(f"{status:<10} playlists.media_count {item['name']} ({item['id']}): {item['old']} -> {item['new']}")
+    click.echo(f"{result['checked']} playlist kontrol edildi, {len(result['corrections'])} medya sayısı farklı.")
+
+
+def register_commands(app):
+    """CLI komutlarını uygulamaya kaydet"""
+    app.cli.add_command(ensure_indexes_command)
+    app.cli.add_command(index_report_command)
+    app.cli.add_command(reconcile_counters_command)
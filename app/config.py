@@ -23,11 +23,68 @@ class Config:
     # MongoDB URI
     MONGO_URI = f"mongodb://{encoded_username}:{encoded_password}@{MONGO_HOST}:{MONGO_PORT}/{MONGO_DB}?authSource=admin"
     
+    # Paylaşılan MongoClient bağlantı havuzu ayarları (worker başına)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = os.environ.get('MONGO_SOCKET_TIMEOUT_MS')
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS')
+    MONGO_MAX_IDLE_TIME_MS = os.environ.get('MONGO_MAX_IDLE_TIME_MS')
+    MONGO_WRITE_CONCERN = os.environ.get('MONGO_WRITE_CONCERN')  # örn. 'majority' veya '1'
+    MONGO_READ_CONCERN = os.environ.get('MONGO_READ_CONCERN')  # örn. 'local', 'majority'
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE')  # örn. 'secondaryPreferred'
+    
     UPLOAD_FOLDER = 'app/static/uploads'
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'webm', 'mov', 'avi'}
     PASSWORD_RESET_EXPIRE = timedelta(hours=24)
     
+    # Player long-poll ayarları
+    PLAYER_LONGPOLL_TIMEOUT = int(os.environ.get('PLAYER_LONGPOLL_TIMEOUT', 25))  # saniye
+    MANIFEST_WATCH_INTERVAL = float(os.environ.get('MANIFEST_WATCH_INTERVAL', 2))  # saniye
+    
+    # API anahtarı -> ekran önbelleği (worker başına)
+    SCREEN_CACHE_SIZE = int(os.environ.get('SCREEN_CACHE_SIZE', 10000))
+    SCREEN_CACHE_TTL = int(os.environ.get('SCREEN_CACHE_TTL', 30))  # saniye
+    
+    # last_active heartbeat'lerinin veritabanına toplu yazılma aralığı
+    HEARTBEAT_FLUSH_INTERVAL = int(os.environ.get('HEARTBEAT_FLUSH_INTERVAL', 15))  # saniye
+    
+    # Player'ın tek istekte gönderebileceği azami oynatma olayı sayısı
+    PLAY_EVENTS_MAX_BATCH = int(os.environ.get('PLAY_EVENTS_MAX_BATCH', 1000))
+    
+    # Ekran telemetrisi: toplu yazma aralığı ve saklama süreleri
+    TELEMETRY_FLUSH_INTERVAL = int(os.environ.get('TELEMETRY_FLUSH_INTERVAL', 30))  # saniye
+    TELEMETRY_RAW_RETENTION_DAYS = int(os.environ.get('TELEMETRY_RAW_RETENTION_DAYS', 7))
+    TELEMETRY_RETENTION_DAYS = int(os.environ.get('TELEMETRY_RETENTION_DAYS', 90))
+    
+    # Model ve API izleme (tracing) ayarları; kapalıyken maliyeti yoktur
+    TRACE_ENABLED = os.environ.get('TRACE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    TRACE_LEVEL = os.environ.get('TRACE_LEVEL', 'DEBUG')
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 1.0))
+    
+    # İstek başına veritabanı komut muhasebesi (Server-Timing başlığı ve N+1 uyarısı)
+    # Çalışma anında /admin/api/admin/db-metrics ile açılıp kapatılabilir
+    DB_METRICS_ENABLED = os.environ.get('DB_METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    DB_METRICS_WARN_THRESHOLD = int(os.environ.get('DB_METRICS_WARN_THRESHOLD', 10))
+    DB_METRICS_REFRESH_INTERVAL = int(os.environ.get('DB_METRICS_REFRESH_INTERVAL', 30))  # saniye
+    
+    # Yeni playlist atamalarının modu: copy (içerikler ekrana kopyalanır) veya
+    # linked (ekran playlist'e bağlanır, manifest okuma anında playlist'ten çözülür)
+    PLAYLIST_ASSIGN_MODE = os.environ.get('PLAYLIST_ASSIGN_MODE', 'copy')
+    
+    # Arka plan iş worker'ı (job_worker.py): paralel iş sayısı, tur başına iş ve bekleme aralığı
+    JOB_WORKER_CONCURRENCY = int(os.environ.get('JOB_WORKER_CONCURRENCY', 8))
+    JOB_WORKER_BATCH_SIZE = int(os.environ.get('JOB_WORKER_BATCH_SIZE', 50))
+    JOB_WORKER_POLL_INTERVAL = float(os.environ.get('JOB_WORKER_POLL_INTERVAL', 1))  # saniye
+    
+    # Dashboard sayaçlarının worker içi önbellek süresi (bkz. utils/counters)
+    COUNTERS_CACHE_TTL = int(os.environ.get('COUNTERS_CACHE_TTL', 30))  # saniye
+    
+    # Başlangıçta eksik indeksleri log'a yaz (oluşturmak için: flask ensure-indexes)
+    INDEX_VERIFY_ON_STARTUP = os.environ.get('INDEX_VERIFY_ON_STARTUP', 'true').lower() in ('1', 'true', 'yes')
+    
     # Mail ayarları
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'mail.elektrobil.com.tr')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -0,0 +1,312 @@
+"""
+Arka Plan İş Modeli: HTTP isteği dışında çalıştırılacak işlerin MongoDB tabanlı kuyruğunu yönetir
+"""
+import socket
+import os
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app import mongo
+
+class Job:
+    """
+    Arka plan iş kuyruğu (MongoDB tabanlı)
+
+    Her iş jobs koleksiyonunda bir belgedir ve job_worker.py süreci tarafından
+    işlenir. Aynı anahtara (key) sahip bekleyen tek bir iş bulunur: art arda
+    gelen istekler yeni iş oluşturmaz, bekleyen işe katılır ve çalışma zamanını
+    COALESCE_SECONDS kadar öteler; böylece hızlı düzenlemeler tek işte birleşir.
+    Çalışmakta olan bir iş varken gelen istek yeni bir bekleyen iş açar, yani
+    son değişiklik her zaman işlenir.
+
+    İşler gruplar (batch) halinde izlenir: bir playlist düzenlemesinin
+    tetiklediği tüm ekran işleri aynı gruba yazılır ve grup belgesindeki
+    sayaçlar ilerleme olarak okunur.
+
+    Alanlar (jobs):
+    - type: İş tipi (HANDLERS anahtarı)
+    - key: Tekilleştirme anahtarı (örn. 'screen_sync:<ekran id>')
+    - payload: İşleyiciye verilen parametreler
+    - status: pending, running, done, failed
+    - batch_ids: İşi bekleyen gruplar
+    - run_after: En erken çalışma zamanı
+    - attempts: Deneme sayısı
+    - locked_by / lease_until: İşi alan worker ve kilidin bitişi
+    - error: Son hata
+    - created_at, updated_at, finished_at
+
+    Alanlar (job_batches):
+    - type, label: İş tipi ve açıklama (örn. playlist ID)
+    - total, done, failed: İş sayıları
+    - created_at, updated_at
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    TYPE_SCREEN_SYNC = 'screen_sync'
+
+    # İş tipi -> işleyici (payload'ı anahtar kelime argümanı olarak alır)
+    HANDLERS = {
+        TYPE_SCREEN_SYNC: 'app.models.screen_playlist.ScreenPlaylist.process_sync_job',
+    }
+
+    # Bekleyen işe katılan isteklerin işi öteleme süresi
+    COALESCE_SECONDS = 2
+
+    # Çalışan işin kilidi; süresi dolan işler (worker çöktüyse) yeniden alınır
+    LEASE_SECONDS = 300
+
+    MAX_ATTEMPTS = 5
+
+    # Biten işler ve gruplar bu süreden sonra silinir
+    RETENTION_DAYS = 7
+
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'jobs': [
+            IndexModel([('key', 1)], name='key_pending_unique', unique=True,
+                       partialFilterExpression={'status': STATUS_PENDING}),
+            IndexModel([('status', 1), ('run_after', 1)], name='status_run_after'),
+            IndexModel([('status', 1), ('lease_until', 1)], name='status_lease'),
+            IndexModel([('finished_at', 1)], name='finished_at_ttl',
+                       expireAfterSeconds=RETENTION_DAYS * 86400),
+        ],
+        'job_batches': [
+            IndexModel([('created_at', 1)], name='created_at_ttl',
+                       expireAfterSeconds=RETENTION_DAYS * 86400),
+        ]
+    }
+
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'Job.claim', 'collection': 'jobs',
+         'filter': {'status': 'pending', 'run_after': {'$lte': datetime(2000, 1, 1)}},
+         'sort': [('run_after', 1)]},
+        {'name': 'Job.claim (süresi dolan)', 'collection': 'jobs',
+         'filter': {'status': 'running', 'lease_until': {'$lt': datetime(2000, 1, 1)}}},
+    ]
+
+    @staticmethod
+    def get_collection():
+        """MongoDB koleksiyonuna erişim sağlar"""
+        return mongo.db.jobs
+
+    @staticmethod
+    def get_batch_collection():
+        """İş grupları koleksiyonuna erişim sağlar"""
+        return mongo.db.job_batches
+
+    @staticmethod
+    def worker_id():
+        """Bu süreci tanımlayan worker adı"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def create_batch(cls, job_type, label=None):
+        """
+        Yeni iş grubu oluştur
+
+        Returns:
+            Grup ID (ObjectId)
+        """
+        now = datetime.utcnow()
+        return cls.get_batch_collection().insert_one({
+            'type': job_type,
+            'label': label,
+            'total': 0,
+            'done': 0,
+            'failed': 0,
+            'created_at': now,
+            'updated_at': now
+        }).inserted_id
+
+    @classmethod
+    def enqueue(cls, job_type, key, payload=None, batch_id=None, delay=None):
+        """
+        İşi kuyruğa ekle (aynı anahtarla bekleyen iş varsa ona katıl)
+
+        Args:
+            job_type: İş tipi
+            key: Tekilleştirme anahtarı
+            payload: İşleyici parametreleri
+            batch_id: İlerlemesi izlenecek grup
+            delay: Çalışma öncesi bekleme (varsayılan: COALESCE_SECONDS)
+
+        Returns:
+            Yeni iş oluşturulduysa True, bekleyen işe katıldıysa False
+        """
+        now = datetime.utcnow()
+        delay = cls.COALESCE_SECONDS if delay is None else delay
+
+        update = {
+            '$set': {
+                'payload': payload or {},
+                'run_after': now + timedelta(seconds=delay),
+                'updated_at': now
+            },
+            '$setOnInsert': {
+                'type': job_type,
+                'attempts': 0,
+                'created_at': now
+            }
+        }
+        if batch_id is not None:
+            update['$addToSet'] = {'batch_ids': batch_id}
+
+        query = {'key': key, 'status': cls.STATUS_PENDING}
+        try:
+            previous = cls.get_collection().find_one_and_update(
+                query, update, projection={'batch_ids': 1}, upsert=True
+            )
+        except DuplicateKeyError:
+            # Eşzamanlı iki upsert; kazanan belgeye katıl
+            previous = cls.get_collection().find_one_and_update(
+                query, update, projection={'batch_ids': 1}
+            )
+
+        # Grup bu işe ilk kez eklendiyse toplamı artır
+        if batch_id is not None and batch_id not in (previous or {}).get('batch_ids', []):
+            cls.get_batch_collection().update_one(
+                {'_id': batch_id},
+                {'$inc': {'total': 1}, '$set': {'updated_at': now}}
+            )
+
+        return previous is None
+
+    @classmethod
+    def claim(cls, limit, worker=None, now=None):
+        """
+        Çalışma zamanı gelmiş işleri worker için kilitle
+
+        Kilidi süresi dolmuş çalışan işler de (worker çöktüyse) yeniden alınır.
+
+        Returns:
+            Kilitlenen iş belgeleri
+        """
+        now = now or datetime.utcnow()
+        worker = worker or cls.worker_id()
+        collection = cls.get_collection()
+
+        claimed = []
+        for query in (
+            {'status': cls.STATUS_PENDING, 'run_after': {'$lte': now}},
+            {'status': cls.STATUS_RUNNING, 'lease_until': {'$lt': now}},
+        ):
+            while len(claimed) < limit:
+                job = collection.find_one_and_update(
+                    query,
+                    {
+                        '$set': {
+                            'status': cls.STATUS_RUNNING,
+                            'locked_by': worker,
+                            'lease_until': now + timedelta(seconds=cls.LEASE_SECONDS),
+                            'updated_at': now
+                        },
+                        '$inc': {'attempts': 1}
+                    },
+                    sort=[('run_after', 1)],
+                    return_document=ReturnDocument.AFTER
+                )
+                if not job:
+                    break
+                claimed.append(job)
+
+        return claimed
+
+    @classmethod
+    def complete(cls, job, result=None):
+        """İşi tamamlandı olarak işaretle ve gruplarını ilerlet"""
+        now = datetime.utcnow()
+        updated = cls.get_collection().update_one(
+            {'_id': job['_id'], 'locked_by': job.get('locked_by'), 'status': cls.STATUS_RUNNING},
+            {
+                '$set': {'status': cls.STATUS_DONE, 'result': result, 'finished_at': now, 'updated_at': now},
+                '$unset': {'lease_until': '', 'error': ''}
+            }
+        )
+        # Kilit başka bir worker'a geçtiyse grup sayaçları o worker'da ilerler
+        if updated.modified_count:
+            cls._advance_batches(job, 'done', now)
+
+    @classmethod
+    def fail(cls, job, error):
+        """
+        İş hatasını kaydet
+
+        Deneme hakkı kalan işler artan beklemeyle yeniden kuyruğa alınır; aynı
+        anahtarla yeni bir bekleyen iş açılmışsa bu deneme ona bırakılır.
+
+        Returns:
+            Yeniden denenecekse True
+        """
+        now = datetime.utcnow()
+        collection = cls.get_collection()
+        match = {'_id': job['_id'], 'locked_by': job.get('locked_by'), 'status': cls.STATUS_RUNNING}
+
+        if job.get('attempts', 0) < cls.MAX_ATTEMPTS:
+            retry_at = now + timedelta(seconds=min(30 * 2 ** (job.get('attempts', 1) - 1), 3600))
+            try:
+                result = collection.update_one(match, {
+                    '$set': {'status': cls.STATUS_PENDING, 'run_after': retry_at,
+                             'error': error, 'updated_at': now},
+                    '$unset': {'lease_until': '', 'locked_by': ''}
+                })
+                if result.modified_count:
+                    return True
+            except DuplicateKeyError:
+                # Bekleyen yeni iş bu işin yerini alır; grupları ona aktar
+                pending = collection.find_one_and_update(
+                    {'key': job['key'], 'status': cls.STATUS_PENDING},
+                    {'$addToSet': {'batch_ids': {'$each': job.get('batch_ids', [])}}}
+                )
+                if pending:
+                    collection.delete_one(match)
+                    return True
+
+        updated = collection.update_one(match, {
+            '$set': {'status': cls.STATUS_FAILED, 'error': error, 'finished_at': now, 'updated_at': now},
+            '$unset': {'lease_until': ''}
+        })
+        if updated.modified_count:
+            cls._advance_batches(job, 'failed', now)
+        return False
+
+    @classmethod
+    def _advance_batches(cls, job, counter, now):
+        """İşi bekleyen grupların sayaçlarını artır"""
+        batch_ids = job.get('batch_ids')
+        if batch_ids:
+            cls.get_batch_collection().update_many(
+                {'_id': {'$in': batch_ids}},
+                {'$inc': {counter: 1}, '$set': {'updated_at': now}}
+            )
+
+    @classmethod
+    def get_progress(cls, batch_id):
+        """
+        Grubun ilerlemesini getir
+
+        Returns:
+            {'id', 'total', 'done', 'failed', 'pending', 'finished'} veya None
+        """
+        try:
+            batch = cls.get_batch_collection().find_one({'_id': ObjectId(str(batch_id))})
+        except Exception:
+            return None
+        if not batch:
+            return None
+
+        processed = batch.get('done', 0) + batch.get('failed', 0)
+        return {
+            'id': str(batch['_id']),
+            'label': batch.get('label'),
+            'total': batch.get('total', 0),
+            'done': batch.get('done', 0),
+            'failed': batch.get('failed', 0),
+            'pending': max(batch.get('total', 0) - processed, 0),
+            'finished': processed >= batch.get('total', 0)
+        }
@@ -1,6 +1,8 @@
 import datetime
 from bson import ObjectId
+from pymongo import IndexModel
 from app import mongo
+from app.utils.pagination import paginate
 
 class Log:
     """Log model sınıfı"""
@@ -37,6 +39,28 @@ class Log:
     TYPE_MEDIA_ASSIGN_TO_USER = 'media_assign_to_user'
     TYPE_MEDIA_CREATE = 'media_create'
     
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'logs': [
+            IndexModel([('timestamp', -1), ('_id', -1)], name='timestamp_id'),
+            IndexModel([('user_id', 1), ('timestamp', -1)], name='user_timestamp'),
+            IndexModel([('action', 1), ('timestamp', -1)], name='action_timestamp'),
+            IndexModel([('details.screen_id', 1), ('timestamp', -1)], name='screen_timestamp', sparse=True),
+            IndexModel([('details.media_id', 1), ('timestamp', -1)], name='media_timestamp', sparse=True),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'Log.find_latest', 'collection': 'logs', 'filter': {}, 'sort': [('timestamp', -1), ('_id', -1)]},
+        {'name': 'Log.find_by_user_id', 'collection': 'logs',
+         'filter': {'user_id': ''}, 'sort': [('timestamp', -1)]},
+        {'name': 'Log.find_by_action', 'collection': 'logs',
+         'filter': {'action': ''}, 'sort': [('timestamp', -1)]},
+        {'name': 'Log.find_screen_logs', 'collection': 'logs',
+         'filter': {'details.screen_id': ''}, 'sort': [('timestamp', -1)]},
+    ]
+    
     def __init__(self, action, user_id=None, ip_address=None, details=None, timestamp=None):
         self.action = action
         self.user_id = user_id
@@ -72,12 +96,16 @@ class Log:
         return logs
     
     @classmethod
-    def find_latest(cls, limit=100):
-        """En son logları getir"""
-        logs = []
-        for log_data in cls.get_collection().find().sort("timestamp", -1).limit(limit):
-            logs.append(cls.from_dict(log_data))
-        return logs
+    def find_latest(cls, limit=100, cursor=None):
+        """
+        En son logları getir
+        
+        cursor: Önceki sayfanın next_cursor değeri (bkz. pagination)
+        
+        Returns:
+            Page (next_cursor ile sonraki sayfa istenebilir)
+        """
+        return paginate(cls.get_collection(), {}, "timestamp", -1, limit, cursor, factory=cls.from_dict)
     
     @classmethod
     def find_errors(cls, limit=100):
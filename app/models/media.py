@@ -4,19 +4,25 @@ Medya Modeli: Görsel ve video içeriklerini yönetir
 import os
 from datetime import datetime
 from bson.objectid import ObjectId
+from pymongo import IndexModel
 from werkzeug.utils import secure_filename
 from flask import current_app
 from app import mongo
+from app.utils import identity_map
+from app.utils.counters import counters
+from app.utils.pagination import Page, keyset_filter, keyset_sort, merge_filter, page_from, paginate
+from app.utils.projections import projection_for
+from app.utils.tracing import tracer
 import uuid
 from PIL import Image
 import mimetypes
 import urllib.parse
-from pymongo import MongoClient
-from urllib.parse import quote_plus
 
 from app.models.logs import Log
+from app.models.record import Record
+from app.models.screen_manifest import ScreenManifest
 
-class Media:
+class Media(Record):
     """
     Medya dosyası modeli (resim, video)
     
@@ -41,6 +47,15 @@ class Media:
     - created_at: Oluşturulma zamanı
     - updated_at: Güncellenme zamanı
     """
+
+    # Nesne alanları; belgedeki diğer alanlar _extra'da tutulur (bkz. Record)
+    __slots__ = (
+        'id', '_id', 'title', 'description', 'filename', 'file_type', 'file_size',
+        'file_path', 'category', 'tags', 'status', 'user_id', 'width', 'height',
+        'duration', 'display_time', 'created_at', 'updated_at', 'is_public', 'views',
+        'orientation', 'approved_by', 'approved_at'
+    )
+    _SLOT_SET = frozenset(__slots__)
     
     # Medya tipleri
     TYPE_IMAGE = 'image'
@@ -65,6 +80,53 @@ class Media:
     TYPE_MEDIA_APPROVE = 'media_approve'
     TYPE_MEDIA_REJECT = 'media_reject'
     
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'media': [
+            IndexModel([('user_id', 1), ('created_at', -1), ('_id', -1)], name='user_created_id'),
+            IndexModel([('created_at', -1), ('_id', -1)], name='created_id'),
+            IndexModel([('is_public', 1), ('status', 1), ('created_at', -1)], name='public_status_created'),
+            IndexModel([('status', 1), ('created_at', -1)], name='status_created'),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'Media.find_by_user', 'collection': 'media',
+         'filter': {'user_id': ObjectId()}, 'sort': [('created_at', -1), ('_id', -1)]},
+        {'name': 'Media.find_all', 'collection': 'media',
+         'filter': {}, 'sort': [('created_at', -1), ('_id', -1)]},
+        {'name': 'Media.find_public', 'collection': 'media',
+         'filter': {'is_public': True, 'status': 'active'}, 'sort': [('created_at', -1)]},
+        {'name': 'Media.find_pending', 'collection': 'media',
+         'filter': {'status': 'processing'}, 'sort': [('created_at', -1)]},
+    ]
+    
+    # Yazma anında $inc ile güncellenen dashboard sayaçları (bkz. counters)
+    TALLIES = {
+        'media.status': {'collection': 'media', 'group': 'status'},
+        'media.views': {'collection': 'media', 'sum': 'views'},
+    }
+    
+    # Finder'ların projection parametresiyle seçilen alan profilleri (bkz. projections)
+    PROJECTIONS = {
+        'detail': None,
+        # Liste ve dashboard kartları; açıklama, etiketler ve onay alanları hariç
+        'list': {
+            'title': 1, 'filename': 1, 'file_path': 1, 'file_type': 1, 'file_size': 1,
+            'status': 1, 'user_id': 1, 'created_at': 1, 'views': 1, 'display_time': 1,
+            'duration': 1, 'orientation': 1, 'width': 1, 'height': 1, 'is_public': 1,
+            'category': 1
+        },
+        # ScreenManifest.build'in okuduğu alanlar
+        'manifest': {
+            'title': 1, 'description': 1, 'file_type': 1, 'width': 1, 'height': 1,
+            'duration': 1, 'display_time': 1, 'filename': 1, 'orientation': 1,
+            'category': 1, 'is_public': 1, 'created_at': 1, 'status': 1
+        },
+        'stats': {'status': 1, 'user_id': 1, 'views': 1},
+    }
+    
     @classmethod
     def create(cls, data, file=None):
         """
@@ -165,6 +227,7 @@ class Media:
         # Veritabanına ekle
         result = mongo.db.media.insert_one(media)
         media['_id'] = result.inserted_id
+        counters.incr('media.status', media['status'])
         
         # Video işleme arka plan görevini başlat (ID'yi aldıktan sonra)
         if file and file.filename and media.get('file_type') == cls.TYPE_VIDEO:
@@ -182,26 +245,36 @@ class Media:
         pass
     
     @classmethod
+    @identity_map.identity_mapped('media')
     def find_by_id(cls, media_id):
         """
         ID'ye göre medya bul
         """
-        print(f"Media.find_by_id çağrıldı: {media_id}, tipi: {type(media_id)}")
-        
         if isinstance(media_id, str):
             try:
                 media_id = ObjectId(media_id)
-                print(f"String'den ObjectId'ye dönüştürüldü: {media_id}")
-            except Exception as e:
-                print(f"ObjectId dönüşüm hatası: {str(e)}")
+            except Exception:
+                tracer.event('Media.find_by_id.invalid_id', media_id=media_id)
                 return None
         
-        result = mongo.db.media.find_one({'_id': media_id})
-        print(f"Bulunan medya: {result}")
+        with tracer.span('Media.find_by_id', media_id=media_id) as span:
+            result = mongo.db.media.find_one({'_id': media_id})
+            span.set(found=result is not None)
         return result
     
     @classmethod
-    def find_by_user(cls, user_id, status=None, limit=20, skip=0, sort_by=None, sort_order=-1):
+    def prefetch(cls, media_ids):
+        """
+        Medyaları tek sorguda istek kimlik haritasına yükle
+
+        Returns:
+            {ObjectId: medya belgesi veya None}
+        """
+        return identity_map.prefetch('media', mongo.db.media, media_ids)
+    
+    @classmethod
+    def find_by_user(cls, user_id, status=None, limit=20, cursor=None, sort_by=None, sort_order=-1,
+                     projection=None, file_type=None, category=None):
         """
         Kullanıcının medyalarını getir
         
@@ -209,31 +282,20 @@ class Media:
             user_id: Kullanıcı ID
             status: Medya durumu (active, inactive, pending)
             limit: Sayfalama limiti
-            skip: Atlanacak kayıt sayısı
+            cursor: Önceki sayfanın next_cursor değeri (bkz. pagination)
+            projection: Alan profili ('list', 'manifest', 'stats'; varsayılan tüm belge)
+            file_type: Medya tipi filtresi
+            category: Kategori filtresi
             
         Returns:
-            Medya öğelerinin listesi
+            Medya öğelerinin sayfası (Page; next_cursor ile sonraki sayfa istenebilir)
         """
         try:
-            from bson import ObjectId
-            from pymongo import MongoClient
-            from urllib.parse import quote_plus
+            # Uygulamanın paylaşılan bağlantı havuzu kullanılır
+            db = mongo.db
+            fields = projection_for(cls, projection)
             
-            # MongoDB bağlantısını doğrudan oluştur - Flask-PyMongo yerine
             try:
-                mongo_user = os.environ.get('MONGO_USER', 'elektrobil_admin')
-                mongo_pass = os.environ.get('MONGO_PASS', 'Eb@2254097*')
-                mongo_host = os.environ.get('MONGO_HOST', 'localhost')
-                mongo_port = os.environ.get('MONGO_PORT', '27017')
-                mongo_db = os.environ.get('MONGO_DB', 'bulutvizyondb')
-                
-                encoded_password = quote_plus(mongo_pass)
-                
-                # MongoDB bağlantısı oluştur
-                mongo_uri = f"mongodb://{mongo_user}:{encoded_password}@{mongo_host}:{mongo_port}/{mongo_db}?authSource=admin"
-                client = MongoClient(mongo_uri)
-                db = client[mongo_db]
-            
                 # user_id string ise ObjectId'ye dönüştür
                 if isinstance(user_id, str):
                     try:
@@ -241,15 +303,21 @@ class Media:
                     except Exception as e:
                         print(f"ObjectId dönüşüm hatası: {str(e)}")
                 
-                # Kullanıcının sahip olduğu medyayı bul
-                query = {"user_id": user_id}
-                
-                # Duruma göre filtrele
+                # Sahip olunan ve paylaşılan medyaya uygulanan ortak filtre
+                filters = {}
                 if status is not None:
-                    query["status"] = status
+                    filters["status"] = status
+                if file_type:
+                    filters["file_type"] = file_type
+                if category:
+                    filters["category"] = category
+                
+                keyset = keyset_filter("created_at", cursor) if cursor else None
+                sort = keyset_sort("created_at")
                 
-                # Kullanıcının kendi medyasını bul
-                owned_media = list(db.media.find(query).sort("created_at", -1).skip(skip).limit(limit))
+                # Kullanıcının kendi medyasını bul (sonraki sayfayı anlamak için bir fazla)
+                query = merge_filter(dict(filters, user_id=user_id), keyset)
+                owned_media = list(db.media.find(query, fields).sort(sort).limit(limit + 1))
                 print(f"Kullanıcıya ait medya sayısı: {len(owned_media)}")
                 
                 # Kullanıcı ile paylaşılan medyayı bul (MediaShare tablosundan)
@@ -264,48 +332,41 @@ class Media:
                     for media_id in shared_media_ids
                 ]
                 
-                # Paylaşılan medyayı bul
+                # Paylaşılan medyayı aynı imleçten itibaren bul
                 shared_media = []
                 if shared_media_object_ids:
-                    shared_media_query = {"_id": {"$in": shared_media_object_ids}}
-                    if status is not None:
-                        shared_media_query["status"] = status
-                    
-                    shared_media = list(db.media.find(shared_media_query))
+                    shared_media_query = merge_filter(
+                        dict(filters, _id={"$in": shared_media_object_ids}), keyset
+                    )
+                    shared_media = list(db.media.find(shared_media_query, fields).sort(sort).limit(limit + 1))
                     print(f"Paylaşılan medya sayısı: {len(shared_media)}")
                 
                 # Sonuçları birleştir (aynı medya hem sahip hem de paylaşılan olabilir)
-                all_media = owned_media + shared_media
-                
-                # Aynı ID'ye sahip medya öğelerini kaldır
-                seen_ids = set()
-                unique_media = []
-                
-                for media in all_media:
-                    if str(media["_id"]) not in seen_ids:
-                        seen_ids.add(str(media["_id"]))
-                        # Sınıf örneği oluştur
-                        unique_media.append(cls(**media))
-                
-                # Oluşturulma tarihine göre sırala
-                unique_media.sort(key=lambda x: getattr(x, 'created_at', datetime.min), reverse=True)
+                unique_media = {media["_id"]: media for media in owned_media + shared_media}
                 
-                # Limit uygula
-                return unique_media[:limit]
+                # (created_at, _id) anahtarına göre sırala ve sayfayı kes
+                merged = sorted(
+                    unique_media.values(),
+                    key=lambda media: (media.get("created_at") or datetime.min, media["_id"]),
+                    reverse=True
+                )
+                return page_from(merged, "created_at", limit, lambda media: cls(**media))
             except Exception as e:
                 print(f"MongoDB işlemleri hatası: {str(e)}")
-                return []
+                return Page()
                 
         except Exception as e:
             import traceback
             print(f"Medyalar getirilemedi: {str(e)}")
             print(traceback.format_exc())
-            return []
+            return Page()
     
     @classmethod
-    def find_public(cls, limit=100, skip=0, category=None, search=None):
+    def find_public(cls, limit=100, skip=0, category=None, search=None, projection=None):
         """
         Herkese açık medyaları bul
+        
+        projection: Alan profili ('list', 'manifest', 'stats'; varsayılan tüm belge)
         """
         query = {'is_public': True, 'status': cls.STATUS_ACTIVE}
         
@@ -319,22 +380,32 @@ class Media:
                 {'tags': {'$in': [search]}}
             ]
         
-        return list(mongo.db.media.find(query).sort('created_at', -1).skip(skip).limit(limit))
+        cursor = mongo.db.media.find(query, projection_for(cls, projection))
+        return list(cursor.sort('created_at', -1).skip(skip).limit(limit))
     
     @classmethod
-    def find_all(cls, limit=100, skip=0, sort_by='created_at', sort_dir=-1):
+    def find_all(cls, limit=100, cursor=None, sort_by='created_at', sort_dir=-1, projection=None):
         """
         Tüm medyaları getir
+        
+        cursor: Önceki sayfanın next_cursor değeri (bkz. pagination)
+        projection: Alan profili ('list', 'manifest', 'stats'; varsayılan tüm belge)
+        
+        Returns:
+            Page (next_cursor ile sonraki sayfa istenebilir)
         """
-        return list(mongo.db.media.find().sort(sort_by, sort_dir).skip(skip).limit(limit))
+        return paginate(mongo.db.media, {}, sort_by, sort_dir, limit, cursor, projection_for(cls, projection))
     
     @classmethod
-    def find_pending(cls, limit=100, skip=0):
+    def find_pending(cls, limit=100, skip=0, projection=None):
         """
         Onay bekleyen medyaları getir
+        
+        projection: Alan profili ('list', 'manifest', 'stats'; varsayılan tüm belge)
         """
         query = {'status': cls.STATUS_PROCESSING}
-        return list(mongo.db.media.find(query).sort('created_at', -1).skip(skip).limit(limit))
+        cursor = mongo.db.media.find(query, projection_for(cls, projection))
+        return list(cursor.sort('created_at', -1).skip(skip).limit(limit))
     
     @classmethod
     def update(cls, media_id, data=None, **kwargs):
@@ -362,6 +433,7 @@ class Media:
             except:
                 return False
         
+        identity_map.discard('media', media_id)
         update_data = {
             'updated_at': datetime.utcnow()
         }
@@ -382,15 +454,40 @@ class Media:
                 if field in kwargs:
                     update_data[field] = kwargs[field]
         
-        result = mongo.db.media.update_one(
+        modified = cls._apply_update(media_id, update_data)
+        
+        # Bu medyayı kullanan player manifestlerini geçersiz işaretle
+        if modified:
+            ScreenManifest.invalidate_media(media_id)
+        
+        return modified
+    
+    @classmethod
+    def _apply_update(cls, media_id, update_data):
+        """
+        $set güncellemesini uygula, durum değiştiyse durum sayacını taşı
+        
+        Returns:
+            Belge bulunup güncellendiyse True
+        """
+        if 'status' not in update_data:
+            result = mongo.db.media.update_one({'_id': media_id}, {'$set': update_data})
+            return result.modified_count > 0
+        
+        # Eski durum sayaç için güncellemeyle aynı işlemde okunur
+        previous = mongo.db.media.find_one_and_update(
             {'_id': media_id},
-            {'$set': update_data}
+            {'$set': update_data},
+            projection={'status': 1}
         )
-        
-        return result.modified_count > 0
+        if previous is None:
+            return False
+        counters.move('media.status', previous.get('status'), update_data['status'])
+        return True
     
     def _instance_update(self, **kwargs):
         """Nesne metodunun dahili implementasyonu"""
+        identity_map.discard('media', self.id)
         updates = {"updated_at": datetime.now()}
         
         # Güncellenebilir alanlar
@@ -404,10 +501,10 @@ class Media:
                 updates[field] = kwargs[field]
         
         # Veritabanını güncelle
-        mongo.db.media.update_one(
-            {"_id": ObjectId(self.id)},
-            {"$set": updates}
-        )
+        self._apply_update(ObjectId(self.id), updates)
+        
+        # Bu medyayı kullanan player manifestlerini geçersiz işaretle
+        ScreenManifest.invalidate_media(self.id)
         
         # Nesne bilgilerini güncelle
         for key, value in updates.items():
@@ -468,43 +565,6 @@ class Media:
             
         return mongo.db.media.count_documents(query)
     
-    @classmethod
-    def increment_views(cls, media_ids):
-        """
-        Birden çok medyanın görüntülenme sayısını artırır.
-        Bu metot, bulk operasyon kullanarak veritabanında toplu güncelleme yapar.
-        
-        Args:
-            media_ids: Medya ID'lerinin listesi (str veya ObjectId)
-            
-        Returns:
-            Güncellenen medya sayısı
-        """
-        if not media_ids:
-            return 0
-            
-        # String ID'leri ObjectId'ye dönüştür
-        object_ids = []
-        for media_id in media_ids:
-            if isinstance(media_id, str):
-                try:
-                    object_ids.append(ObjectId(media_id))
-                except:
-                    pass  # Geçersiz ID'leri atla
-            elif isinstance(media_id, ObjectId):
-                object_ids.append(media_id)
-        
-        if not object_ids:
-            return 0
-            
-        # Toplu güncelleme - $inc operatörü ile views alanını 1 artır
-        result = mongo.db.media.update_many(
-            {'_id': {'$in': object_ids}},
-            {'$inc': {'views': 1}}
-        )
-        
-        return result.modified_count
-    
     def __init__(self, **kwargs):
         """
         Medya nesnesi oluştur
@@ -530,11 +590,12 @@ class Media:
         self.is_public = kwargs.get('is_public', False)
         self.views = kwargs.get('views', 0)
         self.orientation = kwargs.get('orientation', 'horizontal')
+        self.approved_by = kwargs.get('approved_by')
+        self.approved_at = kwargs.get('approved_at')
         
-        # Dictionary'den alınan tüm değerleri üyelere ayarla
-        for key, value in kwargs.items():
-            if not hasattr(self, key):
-                setattr(self, key, value)
+        # Diğer alanlar erişildiğinde _extra'dan okunur
+        extra_keys = kwargs.keys() - self._SLOT_SET
+        self._extra = {key: kwargs[key] for key in extra_keys} if extra_keys else None
     
     def increment_view(self):
         """Görüntülenme sayısını artır"""
@@ -542,6 +603,7 @@ class Media:
             {"_id": ObjectId(self.id)}, 
             {"$inc": {"views": 1}}
         )
+        counters.incr('media.views')
         self.views += 1
         return self.views
     
@@ -589,46 +651,37 @@ class Media:
         Returns:
             Başarılıysa True, değilse False
         """
-        print(f"DEBUG: Media.delete çağrıldı. media_id: {media_id}, tipi: {type(media_id)}")
-        
         if isinstance(media_id, str):
             try:
                 media_id = ObjectId(media_id)
-                print(f"DEBUG: media_id ObjectId'ye dönüştürüldü: {media_id}")
-            except Exception as e:
-                print(f"DEBUG: ObjectId dönüşüm hatası: {str(e)}")
+            except Exception:
+                tracer.event('Media.delete.invalid_id', media_id=media_id)
                 return False
         
         # Medya bilgilerini al
         media = cls.find_by_id(media_id)
         if not media:
-            print(f"DEBUG: Silinecek medya bulunamadı: {media_id}")
             return False
         
-        print(f"DEBUG: Silinecek medya bulundu: {media.get('_id')}, durum: {media.get('status')}")
-        
         # MediaShare koleksiyonundan paylaşımları temizle
         try:
             MediaShare.delete_medias_from_shares(media_id)
-            print(f"DEBUG: MediaShare kayıtları temizlendi")
         except Exception as e:
-            print(f"DEBUG: MediaShare temizleme hatası: {str(e)}")
+            print(f"MediaShare temizleme hatası: {str(e)}")
         
         # Playlist-Media ilişkilerini temizle
         try:
             from app.models.playlist_media import PlaylistMedia
-            deleted_count = PlaylistMedia.remove_media_from_all_playlists(media_id)
-            print(f"DEBUG: PlaylistMedia kayıtları temizlendi, silinen ilişki sayısı: {deleted_count}")
+            PlaylistMedia.remove_media_from_all_playlists(media_id)
         except Exception as e:
-            print(f"DEBUG: PlaylistMedia temizleme hatası: {str(e)}")
+            print(f"PlaylistMedia temizleme hatası: {str(e)}")
         
         # Ekran içeriklerini temizle
         try:
             from app.models.screen_content import ScreenContent
-            deleted_count = ScreenContent.delete_by_media_id(media_id)
-            print(f"DEBUG: ScreenContent kayıtları temizlendi, silinen içerik sayısı: {deleted_count}")
+            ScreenContent.delete_by_media_id(media_id)
         except Exception as e:
-            print(f"DEBUG: ScreenContent temizleme hatası: {str(e)}")
+            print(f"ScreenContent temizleme hatası: {str(e)}")
         
         # Dosyayı diskten sil
         try:
@@ -646,27 +699,29 @@ class Media:
                 file_deleted = False
                 for file_path in possible_paths:
                     if file_path and os.path.exists(file_path):
-                        print(f"DEBUG: Dosya bulundu ve siliniyor: {file_path}")
                         os.remove(file_path)
-                        print(f"DEBUG: Dosya diskten silindi: {file_path}")
                         file_deleted = True
                         break
                 
                 if not file_deleted:
-                    print(f"DEBUG: Hiçbir konumda dosya bulunamadı. Denenen yollar: {possible_paths}")
-            else:
-                print(f"DEBUG: Dosya adı bulunamadı")
+                    tracer.event('Media.delete.file_missing', media_id=media_id, paths=possible_paths)
         except Exception as e:
-            print(f"DEBUG: Dosya silme hatası: {str(e)}")
+            print(f"Dosya silme hatası: {str(e)}")
         
         # Veritabanından sil
         try:
-            result = mongo.db.media.delete_one({'_id': media_id})
-            deleted_count = result.deleted_count
-            print(f"DEBUG: Veritabanından silme sonucu: {deleted_count} kayıt silindi")
+            with tracer.span('Media.delete', media_id=media_id) as span:
+                result = mongo.db.media.delete_one({'_id': media_id})
+                deleted_count = result.deleted_count
+                span.set(deleted=deleted_count)
+            if deleted_count:
+                # Silme başarılı olduktan sonra istekteki kopya da düşürülür
+                identity_map.discard('media', media_id)
+                counters.incr('media.status', media.get('status'), -1)
+                counters.incr('media.views', amount=-(media.get('views') or 0))
             return deleted_count > 0
         except Exception as e:
-            print(f"DEBUG: Veritabanı silme hatası: {str(e)}")
+            print(f"Veritabanı silme hatası: {str(e)}")
             return False
 
 # Medya paylaşımları için yeni bir koleksiyon oluşturalım
@@ -676,6 +731,22 @@ class MediaShare:
     Bu sınıf, hangi medya öğesinin hangi kullanıcıya atandığını izler.
     """
     
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'media_shares': [
+            IndexModel([('user_id', 1)], name='user'),
+            IndexModel([('media_id', 1), ('user_id', 1)], name='media_user'),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'MediaShare.find_by_user', 'collection': 'media_shares',
+         'filter': {'user_id': ObjectId()}},
+        {'name': 'MediaShare.find_by_media', 'collection': 'media_shares',
+         'filter': {'media_id': ObjectId()}},
+    ]
+    
     @classmethod
     def create(cls, media_id, user_id, assigned_by=None):
         """
@@ -0,0 +1,294 @@
+"""
+Oynatma İstatistikleri Modeli: Player'ların bildirdiği gerçek oynatmaları saatlik sayaçlar halinde tutar
+"""
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import IndexModel, UpdateOne
+from app import mongo
+from app.utils.counters import counters
+
+class PlayStat:
+    """
+    Oynatma istatistikleri (proof-of-play) modeli
+
+    Her belge bir medyanın bir ekranda belirli bir saat içindeki oynatma sayacıdır.
+    Player'lar oynatma olaylarını toplu gönderir; olaylar önce bellekte
+    (medya, saat) bazında toplanır, ardından tek bir bulk_write ile $inc upsert
+    olarak yazılır. Böylece olay sayısından bağımsız olarak her istek en fazla
+    (medya x saat) kadar güncelleme üretir.
+
+    Alanlar:
+    - media_id: Medya ID (ObjectId)
+    - screen_id: Ekran ID (ObjectId)
+    - hour: Saat başlangıcı (dakika ve saniyeler sıfırlanmış)
+    - plays: O saat içindeki oynatma sayısı
+    - duration: O saat içindeki toplam oynatma süresi (saniye)
+    """
+
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'play_stats': [
+            IndexModel([('media_id', 1), ('screen_id', 1), ('hour', 1)], name='media_screen_hour_unique', unique=True),
+            IndexModel([('screen_id', 1), ('hour', 1)], name='screen_hour'),
+        ]
+    }
+
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'PlayStat.get_hourly (media)', 'collection': 'play_stats',
+         'filter': {'media_id': ObjectId()}, 'sort': [('hour', 1)]},
+        {'name': 'PlayStat.get_hourly (screen)', 'collection': 'play_stats',
+         'filter': {'screen_id': ObjectId()}, 'sort': [('hour', 1)]},
+    ]
+
+    @staticmethod
+    def get_collection():
+        """MongoDB koleksiyonuna erişim sağlar"""
+        return mongo.db.play_stats
+
+    @staticmethod
+    def _hour_bucket(timestamp):
+        """Zaman damgasını ait olduğu saatin başına yuvarla"""
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _parse_timestamp(value):
+        """
+        Player'dan gelen zaman değerini datetime'a çevir
+
+        ISO 8601 metin veya epoch (saniye ya da milisaniye) kabul edilir.
+        Çevrilemeyen değerler için None döner.
+        """
+        if isinstance(value, (int, float)):
+            # JavaScript Date.now() milisaniye döndürür
+            if value > 1e11:
+                value = value / 1000.0
+            try:
+                return datetime.utcfromtimestamp(value)
+            except (OverflowError, OSError, ValueError):
+                return None
+
+        if isinstance(value, str):
+            try:
+                parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return None
+            if parsed.tzinfo:
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            return parsed
+
+        return None
+
+    @staticmethod
+    def _visible_media_ids(screen_id, media_ids):
+        """
+        Medyalardan ekranın sahibine görünür olanları döndür
+
+        Mevcut olup ekran sahibine ait, herkese açık veya sahibiyle paylaşılmış
+        medyalar kabul edilir. Ekran bulunamazsa boş küme döner.
+        """
+        if not media_ids:
+            return set()
+
+        screen = mongo.db.screens.find_one({'_id': screen_id}, {'user_id': 1})
+        if not screen or not screen.get('user_id'):
+            return set()
+
+        # user_id eski kayıtlarda metin, yenilerde ObjectId olabilir
+        owner = str(screen['user_id'])
+        owner_ids = [owner]
+        if ObjectId.is_valid(owner):
+            owner_ids.append(ObjectId(owner))
+
+        media_ids = list(media_ids)
+        visible = {
+            media['_id']
+            for media in mongo.db.media.find(
+                {'_id': {'$in': media_ids},
+                 '$or': [{'user_id': {'$in': owner_ids}}, {'is_public': True}]},
+                {'_id': 1}
+            )
+        }
+
+        remaining = [media_id for media_id in media_ids if media_id not in visible]
+        if remaining:
+            shared = {
+                share['media_id']
+                for share in mongo.db.media_shares.find(
+                    {'media_id': {'$in': remaining}, 'user_id': {'$in': owner_ids}},
+                    {'media_id': 1}
+                )
+            }
+            if shared:
+                visible.update(
+                    media['_id']
+                    for media in mongo.db.media.find({'_id': {'$in': list(shared)}}, {'_id': 1})
+                )
+
+        return visible
+
+    @classmethod
+    def record_batch(cls, screen_id, events, allowed_media_ids=None, max_age_hours=72):
+        """
+        Bir ekranın oynatma olaylarını saatlik sayaçlara işle
+
+        Player çevrimdışıyken biriktirdiği olayları max_age_hours içinde
+        gönderebilir; bu sürede ekranın manifesti değişmiş olabilir. Bu yüzden
+        allowed_media_ids dışındaki medyalar reddedilmez, mevcut ve ekran
+        sahibine görünür olup olmadıklarına tek sorguyla bakılır
+        (bkz. _visible_media_ids).
+
+        Args:
+            screen_id: Ekran ID (ObjectId)
+            events: [{'media_id': str, 'played_at': ISO/epoch, 'duration': saniye}, ...]
+            allowed_media_ids: Doğrudan kabul edilen medyalar (ekranın manifesti);
+                None ise medya kontrolü yapılmaz
+            max_age_hours: Bu süreden eski veya gelecekteki olaylar yok sayılır
+
+        Returns:
+            (kabul edilen olay sayısı, reddedilen olay sayısı)
+        """
+        now = datetime.utcnow()
+        oldest = now - timedelta(hours=max_age_hours)
+        newest = now + timedelta(minutes=5)
+
+        # Önce olaylar ayrıştırılır: [(medya, zaman, süre), ...]
+        parsed = []
+        rejected = 0
+
+        for event in events:
+            if not isinstance(event, dict):
+                rejected += 1
+                continue
+
+            try:
+                media_obj_id = ObjectId(str(event.get('media_id', '')))
+            except Exception:
+                rejected += 1
+                continue
+
+            played_at = cls._parse_timestamp(event.get('played_at')) or now
+            if played_at < oldest or played_at > newest:
+                rejected += 1
+                continue
+
+            try:
+                duration = max(float(event.get('duration') or 0), 0.0)
+            except (TypeError, ValueError):
+                duration = 0.0
+
+            parsed.append((media_obj_id, played_at, duration))
+
+        allowed = None
+        if allowed_media_ids is not None:
+            allowed = {ObjectId(str(media_id)) for media_id in allowed_media_ids if ObjectId.is_valid(str(media_id))}
+            unknown = {media_obj_id for media_obj_id, _, _ in parsed} - allowed
+            allowed |= cls._visible_media_ids(screen_id, unknown)
+
+        # (medya, saat) -> [oynatma, süre]
+        buckets = {}
+        media_plays = {}
+        accepted = 0
+
+        for media_obj_id, played_at, duration in parsed:
+            if allowed is not None and media_obj_id not in allowed:
+                rejected += 1
+                continue
+
+            key = (media_obj_id, cls._hour_bucket(played_at))
+            bucket = buckets.setdefault(key, [0, 0.0])
+            bucket[0] += 1
+            bucket[1] += duration
+
+            media_plays[media_obj_id] = media_plays.get(media_obj_id, 0) + 1
+            accepted += 1
+
+        if not buckets:
+            return accepted, rejected
+
+        operations = [
+            UpdateOne(
+                {'media_id': media_obj_id, 'screen_id': screen_id, 'hour': hour},
+                {'$inc': {'plays': plays, 'duration': duration}},
+                upsert=True
+            )
+            for (media_obj_id, hour), (plays, duration) in buckets.items()
+        ]
+        cls.get_collection().bulk_write(operations, ordered=False)
+
+        # Medya listelerinde gösterilen toplam görüntülenme sayısı da oynatmalardan beslenir
+        mongo.db.media.bulk_write([
+            UpdateOne({'_id': media_obj_id}, {'$inc': {'views': plays}})
+            for media_obj_id, plays in media_plays.items()
+        ], ordered=False)
+        counters.incr('media.views', amount=sum(media_plays.values()))
+
+        return accepted, rejected
+
+    @classmethod
+    def get_hourly(cls, media_id=None, screen_id=None, start=None, end=None):
+        """
+        Saatlik oynatma sayaçlarını getir
+
+        Args:
+            media_id: Sadece bu medyanın sayaçları (opsiyonel)
+            screen_id: Sadece bu ekranın sayaçları (opsiyonel)
+            start: Başlangıç saati (dahil)
+            end: Bitiş saati (hariç)
+
+        Returns:
+            Saate göre sıralı sayaç belgeleri listesi
+        """
+        query = {}
+        if media_id:
+            query['media_id'] = ObjectId(str(media_id))
+        if screen_id:
+            query['screen_id'] = ObjectId(str(screen_id))
+        if start or end:
+            query['hour'] = {}
+            if start:
+                query['hour']['$gte'] = start
+            if end:
+                query['hour']['$lt'] = end
+
+        return list(cls.get_collection().find(query).sort('hour', 1))
+
+    @classmethod
+    def get_totals_by_media(cls, media_ids, start=None, end=None):
+        """
+        Medyaların toplam oynatma sayısı ve süresini getir
+
+        Returns:
+            {media_id (str): {'plays': int, 'duration': float}}
+        """
+        object_ids = []
+        for media_id in media_ids:
+            try:
+                object_ids.append(ObjectId(str(media_id)))
+            except Exception:
+                continue
+
+        if not object_ids:
+            return {}
+
+        match = {'media_id': {'$in': object_ids}}
+        if start or end:
+            match['hour'] = {}
+            if start:
+                match['hour']['$gte'] = start
+            if end:
+                match['hour']['$lt'] = end
+
+        pipeline = [
+            {'$match': match},
+            {'$group': {
+                '_id': '$media_id',
+                'plays': {'$sum': '$plays'},
+                'duration': {'$sum': '$duration'}
+            }}
+        ]
+
+        return {
+            str(row['_id']): {'plays': row['plays'], 'duration': row['duration']}
+            for row in cls.get_collection().aggregate(pipeline)
+        }
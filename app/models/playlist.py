@@ -3,9 +3,15 @@ Playlist Modeli: Kullanıcıların ekranlara atamak için hazırladığı medya
 """
 from datetime import datetime
 from bson.objectid import ObjectId
+from pymongo import IndexModel, UpdateOne
 from app import mongo
+from app.models.record import Record
+from app.utils import identity_map
+from app.utils.ids import to_object_id
+from app.utils.pagination import paginate
+from app.utils.projections import projection_for
 
-class Playlist:
+class Playlist(Record):
     """
     Playlist modeli
     
@@ -18,13 +24,52 @@ class Playlist:
     - status: Durum (active, inactive)
     - created_at: Oluşturulma zamanı
     - updated_at: Güncellenme zamanı
-    - media_count: Playlist içindeki medya sayısı (otomatik hesaplanır)
+    - media_count: Playlist içindeki medya sayısı (PlaylistMedia işlemlerinde $inc ile tutulur)
+    - content_version: Playlist öğeleri her değiştiğinde artan sürüm (bkz. PlaylistMedia)
+    - order_seq: Sona eklenen öğelerin sıra sayacı (bkz. ranking.next_rank)
     """
+
+    # Nesne alanları; belgedeki diğer alanlar _extra'da tutulur (bkz. Record)
+    __slots__ = (
+        'id', 'name', 'description', 'user_id', 'is_public', 'status', 'created_at',
+        'updated_at', 'media_count',
+        # Admin sayfalarında route'ların eklediği alanlar
+        'user_name', 'screen_count'
+    )
     
     # Statü değerleri
     STATUS_ACTIVE = 'active'
     STATUS_INACTIVE = 'inactive'
     
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'playlists': [
+            IndexModel([('user_id', 1), ('created_at', -1)], name='user_created'),
+            IndexModel([('created_at', -1), ('_id', -1)], name='created_id'),
+            IndexModel([('is_public', 1), ('status', 1), ('created_at', -1)], name='public_status_created'),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'Playlist.find_by_user', 'collection': 'playlists',
+         'filter': {'user_id': ''}, 'sort': [('created_at', -1)]},
+        {'name': 'Playlist.find_public', 'collection': 'playlists',
+         'filter': {'is_public': True, 'status': 'active'}, 'sort': [('created_at', -1)]},
+        {'name': 'Playlist.find_all', 'collection': 'playlists',
+         'filter': {}, 'sort': [('created_at', -1), ('_id', -1)]},
+    ]
+    
+    # Finder'ların projection parametresiyle seçilen alan profilleri (bkz. projections)
+    PROJECTIONS = {
+        'detail': None,
+        'list': {
+            'name': 1, 'user_id': 1, 'is_public': 1, 'status': 1, 'media_count': 1,
+            'created_at': 1, 'updated_at': 1
+        },
+        'option': {'name': 1, 'user_id': 1, 'status': 1},
+    }
+    
     @classmethod
     def create(cls, data):
         """
@@ -48,6 +93,7 @@ class Playlist:
         return playlist
     
     @classmethod
+    @identity_map.identity_mapped('playlists')
     def find_by_id(cls, playlist_id):
         """
         ID'ye göre playlist bul
@@ -66,9 +112,21 @@ class Playlist:
         return cls(**playlist_data)
     
     @classmethod
-    def find_by_user(cls, user_id, status=None, limit=100, skip=0):
+    def prefetch(cls, playlist_ids):
+        """
+        Playlistleri tek sorguda istek kimlik haritasına yükle
+
+        Returns:
+            {ObjectId: Playlist veya None}
+        """
+        return identity_map.prefetch('playlists', mongo.db.playlists, playlist_ids, lambda data: cls(**data))
+    
+    @classmethod
+    def find_by_user(cls, user_id, status=None, limit=100, skip=0, projection=None):
         """
         Kullanıcı ID'sine göre playlistleri bul
+        
+        projection: Alan profili ('list', 'option'; varsayılan tüm belge)
         """
         query = {'user_id': user_id}
         
@@ -76,67 +134,48 @@ class Playlist:
             query['status'] = status
             
         playlist_list = []
-        for playlist_data in mongo.db.playlists.find(query).sort('created_at', -1).skip(skip).limit(limit):
+        for playlist_data in mongo.db.playlists.find(query, projection_for(cls, projection)).sort('created_at', -1).skip(skip).limit(limit):
             playlist_list.append(cls(**playlist_data))
             
         return playlist_list
     
     @classmethod
-    def find_public(cls, limit=100, skip=0):
+    def find_public(cls, limit=100, skip=0, projection=None):
         """
         Herkese açık playlistleri bul
+        
+        projection: Alan profili ('list', 'option'; varsayılan tüm belge)
         """
         query = {'is_public': True, 'status': cls.STATUS_ACTIVE}
         
         playlist_list = []
-        for playlist_data in mongo.db.playlists.find(query).sort('created_at', -1).skip(skip).limit(limit):
+        for playlist_data in mongo.db.playlists.find(query, projection_for(cls, projection)).sort('created_at', -1).skip(skip).limit(limit):
             playlist_list.append(cls(**playlist_data))
             
         return playlist_list
     
     @classmethod
-    def find_all(cls, limit=100, skip=0):
+    def find_all(cls, limit=100, cursor=None, projection=None):
         """
         Tüm playlistleri bul
-        """
-        playlist_list = []
-        for playlist_data in mongo.db.playlists.find().sort('created_at', -1).skip(skip).limit(limit):
-            playlist_list.append(cls(**playlist_data))
-            
-        return playlist_list
-    
-    @classmethod
-    def update(cls, playlist_id, data):
-        """
-        Playlist güncelle
-        """
-        if isinstance(playlist_id, str):
-            try:
-                playlist_id = ObjectId(playlist_id)
-            except:
-                return False
-                
-        update_data = {
-            'updated_at': datetime.utcnow()
-        }
         
-        # Güncellenebilir alanlar
-        for field in ['name', 'description', 'is_public', 'status']:
-            if field in data:
-                update_data[field] = data[field]
-                
-        result = mongo.db.playlists.update_one(
-            {'_id': playlist_id},
-            {'$set': update_data}
-        )
+        cursor: Önceki sayfanın next_cursor değeri (bkz. pagination)
+        projection: Alan profili ('list', 'option'; varsayılan tüm belge)
         
-        return result.modified_count > 0
+        Returns:
+            Page (next_cursor ile sonraki sayfa istenebilir)
+        """
+        return paginate(
+            mongo.db.playlists, {}, 'created_at', -1, limit, cursor,
+            projection_for(cls, projection), lambda data: cls(**data)
+        )
     
     @classmethod
     def delete(cls, playlist_id):
         """
         Playlist sil
         """
+        identity_map.discard('playlists', playlist_id)
         if isinstance(playlist_id, str):
             try:
                 playlist_id = ObjectId(playlist_id)
@@ -149,6 +188,10 @@ class Playlist:
         # Playlist'i sil
         result = mongo.db.playlists.delete_one({'_id': playlist_id})
         
+        # Playlist'e bağlı ekranların manifestlerini geçersiz işaretle
+        from app.models.screen_manifest import ScreenManifest
+        ScreenManifest.invalidate_playlist(playlist_id)
+        
         return result.deleted_count > 0
     
     @classmethod
@@ -164,102 +207,59 @@ class Playlist:
         return mongo.db.playlists.count_documents(query)
     
     @classmethod
-    def update_media_count(cls, playlist_id):
-        """
-        Playlist içindeki medya sayısını güncelle ve güncel sayıyı döndür
+    def reconcile_media_counts(cls, dry_run=False):
         """
-        import traceback
-        from datetime import datetime
-        print(f"DEBUG - update_media_count başladı: playlist_id={playlist_id}")
+        media_count alanlarını playlist_media üzerinden doğrula ve kaymaları düzelt
         
-        try:
-            # ID'yi doğru formata dönüştür
-            if isinstance(playlist_id, str):
-                try:
-                    obj_id = ObjectId(playlist_id)
-                except:
-                    obj_id = playlist_id
-            else:
-                obj_id = playlist_id
-            
-            # Playlist medyalarını say (hem string hem ObjectId formatını kontrol et)
-            # Tek sorguda ve daha basit bir $or operatörü ile gerçekleştir
-            count = mongo.db.playlist_media.count_documents({
-                "$or": [
-                    {"playlist_id": obj_id},
-                    {"playlist_id": str(obj_id)}
-                ]
-            })
-            
-            print(f"DEBUG - Bulunan playlist medya sayısı: {count}")
-            
-            # Playlist'i güncelle - ObjectId dönüşüm hataları için try-except içinde
-            try:
-                update_id = obj_id if obj_id else playlist_id
-                result = mongo.db.playlists.update_one(
-                    {"_id": update_id},
-                    {"$set": {"media_count": count, "updated_at": datetime.utcnow()}}
-                )
-                modified = result.modified_count
-            except Exception as e:
-                # ID formatı problemi olabilir, string olarak dene
-                try:
-                    result = mongo.db.playlists.update_one(
-                        {"_id": ObjectId(str(update_id))},
-                        {"$set": {"media_count": count, "updated_at": datetime.utcnow()}}
-                    )
-                    modified = result.modified_count
-                except:
-                    modified = 0
-            
-            print(f"DEBUG - Güncelleme sonucu: {modified} belge etkilendi.")
-            return count
-        except Exception as e:
-            print(f"DEBUG - media_count güncelleme hatası: {str(e)}")
-            print(traceback.format_exc())
-            return 0
-    
-    @classmethod
-    def update_all_media_counts(cls):
-        """
-        Tüm playlistlerin medya sayılarını günceller
+        media_count, PlaylistMedia işlemlerinde $inc ile artımlı tutulur; satır
+        yazımı ile sayaç güncellemesi ayrı yazımlar olduğundan araya giren bir
+        hata kaymaya yol açabilir. Gerçek sayılar tek bir $group ile hesaplanır
+        ve yalnızca farklı olan playlistler tek bir bulk_write ile düzeltilir.
         
+        Args:
+            dry_run: True ise veritabanı değiştirilmez, yalnızca farklar döner
+            
         Returns:
-            dict: Güncellenen playlist sayısı ve toplam medya sayısı
+            dict: {'checked', 'total_media', 'corrections': [{'id', 'name', 'old', 'new'}, ...]}
         """
-        import traceback
+        actual = {
+            row['_id']: row['n']
+            for row in mongo.db.playlist_media.aggregate([
+                {'$group': {'_id': '$playlist_id', 'n': {'$sum': 1}}}
+            ])
+        }
         
-        print("Tüm playlistlerin medya sayıları güncelleniyor...")
-        updated_count = 0
-        total_media = 0
+        checked = 0
+        corrections = []
+        for playlist in mongo.db.playlists.find({}, {'name': 1, 'media_count': 1}):
+            checked += 1
+            count = actual.get(playlist['_id'], 0)
+            if playlist.get('media_count') != count:
+                corrections.append({
+                    'id': playlist['_id'],
+                    'name': playlist.get('name', str(playlist['_id'])),
+                    'old': playlist.get('media_count'),
+                    'new': count
+                })
         
-        try:
-            # Tüm playlistleri getir
-            all_playlists = list(mongo.db.playlists.find())
-            print(f"Toplam {len(all_playlists)} playlist bulundu")
-            
-            # Her bir playlist için medya sayısını güncelle
-            for playlist in all_playlists:
-                playlist_id = playlist['_id']
-                
-                # Medya sayısını hesapla
-                old_count = playlist.get('media_count', 0)
-                new_count = cls.update_media_count(playlist_id)
-                
-                if old_count != new_count:
-                    updated_count += 1
-                    print(f"Playlist {playlist.get('name')} ({playlist_id}): {old_count} -> {new_count}")
-                
-                total_media += new_count
-        
-        except Exception as e:
-            print(f"Playlist medya sayıları güncellenirken hata: {str(e)}")
-            print(traceback.format_exc())
+        if corrections and not dry_run:
+            # Okumadan sonra $inc almış playlistler ezilmez (filtre eşleşmez);
+            # kalan kayma bir sonraki çalıştırmada düzeltilir. old None ise
+            # {'media_count': None} alanı olmayan belgeyle de eşleşir
+            mongo.db.playlists.bulk_write([
+                UpdateOne(
+                    {'_id': item['id'], 'media_count': item['old']},
+                    {'$set': {'media_count': item['new']}}
+                )
+                for item in corrections
+            ], ordered=False)
+            for item in corrections:
+                identity_map.discard('playlists', item['id'])
         
-        print(f"Toplam {updated_count} playlist güncellendi. Toplam {total_media} medya içeriği.")
         return {
-            'updated_playlist_count': updated_count,
-            'total_media_count': total_media
+            'checked': checked,
+            'total_media': sum(actual.values()),
+            'corrections': corrections
         }
     
     def __init__(self, _id, name, user_id, description=None, is_public=False, 
@@ -274,9 +274,11 @@ class Playlist:
         self.created_at = created_at
         self.updated_at = updated_at
         self.media_count = media_count
+        self._extra = kwargs or None
     
     def update(self, **kwargs):
         """Playlist bilgilerini güncelle"""
+        identity_map.discard('playlists', self.id)
         updates = {"updated_at": datetime.utcnow()}
         
         # Güncellenebilir alanlar
@@ -302,17 +304,13 @@ class Playlist:
         """Playlist'e medya ekle"""
         from app.models.playlist_media import PlaylistMedia
         
-        if order is None:
-            # Mevcut son sıraya ekle
-            existing_count = PlaylistMedia.count_by_playlist(self.id)
-            order = existing_count
-            
-        return PlaylistMedia.create({
-            'playlist_id': self.id,
-            'media_id': media_id,
-            'order': order,
-            'display_time': display_time
-        })
+        # Sıra verilmezse PlaylistMedia.create sona ekler
+        return PlaylistMedia.create(
+            playlist_id=self.id,
+            media_id=media_id,
+            display_time=display_time,
+            order=order
+        )
     
     def remove_media(self, media_id):
         """Playlist'ten medya kaldır"""
@@ -326,20 +324,6 @@ class Playlist:
         
         return PlaylistMedia.find_by_playlist(self.id)
     
-    def update_media_count(self):
-        """Medya sayısını güncelle"""
-        from app.models.playlist_media import PlaylistMedia
-        
-        count = PlaylistMedia.count_by_playlist(self.id)
-        
-        mongo.db.playlists.update_one(
-            {"_id": ObjectId(self.id)},
-            {"$set": {"media_count": count}}
-        )
-        
-        self.media_count = count
-        return count
-    
     def to_dict(self):
         """Playlist bilgilerini sözlük olarak döndür"""
         return {
@@ -1,44 +1,78 @@
 """
 Playlist-Medya ilişkisi modeli: Playlistlere atanmış medyaların ilişkilerini yönetir
 """
+import logging
 from datetime import datetime
 from bson.objectid import ObjectId
+from pymongo import IndexModel
 from app import mongo
+from app.utils import ranking
+from app.utils.cache import TTLCache
+from app.utils.ids import to_object_id, to_object_ids
+from app.utils.projections import projection_for
+from app.utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# (playlist ID, içerik sürümü) -> sıralı playlist öğeleri (worker başına)
+# Sürüm anahtarın parçası olduğu için değişen playlist'ler kendiliğinden ıskalanır
+_items_cache = TTLCache(maxsize=2000, ttl=300)
 
 class PlaylistMedia:
     """
     Playlist-Medya ilişkisini yöneten model sınıfı
+    
+    Playlist öğelerini değiştiren her işlem playlist belgesindeki
+    content_version sayacını, öğe ekleyen/silen işlemler ayrıca media_count
+    alanını aynı $inc ile günceller (bkz. _content_changed); sayım için
+    playlist_media yeniden taranmaz. Bağlı modda
+    (ScreenPlaylist.MODE_LINKED) player manifestleri öğeleri bu sürümle
+    önbelleğe alınmış find_items üzerinden okur.
+    
+    order alanı kesirli sıra anahtarıdır (bkz. app/utils/ranking.py); sona
+    eklemeler sırayı playlist belgesindeki order_seq sayacından alır.
     """
     
     # Statü değerleri
     STATUS_ACTIVE = 'active'
     STATUS_INACTIVE = 'inactive'
     
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'playlist_media': [
+            IndexModel([('playlist_id', 1), ('order', 1)], name='playlist_order'),
+            IndexModel([('media_id', 1)], name='media'),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'PlaylistMedia.find_by_playlist', 'collection': 'playlist_media',
+         'filter': {'playlist_id': ObjectId()}, 'sort': [('order', 1)]},
+        {'name': 'PlaylistMedia.create (sıra sayacı başlatma)', 'collection': 'playlist_media',
+         'filter': {'playlist_id': ObjectId()}, 'sort': [('order', -1)]},
+        {'name': 'PlaylistMedia.find_by_media', 'collection': 'playlist_media',
+         'filter': {'media_id': ObjectId()}},
+    ]
+    
     @classmethod
     def create(cls, playlist_id=None, media_id=None, display_time=None, order=None, **kwargs):
         """Yeni playlist medya ilişkisi oluşturur"""
         
-        import traceback
-        print(f"PlaylistMedia.create called with: playlist_id={playlist_id}, media_id={media_id}, display_time={display_time}")
-        
         # ID kontrolleri
         try:
             # playlist_id'yi ObjectId'ye dönüştür
             if isinstance(playlist_id, str):
                 try:
                     playlist_id = ObjectId(playlist_id)
-                    print(f"Playlist ID converted to ObjectId: {playlist_id}")
-                except Exception as e:
-                    print(f"Error converting playlist_id to ObjectId: {e}")
+                except Exception:
                     raise ValueError(f"Geçersiz playlist ID formatı: {playlist_id}")
                 
             # media_id'yi ObjectId'ye dönüştür
             if isinstance(media_id, str):
                 try:
                     media_id = ObjectId(media_id)
-                    print(f"Media ID converted to ObjectId: {media_id}")
-                except Exception as e:
-                    print(f"Error converting media_id to ObjectId: {e}")
+                except Exception:
                     raise ValueError(f"Geçersiz media ID formatı: {media_id}")
                 
             # Null kontrolleri
@@ -53,21 +87,19 @@ class PlaylistMedia:
                 from app.models.playlist import Playlist
                 playlist = Playlist.find_by_id(playlist_id)
                 if not playlist:
-                    print(f"Playlist not found: {playlist_id}")
                     raise ValueError(f"Playlist bulunamadı: {playlist_id}")
                 
                 # Media'nın var olduğunu kontrol et
                 from app.models.media import Media
                 media = Media.find_by_id(media_id)
                 if not media:
-                    print(f"Media not found: {media_id}")
                     raise ValueError(f"Media bulunamadı: {media_id}")
             except Exception as check_error:
-                print(f"Error checking playlist/media existence: {check_error}")
+                logger.warning(f"Playlist/medya kontrolü başarısız: {check_error}")
             
-            # Sıra numarasını belirle - verilmemişse en sona ekle
+            # Sıra verilmemişse en sona ekle
             if order is None:
-                order = cls.get_max_order(playlist_id) + 1
+                order = cls.next_order(playlist_id)
             
             # Yeni playlist media dökümanı
             playlist_media = {
@@ -83,23 +115,18 @@ class PlaylistMedia:
                 playlist_media[key] = value
             
             # MongoDB'ye ekle
-            result = mongo.db.playlist_media.insert_one(playlist_media)
+            with tracer.span('PlaylistMedia.create', playlist_id=playlist_id, media_id=media_id) as span:
+                result = mongo.db.playlist_media.insert_one(playlist_media)
+                span.set(order=order)
             
             # ID'yi ayarla ve döndür
             playlist_media['_id'] = result.inserted_id
-            print(f"Playlist media created successfully: {result.inserted_id}")
             
-            # Playlist medya sayısını güncelle
-            try:
-                from app.models.playlist import Playlist
-                Playlist.update_media_count(playlist_id)
-            except Exception as e:
-                print(f"Error updating playlist media count: {e}")
+            cls._content_changed(playlist_id, media_delta=1)
             
             return playlist_media
-        except Exception as e:
-            print(f"Error in PlaylistMedia.create: {e}")
-            print(traceback.format_exc())
+        except Exception:
+            logger.exception(f"PlaylistMedia.create hatası (playlist_id={playlist_id}, media_id={media_id})")
             raise
     
     @classmethod
@@ -117,143 +144,157 @@ class PlaylistMedia:
     def find_by_playlist(cls, playlist_id):
         """Belirli bir playlist'teki tüm medyaları bul"""
         import traceback
-        print(f"PlaylistMedia.find_by_playlist çağrıldı: playlist_id={playlist_id}, tip={type(playlist_id)}")
         
-        try:
-            # ObjectId dönüşümü
-            if isinstance(playlist_id, str):
-                try:
-                    obj_id = ObjectId(playlist_id)
-                    print(f"Playlist ID ObjectId'ye dönüştürüldü: {obj_id}")
-                except Exception as e:
-                    print(f"ObjectId dönüşüm hatası: {str(e)}")
-                    obj_id = None
-            else:
-                obj_id = playlist_id
-            
-            # Her iki ID formatı için sorgu
-            query = {"$or": []}
-            
-            if obj_id:
-                query["$or"].append({"playlist_id": obj_id})
-            
-            if isinstance(playlist_id, str):
-                query["$or"].append({"playlist_id": playlist_id})
-            elif obj_id:
-                query["$or"].append({"playlist_id": str(obj_id)})
-            
-            print(f"Sorgu: {query}")
+        with tracer.span('PlaylistMedia.find_by_playlist', playlist_id=playlist_id) as span:
+            try:
+                playlist_id = to_object_id(playlist_id)
+                if playlist_id is None:
+                    return []
             
-            # Bu playlist'teki tüm medyaları al ve sırala
-            playlist_media = list(mongo.db.playlist_media.find(query).sort("order", 1))
-            print(f"Bulunan playlist media sayısı: {len(playlist_media)}")
+                # Bu playlist'teki tüm medyaları al ve sırala
+                playlist_media = list(mongo.db.playlist_media.find({"playlist_id": playlist_id}).sort("order", 1))
+                span.set(count=len(playlist_media))
             
-            # Medya detaylarını ekle
-            from app.models.media import Media
+                # Medya detaylarını tek sorguda al
+                media_ids = to_object_ids(pm.get('media_id') for pm in playlist_media)
+                media_by_id = {}
+                if media_ids:
+                    media_by_id = {media['_id']: media for media in mongo.db.media.find({'_id': {'$in': media_ids}})}
+                    span.incr('media_queries')
             
-            result_with_media = []
-            for pm in playlist_media:
-                print(f"Playlist media işleniyor: {pm.get('_id')}, media_id: {pm.get('media_id')}")
+                result_with_media = []
+                for pm in playlist_media:
+                    media_id = pm.get('media_id')
+                    if not media_id:
+                        result_with_media.append(pm)
+                        continue
                 
-                # Her medyanın detaylarını al
-                media_id = pm.get('media_id')
-                media = None
-                
-                if media_id:
-                    # Doğrudan string ID'yi ObjectId'ye dönüştürmeyi deneyelim
-                    if isinstance(media_id, str):
-                        try:
-                            media_id_obj = ObjectId(media_id)
-                            media = Media.find_by_id(media_id_obj)
-                            print(f"String media_id ile bulma başarılı: {media_id}")
-                        except Exception as e:
-                            print(f"String ID dönüşüm hatası: {e}")
-                            # Dönüşüm başarısız olursa orijinal ID ile devam et
-                    
-                    # ObjectId ile bulunamadıysa orijinal ID ile tekrar dene
-                    if not media:
-                        media = Media.find_by_id(media_id)
-                        print(f"Orijinal media_id ile sorgu: {media_id}, tip: {type(media_id)}")
-                    
-                    # Hala bulunamadıysa string ile dene
-                    if not media and isinstance(media_id, ObjectId):
-                        media = Media.find_by_id(str(media_id))
-                        print(f"String'e dönüştürülmüş media_id ile sorgu: {str(media_id)}")
-                    
-                    print(f"Medya bulundu mu: {bool(media)}")
-                    
-                    # Medya bulunamazsa atlama, önemli medya bilgilerini ekle
+                    media = media_by_id.get(to_object_id(media_id))
                     if media:
-                        # Medya bilgilerini ekle
                         pm['media'] = media
-                        
-                        # Görüntülenme süresini kontrol et ve varsayılan değer ata
+                    
+                        # Görüntülenme süresi yoksa medyanın süresini, o da yoksa varsayılan değeri kullan
                         if pm.get('display_time') is None:
-                            # Medya nesnesinden süreyi al, o da yoksa varsayılan değer kullan
-                            if isinstance(media, dict) and media.get('display_time'):
-                                pm['display_time'] = media.get('display_time')
-                            elif hasattr(media, 'display_time') and media.display_time:
-                                pm['display_time'] = media.display_time
-                            else:
-                                pm['display_time'] = 10
+                            pm['display_time'] = media.get('display_time') or 10
                     else:
-                        print(f"Medya bulunamadı, ID: {media_id}")
-                        
-                        # MongoDB'den doğrudan sorgu yapalım
-                        try:
-                            direct_media = mongo.db.media.find_one({'_id': media_id})
-                            if not direct_media and isinstance(media_id, ObjectId):
-                                direct_media = mongo.db.media.find_one({'_id': str(media_id)})
-                            if not direct_media and isinstance(media_id, str):
-                                try:
-                                    direct_media = mongo.db.media.find_one({'_id': ObjectId(media_id)})
-                                except:
-                                    pass
-                                    
-                            # Alternatif koleksiyon adını dene
-                            if not direct_media:
-                                direct_media = mongo.db.medias.find_one({'_id': media_id})
-                                if not direct_media and isinstance(media_id, ObjectId):
-                                    direct_media = mongo.db.medias.find_one({'_id': str(media_id)})
-                                if not direct_media and isinstance(media_id, str):
-                                    try:
-                                        direct_media = mongo.db.medias.find_one({'_id': ObjectId(media_id)})
-                                    except:
-                                        pass
-                            
-                            if direct_media:
-                                print(f"Doğrudan MongoDB sorgusu ile medya bulundu: {direct_media.get('_id')}")
-                                pm['media'] = direct_media
-                                
-                                # Görüntülenme süresini ayarla
-                                if pm.get('display_time') is None:
-                                    pm['display_time'] = direct_media.get('display_time', 10)
-                            else:
-                                # Boş bir medya nesnesi ekle
-                                pm['media'] = {
-                                    '_id': media_id,
-                                    'title': 'Medya bulunamadı',
-                                    'file_type': 'unknown',
-                                    'filename': ''
-                                }
-                        except Exception as mongo_error:
-                            print(f"Doğrudan MongoDB sorgusu hatası: {mongo_error}")
-                            # Boş bir medya nesnesi ekle
-                            pm['media'] = {
-                                '_id': media_id,
-                                'title': 'Medya bulunamadı',
-                                'file_type': 'unknown',
-                                'filename': ''
-                            }
+                        span.incr('media_missing')
+                    
+                        # Medya bulunamazsa boş bir medya nesnesi ekle
+                        pm['media'] = {
+                            '_id': media_id,
+                            'title': 'Medya bulunamadı',
+                            'file_type': 'unknown',
+                            'filename': ''
+                        }
+                        if pm.get('display_time') is None:
+                            pm['display_time'] = 10
                 
-                result_with_media.append(pm)
+                    result_with_media.append(pm)
+            
+                return result_with_media
+            except Exception as e:
+                print(f"find_by_playlist hatası: {str(e)}")
+                print(traceback.format_exc())
+                return []
+    
+    @classmethod
+    def _content_changed(cls, playlist_id, media_delta=0):
+        """
+        Playlist öğeleri değişti: içerik sürümünü artır ve bağlı manifestleri geçersiz işaretle
+        
+        Bağlı moddaki ekranlar için tek bir playlist güncellemesi ve tek bir
+        update_many yeterlidir; ekran içerikleri tek tek kopyalanmaz.
+        
+        Sayaç ve sürüm, öğe yazımından sonra tek bir $inc ile güncellenir.
+        Bu güncelleme başarısız olursa hata loglanıp çağırana iletilir; öğe
+        yazımı geri alınmaz, media_count kayması `flask reconcile-counters`
+        ile düzeltilir (bkz. Playlist.reconcile_media_counts).
+        
+        Args:
+            playlist_id: Playlist ID
+            media_delta: Eklenen (+) veya silinen (-) öğe sayısı; media_count'a eklenir
+        """
+        playlist_id = to_object_id(playlist_id)
+        if playlist_id is None:
+            return
+        
+        inc = {'content_version': 1}
+        if media_delta:
+            inc['media_count'] = media_delta
+        
+        from app.utils import identity_map
+        identity_map.discard('playlists', playlist_id)
+        try:
+            mongo.db.playlists.update_one({'_id': playlist_id}, {'$inc': inc})
             
-            print(f"Medya bilgileriyle birlikte döndürülen item sayısı: {len(result_with_media)}")
-            return result_with_media
-        except Exception as e:
-            print(f"find_by_playlist hatası: {str(e)}")
-            print(traceback.format_exc())
+            from app.models.screen_manifest import ScreenManifest
+            ScreenManifest.invalidate_playlist(playlist_id)
+        except Exception:
+            logger.exception(f"Playlist içerik sürümü güncellenemedi ({playlist_id}, media_delta={media_delta})")
+            raise
+    
+    @classmethod
+    def find_items(cls, playlist_id):
+        """
+        Playlist'in sıralı öğelerini (medya bilgisi olmadan) getir
+        
+        Sonuç (playlist, content_version) anahtarıyla worker içinde önbelleğe
+        alınır; playlist değiştiğinde sürüm arttığı için eski kayıt kullanılmaz.
+        Sürüm okuması tek bir _id sorgusudur.
+        
+        Returns:
+            [{'_id', 'media_id', 'display_time', 'order'}, ...]
+        """
+        playlist_id = to_object_id(playlist_id)
+        if playlist_id is None:
+            return []
+        
+        playlist = mongo.db.playlists.find_one({'_id': playlist_id}, {'content_version': 1})
+        if not playlist:
             return []
+        
+        key = (playlist_id, playlist.get('content_version', 0))
+        items = _items_cache.get(key)
+        if items is None:
+            with tracer.span('PlaylistMedia.find_items', playlist_id=playlist_id) as span:
+                items = list(mongo.db.playlist_media.find(
+                    {'playlist_id': playlist_id},
+                    {'media_id': 1, 'display_time': 1, 'order': 1}
+                ).sort([('order', 1), ('_id', 1)]))
+                span.set(count=len(items))
+            _items_cache.set(key, items)
+        
+        return items
+    
+    @classmethod
+    def find_with_media(cls, playlist_id, media_status='active', projection=None):
+        """
+        Playlist öğelerini medya bilgileriyle birlikte getir
+        
+        ScreenContent.find_with_media ile aynı biçimde döner; bağlı moddaki
+        ekranların manifesti bu liste üzerinden derlenir. Medyalar önbelleğe
+        alınmaz, tek bir $in sorgusuyla her seferinde okunur.
+        
+        Returns:
+            Sıralı öğe listesi; her öğenin 'media' alanında medya belgesi
+            bulunur (bulunamayan veya filtrelenen medyalar için None)
+        """
+        items = [dict(item) for item in cls.find_items(playlist_id)]
+        
+        media_ids = to_object_ids(item.get('media_id') for item in items)
+        media_map = {}
+        if media_ids:
+            query = {'_id': {'$in': media_ids}}
+            if media_status:
+                query['status'] = media_status
+            from app.models.media import Media
+            for media in mongo.db.media.find(query, projection_for(Media, projection)):
+                media_map[media['_id']] = media
+        
+        for item in items:
+            item['media'] = media_map.get(to_object_id(item.get('media_id')))
+        
+        return items
     
     @classmethod
     def find_by_media(cls, media_id):
@@ -306,11 +347,8 @@ class PlaylistMedia:
             "media_id": media_id
         })
         
-        # Playlist medya sayısını güncelle
-        from app.models.playlist import Playlist
-        playlist = Playlist.find_by_id(playlist_id)
-        if playlist:
-            playlist.update_media_count()
+        if result.deleted_count > 0:
+            cls._content_changed(playlist_id, media_delta=-result.deleted_count)
         
         return result.deleted_count > 0
     
@@ -325,40 +363,42 @@ class PlaylistMedia:
                 
         result = mongo.db.playlist_media.delete_many({"playlist_id": playlist_id})
         
-        # Playlist medya sayısını güncelle
-        from app.models.playlist import Playlist
-        playlist = Playlist.find_by_id(playlist_id)
-        if playlist:
-            playlist.update_media_count()
+        if result.deleted_count > 0:
+            cls._content_changed(playlist_id, media_delta=-result.deleted_count)
             
         return result.deleted_count
     
+    @classmethod
+    def next_order(cls, playlist_id):
+        """Playlist'in sonuna eklenecek öğe için benzersiz sıra al (bkz. ranking.next_rank)"""
+        playlist_id = to_object_id(playlist_id)
+        return ranking.next_rank(
+            mongo.db.playlists, playlist_id, 'order_seq',
+            mongo.db.playlist_media, {'playlist_id': playlist_id}
+        )
+    
     @classmethod
     def reorder_playlist_media(cls, playlist_id, media_order):
         """
         Playlist'teki medyaları yeniden sırala
         
+        Tek bir öğenin taşınması tek belge yazar; diğer sıralamalar tek bir
+        bulk_write ile uygulanır (bkz. ranking.reorder).
+        
         media_order: [{"media_id": "...", "order": 1}, ...]
         """
-        if isinstance(playlist_id, str):
-            try:
-                playlist_id = ObjectId(playlist_id)
-            except:
-                return False
-                
-        for item in media_order:
-            media_id = item["media_id"]
-            if isinstance(media_id, str):
-                try:
-                    media_id = ObjectId(media_id)
-                except:
-                    continue
-                    
-            mongo.db.playlist_media.update_one(
-                {"playlist_id": playlist_id, "media_id": media_id},
-                {"$set": {"order": item["order"], "updated_at": datetime.utcnow()}}
-            )
-            
+        playlist_id = to_object_id(playlist_id)
+        if playlist_id is None:
+            return False
+        
+        media_ids = [item["media_id"] for item in sorted(media_order, key=lambda item: item.get("order", 0))]
+        written = ranking.reorder(
+            mongo.db.playlist_media, {"playlist_id": playlist_id}, media_ids,
+            mongo.db.playlists, playlist_id, 'order_seq', key='media_id'
+        )
+        
+        if written:
+            cls._content_changed(playlist_id)
         return True
     
     @classmethod
@@ -374,27 +414,6 @@ class PlaylistMedia:
                 
         return mongo.db.playlist_media.count_documents({'playlist_id': playlist_id})
         
-    @classmethod
-    def get_max_order(cls, playlist_id):
-        """
-        Belirli bir playlist'teki en yüksek sıra numarasını döndürür
-        """
-        if isinstance(playlist_id, str):
-            try:
-                playlist_id = ObjectId(playlist_id)
-            except:
-                return 0
-                
-        # Son sıradaki öğeyi bul
-        result = mongo.db.playlist_media.find_one(
-            {"playlist_id": playlist_id}, 
-            sort=[("order", -1)]
-        )
-        
-        if result:
-            return result.get("order", 0)
-        return 0
-    
     @classmethod
     def find_one(cls, query):
         """
@@ -426,25 +445,25 @@ class PlaylistMedia:
         Returns:
             Silinen kayıt sayısı
         """
-        # String ID'yi ObjectId'ye çevirme girişimi
-        if isinstance(media_id, str):
-            try:
-                media_id_obj = ObjectId(media_id)
-            except:
-                media_id_obj = None
-                
-            # Her iki format için sorgu
-            result1 = mongo.db.playlist_media.delete_many({'media_id': media_id})
-            
-            if media_id_obj:
-                result2 = mongo.db.playlist_media.delete_many({'media_id': media_id_obj})
-                return result1.deleted_count + result2.deleted_count
-            return result1.deleted_count
-        else:
-            # ObjectId olarak verilmişse
-            result1 = mongo.db.playlist_media.delete_many({'media_id': media_id})
-            result2 = mongo.db.playlist_media.delete_many({'media_id': str(media_id)})
-            return result1.deleted_count + result2.deleted_count
+        media_id = to_object_id(media_id)
+        if media_id is None:
+            return 0
+        
+        # Silinecek satırlar playlist başına gruplanır
+        rows_by_playlist = {}
+        for row in mongo.db.playlist_media.find({'media_id': media_id}, {'playlist_id': 1}):
+            rows_by_playlist.setdefault(row.get('playlist_id'), []).append(row['_id'])
+        
+        # Satırlar bulunan _id'lerle silinir; media_count'tan yalnızca gerçekten
+        # silinenler düşülür (araya giren başka bir silme iki kez sayılmaz)
+        deleted = 0
+        for playlist_id, row_ids in rows_by_playlist.items():
+            result = mongo.db.playlist_media.delete_many({'_id': {'$in': row_ids}})
+            if result.deleted_count:
+                deleted += result.deleted_count
+                cls._content_changed(playlist_id, media_delta=-result.deleted_count)
+        
+        return deleted
     
     @classmethod
     def count_by_media(cls, media_id):
@@ -475,12 +494,16 @@ class PlaylistMedia:
             if field in data:
                 update_data[field] = data[field]
                 
-        result = mongo.db.playlist_media.update_one(
+        relation = mongo.db.playlist_media.find_one_and_update(
             {"_id": playlist_media_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection={"playlist_id": 1}
         )
         
-        return result.modified_count > 0
+        if relation:
+            cls._content_changed(relation.get('playlist_id'))
+        
+        return relation is not None
     
     @classmethod
     def delete(cls, playlist_media_id):
@@ -499,11 +522,7 @@ class PlaylistMedia:
             
         result = mongo.db.playlist_media.delete_one({"_id": playlist_media_id})
         
-        # Playlist medya sayısını güncelle
         if result.deleted_count > 0 and relation.get('playlist_id'):
-            from app.models.playlist import Playlist
-            playlist = Playlist.find_by_id(relation['playlist_id'])
-            if playlist:
-                playlist.update_media_count()
+            cls._content_changed(relation['playlist_id'], media_delta=-1)
                 
         return result.deleted_count > 0 
\ No newline at end of file
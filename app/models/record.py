@@ -0,0 +1,31 @@
+"""
+Hafif model kaydı: Model nesneleri için __slots__ tabanlı ortak taban sınıf
+"""
+
+
+class Record:
+    """
+    __slots__ tabanlı model kaydı
+
+    Alt sınıflar sık kullanılan alanları __slots__ ile açıkça listeler; bu
+    alanlar nesne başına sözlük yerine sabit konumlarda tutulur. Belgede bulunan
+    diğer (nadir) alanlar tek tek öznitelik olarak kopyalanmaz, _extra
+    sözlüğünde bekler ve yalnızca erişildiğinde __getattr__ ile çözülür.
+
+    Nesnelerin __dict__'i yoktur; route'ların nesneye sonradan eklediği
+    öznitelikler (playlist.user_name gibi) de alt sınıfın __slots__ listesinde
+    bildirilmelidir. Karışım (mixin) sınıfları da __slots__ = () tanımlamalıdır,
+    aksi halde nesnelere yeniden __dict__ eklenir.
+    """
+
+    __slots__ = ('_extra',)
+
+    def __getattr__(self, name):
+        # Yalnızca slotlarda bulunamayan öznitelikler için çağrılır
+        try:
+            extra = object.__getattribute__(self, '_extra')
+        except AttributeError:
+            extra = None
+        if extra and name in extra:
+            return extra[name]
+        raise AttributeError(f"'{type(self).__name__}' nesnesinde '{name}' özniteliği yok")
@@ -5,14 +5,23 @@ import random
 import string
 from datetime import datetime
 from bson.objectid import ObjectId
+from pymongo import IndexModel
 from flask import current_app
 from app import mongo
 import uuid
 import os
-from pymongo import MongoClient
-from urllib.parse import quote_plus
+from app.models.record import Record
+from app.utils import identity_map
+from app.utils.cache import TTLCache
+from app.utils.heartbeat import heartbeat_buffer
+from app.utils.pagination import Page, paginate
+from app.utils.projections import projection_for
+from app.utils.tracing import tracer
 
-class Screen:
+# API anahtarı -> ekran belgesi önbelleği (worker başına)
+_api_key_cache = TTLCache(maxsize=10000, ttl=30)
+
+class Screen(Record):
     """
     Ekran modeli
     
@@ -32,13 +41,22 @@ class Screen:
     - last_active: Son aktivite zamanı
     - created_at: Oluşturulma zamanı
     - updated_at: Güncellenme zamanı
-    - offline_periods: Offline kalma dönemleri
     - playlist_id: Playlist ID
     - screen_type: Ekran tipi (monitor, led)
     - panel_type: Panell tipi (P2.5, P3, P4, P5, ...)
     - width_cm: Genişlik (cm)
     - height_cm: Yükseklik (cm)
     """
+
+    # Nesne alanları; belgedeki diğer alanlar _extra'da tutulur (bkz. Record)
+    __slots__ = (
+        'id', 'user_id', 'name', 'orientation', 'resolution', 'location', 'description',
+        'status', 'refresh_rate', 'show_clock', 'api_key', 'preview_image', 'created_at',
+        'updated_at', 'last_active', 'playlist_id', 'screen_type',
+        'panel_type', 'width_cm', 'height_cm',
+        # Admin ekran listesinde route'ların eklediği playlist nesnesi
+        'playlist'
+    )
     
     # Status değerleri
     STATUS_ACTIVE = 'active'
@@ -47,6 +65,36 @@ class Screen:
     ORIENTATION_HORIZONTAL = 'horizontal'
     ORIENTATION_VERTICAL = 'vertical'
     
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'screens': [
+            IndexModel([('api_key', 1)], name='api_key_unique', unique=True, sparse=True),
+            IndexModel([('user_id', 1), ('created_at', -1), ('_id', -1)], name='user_created_id'),
+            IndexModel([('created_at', -1), ('_id', -1)], name='created_id'),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'Screen.find_by_api_key', 'collection': 'screens', 'filter': {'api_key': ''}},
+        {'name': 'Screen.find_by_user', 'collection': 'screens',
+         'filter': {'user_id': ObjectId()}, 'sort': [('created_at', -1), ('_id', -1)]},
+        {'name': 'Screen.find_all', 'collection': 'screens',
+         'filter': {}, 'sort': [('created_at', -1), ('_id', -1)]},
+    ]
+    
+    # Finder'ların projection parametresiyle seçilen alan profilleri (bkz. projections)
+    PROJECTIONS = {
+        'detail': None,
+        # Henüz taşınmamış belgelerdeki eski offline_periods dizisi okunmaz
+        # (bkz. ScreenOfflinePeriod, migrate_offline_periods.py)
+        'list': {'offline_periods': 0},
+        'manifest': {
+            'user_id': 1, 'name': 1, 'orientation': 1, 'resolution': 1, 'api_key': 1,
+            'status': 1, 'refresh_rate': 1, 'show_clock': 1
+        },
+    }
+    
     @classmethod
     def create(cls, data):
         """
@@ -73,7 +121,6 @@ class Screen:
             'width_cm': data.get('width_cm'),  # Genişlik (cm)
             'height_cm': data.get('height_cm'),  # Yükseklik (cm)
             'last_active': None,
-            'offline_periods': [],
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
@@ -85,63 +132,96 @@ class Screen:
         return screen
     
     @classmethod
+    @identity_map.identity_mapped('screens')
     def find_by_id(cls, screen_id):
         """
         ID'ye göre ekran bul
         """
-        print(f"DEBUG - Screen.find_by_id çağrıldı: {screen_id}, tip: {type(screen_id)}")
-        
         if isinstance(screen_id, str):
             try:
                 screen_id = ObjectId(screen_id)
-                print(f"DEBUG - String ID, ObjectId'ye dönüştürüldü: {screen_id}")
-            except Exception as e:
-                print(f"DEBUG - ObjectId dönüşüm hatası: {str(e)}")
+            except Exception:
+                tracer.event('Screen.find_by_id.invalid_id', screen_id=screen_id)
                 return None
         
-        try:
-            screen_data = mongo.db.screens.find_one({'_id': screen_id})
-            
-            if not screen_data:
-                print(f"DEBUG - Ekran bulunamadı: {screen_id}")
+        with tracer.span('Screen.find_by_id', screen_id=screen_id) as span:
+            try:
+                screen_data = mongo.db.screens.find_one({'_id': screen_id})
+                span.set(found=screen_data is not None)
+                
+                if not screen_data:
+                    return None
+                
+                # MongoDB belgesini Screen nesnesine dönüştür
+                screen = cls(**screen_data)
+                return screen
+            except Exception as e:
+                print(f"Ekran getirilirken hata: {str(e)}")
+                import traceback
+                print(traceback.format_exc())
                 return None
-            
-            print(f"DEBUG - Ekran bulundu: {screen_data.get('_id')}, isim: {screen_data.get('name')}")
-            
-            # MongoDB belgesini Screen nesnesine dönüştür
-            screen = cls(**screen_data)
-            return screen
-        except Exception as e:
-            print(f"DEBUG - MongoDB sorgulama hatası: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            return None
+    
+    @classmethod
+    def prefetch(cls, screen_ids):
+        """
+        Ekranları tek sorguda istek kimlik haritasına yükle
+
+        Returns:
+            {ObjectId: Screen veya None}
+        """
+        return identity_map.prefetch('screens', mongo.db.screens, screen_ids, lambda data: cls(**data))
     
     @classmethod
     def find_by_api_key(cls, api_key):
         """
         API anahtarına göre ekran bul
+        
+        Player uç noktalarının ilk çağrısı olduğu için sonuç worker içinde kısa
+        süreli önbelleğe alınır; ekran güncellendiğinde veya silindiğinde önbellek
+        temizlenir.
         """
-        screen_data = mongo.db.screens.find_one({'api_key': api_key})
+        screen_data = _api_key_cache.get(api_key)
         
-        if not screen_data:
-            return None
+        if screen_data is None:
+            screen_data = mongo.db.screens.find_one({'api_key': api_key}, cls.PROJECTIONS['list'])
+            
+            if not screen_data:
+                return None
+            
+            _api_key_cache.set(api_key, screen_data)
         
         # MongoDB belgesini Screen nesnesine dönüştür
         return cls(**screen_data)
     
     @classmethod
-    def find_by_user(cls, user_id, status=None, limit=100, skip=0):
+    def invalidate_api_key_cache(cls, screen_id=None, api_key=None):
+        """
+        Ekranın API anahtarı önbelleğini temizle
+        """
+        if api_key:
+            _api_key_cache.pop(api_key)
+        
+        if screen_id:
+            screen_id = str(screen_id)
+            _api_key_cache.pop_where(lambda screen_data: str(screen_data.get('_id')) == screen_id)
+    
+    @classmethod
+    def find_by_user(cls, user_id, status=None, limit=100, cursor=None, projection=None):
         """
         Kullanıcı ID'sine göre ekranları bul
+        
+        cursor: Önceki sayfanın next_cursor değeri (bkz. pagination)
+        projection: Alan profili ('list', 'manifest'; varsayılan tüm belge)
+        
+        Returns:
+            Page (next_cursor ile sonraki sayfa istenebilir)
         """
         try:
             # user_id'yi doğru şekilde dönüştür
             if isinstance(user_id, str):
                 try:
                     user_id_obj = ObjectId(user_id)
-                except Exception as e:
-                    print(f"ObjectId dönüşüm hatası: {str(e)}")
+                except Exception:
                     user_id_obj = user_id
             else:
                 user_id_obj = user_id
@@ -152,77 +232,33 @@ class Screen:
             if status:
                 query['status'] = status
             
-            screen_list = []
-            for screen_data in mongo.db.screens.find(query).sort('created_at', -1).skip(skip).limit(limit):
-                screen_list.append(cls(**screen_data))
+            with tracer.span('Screen.find_by_user', user_id=user_id) as span:
+                screen_list = paginate(
+                    mongo.db.screens, query, 'created_at', -1, limit, cursor,
+                    projection_for(cls, projection), lambda data: cls(**data)
+                )
+                span.set(count=len(screen_list))
             
-            print(f"Kullanıcıya ait {len(screen_list)} ekran bulundu - user_id: {user_id}")
             return screen_list
         except Exception as e:
             print(f"Ekranlar getirilirken hata: {str(e)}")
-            return []
+            return Page()
     
     @classmethod
-    def find_all(cls, limit=100, skip=0, sort_by='created_at', sort_dir=-1):
+    def find_all(cls, limit=100, cursor=None, sort_by='created_at', sort_dir=-1, projection=None):
         """
         Tüm ekranları getir
-        """
-        screen_list = []
-        for screen_data in mongo.db.screens.find().sort(sort_by, sort_dir).skip(skip).limit(limit):
-            screen_list.append(cls(**screen_data))
-        
-        return screen_list
-    
-    @classmethod
-    def update(cls, screen_id, data):
-        """
-        Ekran güncelle
-        """
-        if isinstance(screen_id, str):
-            try:
-                screen_id = ObjectId(screen_id)
-            except:
-                return False
-        
-        update_data = {
-            'updated_at': datetime.utcnow()
-        }
-        
-        # Güncellenebilir alanlar
-        for field in ['name', 'description', 'orientation', 'resolution', 
-                     'location', 'status', 'refresh_rate', 'show_clock', 'last_active',
-                     'screen_type', 'panel_type', 'width_cm', 'height_cm']:
-            if field in data:
-                update_data[field] = data[field]
         
-        result = mongo.db.screens.update_one(
-            {'_id': screen_id},
-            {'$set': update_data}
-        )
+        cursor: Önceki sayfanın next_cursor değeri (bkz. pagination)
+        projection: Alan profili ('list', 'manifest'; varsayılan tüm belge)
         
-        return result.modified_count > 0
-    
-    @classmethod
-    def delete(cls, screen_id):
-        """
-        Ekran sil
+        Returns:
+            Page (next_cursor ile sonraki sayfa istenebilir)
         """
-        if isinstance(screen_id, str):
-            try:
-                obj_id = ObjectId(screen_id)
-            except:
-                return False
-        else:
-            obj_id = screen_id
-        
-        # İlişkili içerikleri sil
-        from app.models.screen_content import ScreenContent
-        ScreenContent.delete_by_screen(screen_id)
-        
-        # Ekranı sil
-        result = mongo.db.screens.delete_one({'_id': obj_id})
-        
-        return result.deleted_count > 0
+        return paginate(
+            mongo.db.screens, {}, sort_by, sort_dir, limit, cursor,
+            projection_for(cls, projection), lambda data: cls(**data)
+        )
     
     @classmethod
     def count_by_user(cls, user_id, status=None):
@@ -234,8 +270,7 @@ class Screen:
             if isinstance(user_id, str):
                 try:
                     user_id_obj = ObjectId(user_id)
-                except Exception as e:
-                    print(f"ObjectId dönüşüm hatası: {str(e)}")
+                except Exception:
                     user_id_obj = user_id
             else:
                 user_id_obj = user_id
@@ -246,8 +281,10 @@ class Screen:
             if status:
                 query['status'] = status
             
-            count = mongo.db.screens.count_documents(query)
-            print(f"Kullanıcıya ait ekran sayısı: {count} - user_id: {user_id}")
+            with tracer.span('Screen.count_by_user', user_id=user_id) as span:
+                count = mongo.db.screens.count_documents(query)
+                span.set(count=count)
+            
             return count
         except Exception as e:
             print(f"Ekran sayısı sayılırken hata: {str(e)}")
@@ -282,15 +319,17 @@ class Screen:
         self.created_at = created_at
         self.updated_at = updated_at
         self.last_active = last_active
-        self.offline_periods = offline_periods if offline_periods else []
         self.playlist_id = playlist_id
         self.screen_type = screen_type  # monitor veya led
         self.panel_type = panel_type    # P2.5, P3, P4, P5, ...
         self.width_cm = width_cm        # Genişlik (cm)
         self.height_cm = height_cm      # Yükseklik (cm)
+        # offline_periods yalnızca taşınmamış eski belgelerde bulunur ve kullanılmaz
+        self._extra = kwargs or None
     
     def update(self, **kwargs):
         """Ekran bilgilerini güncelle"""
+        identity_map.discard('screens', self.id)
         updates = {"updated_at": datetime.now()}
         
         # Güncellenebilir alanlar
@@ -311,12 +350,21 @@ class Screen:
         if 'last_active' in kwargs:
             updates['last_active'] = kwargs['last_active']
         
+        if kwargs.get('api_key'):
+            updates['api_key'] = kwargs['api_key']
+        
         # Veritabanını güncelle
         mongo.db.screens.update_one(
             {"_id": ObjectId(self.id)},
             {"$set": updates}
         )
         
+        # Player manifestini etkileyen alanlar değiştiyse geçersiz işaretle
+        from app.models.screen_manifest import ScreenManifest
+        if any(field in updates for field in ScreenManifest.SCREEN_FIELDS):
+            ScreenManifest.invalidate(self.id)
+            self.invalidate_api_key_cache(api_key=self.api_key)
+        
         # Nesne bilgilerini güncelle
         for key, value in updates.items():
             setattr(self, key, value)
@@ -325,13 +373,31 @@ class Screen:
     
     def delete(self):
         """Ekranı ve ilişkili içerikleri sil"""
+        identity_map.discard('screens', self.id)
         # Önce ilişkili ekran içeriklerini sil
         from app.models.screen_content import ScreenContent
         ScreenContent.delete_by_screen(self.id)
         
+        # Playlist atamasını sil
+        from app.models.screen_playlist import ScreenPlaylist
+        ScreenPlaylist.delete_by_screen(self.id)
+        
         # Sonra ekranı sil
         mongo.db.screens.delete_one({"_id": ObjectId(self.id)})
         
+        # Player manifestini ve önbelleği sil
+        from app.models.screen_manifest import ScreenManifest
+        ScreenManifest.delete_by_screen(self.id)
+        self.invalidate_api_key_cache(api_key=self.api_key)
+        
+        # Telemetri kayıtlarını sil
+        from app.models.screen_telemetry import ScreenTelemetry
+        ScreenTelemetry.delete_by_screen(self.id)
+        
+        # Offline dönem kayıtlarını sil
+        from app.models.screen_offline_period import ScreenOfflinePeriod
+        ScreenOfflinePeriod.delete_by_screen(self.id)
+        
         return True
     
     def get_contents(self):
@@ -345,8 +411,27 @@ class Screen:
         return ScreenContent.find_by_screen_id(self.id)
     
     def update_last_active(self):
-        """Son aktif zamanını güncelle"""
-        return self.update(last_active=datetime.now())
+        """Son aktif zamanını güncelle (heartbeat tamponu üzerinden)"""
+        self.last_active = datetime.now()
+        heartbeat_buffer.record(ObjectId(self.id), self.last_active)
+        return self
+    
+    @classmethod
+    def update_last_active_by_id(cls, screen_id, timestamp=None):
+        """
+        Ekran nesnesi yüklemeden son aktif zamanını güncelle
+        
+        Yazma hemen yapılmaz; heartbeat tamponunda biriktirilip periyodik olarak
+        toplu halde veritabanına aktarılır.
+        """
+        if isinstance(screen_id, str):
+            try:
+                screen_id = ObjectId(screen_id)
+            except:
+                return False
+        
+        heartbeat_buffer.record(screen_id, timestamp)
+        return True
     
     def to_dict(self):
         """Ekran bilgilerini sözlük olarak döndür"""
@@ -366,7 +451,6 @@ class Screen:
             "created_at": self.created_at,
             "updated_at": self.updated_at,
             "last_active": self.last_active,
-            "offline_periods": self.offline_periods,
             "playlist_id": self.playlist_id,
             "screen_type": self.screen_type,
             "panel_type": self.panel_type,
@@ -377,19 +461,15 @@ class Screen:
     def add_offline_period(self, offline_period):
         """
         Ekrana offline kalma dönemi ekle
-        """
-        if not hasattr(self, 'offline_periods') or self.offline_periods is None:
-            self.offline_periods = []
-            
-        self.offline_periods.append(offline_period)
         
-        # Veritabanını güncelle
-        mongo.db.screens.update_one(
-            {"_id": ObjectId(self.id)},
-            {"$push": {"offline_periods": offline_period}}
-        )
+        Dönemler ekran belgesinde değil screen_offline_periods koleksiyonunda
+        tutulur (bkz. ScreenOfflinePeriod).
         
-        return True
+        Returns:
+            Kaydedilen dönem belgesi veya veri yorumlanamıyorsa None
+        """
+        from app.models.screen_offline_period import ScreenOfflinePeriod
+        return ScreenOfflinePeriod.record(self.id, offline_period)
     
     @classmethod
     def get_content(cls, screen_id):
@@ -3,9 +3,16 @@ Ekran İçerik Modeli: Ekranlarda gösterilen medya içeriklerini yönetir
 """
 from datetime import datetime
 from bson import ObjectId
+from pymongo import IndexModel, InsertOne, UpdateOne, DeleteMany
 from app import mongo
+from app.models.record import Record
+from app.models.screen_manifest import ScreenManifest
+from app.utils import ranking
+from app.utils.tracing import tracer
+from app.utils.ids import to_object_id, to_object_ids
+from app.utils.projections import projection_for
 
-class ScreenContent:
+class ScreenContent(Record):
     """
     Ekran içeriği modeli
     
@@ -14,16 +21,41 @@ class ScreenContent:
     - screen_id: Ekran ID
     - media_id: Medya ID
     - display_time: Görüntülenme süresi (saniye)
-    - order: Sıralama
+    - order: Kesirli sıra anahtarı (bkz. app/utils/ranking.py); sona eklemeler
+      sırayı ekran belgesindeki content_order_seq sayacından alır
     - status: Durum (active, inactive)
     - created_at: Oluşturulma zamanı
     - updated_at: Güncellenme zamanı
     """
+
+    # Nesne alanları; belgedeki diğer alanlar _extra'da tutulur (bkz. Record)
+    __slots__ = (
+        'id', 'screen_id', 'media_id', 'order', 'display_time', 'status', 'created_at',
+        'updated_at', 'media'
+    )
     
     # Sabitler
     STATUS_ACTIVE = 'active'
     STATUS_INACTIVE = 'inactive'
     
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'screen_contents': [
+            IndexModel([('screen_id', 1), ('status', 1), ('order', 1)], name='screen_status_order'),
+            IndexModel([('media_id', 1), ('status', 1)], name='media_status'),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'ScreenContent.find_by_screen_id', 'collection': 'screen_contents',
+         'filter': {'screen_id': ObjectId(), 'status': 'active'}, 'sort': [('order', 1)]},
+        {'name': 'ScreenContent.count_by_screen', 'collection': 'screen_contents',
+         'filter': {'screen_id': ObjectId()}},
+        {'name': 'ScreenContent.count_by_media_id', 'collection': 'screen_contents',
+         'filter': {'media_id': ObjectId(), 'status': 'active'}},
+    ]
+    
     @classmethod
     def create(cls, data):
         """
@@ -33,12 +65,17 @@ class ScreenContent:
         display_time = data.get('display_time', 10)
         if display_time is None:
             display_time = 10
+        
+        # Sıra verilmemişse en sona ekle
+        order = data.get('order')
+        if order is None:
+            order = cls.next_order(data.get('screen_id'))
             
         content = {
-            'screen_id': data.get('screen_id'),
-            'media_id': data.get('media_id'),
+            'screen_id': to_object_id(data.get('screen_id')),
+            'media_id': to_object_id(data.get('media_id')),
             'display_time': int(display_time),
-            'order': int(data.get('order', 0)),
+            'order': float(order),
             'status': data.get('status', cls.STATUS_ACTIVE),
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
@@ -48,6 +85,9 @@ class ScreenContent:
         result = mongo.db.screen_contents.insert_one(content)
         content['_id'] = result.inserted_id
         
+        # Player manifestini geçersiz işaretle
+        ScreenManifest.invalidate(content['screen_id'])
+        
         return content
     
     @classmethod
@@ -68,51 +108,61 @@ class ScreenContent:
         """
         Ekran ID'sine göre içerikleri bul
         """
-        print(f"DEBUG - find_by_screen_id metodu çağrıldı: {screen_id}, tip: {type(screen_id)}")
+        screen_id = to_object_id(screen_id)
+        if not screen_id:
+            return []
         
-        # Farklı format olasılıklarını göz önünde bulunduralım
-        query_conditions = []
+        query = {
+            'screen_id': screen_id,
+            'status': cls.STATUS_ACTIVE
+        }
         
-        # String ID durumu
-        if isinstance(screen_id, str):
-            query_conditions.append({'screen_id': screen_id})
-            
-            # ObjectId dönüşümü yapabilirsek bu formatı da ekleyelim
+        with tracer.span('ScreenContent.find_by_screen_id', screen_id=screen_id) as span:
             try:
-                obj_id = ObjectId(screen_id)
-                query_conditions.append({'screen_id': obj_id})
+                # Tüm olası eşleşmeleri getir
+                result = list(mongo.db.screen_contents.find(query).sort('order', 1))
+                span.set(count=len(result))
+                return result
             except Exception as e:
-                print(f"DEBUG - ObjectId dönüşüm hatası: {str(e)}")
+                print(f"İçerik getirme hatası: {str(e)}")
+                import traceback
+                print(traceback.format_exc())
+                return []
+    
+    @classmethod
+    def find_with_media(cls, screen_id, media_status=STATUS_ACTIVE, projection=None):
+        """
+        Ekran içeriklerini medya bilgileriyle birlikte getir
         
-        # Halihazırda ObjectId ise 
-        elif isinstance(screen_id, ObjectId):
-            query_conditions.append({'screen_id': screen_id})
-            query_conditions.append({'screen_id': str(screen_id)})
+        Tüm medyalar tek bir $in sorgusu ile çözülür; medya durum filtresi
+        veritabanı tarafında uygulanır.
         
-        # Diğer durumlar için orijinal ID'yi kullan
-        else:
-            query_conditions.append({'screen_id': screen_id})
+        Args:
+            screen_id: Ekran ID
+            media_status: Sadece bu durumdaki medyaları ekle (None ise hepsi)
+            projection: Medya alan profili (bkz. Media.PROJECTIONS)
+            
+        Returns:
+            Sıralı içerik listesi; her içeriğin 'media' alanında medya belgesi
+            bulunur (bulunamayan veya filtrelenen medyalar için None)
+        """
+        content_list = cls.find_by_screen_id(screen_id)
         
-        # Her durum için OR sorgusu oluştur
-        query = {
-            '$or': query_conditions
-        }
+        media_ids = to_object_ids(content.get('media_id') for content in content_list)
         
-        # Status kontrolü ekle (eğer varsa)
-        query['status'] = cls.STATUS_ACTIVE
+        media_map = {}
+        if media_ids:
+            query = {'_id': {'$in': media_ids}}
+            if media_status:
+                query['status'] = media_status
+            from app.models.media import Media
+            for media in mongo.db.media.find(query, projection_for(Media, projection)):
+                media_map[str(media['_id'])] = media
         
-        print(f"DEBUG - screen_contents sorgusu: {query}")
+        for content in content_list:
+            content['media'] = media_map.get(str(content.get('media_id')))
         
-        try:
-            # Tüm olası eşleşmeleri getir
-            result = list(mongo.db.screen_contents.find(query).sort('order', 1))
-            print(f"DEBUG - Bulunan içerikler: {len(result)}")
-            return result
-        except Exception as e:
-            print(f"DEBUG - İçerik getirme hatası: {str(e)}")
-            import traceback
-            print(traceback.format_exc())
-            return []
+        return content_list
     
     @classmethod
     def update(cls, content_id, data):
@@ -139,6 +189,12 @@ class ScreenContent:
             {'$set': update_data}
         )
         
+        # Player manifestini geçersiz işaretle
+        if result.modified_count > 0:
+            content = mongo.db.screen_contents.find_one({'_id': content_id}, {'screen_id': 1})
+            if content:
+                ScreenManifest.invalidate(content.get('screen_id'))
+        
         return result.modified_count > 0
     
     @classmethod
@@ -152,60 +208,180 @@ class ScreenContent:
             except:
                 return False
         
-        result = mongo.db.screen_contents.delete_one({'_id': content_id})
+        content = mongo.db.screen_contents.find_one_and_delete({'_id': content_id}, {'screen_id': 1})
         
-        return result.deleted_count > 0
+        # Player manifestini geçersiz işaretle
+        if content:
+            ScreenManifest.invalidate(content.get('screen_id'))
+        
+        return content is not None
     
     @classmethod
     def delete_by_screen(cls, screen_id):
         """
         Ekrana ait tüm içerikleri sil
         """
-        print(f"DEBUG - ScreenContent.delete_by_screen çağrıldı: screen_id={screen_id}, tip={type(screen_id)}")
+        screen_id = to_object_id(screen_id)
+        if not screen_id:
+            return 0
         
-        # ObjectId formatına çevirme
-        if isinstance(screen_id, str):
-            try:
-                obj_id = ObjectId(screen_id)
-            except:
-                obj_id = None
-                print(f"DEBUG - screen_id ObjectId'ye çevrilemedi: {screen_id}")
-        else:
-            obj_id = screen_id
+        query = {'screen_id': screen_id}
         
-        # Her iki format için de sorgu yap 
-        query = {
-            '$or': [
-                {'screen_id': screen_id},  # String format
-                {'screen_id': obj_id}  # ObjectId format (eğer çevrilebildiyse)
-            ]
-        }
+        with tracer.span('ScreenContent.delete_by_screen', screen_id=screen_id) as span:
+            result = mongo.db.screen_contents.delete_many(query)
+            deleted_count = result.deleted_count
+            span.set(deleted=deleted_count)
+        
+        # Player manifestini geçersiz işaretle
+        ScreenManifest.invalidate(screen_id)
         
-        print(f"DEBUG - Silinecek içerikler için sorgu: {query}")
+        return deleted_count
+    
+    @classmethod
+    def sync(cls, screen_id, items):
+        """
+        Ekran içeriklerini verilen listeyle eşitle
         
-        # Silinecek kayıtları göster
-        matching_records = list(mongo.db.screen_contents.find(query))
-        print(f"DEBUG - Eşleşen içerik sayısı: {len(matching_records)}")
-        for record in matching_records:
-            print(f"DEBUG - Silinecek içerik: {record.get('_id')}, media_id: {record.get('media_id')}")
+        Mevcut içerikler silinip yeniden oluşturulmaz; hedef liste ile mevcut
+        satırlar arasındaki fark hesaplanır ve tek bir sıralı (ordered)
+        bulk_write ile uygulanır. Aynı medyaya ait mevcut satırlar yeniden
+        kullanılır (yalnızca sıra, süre veya durumu değiştiyse güncellenir),
+        fazla satırlar silinir, eksikler eklenir.
         
-        # Silme işlemi
-        result = mongo.db.screen_contents.delete_many(query)
-        deleted_count = result.deleted_count
-        print(f"DEBUG - Silinen içerik sayısı: {deleted_count}")
+        Player'lar içerik listesini doğrudan değil manifest üzerinden okur.
+        Manifest yazmadan önce ve sonra geçersiz işaretlenir: yazma sürerken
+        derlenen bir manifest taze kaydedilmez, yazma bitince de yeniden
+        derlenir. Böylece player'lar eski listeyi ya da yeni listenin
+        tamamını görür.
         
-        return deleted_count
+        Args:
+            screen_id: Ekran ID
+            items: Sıralı [{'media_id', 'display_time', 'order'}, ...] listesi;
+                öğenin order değeri (playlist sırası) aynen kullanılır, böylece
+                playlist'te tek öğe taşındığında tek satır güncellenir. order
+                yoksa veya önceki öğeninkinden büyük değilse bir önceki sıranın
+                STEP fazlası verilir
+            
+        Returns:
+            {'inserted', 'updated', 'deleted', 'unchanged'} sayıları
+        """
+        screen_id = to_object_id(screen_id)
+        stats = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        if not screen_id:
+            return stats
+        
+        collection = mongo.db.screen_contents
+        
+        # Aynı medyaya ait mevcut satırlar sıralarına göre yeniden kullanılır
+        existing = {}
+        for content in collection.find(
+            {'screen_id': screen_id},
+            {'media_id': 1, 'order': 1, 'display_time': 1, 'status': 1}
+        ).sort([('order', 1), ('_id', 1)]):
+            existing.setdefault(to_object_id(content.get('media_id')), []).append(content)
+        
+        now = datetime.utcnow()
+        inserts = []
+        updates = []
+        order = 0
+        for item in items:
+            media_id = to_object_id(item.get('media_id'))
+            if not media_id:
+                continue
+            rank = item.get('order')
+            order = rank if isinstance(rank, (int, float)) and rank > order else order + ranking.STEP
+            display_time = item.get('display_time')
+            target = {'order': order, 'display_time': display_time, 'status': cls.STATUS_ACTIVE}
+            
+            candidates = existing.get(media_id)
+            if not candidates:
+                inserts.append(InsertOne(dict(
+                    target, screen_id=screen_id, media_id=media_id, created_at=now, updated_at=now
+                )))
+                continue
+            
+            content = candidates.pop(0)
+            changes = {field: value for field, value in target.items() if content.get(field) != value}
+            if changes:
+                changes['updated_at'] = now
+                updates.append(UpdateOne({'_id': content['_id']}, {'$set': changes}))
+            else:
+                stats['unchanged'] += 1
+        
+        # Hedef listede karşılığı kalmayan satırlar
+        removed = [content['_id'] for contents in existing.values() for content in contents]
+        
+        # Önce eklemeler, sonra güncellemeler, en son silmeler
+        operations = inserts + updates
+        if removed:
+            operations.append(DeleteMany({'_id': {'$in': removed}}))
+        
+        if operations:
+            # Yazma sırasında derlenen manifest yarım listeyi taze saymasın
+            ScreenManifest.invalidate(screen_id)
+            
+            with tracer.span('ScreenContent.sync', screen_id=screen_id) as span:
+                result = collection.bulk_write(operations, ordered=True)
+                span.set(operations=len(operations))
+            
+            stats['inserted'] = result.inserted_count
+            stats['updated'] = result.modified_count
+            stats['deleted'] = result.deleted_count
+            
+            # Sonradan eklenecek içerikler playlist öğelerinin ardına düşsün
+            ranking.reserve(mongo.db.screens, screen_id, 'content_order_seq', order)
+            
+            # Player manifestini yeni liste için tekrar geçersiz işaretle
+            ScreenManifest.invalidate(screen_id)
+        
+        return stats
+    
+    @classmethod
+    def next_order(cls, screen_id):
+        """Ekranın sonuna eklenecek içerik için benzersiz sıra al (bkz. ranking.next_rank)"""
+        screen_id = to_object_id(screen_id)
+        return ranking.next_rank(
+            mongo.db.screens, screen_id, 'content_order_seq',
+            mongo.db.screen_contents, {'screen_id': screen_id}
+        )
+    
+    @classmethod
+    def reorder_screen_contents(cls, screen_id, content_ids):
+        """
+        Ekran içeriklerini verilen sıraya getir
+        
+        Tek bir içeriğin taşınması tek belge yazar; diğer sıralamalar tek bir
+        bulk_write ile uygulanır (bkz. ranking.reorder). Listede olmayan
+        içerikler mevcut sıralarıyla sona alınır.
+        
+        Args:
+            screen_id: Ekran ID
+            content_ids: İstenen sırada içerik ID'leri
+            
+        Returns:
+            Sırası değişen içerik sayısı
+        """
+        screen_id = to_object_id(screen_id)
+        if not screen_id:
+            return 0
+        
+        written = ranking.reorder(
+            mongo.db.screen_contents, {'screen_id': screen_id}, content_ids,
+            mongo.db.screens, screen_id, 'content_order_seq'
+        )
+        
+        if written:
+            ScreenManifest.invalidate(screen_id)
+        return written
     
     @classmethod
     def count_by_screen(cls, screen_id):
         """
         Ekrana ait içerik sayısını döndür
         """
-        if isinstance(screen_id, str):
-            try:
-                screen_id = ObjectId(screen_id)
-            except:
-                return 0
+        screen_id = to_object_id(screen_id)
+        if not screen_id:
+            return 0
         
         return mongo.db.screen_contents.count_documents({'screen_id': screen_id})
     
@@ -220,23 +396,12 @@ class ScreenContent:
         Returns:
             Medyanın kullanıldığı ekran içeriği sayısı
         """
-        # String ID'leri ObjectId'ye çevirme girişimi
-        media_id_str = media_id
-        if isinstance(media_id, str):
-            try:
-                media_id_obj = ObjectId(media_id)
-            except:
-                media_id_obj = None
-        else:
-            media_id_obj = media_id
-            media_id_str = str(media_id)
-            
-        # Her iki format için sorgu oluştur
+        media_id = to_object_id(media_id)
+        if not media_id:
+            return 0
+        
         query = {
-            '$or': [
-                {'media_id': media_id_str},  # String format
-                {'media_id': media_id_obj}   # ObjectId format
-            ],
+            'media_id': media_id,
             'status': cls.STATUS_ACTIVE
         }
         
@@ -254,53 +419,35 @@ class ScreenContent:
         Returns:
             Silinen içerik sayısı
         """
-        print(f"DEBUG - ScreenContent.delete_by_media_id çağrıldı: media_id={media_id}, tip={type(media_id)}")
+        media_id = to_object_id(media_id)
+        if not media_id:
+            return 0
         
-        # String ID'leri ObjectId'ye çevirme girişimi
-        media_id_str = media_id
-        if isinstance(media_id, str):
-            try:
-                media_id_obj = ObjectId(media_id)
-            except:
-                media_id_obj = None
-        else:
-            media_id_obj = media_id
-            media_id_str = str(media_id)
-            
-        # Her iki format için sorgu oluştur
-        query = {
-            '$or': [
-                {'media_id': media_id_str},  # String format
-                {'media_id': media_id_obj}   # ObjectId format
-            ]
-        }
+        query = {'media_id': media_id}
         
-        print(f"DEBUG - Silinecek içerikler için sorgu: {query}")
+        with tracer.span('ScreenContent.delete_by_media_id', media_id=media_id) as span:
+            result = mongo.db.screen_contents.delete_many(query)
+            deleted_count = result.deleted_count
+            span.set(deleted=deleted_count)
         
-        # Silinecek kayıtları göster
-        matching_records = list(mongo.db.screen_contents.find(query))
-        print(f"DEBUG - Eşleşen içerik sayısı: {len(matching_records)}")
-        for record in matching_records:
-            print(f"DEBUG - Silinecek içerik: {record.get('_id')}, screen_id: {record.get('screen_id')}")
-        
-        # Silme işlemi
-        result = mongo.db.screen_contents.delete_many(query)
-        deleted_count = result.deleted_count
-        print(f"DEBUG - Silinen içerik sayısı: {deleted_count}")
+        # Bu medyayı kullanan player manifestlerini geçersiz işaretle
+        ScreenManifest.invalidate_media(media_id)
         
         return deleted_count
     
     def __init__(self, _id, screen_id, media_id, order=1, display_time=None, 
-                 created_at=None, updated_at=None, **kwargs):
+                 status=STATUS_ACTIVE, created_at=None, updated_at=None, **kwargs):
         """Yeni bir içerik örneği başlat"""
         self.id = str(_id)
         self.screen_id = screen_id
         self.media_id = media_id
         self.order = order
         self.display_time = display_time
+        self.status = status
         self.created_at = created_at
         self.updated_at = updated_at
         self.media = None  # Medya nesnesi sonradan yüklenebilir
+        self._extra = kwargs or None
     
     def update(self, **kwargs):
         """İçerik bilgilerini güncelle"""
@@ -319,6 +466,9 @@ class ScreenContent:
             {"$set": updates}
         )
         
+        # Player manifestini geçersiz işaretle
+        ScreenManifest.invalidate(self.screen_id)
+        
         # Nesne bilgilerini güncelle
         for key, value in updates.items():
             setattr(self, key, value)
@@ -328,6 +478,11 @@ class ScreenContent:
     def delete(self):
         """İçeriği sil"""
         result = mongo.db.screen_contents.delete_one({"_id": ObjectId(self.id)})
+        
+        # Player manifestini geçersiz işaretle
+        if result.deleted_count > 0:
+            ScreenManifest.invalidate(self.screen_id)
+        
         return result.deleted_count > 0
     
     def get_media(self):
@@ -0,0 +1,466 @@
+"""
+Ekran Manifest Modeli: Player API'lerinin okuduğu, önceden derlenmiş ekran içerik listesini yönetir
+"""
+import hashlib
+import json
+from datetime import datetime
+from bson import ObjectId
+from pymongo import IndexModel, ReturnDocument
+from app import mongo
+from app.utils.ids import to_object_id
+from app.utils.manifest_watcher import manifest_watcher
+from app.utils.projections import projection_for
+
+class ScreenManifest:
+    """
+    Ekran manifest modeli
+
+    Her ekran için player'ın ihtiyaç duyduğu ekran bilgileri ve sıralı içerik listesi
+    tek bir belge olarak saklanır. Player istekleri bu belgeyi tek sorgu ile okur.
+    Belge, ekranın içerikleri, içeriklerin kullandığı medyalar veya ekranın kendisi
+    değiştiğinde geçersiz (stale) işaretlenir ve ilk okumada yeniden derlenir.
+
+    Playlist'i bağlı modda (ScreenPlaylist.MODE_LINKED) atanmış ekranlarda
+    içerik listesi screen_contents kopyalarından değil, doğrudan playlist
+    öğelerinden çözülür; playlist değiştiğinde yalnızca ona bağlı manifestler
+    tek bir update_many ile geçersiz işaretlenir.
+
+    Alanlar:
+    - screen_id: Ekran ID (ObjectId)
+    - api_key: Ekranın API anahtarı
+    - screen: Player'a gönderilen ekran bilgileri
+    - items: Sıralı içerik listesi (medya bilgileri ile birlikte)
+    - media_ids: Ekran içeriklerinin referans verdiği medya ID'leri
+    - playlist_id: Bağlı moddaki ekranlarda içeriklerin okunduğu playlist
+    - version: Ekran bilgileri ve içerik listesinin özeti (ETag olarak kullanılır)
+    - stale: Yeniden derlenmesi gerekiyor mu?
+    - generation: Her geçersiz işaretlemede artan sayaç; derleme yalnızca
+      okumaya başladığı nesil hâlâ geçerliyse kaydedilir (bkz. build)
+    - built_at: Derlenme zamanı
+
+    Her yeni sürümün içerik listesi screen_manifest_history koleksiyonunda da
+    saklanır; player'lara bildikleri sürümden bu yana değişen öğeler (delta)
+    bu geçmiş üzerinden hesaplanır. Ekran başına son HISTORY_SIZE sürüm tutulur.
+    """
+
+    # Değiştiğinde manifestin yeniden derlenmesini gerektiren ekran alanları
+    SCREEN_FIELDS = ('name', 'orientation', 'resolution', 'refresh_rate', 'show_clock', 'status', 'api_key')
+
+    # Delta hesaplamak için ekran başına saklanan geçmiş sürüm sayısı
+    HISTORY_SIZE = 20
+
+    # Derleme sırasında geçersiz işaretlenen manifest için deneme sayısı
+    BUILD_ATTEMPTS = 3
+
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'screen_manifests': [
+            IndexModel([('screen_id', 1)], name='screen_unique', unique=True),
+            IndexModel([('api_key', 1)], name='api_key'),
+            IndexModel([('media_ids', 1)], name='media_ids'),
+            IndexModel([('playlist_id', 1)], name='playlist_id', sparse=True),
+        ],
+        'screen_manifest_history': [
+            IndexModel([('screen_id', 1), ('version', 1)], name='screen_version'),
+            IndexModel([('screen_id', 1), ('created_at', -1)], name='screen_created'),
+        ]
+    }
+
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'ScreenManifest.find_by_api_key', 'collection': 'screen_manifests',
+         'filter': {'api_key': ''}},
+        {'name': 'ScreenManifest.invalidate_media', 'collection': 'screen_manifests',
+         'filter': {'media_ids': ObjectId()}},
+        {'name': 'ScreenManifest.invalidate_playlist', 'collection': 'screen_manifests',
+         'filter': {'playlist_id': ObjectId()}},
+        {'name': 'ScreenManifest.find_version', 'collection': 'screen_manifest_history',
+         'filter': {'screen_id': ObjectId(), 'version': ''}},
+        {'name': 'ScreenManifest._save_history', 'collection': 'screen_manifest_history',
+         'filter': {'screen_id': ObjectId()}, 'sort': [('created_at', -1)]},
+    ]
+
+    @staticmethod
+    def get_collection():
+        """MongoDB koleksiyonuna erişim sağlar"""
+        return mongo.db.screen_manifests
+
+    @staticmethod
+    def _to_object_id(value):
+        """ID değerini ObjectId'ye çevir, çevrilemezse None döndür"""
+        return to_object_id(value)
+
+    @staticmethod
+    def get_history_collection():
+        """Manifest sürüm geçmişi koleksiyonuna erişim sağlar"""
+        return mongo.db.screen_manifest_history
+
+    @classmethod
+    def find_by_api_key(cls, api_key):
+        """
+        API anahtarına göre manifesti getir
+
+        Güncel bir manifest varsa tek sorgu ile döner; yoksa veya geçersiz
+        işaretlenmişse ekran için yeniden derlenir.
+        """
+        manifest = cls.get_collection().find_one({'api_key': api_key})
+
+        if manifest and not manifest.get('stale') and manifest.get('version'):
+            return manifest
+
+        if manifest:
+            screen_data = cls._find_screen({'_id': manifest['screen_id']})
+        else:
+            screen_data = cls._find_screen({'api_key': api_key})
+
+        # Anahtar yenilenmiş veya ekran silinmiş olabilir
+        if not screen_data or screen_data.get('api_key') != api_key:
+            if manifest:
+                cls.get_collection().delete_one({'_id': manifest['_id']})
+            return None
+
+        manifest = cls.build(screen_data)
+        # Derleme sırasında anahtar yenilenmiş olabilir
+        if not manifest or manifest.get('api_key') != api_key:
+            return None
+        return manifest
+
+    @classmethod
+    def _find_screen(cls, query):
+        """Ekran belgesini yalnızca manifestin kullandığı alanlarla oku"""
+        from app.models.screen import Screen
+        return mongo.db.screens.find_one(query, projection_for(Screen, 'manifest'))
+
+    @classmethod
+    def find_by_screen_id(cls, screen_id):
+        """
+        Ekran ID'sine göre güncel manifesti getir (gerekirse yeniden derle)
+        """
+        obj_id = cls._to_object_id(screen_id)
+        if not obj_id:
+            return None
+
+        manifest = cls.get_collection().find_one({'screen_id': obj_id})
+        if manifest and not manifest.get('stale') and manifest.get('version'):
+            return manifest
+
+        screen_data = cls._find_screen({'_id': obj_id})
+        if not screen_data:
+            cls.get_collection().delete_one({'screen_id': obj_id})
+            return None
+
+        return cls.build(screen_data)
+
+    @classmethod
+    def build(cls, screen_data):
+        """
+        Ekran belgesinden manifesti derle ve kaydet
+
+        Her denemede önce manifestin nesli (generation) okunur, ardından ekran
+        belgesi ve içerikler okunur; yeni manifest yalnızca nesil değişmediyse
+        yazılır. Okumalar sürerken gelen bir invalidate (ekran güncellemesi
+        dahil) nesli artırdığı için eski ekran alanları veya içerik listesi
+        güncelmiş gibi kaydedilmez; derleme BUILD_ATTEMPTS kez denenir, yine
+        yazılamazsa manifest geçersiz kalır ve sonraki istekte yeniden derlenir.
+
+        Args:
+            screen_data: MongoDB ekran belgesi (yalnızca _id kullanılır; alanlar
+                nesil okunduktan sonra yeniden okunur)
+
+        Returns:
+            Derlenen manifest belgesi veya ekran silinmişse None
+        """
+        screen_id = screen_data['_id']
+        collection = cls.get_collection()
+        manifest = None
+
+        for _ in range(cls.BUILD_ATTEMPTS):
+            # Manifest yoksa geçersiz bir yer tutucu oluşturulur ki derleme
+            # sırasındaki invalidate çağrıları da nesli artırabilsin
+            state = collection.find_one_and_update(
+                {'screen_id': screen_id},
+                {'$setOnInsert': {'stale': True, 'generation': 0}},
+                projection={'generation': 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            generation = state.get('generation')
+
+            # Ekran alanları nesilden sonra okunur; arada yapılan güncelleme
+            # nesli artırdığı için aşağıdaki yazma eşleşmez
+            screen_data = cls._find_screen({'_id': screen_id})
+            if not screen_data:
+                collection.delete_one({'screen_id': screen_id})
+                return None
+
+            manifest = cls._compile(screen_data)
+            manifest['generation'] = generation or 0
+
+            # Eski belgelerde generation alanı yoktur; None eksik alanla da eşleşir
+            previous = collection.find_one_and_replace(
+                {'screen_id': screen_id, 'generation': generation},
+                manifest,
+                projection={'version': 1}
+            )
+            if previous is None:
+                continue
+
+            # Sürüm değiştiyse yeni içerik listesini geçmişe ekle
+            if previous.get('version') != manifest['version']:
+                cls._save_history(manifest)
+            return manifest
+
+        # Sürekli değişen ekran: derlenen liste bu isteğe verilir, kayıt geçersiz kalır
+        return manifest
+
+    @classmethod
+    def _compile(cls, screen_data):
+        """Ekran belgesi ve içeriklerinden manifest belgesini oluştur (kaydetmeden)"""
+        from app.models.screen_content import ScreenContent
+        from app.models.screen_playlist import ScreenPlaylist
+
+        screen_id = screen_data['_id']
+
+        # Bağlı moddaki ekranlar içeriklerini doğrudan playlist'ten okur
+        playlist_id = None
+        relation = ScreenPlaylist.find_by_screen_id(screen_id)
+        if relation and relation.get('mode') == ScreenPlaylist.MODE_LINKED:
+            playlist_id = relation.get('playlist_id')
+
+        # İçerikler ve aktif medyaları tek $in sorgusu ile birlikte çözülür
+        if playlist_id:
+            from app.models.playlist_media import PlaylistMedia
+            content_list = PlaylistMedia.find_with_media(playlist_id, projection='manifest')
+        else:
+            content_list = ScreenContent.find_with_media(screen_id, projection='manifest')
+
+        items = []
+        media_ids = []
+        for index, content in enumerate(content_list):
+            # Pasif medyalar da izlenir ki aktifleştiklerinde manifest yenilensin
+            media_obj_id = cls._to_object_id(content.get('media_id'))
+            if media_obj_id:
+                media_ids.append(media_obj_id)
+
+            media = content.get('media')
+            if not media:
+                continue
+
+            items.append({
+                'id': str(content.get('_id')),
+                'media_id': str(media['_id']),
+                'title': media.get('title', ''),
+                'description': media.get('description', ''),
+                'file_type': media.get('file_type', ''),
+                'width': media.get('width', 0),
+                'height': media.get('height', 0),
+                'duration': media.get('duration', 0),
+                'display_time': content.get('display_time') or media.get('display_time', 10),
+                'media_display_time': media.get('display_time', 10),
+                'file_url': f"/uploads/{media.get('filename', '')}",
+                'orientation': media.get('orientation', 'horizontal'),
+                'category': media.get('category', ''),
+                'public': media.get('is_public', False),
+                'created_at': media.get('created_at'),
+                'order': content.get('order', index)
+            })
+
+        # İçerikler sıraya göre sıralanıyor
+        items.sort(key=lambda x: x['order'])
+
+        screen = {
+            'id': str(screen_id),
+            'name': screen_data.get('name', ''),
+            'status': screen_data.get('status'),
+            'orientation': screen_data.get('orientation', 'horizontal'),
+            'resolution': screen_data.get('resolution', '1920x1080'),
+            'refresh_rate': screen_data.get('refresh_rate', 15),
+            'show_clock': screen_data.get('show_clock', True)
+        }
+        
+        manifest = {
+            'screen_id': screen_id,
+            'api_key': screen_data.get('api_key'),
+            'screen': screen,
+            'items': items,
+            'media_ids': media_ids,
+            'version': cls.compute_version(screen, items),
+            'stale': False,
+            'built_at': datetime.utcnow()
+        }
+
+        if playlist_id:
+            manifest['playlist_id'] = playlist_id
+
+        return manifest
+
+    @classmethod
+    def _save_history(cls, manifest):
+        """
+        Manifest sürümünü geçmişe kaydet ve ekranın eski sürümlerini buda
+        """
+        history = cls.get_history_collection()
+        try:
+            # Geri dönülen bir sürüm (A -> B -> A) en yeni sayılır; aksi halde
+            # eski created_at ile budanır ve player'lar delta alamaz
+            history.update_one(
+                {'screen_id': manifest['screen_id'], 'version': manifest['version']},
+                {
+                    '$set': {'created_at': manifest['built_at']},
+                    '$setOnInsert': {
+                        'screen': manifest['screen'],
+                        'items': manifest['items']
+                    }
+                },
+                upsert=True
+            )
+
+            # HISTORY_SIZE'dan eski sürümleri sil
+            oldest_kept = list(
+                history.find({'screen_id': manifest['screen_id']}, {'created_at': 1})
+                .sort('created_at', -1)
+                .skip(cls.HISTORY_SIZE - 1)
+                .limit(1)
+            )
+            if oldest_kept:
+                history.delete_many({
+                    'screen_id': manifest['screen_id'],
+                    'created_at': {'$lt': oldest_kept[0]['created_at']}
+                })
+        except Exception as e:
+            # Geçmiş yazılamazsa player'lar tam senkronizasyona düşer
+            print(f"Manifest geçmişi kaydedilirken hata: {str(e)}")
+
+    @classmethod
+    def find_version(cls, screen_id, version):
+        """
+        Ekranın geçmişteki belirli bir manifest sürümünü getir
+
+        Returns:
+            {'screen': ..., 'items': [...]} veya sürüm artık tutulmuyorsa None
+        """
+        obj_id = cls._to_object_id(screen_id)
+        if not obj_id or not version:
+            return None
+
+        return cls.get_history_collection().find_one(
+            {'screen_id': obj_id, 'version': version},
+            {'screen': 1, 'items': 1}
+        )
+
+    @staticmethod
+    def diff_items(old_items, new_items, key='id'):
+        """
+        İki içerik listesi arasındaki farkı hesapla
+
+        Args:
+            old_items: Player'ın bildiği öğe listesi
+            new_items: Güncel öğe listesi
+            key: Öğeleri eşleştiren alan
+
+        Returns:
+            {'added': [...], 'removed': [id, ...], 'modified': [...], 'order': [id, ...] veya None}
+            Sıra değişmediyse 'order' None döner.
+        """
+        old_by_id = {item[key]: item for item in old_items}
+        new_ids = [item[key] for item in new_items]
+
+        added = []
+        modified = []
+        for item in new_items:
+            old_item = old_by_id.get(item[key])
+            if old_item is None:
+                added.append(item)
+            elif old_item != item:
+                modified.append(item)
+
+        new_id_set = set(new_ids)
+        removed = [item_id for item_id in old_by_id if item_id not in new_id_set]
+
+        # Kalan öğelerin sırası değiştiyse veya öğe eklendiyse tam sıra gönderilir
+        old_ids = [item[key] for item in old_items if item[key] in new_id_set]
+        order = None
+        if added or old_ids != [item_id for item_id in new_ids if item_id in old_by_id]:
+            order = new_ids
+
+        return {
+            'added': added,
+            'removed': removed,
+            'modified': modified,
+            'order': order
+        }
+
+    @staticmethod
+    def compute_version(screen, items):
+        """
+        Ekran bilgileri ve içerik listesinden içerik sürümü üret
+
+        Aynı içerik her derlemede aynı sürümü verir; böylece geçersiz işaretlenip
+        değişmeden yeniden derlenen manifestler player'ın önbelleğini bozmaz.
+        """
+        payload = json.dumps({'screen': screen, 'items': items}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def invalidate(cls, screen_id):
+        """
+        Ekranın manifestini geçersiz işaretle
+        """
+        obj_id = cls._to_object_id(screen_id)
+        if not obj_id:
+            return 0
+
+        result = cls.get_collection().update_one(
+            {'screen_id': obj_id},
+            {'$set': {'stale': True}, '$inc': {'generation': 1}}
+        )
+        manifest_watcher.notify()
+        return result.modified_count
+
+    @classmethod
+    def invalidate_media(cls, media_id):
+        """
+        Belirli bir medyayı kullanan tüm manifestleri geçersiz işaretle
+        """
+        obj_id = cls._to_object_id(media_id)
+        if not obj_id:
+            return 0
+
+        result = cls.get_collection().update_many(
+            {'media_ids': obj_id},
+            {'$set': {'stale': True}, '$inc': {'generation': 1}}
+        )
+        if result.modified_count:
+            manifest_watcher.notify()
+        return result.modified_count
+
+    @classmethod
+    def invalidate_playlist(cls, playlist_id):
+        """
+        Playlist'e bağlı moddaki tüm ekranların manifestlerini geçersiz işaretle
+        """
+        obj_id = cls._to_object_id(playlist_id)
+        if not obj_id:
+            return 0
+
+        result = cls.get_collection().update_many(
+            {'playlist_id': obj_id},
+            {'$set': {'stale': True}, '$inc': {'generation': 1}}
+        )
+        if result.modified_count:
+            manifest_watcher.notify()
+        return result.modified_count
+
+    @classmethod
+    def delete_by_screen(cls, screen_id):
+        """
+        Ekranın manifestini sil
+        """
+        obj_id = cls._to_object_id(screen_id)
+        if not obj_id:
+            return 0
+
+        result = cls.get_collection().delete_one({'screen_id': obj_id})
+        cls.get_history_collection().delete_many({'screen_id': obj_id})
+        manifest_watcher.notify()
+        return result.deleted_count
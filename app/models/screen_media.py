@@ -4,10 +4,15 @@ Ekran-Medya ilişkisi modeli: Ekranlara atanmış medyaların ilişkilerini yön
 from datetime import datetime
 from bson.objectid import ObjectId
 from app import mongo
+from app.utils import ranking
+from app.utils.ids import to_object_id
 
 class ScreenMedia:
     """
     Ekran-Medya ilişkisini yöneten model sınıfı
+    
+    order alanı kesirli sıra anahtarıdır (bkz. app/utils/ranking.py); sona
+    eklemeler sırayı ekran belgesindeki media_order_seq sayacından alır.
     """
     
     # Statü değerleri
@@ -15,8 +20,19 @@ class ScreenMedia:
     STATUS_INACTIVE = 'inactive'
     
     @classmethod
-    def create(cls, screen_id, media_id, order=0, display_time=None, status=STATUS_ACTIVE):
-        """Yeni bir ekran-medya ilişkisi oluştur"""
+    def create(cls, screen_id, media_id, order=None, display_time=None, status=STATUS_ACTIVE):
+        """Yeni bir ekran-medya ilişkisi oluştur (sıra verilmezse sona eklenir)"""
+        # Aynı ekran ve medya ilişkisi varsa güncelle
+        existing = mongo.db.screen_media.find_one({
+            "screen_id": screen_id,
+            "media_id": media_id
+        })
+        
+        if order is None:
+            order = (existing or {}).get("order")
+        if order is None:
+            order = cls.next_order(screen_id)
+        
         screen_media_data = {
             "screen_id": screen_id,
             "media_id": media_id,
@@ -27,12 +43,6 @@ class ScreenMedia:
             "updated_at": datetime.now()
         }
         
-        # Aynı ekran ve medya ilişkisi varsa güncelle
-        existing = mongo.db.screen_media.find_one({
-            "screen_id": screen_id,
-            "media_id": media_id
-        })
-        
         if existing:
             screen_media_data["_id"] = existing["_id"]
             mongo.db.screen_media.replace_one({"_id": existing["_id"]}, screen_media_data)
@@ -89,18 +99,29 @@ class ScreenMedia:
         mongo.db.screen_media.delete_many({"screen_id": screen_id})
         return True
     
+    @classmethod
+    def next_order(cls, screen_id):
+        """Ekranın sonuna eklenecek medya için benzersiz sıra al (bkz. ranking.next_rank)"""
+        return ranking.next_rank(
+            mongo.db.screens, to_object_id(screen_id), 'media_order_seq',
+            mongo.db.screen_media, {"screen_id": screen_id}
+        )
+    
     @classmethod
     def reorder_screen_media(cls, screen_id, media_order):
         """
         Ekrandaki medyaları yeniden sırala
         
+        Tek bir öğenin taşınması tek belge yazar; diğer sıralamalar tek bir
+        bulk_write ile uygulanır (bkz. ranking.reorder).
+        
         media_order: [{"media_id": "...", "order": 1}, ...]
         """
-        for item in media_order:
-            mongo.db.screen_media.update_one(
-                {"screen_id": screen_id, "media_id": item["media_id"]},
-                {"$set": {"order": item["order"], "updated_at": datetime.now()}}
-            )
+        media_ids = [item["media_id"] for item in sorted(media_order, key=lambda item: item.get("order", 0))]
+        ranking.reorder(
+            mongo.db.screen_media, {"screen_id": screen_id}, media_ids,
+            mongo.db.screens, to_object_id(screen_id), 'media_order_seq', key='media_id'
+        )
         return True
     
     def __init__(self, _id, screen_id, media_id, order=0, display_time=None, 
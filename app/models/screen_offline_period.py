@@ -0,0 +1,342 @@
+"""
+Ekran Offline Dönem Modeli: Player'ların bildirdiği offline kalma dönemlerini ve günlük erişilebilirlik özetlerini tutar
+"""
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import IndexModel, UpdateOne
+from app import mongo
+
+class ScreenOfflinePeriod:
+    """
+    Ekran offline dönem modeli
+
+    Her offline dönem screen_offline_periods koleksiyonunda ayrı bir belgedir;
+    ekran belgesi dönem sayısıyla büyümez. Dönem kaydedilirken kapsadığı her UTC
+    günü için screen_uptime_daily koleksiyonundaki günlük özet $inc ile
+    güncellenir; erişilebilirlik raporları ham dönemleri taramadan bu özetlerden
+    hesaplanır.
+
+    Ham dönemler RETENTION_DAYS, günlük özetler ROLLUP_RETENTION_DAYS sonra
+    TTL indeksleriyle MongoDB tarafından silinir.
+
+    Alanlar (screen_offline_periods):
+    - screen_id: Ekran ID (ObjectId)
+    - start: Offline başlangıcı (UTC)
+    - end: Offline bitişi (UTC)
+    - duration_seconds: Süre (saniye)
+    - reported_at: Bildirilme zamanı
+    - payload: Player'ın gönderdiği ham veri
+
+    Alanlar (screen_uptime_daily):
+    - screen_id: Ekran ID (ObjectId)
+    - day: Gün başlangıcı (UTC)
+    - offline_seconds: Gün içindeki toplam offline süre
+    - periods: Gün içinde başlayan offline dönem sayısı
+    """
+
+    RETENTION_DAYS = 90
+    ROLLUP_RETENTION_DAYS = 730
+
+    # Hatalı saat bilgisiyle gelen dönemler bu süreyle sınırlanır
+    MAX_PERIOD = timedelta(days=31)
+
+    DAY_SECONDS = 86400
+
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'screen_offline_periods': [
+            IndexModel([('screen_id', 1), ('start', -1)], name='screen_start'),
+            IndexModel([('reported_at', 1)], name='reported_at_ttl',
+                       expireAfterSeconds=RETENTION_DAYS * DAY_SECONDS),
+        ],
+        'screen_uptime_daily': [
+            IndexModel([('screen_id', 1), ('day', 1)], name='screen_day_unique', unique=True),
+            IndexModel([('day', 1)], name='day_ttl',
+                       expireAfterSeconds=ROLLUP_RETENTION_DAYS * DAY_SECONDS),
+        ]
+    }
+
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'ScreenOfflinePeriod.find_by_screen', 'collection': 'screen_offline_periods',
+         'filter': {'screen_id': ObjectId()}, 'sort': [('start', -1)]},
+        {'name': 'ScreenOfflinePeriod.get_uptime', 'collection': 'screen_uptime_daily',
+         'filter': {'screen_id': ObjectId(), 'day': {'$gte': datetime(2000, 1, 1)}}, 'sort': [('day', 1)]},
+    ]
+
+    @staticmethod
+    def get_collection():
+        """MongoDB koleksiyonuna erişim sağlar"""
+        return mongo.db.screen_offline_periods
+
+    @staticmethod
+    def get_rollup_collection():
+        """Günlük özet koleksiyonuna erişim sağlar"""
+        return mongo.db.screen_uptime_daily
+
+    @staticmethod
+    def _parse_time(value):
+        """
+        Zaman değerini UTC datetime'a çevir
+
+        datetime, ISO 8601 metni veya epoch (saniye ya da milisaniye) kabul edilir.
+        """
+        if value is None or isinstance(value, bool):
+            return None
+
+        if isinstance(value, datetime):
+            parsed = value
+        elif isinstance(value, (int, float)):
+            # 1e11'den büyük değerler milisaniye kabul edilir
+            seconds = value / 1000 if value > 1e11 else value
+            try:
+                return datetime.utcfromtimestamp(seconds)
+            except (OverflowError, OSError, ValueError):
+                return None
+        elif isinstance(value, str):
+            text = value.strip()
+            if text.endswith('Z'):
+                text = text[:-1] + '+00:00'
+            try:
+                parsed = datetime.fromisoformat(text)
+            except ValueError:
+                try:
+                    return ScreenOfflinePeriod._parse_time(float(text))
+                except ValueError:
+                    return None
+        else:
+            return None
+
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    @classmethod
+    def build_period(cls, data, now=None):
+        """
+        Player'ın gönderdiği veriden offline dönem oluştur
+
+        Args:
+            data: {'start', 'end'} ve/veya {'duration'} (saniye) içeren sözlük
+                ya da yalnızca süre (saniye); bitiş verilmezse bildirim zamanı kabul edilir
+            now: Bildirim zamanı (varsayılan: şimdi)
+
+        Returns:
+            (start, end) veya veri yorumlanamıyorsa None
+        """
+        now = now or datetime.utcnow()
+
+        if isinstance(data, (int, float)) and not isinstance(data, bool):
+            data = {'duration': data}
+        if not isinstance(data, dict):
+            return None
+
+        start = cls._parse_time(data.get('start') or data.get('start_time'))
+        end = cls._parse_time(data.get('end') or data.get('end_time'))
+
+        duration = data.get('duration', data.get('duration_seconds'))
+        try:
+            duration = timedelta(seconds=float(duration)) if duration is not None else None
+        except (TypeError, ValueError):
+            duration = None
+
+        if start is None and end is None and duration is None:
+            return None
+
+        if start is None and duration is not None:
+            start = (end or now) - duration
+        if end is None:
+            end = start + duration if duration is not None else now
+
+        if start is None or end < start:
+            return None
+
+        end = min(end, now)
+        start = max(start, end - cls.MAX_PERIOD)
+
+        # Gelecekte başlayan dönem kırpılınca boş (veya negatif) kalır
+        if start >= end:
+            return None
+        return start, end
+
+    @classmethod
+    def _split_by_day(cls, start, end):
+        """Dönemi UTC gün sınırlarından böl: [(gün, saniye), ...]"""
+        parts = []
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day < end:
+            next_day = day + timedelta(days=1)
+            seconds = (min(end, next_day) - max(start, day)).total_seconds()
+            if seconds > 0:
+                parts.append((day, seconds))
+            day = next_day
+        return parts
+
+    @classmethod
+    def record(cls, screen_id, data, now=None):
+        """
+        Offline dönemi kaydet ve günlük özetleri güncelle
+
+        Args:
+            screen_id: Ekran ID
+            data: Player'ın gönderdiği offline dönem verisi (bkz. build_period)
+
+        Returns:
+            Kaydedilen dönem belgesi veya veri geçersizse None
+        """
+        now = now or datetime.utcnow()
+        period = cls.build_period(data, now)
+        if period is None:
+            return None
+
+        screen_id = ObjectId(str(screen_id))
+        start, end = period
+
+        document = {
+            'screen_id': screen_id,
+            'start': start,
+            'end': end,
+            'duration_seconds': (end - start).total_seconds(),
+            'reported_at': now,
+            'payload': data
+        }
+        document['_id'] = cls.get_collection().insert_one(document).inserted_id
+
+        cls._apply_rollups([document])
+        return document
+
+    @classmethod
+    def _apply_rollups(cls, documents):
+        """Dönem belgelerini günlük özetlere $inc ile yansıt"""
+        totals = {}
+        for document in documents:
+            parts = cls._split_by_day(document['start'], document['end'])
+            for index, (day, seconds) in enumerate(parts):
+                entry = totals.setdefault((document['screen_id'], day), {'offline_seconds': 0, 'periods': 0})
+                entry['offline_seconds'] += seconds
+                # Dönem başladığı günde sayılır
+                if index == 0:
+                    entry['periods'] += 1
+
+        operations = [
+            UpdateOne({'screen_id': screen_id, 'day': day}, {'$inc': inc}, upsert=True)
+            for (screen_id, day), inc in totals.items()
+        ]
+        if operations:
+            cls.get_rollup_collection().bulk_write(operations, ordered=False)
+        return len(operations)
+
+    @classmethod
+    def insert_many(cls, screen_id, periods, now=None):
+        """
+        Birden çok offline dönemi toplu kaydet (taşıma betiği için)
+
+        Returns:
+            (kaydedilen, yorumlanamayan) dönem sayıları
+        """
+        now = now or datetime.utcnow()
+        screen_id = ObjectId(str(screen_id))
+
+        documents = []
+        invalid = 0
+        for data in periods:
+            period = cls.build_period(data, now)
+            if period is None:
+                invalid += 1
+                continue
+            start, end = period
+            documents.append({
+                'screen_id': screen_id,
+                'start': start,
+                'end': end,
+                'duration_seconds': (end - start).total_seconds(),
+                # TTL süresi dönemin kendi zamanından işler
+                'reported_at': end,
+                'payload': data
+            })
+
+        if documents:
+            cls.get_collection().insert_many(documents, ordered=False)
+            cls._apply_rollups(documents)
+
+        return len(documents), invalid
+
+    @classmethod
+    def find_by_screen(cls, screen_id, limit=50):
+        """Ekranın en son offline dönemlerini getir"""
+        try:
+            screen_id = ObjectId(str(screen_id))
+        except Exception:
+            return []
+
+        return list(
+            cls.get_collection().find({'screen_id': screen_id}, {'payload': 0})
+            .sort('start', -1).limit(limit)
+        )
+
+    @classmethod
+    def get_uptime(cls, screen_id, days=30, now=None):
+        """
+        Ekranın günlük erişilebilirlik raporu
+
+        Args:
+            screen_id: Ekran ID
+            days: Bugün dahil geriye doğru gün sayısı
+
+        Returns:
+            {'days': [{'day', 'offline_seconds', 'periods', 'uptime_percent'}, ...],
+             'offline_seconds', 'uptime_percent'}
+        """
+        now = now or datetime.utcnow()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        first_day = today - timedelta(days=max(days, 1) - 1)
+
+        try:
+            screen_id = ObjectId(str(screen_id))
+        except Exception:
+            return {'days': [], 'offline_seconds': 0, 'uptime_percent': None}
+
+        rollups = {
+            rollup['day']: rollup
+            for rollup in cls.get_rollup_collection().find(
+                {'screen_id': screen_id, 'day': {'$gte': first_day}},
+                {'day': 1, 'offline_seconds': 1, 'periods': 1}
+            ).sort('day', 1)
+        }
+
+        report = []
+        total_seconds = total_offline = 0
+        day = first_day
+        while day <= today:
+            # Bugün için yalnızca geçen süre hesaba katılır
+            span = (now - day).total_seconds() if day == today else cls.DAY_SECONDS
+            rollup = rollups.get(day, {})
+            offline = min(rollup.get('offline_seconds', 0), span)
+
+            report.append({
+                'day': day,
+                'offline_seconds': offline,
+                'periods': rollup.get('periods', 0),
+                'uptime_percent': round(100 * (span - offline) / span, 2) if span > 0 else None
+            })
+            total_seconds += span
+            total_offline += offline
+            day += timedelta(days=1)
+
+        return {
+            'days': report,
+            'offline_seconds': total_offline,
+            'uptime_percent': round(100 * (total_seconds - total_offline) / total_seconds, 2) if total_seconds else None
+        }
+
+    @classmethod
+    def delete_by_screen(cls, screen_id):
+        """Ekrana ait tüm offline dönem ve özet kayıtlarını sil"""
+        try:
+            screen_id = ObjectId(str(screen_id))
+            result = cls.get_collection().delete_many({'screen_id': screen_id})
+            cls.get_rollup_collection().delete_many({'screen_id': screen_id})
+            return result.deleted_count
+        except Exception as e:
+            print(f"Offline dönem kayıtları silinirken hata: {str(e)}")
+            return 0
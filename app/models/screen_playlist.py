@@ -3,7 +3,10 @@ Ekran-Playlist İlişkisi Modeli: Ekranlar ve playlistler arasındaki ilişkiyi
 """
 from datetime import datetime
 from bson import ObjectId
+from pymongo import IndexModel
 from app import mongo
+from app.utils.tracing import tracer
+from app.utils.ids import to_object_id
 
 class ScreenPlaylist:
     """
@@ -14,23 +17,51 @@ class ScreenPlaylist:
     - screen_id: Ekran ID
     - playlist_id: Playlist ID
     - status: Durum (active, inactive)
+    - mode: Atama modu (copy, linked)
     - created_at: Oluşturulma zamanı
     - updated_at: Güncellenme zamanı
+    
+    copy modunda playlist öğeleri ekranın screen_contents satırlarına
+    kopyalanır ve playlist değiştiğinde her ekran ayrıca eşitlenir. linked
+    modunda ekran playlist'e doğrudan bağlıdır: manifest öğeleri okuma anında
+    playlist'ten çözülür (bkz. ScreenManifest.build) ve playlist düzenlemesi
+    ekran başına yazma gerektirmez. Eski kayıtlarda mode alanı yoksa copy
+    kabul edilir.
     """
     
     # Sabitler
     STATUS_ACTIVE = 'active'
     STATUS_INACTIVE = 'inactive'
     
+    MODE_COPY = 'copy'
+    MODE_LINKED = 'linked'
+    
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'screen_playlists': [
+            IndexModel([('screen_id', 1), ('status', 1), ('created_at', -1)], name='screen_status_created'),
+            IndexModel([('playlist_id', 1), ('status', 1)], name='playlist_status'),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'ScreenPlaylist.find_by_screen_id', 'collection': 'screen_playlists',
+         'filter': {'screen_id': ObjectId(), 'status': 'active'}, 'sort': [('created_at', -1)]},
+        {'name': 'ScreenPlaylist.find_by_playlist_id', 'collection': 'screen_playlists',
+         'filter': {'playlist_id': ObjectId(), 'status': 'active'}},
+    ]
+    
     @classmethod
     def create(cls, data):
         """
         Yeni ekran-playlist ilişkisi oluştur
         """
         screen_playlist = {
-            'screen_id': data.get('screen_id'),
-            'playlist_id': data.get('playlist_id'),
+            'screen_id': to_object_id(data.get('screen_id')),
+            'playlist_id': to_object_id(data.get('playlist_id')),
             'status': data.get('status', cls.STATUS_ACTIVE),
+            'mode': data.get('mode') or cls.default_mode(),
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
@@ -43,14 +74,52 @@ class ScreenPlaylist:
                 {'_id': existing['_id']},
                 screen_playlist
             )
-            return screen_playlist
+        else:
+            # Yeni kayıt
+            result = mongo.db.screen_playlists.insert_one(screen_playlist)
+            screen_playlist['_id'] = result.inserted_id
         
-        # Yeni kayıt
-        result = mongo.db.screen_playlists.insert_one(screen_playlist)
-        screen_playlist['_id'] = result.inserted_id
+        # Manifestin içerik kaynağı (playlist veya mod) değişmiş olabilir
+        from app.models.screen_manifest import ScreenManifest
+        ScreenManifest.invalidate(screen_playlist['screen_id'])
         
         return screen_playlist
     
+    @staticmethod
+    def default_mode():
+        """Yeni atamaların modu (PLAYLIST_ASSIGN_MODE ayarı)"""
+        from flask import current_app, has_app_context
+        if not has_app_context():
+            return ScreenPlaylist.MODE_COPY
+        mode = current_app.config.get('PLAYLIST_ASSIGN_MODE', ScreenPlaylist.MODE_COPY)
+        return mode if mode in (ScreenPlaylist.MODE_COPY, ScreenPlaylist.MODE_LINKED) else ScreenPlaylist.MODE_COPY
+    
+    @classmethod
+    def assign(cls, screen_id, playlist_id, mode=None):
+        """
+        Playlist'i ekrana ata
+        
+        copy modunda ekran içerikleri playlist ile eşitlenir; linked modunda
+        ekranın eski kopya içerikleri silinir ve manifest doğrudan playlist'ten
+        çözülür.
+        
+        Returns:
+            (ilişki belgesi, playlist öğe sayısı)
+        """
+        from app.models.screen_content import ScreenContent
+        
+        mode = mode or cls.default_mode()
+        
+        if mode == cls.MODE_LINKED:
+            screen_playlist = cls.create({'screen_id': screen_id, 'playlist_id': playlist_id, 'mode': mode})
+            ScreenContent.delete_by_screen(screen_id)
+            count = mongo.db.playlist_media.count_documents({'playlist_id': to_object_id(playlist_id)})
+        else:
+            count, stats = cls.sync_screen(screen_id, playlist_id)
+            screen_playlist = cls.create({'screen_id': screen_id, 'playlist_id': playlist_id, 'mode': mode})
+        
+        return screen_playlist, count
+    
     @classmethod
     def find_by_id(cls, relation_id):
         """
@@ -69,86 +138,54 @@ class ScreenPlaylist:
         """
         Ekran ID'sine göre playlist ilişkisini bul
         """
-        print(f"DEBUG - ScreenPlaylist.find_by_screen_id çağrıldı: {screen_id}")
-        
-        # Farklı format olasılıklarını göz önünde bulunduralım
-        query_conditions = []
-        
-        # String ID durumu
-        if isinstance(screen_id, str):
-            query_conditions.append({'screen_id': screen_id})
-            
-            # ObjectId dönüşümü yapabilirsek bu formatı da ekleyelim
-            try:
-                obj_id = ObjectId(screen_id)
-                query_conditions.append({'screen_id': obj_id})
-            except:
-                pass
-        
-        # Halihazırda ObjectId ise 
-        elif isinstance(screen_id, ObjectId):
-            query_conditions.append({'screen_id': screen_id})
-            query_conditions.append({'screen_id': str(screen_id)})
+        screen_id = to_object_id(screen_id)
+        if not screen_id:
+            return None
         
-        # Diğer durumlar için orijinal ID'yi kullan
-        else:
-            query_conditions.append({'screen_id': screen_id})
-        
-        # Her durum için OR sorgusu oluştur
         query = {
-            '$or': query_conditions,
+            'screen_id': screen_id,
             'status': cls.STATUS_ACTIVE
         }
         
-        print(f"DEBUG - screen_playlists sorgusu: {query}")
-        
         # İlişkiyi getir (en yakın tarihe göre)
-        result = mongo.db.screen_playlists.find_one(query, sort=[('created_at', -1)])
-        print(f"DEBUG - Bulunan ilişki: {result}")
+        with tracer.span('ScreenPlaylist.find_by_screen_id', screen_id=screen_id) as span:
+            result = mongo.db.screen_playlists.find_one(query, sort=[('created_at', -1)])
+            span.set(found=result is not None)
         
         return result
     
+    @classmethod
+    def find_linked(cls, screen_id):
+        """
+        Ekran bir playlist'e bağlıysa (linked modu) ilişkiyi döndür
+        
+        Bağlı ekranların screen_contents satırı yoktur; içerikler
+        PlaylistMedia.find_with_media ile okunur ve yalnızca playlist
+        üzerinden düzenlenir.
+        """
+        screen_playlist = cls.find_by_screen_id(screen_id)
+        if screen_playlist and screen_playlist.get('mode') == cls.MODE_LINKED:
+            return screen_playlist
+        return None
+    
     @classmethod
     def find_by_playlist_id(cls, playlist_id):
         """
         Playlist ID'sine göre ilişkileri bul
         """
-        print(f"DEBUG - ScreenPlaylist.find_by_playlist_id çağrıldı: {playlist_id}")
-        
-        # Farklı format olasılıklarını göz önünde bulunduralım
-        query_conditions = []
-        
-        # String ID durumu
-        if isinstance(playlist_id, str):
-            query_conditions.append({'playlist_id': playlist_id})
-            
-            # ObjectId dönüşümü yapabilirsek bu formatı da ekleyelim
-            try:
-                obj_id = ObjectId(playlist_id)
-                query_conditions.append({'playlist_id': obj_id})
-            except:
-                pass
-        
-        # Halihazırda ObjectId ise 
-        elif isinstance(playlist_id, ObjectId):
-            query_conditions.append({'playlist_id': playlist_id})
-            query_conditions.append({'playlist_id': str(playlist_id)})
+        playlist_id = to_object_id(playlist_id)
+        if not playlist_id:
+            return []
         
-        # Diğer durumlar için orijinal ID'yi kullan
-        else:
-            query_conditions.append({'playlist_id': playlist_id})
-        
-        # Her durum için OR sorgusu oluştur
         query = {
-            '$or': query_conditions,
+            'playlist_id': playlist_id,
             'status': cls.STATUS_ACTIVE
         }
         
-        print(f"DEBUG - screen_playlists sorgusu: {query}")
-        
         # İlişkileri getir
-        result = list(mongo.db.screen_playlists.find(query))
-        print(f"DEBUG - Bulunan ilişki sayısı: {len(result)}")
+        with tracer.span('ScreenPlaylist.find_by_playlist_id', playlist_id=playlist_id) as span:
+            result = list(mongo.db.screen_playlists.find(query))
+            span.set(count=len(result))
         
         return result
     
@@ -199,38 +236,19 @@ class ScreenPlaylist:
         """
         Ekrana ait tüm ilişkileri sil
         """
-        print(f"DEBUG - ScreenPlaylist.delete_by_screen çağrıldı: screen_id={screen_id}")
+        screen_id = to_object_id(screen_id)
+        if not screen_id:
+            return 0
         
-        # ObjectId formatına çevirme
-        if isinstance(screen_id, str):
-            try:
-                obj_id = ObjectId(screen_id)
-            except:
-                obj_id = None
-                print(f"DEBUG - screen_id ObjectId'ye çevrilemedi: {screen_id}")
-        else:
-            obj_id = screen_id
-        
-        # Her iki format için de sorgu yap 
-        query = {
-            '$or': [
-                {'screen_id': screen_id},  # String format
-                {'screen_id': obj_id}  # ObjectId format (eğer çevrilebildiyse)
-            ]
-        }
+        query = {'screen_id': screen_id}
         
-        print(f"DEBUG - Silinecek kayıtlar için sorgu: {query}")
+        with tracer.span('ScreenPlaylist.delete_by_screen', screen_id=screen_id) as span:
+            result = mongo.db.screen_playlists.delete_many(query)
+            deleted_count = result.deleted_count
+            span.set(deleted=deleted_count)
         
-        # Silinecek kayıtları göster
-        matching_records = list(mongo.db.screen_playlists.find(query))
-        print(f"DEBUG - Eşleşen kayıt sayısı: {len(matching_records)}")
-        for record in matching_records:
-            print(f"DEBUG - Silinecek kayıt: {record}")
-        
-        # Silme işlemi
-        result = mongo.db.screen_playlists.delete_many(query)
-        deleted_count = result.deleted_count
-        print(f"DEBUG - Silinen kayıt sayısı: {deleted_count}")
+        from app.models.screen_manifest import ScreenManifest
+        ScreenManifest.invalidate(screen_id)
         
         return deleted_count
     
@@ -239,23 +257,104 @@ class ScreenPlaylist:
         """
         Playlist'e ait tüm ilişkileri sil
         """
-        if isinstance(playlist_id, str):
-            try:
-                playlist_id = ObjectId(playlist_id)
-            except:
-                return 0
+        playlist_id = to_object_id(playlist_id)
+        if not playlist_id:
+            return 0
         
         result = mongo.db.screen_playlists.delete_many({'playlist_id': playlist_id})
         
+        from app.models.screen_manifest import ScreenManifest
+        ScreenManifest.invalidate_playlist(playlist_id)
+        
         return result.deleted_count
     
+    @classmethod
+    def sync_screen(cls, screen_id, playlist_id):
+        """
+        Ekran içeriklerini playlist'in güncel medya listesiyle eşitle
+        
+        Playlist öğeleri tek sorguyla sıralı okunur ve fark
+        ScreenContent.sync ile tek bir bulk_write olarak uygulanır.
+        
+        Returns:
+            (playlist öğe sayısı, ScreenContent.sync sayıları)
+        """
+        from app.models.screen_content import ScreenContent
+        
+        playlist_id = to_object_id(playlist_id)
+        items = []
+        if playlist_id:
+            items = list(mongo.db.playlist_media.find(
+                {'playlist_id': playlist_id},
+                {'media_id': 1, 'display_time': 1, 'order': 1}
+            ).sort([('order', 1), ('_id', 1)]))
+        
+        with tracer.span('ScreenPlaylist.sync_screen', screen_id=screen_id, playlist_id=playlist_id) as span:
+            stats = ScreenContent.sync(screen_id, items)
+            span.set(**stats)
+        
+        return len(items), stats
+    
+    @classmethod
+    def enqueue_playlist_sync(cls, playlist_id):
+        """
+        Playlist'i kullanan tüm ekranların eşitlenmesini arka plan kuyruğuna ekle
+        
+        İstek beklemeden döner; ekranlar job_worker.py tarafından işlenir.
+        Aynı ekran için bekleyen iş varsa yeni iş açılmaz (bkz. Job.enqueue).
+        
+        Returns:
+            (grup ID veya ekran yoksa None, kuyruğa eklenen ekran sayısı)
+        """
+        from app.models.job import Job
+        
+        # Bağlı moddaki ekranların kopyası yoktur; manifestleri zaten geçersiz işaretlenir
+        screen_ids = {
+            relation['screen_id'] for relation in cls.find_by_playlist_id(playlist_id)
+            if relation.get('mode') != cls.MODE_LINKED
+        }
+        if not screen_ids:
+            return None, 0
+        
+        batch_id = Job.create_batch(Job.TYPE_SCREEN_SYNC, label=str(playlist_id))
+        for screen_id in screen_ids:
+            Job.enqueue(
+                Job.TYPE_SCREEN_SYNC,
+                f'{Job.TYPE_SCREEN_SYNC}:{screen_id}',
+                {'screen_id': str(screen_id)},
+                batch_id=batch_id
+            )
+        
+        return batch_id, len(screen_ids)
+    
+    @classmethod
+    def process_sync_job(cls, screen_id):
+        """
+        Kuyruktaki ekran eşitleme işini çalıştır (job_worker.py)
+        
+        Ekranın iş çalıştığı andaki playlist ataması kullanılır; hatalar
+        yeniden denenmek üzere worker'a iletilir.
+        """
+        screen_playlist = cls.find_by_screen_id(screen_id)
+        if not screen_playlist or screen_playlist.get('mode') == cls.MODE_LINKED:
+            return {'skipped': True}
+        
+        count, stats = cls.sync_screen(screen_id, screen_playlist.get('playlist_id'))
+        
+        mongo.db.screen_playlists.update_one(
+            {'_id': screen_playlist.get('_id')},
+            {'$set': {'updated_at': datetime.utcnow()}}
+        )
+        
+        return dict(stats, items=count)
+    
     @classmethod
     def refresh_screen_playlist(cls, screen_id):
         """
         Ekrana atanmış playlist'i yeniler
         
         Bu metod, ekrana atanmış playlist'i bulup, ekrandaki içerikleri
-        güncel playlist içeriğiyle değiştirir.
+        güncel playlist içeriğiyle eşitler (bkz. sync_screen).
         
         Args:
             screen_id: Ekran ID'si
@@ -264,61 +363,28 @@ class ScreenPlaylist:
             dict: İşlem sonucu (success ve message alanları)
         """
         import traceback
-        from app.models.screen_content import ScreenContent
-        from app.models.playlist_media import PlaylistMedia
         
         try:
-            print(f"DEBUG - ScreenPlaylist.refresh_screen_playlist çağrıldı: {screen_id}")
-            
             # Ekran-playlist ilişkisini bul
             screen_playlist = cls.find_by_screen_id(screen_id)
             
             if not screen_playlist:
-                print(f"DEBUG - Ekran {screen_id} için atanmış playlist bulunamadı")
                 return {
                     'success': False,
                     'message': 'Bu ekran için atanmış playlist bulunamadı.'
                 }
-                
-            # Playlist ID'sini al
-            playlist_id = screen_playlist.get('playlist_id')
-            
-            # Mevcut ekran içeriklerini temizle
-            delete_count = ScreenContent.delete_by_screen(screen_id)
-            print(f"DEBUG - Mevcut ekran içerikleri silindi: {delete_count}")
-            
-            # Playlist'teki medyaları al
-            playlist_media = PlaylistMedia.find_by_playlist(playlist_id)
             
-            if not playlist_media:
-                print(f"DEBUG - Playlist {playlist_id} için medya bulunamadı")
+            if screen_playlist.get('mode') == cls.MODE_LINKED:
+                # Kopya yok; manifest bir sonraki okumada playlist'ten derlenir
+                from app.models.screen_manifest import ScreenManifest
+                ScreenManifest.invalidate(screen_id)
                 return {
                     'success': True,
-                    'message': 'Playlist yenilendi, ancak içerik yok.',
+                    'message': 'Ekran playlist\'e doğrudan bağlı; içerik her zaman günceldir.',
                     'updated': 0
                 }
             
-            # Ekrana medyaları ekle
-            created_contents = []
-            order = 1
-            
-            for item in sorted(playlist_media, key=lambda x: x.get('order', 0) if isinstance(x, dict) else getattr(x, 'order', 0)):
-                media_id = item.get('media_id') if isinstance(item, dict) else getattr(item, 'media_id', None)
-                
-                if media_id:
-                    # Ekran içeriği oluştur
-                    new_content = ScreenContent.create({
-                        'screen_id': screen_id,
-                        'media_id': media_id,
-                        'order': order,
-                        'status': ScreenContent.STATUS_ACTIVE
-                    })
-                    
-                    if new_content:
-                        created_contents.append(new_content)
-                        order += 1
-            
-            print(f"DEBUG - Playlist medyaları ekrana eklendi: {len(created_contents)}")
+            count, stats = cls.sync_screen(screen_id, screen_playlist.get('playlist_id'))
             
             # İlişki tablosunu güncelle
             mongo.db.screen_playlists.update_one(
@@ -326,10 +392,18 @@ class ScreenPlaylist:
                 {'$set': {'updated_at': datetime.utcnow()}}
             )
             
+            if not count:
+                return {
+                    'success': True,
+                    'message': 'Playlist yenilendi, ancak içerik yok.',
+                    'updated': 0
+                }
+            
             return {
                 'success': True,
-                'message': f'Playlist başarıyla yenilendi ve {len(created_contents)} medya eklendi.',
-                'updated': len(created_contents)
+                'message': f'Playlist başarıyla yenilendi ve {count} medya eşitlendi.',
+                'updated': count,
+                'changes': stats
             }
             
         except Exception as e:
@@ -339,4 +413,4 @@ class ScreenPlaylist:
             return {
                 'success': False,
                 'message': f'Playlist yenilenirken bir hata oluştu: {str(e)}'
-            } 
\ No newline at end of file
+            } 
@@ -0,0 +1,244 @@
+"""
+Ekran Telemetri Modeli: Player'ların bildirdiği sıcaklık, bellek ve işlemci ölçümlerini saatlik kovalarda tutar
+"""
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import IndexModel, UpdateOne
+from app import mongo
+
+class ScreenTelemetry:
+    """
+    Ekran telemetri modeli (bucket pattern)
+
+    Her belge bir ekranın bir saatlik ölçümlerini tutar. Ölçümler samples
+    dizisine eklenirken aynı güncellemede metrik başına toplam, adet, en düşük
+    ve en yüksek değerler de güncellenir; böylece uzun aralıklı grafikler ham
+    örneklere hiç dokunmadan saatlik özetlerden çizilir.
+
+    Ham örnekler RAW_RETENTION_DAYS'ten sonra silinir (belge saatlik özete
+    indirgenir), belgeler RETENTION_DAYS'ten sonra tamamen silinir.
+
+    Alanlar:
+    - screen_id: Ekran ID (ObjectId)
+    - hour: Saat başlangıcı
+    - count: Kovadaki örnek sayısı
+    - samples: [{'t': zaman, 'temperature': .., 'memory_usage': .., 'cpu_usage': .., 'current_media': ..}]
+    - stats: {metrik: {'sum', 'count', 'min', 'max'}}
+    - last_sample_at: Son örnek zamanı
+    - downsampled: Ham örnekler silindi mi?
+    """
+
+    METRICS = ('temperature', 'memory_usage', 'cpu_usage')
+
+    RAW_RETENTION_DAYS = 7
+    RETENTION_DAYS = 90
+
+    # Bu süreden kısa aralıklar ham örneklerle, uzunlar saatlik özetlerle çizilir
+    RAW_RANGE_LIMIT = timedelta(hours=48)
+
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'screen_telemetry': [
+            IndexModel([('screen_id', 1), ('hour', 1)], name='screen_hour_unique', unique=True),
+            IndexModel([('hour', 1)], name='hour'),
+        ]
+    }
+
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'ScreenTelemetry.get_range', 'collection': 'screen_telemetry',
+         'filter': {'screen_id': ObjectId(), 'hour': {'$gte': datetime(2000, 1, 1)}}, 'sort': [('hour', 1)]},
+        {'name': 'ScreenTelemetry.apply_retention', 'collection': 'screen_telemetry',
+         'filter': {'hour': {'$lt': datetime(2000, 1, 1)}}},
+    ]
+
+    @staticmethod
+    def get_collection():
+        """MongoDB koleksiyonuna erişim sağlar"""
+        return mongo.db.screen_telemetry
+
+    @classmethod
+    def build_sample(cls, data, timestamp=None):
+        """
+        Player'ın gönderdiği durum verisinden telemetri örneği oluştur
+
+        Returns:
+            Örnek sözlüğü veya veride hiç ölçüm yoksa None
+        """
+        sample = {}
+        for metric in cls.METRICS:
+            value = data.get(metric)
+            if value is None:
+                continue
+            try:
+                sample[metric] = float(value)
+            except (TypeError, ValueError):
+                continue
+
+        if data.get('current_media'):
+            sample['current_media'] = str(data['current_media'])
+
+        if not sample:
+            return None
+
+        sample['t'] = timestamp or datetime.utcnow()
+        return sample
+
+    @classmethod
+    def write_samples(cls, samples):
+        """
+        Örnekleri saatlik kovalara toplu yaz
+
+        Args:
+            samples: [(screen_id, sample), ...]
+
+        Returns:
+            Güncellenen kova sayısı
+        """
+        buckets = {}
+        for screen_id, sample in samples:
+            hour = sample['t'].replace(minute=0, second=0, microsecond=0)
+            buckets.setdefault((screen_id, hour), []).append(sample)
+
+        operations = []
+        for (screen_id, hour), bucket_samples in buckets.items():
+            bucket_samples.sort(key=lambda sample: sample['t'])
+
+            inc = {'count': len(bucket_samples)}
+            minimum = {}
+            maximum = {'last_sample_at': bucket_samples[-1]['t']}
+
+            for metric in cls.METRICS:
+                values = [sample[metric] for sample in bucket_samples if metric in sample]
+                if not values:
+                    continue
+                inc[f'stats.{metric}.sum'] = sum(values)
+                inc[f'stats.{metric}.count'] = len(values)
+                minimum[f'stats.{metric}.min'] = min(values)
+                maximum[f'stats.{metric}.max'] = max(values)
+
+            update = {
+                '$push': {'samples': {'$each': bucket_samples}},
+                '$inc': inc,
+                '$max': maximum
+            }
+            if minimum:
+                update['$min'] = minimum
+
+            operations.append(UpdateOne({'screen_id': screen_id, 'hour': hour}, update, upsert=True))
+
+        if not operations:
+            return 0
+
+        cls.get_collection().bulk_write(operations, ordered=False)
+        return len(operations)
+
+    @classmethod
+    def get_range(cls, screen_id, start, end=None, resolution=None):
+        """
+        Grafikler için belirli bir aralıktaki ölçümleri getir
+
+        Args:
+            screen_id: Ekran ID
+            start: Başlangıç zamanı (UTC)
+            end: Bitiş zamanı (UTC, varsayılan: şimdi)
+            resolution: 'raw' veya 'hour' (varsayılan: aralık uzunluğuna göre seçilir)
+
+        Returns:
+            {'resolution': .., 'points': [{'t': .., metrik: değer, ...}, ...]}
+        """
+        try:
+            screen_id = ObjectId(str(screen_id))
+        except Exception:
+            return {'resolution': resolution, 'points': []}
+
+        end = end or datetime.utcnow()
+        if resolution not in ('raw', 'hour'):
+            resolution = 'raw' if end - start <= cls.RAW_RANGE_LIMIT else 'hour'
+
+        # Ham örnekler silinmiş kovalar için saatlik özete düşülür
+        projection = {'hour': 1, 'stats': 1, 'downsampled': 1}
+        if resolution == 'raw':
+            projection['samples'] = 1
+
+        cursor = cls.get_collection().find(
+            {
+                'screen_id': screen_id,
+                'hour': {'$gte': start.replace(minute=0, second=0, microsecond=0), '$lte': end}
+            },
+            projection
+        ).sort('hour', 1)
+
+        points = []
+        for bucket in cursor:
+            if resolution == 'raw' and bucket.get('samples'):
+                for sample in bucket['samples']:
+                    if start <= sample['t'] <= end:
+                        point = {'t': sample['t']}
+                        for metric in cls.METRICS:
+                            point[metric] = sample.get(metric)
+                        points.append(point)
+                continue
+
+            point = {'t': bucket['hour']}
+            stats = bucket.get('stats', {})
+            for metric in cls.METRICS:
+                metric_stats = stats.get(metric)
+                if metric_stats and metric_stats.get('count'):
+                    point[metric] = round(metric_stats['sum'] / metric_stats['count'], 2)
+                    point[f'{metric}_max'] = metric_stats.get('max')
+                else:
+                    point[metric] = None
+            points.append(point)
+
+        return {'resolution': resolution, 'points': points}
+
+    @classmethod
+    def get_latest(cls, screen_id):
+        """
+        Ekranın en son telemetri örneğini getir
+        """
+        try:
+            screen_id = ObjectId(str(screen_id))
+        except Exception:
+            return None
+
+        bucket = cls.get_collection().find_one(
+            {'screen_id': screen_id, 'samples': {'$exists': True}},
+            {'samples': {'$slice': -1}},
+            sort=[('hour', -1)]
+        )
+        if bucket and bucket.get('samples'):
+            return bucket['samples'][0]
+        return None
+
+    @classmethod
+    def apply_retention(cls, raw_days=None, keep_days=None):
+        """
+        Eski ham örnekleri saatlik özete indirge ve süresi dolan kovaları sil
+
+        Returns:
+            (indirgenen kova sayısı, silinen kova sayısı)
+        """
+        now = datetime.utcnow()
+        raw_cutoff = now - timedelta(days=raw_days or cls.RAW_RETENTION_DAYS)
+        keep_cutoff = now - timedelta(days=keep_days or cls.RETENTION_DAYS)
+
+        collection = cls.get_collection()
+        downsampled = collection.update_many(
+            {'hour': {'$lt': raw_cutoff}, 'downsampled': {'$ne': True}},
+            {'$unset': {'samples': ''}, '$set': {'downsampled': True}}
+        ).modified_count
+        deleted = collection.delete_many({'hour': {'$lt': keep_cutoff}}).deleted_count
+
+        return downsampled, deleted
+
+    @classmethod
+    def delete_by_screen(cls, screen_id):
+        """Ekrana ait tüm telemetri kayıtlarını sil"""
+        try:
+            result = cls.get_collection().delete_many({'screen_id': ObjectId(str(screen_id))})
+            return result.deleted_count
+        except Exception as e:
+            print(f"Telemetri kayıtları silinirken hata: {str(e)}")
+            return 0
@@ -3,16 +3,59 @@ Kullanıcı Modeli: Kullanıcı hesap bilgilerini ve yetkilerini yönetir
 """
 import uuid
 from datetime import datetime
-from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson.objectid import ObjectId
+from pymongo import IndexModel
 from app import mongo
+from app.models.record import Record
+from app.utils import identity_map
+from app.utils.projections import projection_for
 import os
-from pymongo import MongoClient
-from urllib.parse import quote_plus
 
-class User(UserMixin):
+class LoginMixin:
+    """
+    Flask-Login'in beklediği kullanıcı arayüzü (flask_login.UserMixin karşılığı)
+
+    UserMixin __slots__ tanımlamadığı için User nesnelerine __dict__ ekler;
+    bu sınıf aynı davranışı slot kullanan Record alt sınıfları için sağlar.
+    """
+
+    __slots__ = ()
+
+    # __eq__ tanımlandığında Python __hash__'i None yapar; varsayılanı koru
+    __hash__ = object.__hash__
+
+    @property
+    def is_authenticated(self):
+        return self.is_active
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def get_id(self):
+        return str(self.id)
+
+    def __eq__(self, other):
+        if isinstance(other, LoginMixin):
+            return self.get_id() == other.get_id()
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return NotImplemented
+        return not equal
+
+class User(Record, LoginMixin):
     """Kullanıcı modeli sınıfı"""
+
+    # Nesne alanları; belgedeki diğer alanlar _extra'da tutulur (bkz. Record)
+    __slots__ = (
+        'id', 'email', 'password_hash', 'name', 'role', 'package', 'status', 'created_at',
+        'updated_at', 'last_login', 'reset_token', 'reset_token_expires', 'supervisor_id',
+        'is_nobetmatik_pro', 'terminal_no', 'business_name', 'notification_settings'
+    )
     
     # Kullanıcı rolleri
     ROLE_ADMIN = 'admin'
@@ -36,6 +79,29 @@ class User(UserMixin):
         PACKAGE_ENTERPRISE: 999  # Pratik olarak sınırsız
     }
     
+    # Koleksiyon indeksleri (flask ensure-indexes ile uygulanır)
+    INDEXES = {
+        'users': [
+            IndexModel([('email', 1)], name='email_unique', unique=True),
+            IndexModel([('reset_token', 1)], name='reset_token', sparse=True),
+        ]
+    }
+    
+    # flask index-report ile explain() çıktısı kontrol edilen sık sorgular
+    HOT_QUERIES = [
+        {'name': 'User.find_by_email', 'collection': 'users', 'filter': {'email': ''}},
+        {'name': 'User.find_by_reset_token', 'collection': 'users', 'filter': {'reset_token': ''}},
+    ]
+    
+    # Finder'ların projection parametresiyle seçilen alan profilleri (bkz. projections)
+    PROJECTIONS = {
+        'detail': None,
+        # Şifre özeti ve sıfırlama tokenı liste sayfalarına taşınmaz
+        'list': {'password_hash': 0, 'reset_token': 0, 'reset_token_expires': 0},
+        # Seçim kutuları, JSON listeleri ve sayımlar
+        'option': {'email': 1, 'name': 1, 'role': 1, 'status': 1},
+    }
+    
     @classmethod
     def create(cls, email, password, name, role=ROLE_USER, 
                package=PACKAGE_STANDARD, status=STATUS_ACTIVE,
@@ -62,23 +128,10 @@ class User(UserMixin):
         return cls(**user_data)
     
     @classmethod
+    @identity_map.identity_mapped('users')
     def find_by_id(cls, user_id):
         """ID'ye göre kullanıcı bulma"""
         try:
-            # Konfigürasyon değerlerini al
-            mongo_user = os.environ.get('MONGODB_USERNAME', 'elektrobil_admin')
-            mongo_pass = os.environ.get('MONGODB_PASSWORD', 'Eb@2254097*')
-            mongo_host = os.environ.get('MONGODB_HOST', 'localhost')
-            mongo_port = os.environ.get('MONGODB_PORT', '27017')
-            mongo_db = os.environ.get('MONGO_DB', 'bulutvizyondb')
-            
-            encoded_password = quote_plus(mongo_pass)
-            
-            # MongoDB bağlantısı oluştur
-            mongo_uri = f"mongodb://{mongo_user}:{encoded_password}@{mongo_host}:{mongo_port}/{mongo_db}?authSource=admin"
-            client = MongoClient(mongo_uri)
-            db = client[mongo_db]
-            
             # Eğer string olarak geldiyse ObjectId'ye çevir
             if isinstance(user_id, str):
                 try:
@@ -90,7 +143,7 @@ class User(UserMixin):
                 obj_id = user_id
             
             # Kullanıcıyı bul
-            user_data = db.users.find_one({"_id": obj_id})
+            user_data = mongo.db.users.find_one({"_id": obj_id})
             
             if not user_data:
                 print(f"Kullanıcı bulunamadı: {user_id}")
@@ -101,6 +154,16 @@ class User(UserMixin):
             print(f"Kullanıcı bulunamadı. Hata: {str(e)}, ID: {user_id}")
             return None
     
+    @classmethod
+    def prefetch(cls, user_ids):
+        """
+        Kullanıcıları tek sorguda istek kimlik haritasına yükle
+
+        Returns:
+            {ObjectId: User veya None}
+        """
+        return identity_map.prefetch('users', mongo.db.users, user_ids, lambda data: cls(**data))
+    
     @classmethod
     def find_by_email(cls, email):
         """Email adresine göre kullanıcı bulma"""
@@ -118,8 +181,13 @@ class User(UserMixin):
         return None
     
     @classmethod
-    def find_all(cls, role=None, status=None):
-        """Tüm kullanıcıları veya belirli rol/duruma göre bul"""
+    def find_all(cls, role=None, status=None, projection=None):
+        """
+        Tüm kullanıcıları veya belirli rol/duruma göre bul
+        
+        projection: Alan profili ('list', 'option'; varsayılan tüm belge). Profille
+        okunan kullanıcılarda password_hash bulunmaz, giriş için kullanılmamalıdır.
+        """
         query = {}
         if role:
             query["role"] = role
@@ -127,7 +195,18 @@ class User(UserMixin):
             query["status"] = status
             
         users = []
-        for user_data in mongo.db.users.find(query):
+        for user_data in mongo.db.users.find(query, projection_for(cls, projection)):
+            user_data.setdefault("password_hash", None)
+            users.append(cls(**user_data))
+        return users
+    
+    @classmethod
+    def find_recent(cls, limit=5, projection=None):
+        """En son oluşturulan kullanıcıları getir"""
+        users = []
+        cursor = mongo.db.users.find({}, projection_for(cls, projection)).sort("created_at", -1).limit(limit)
+        for user_data in cursor:
+            user_data.setdefault("password_hash", None)
             users.append(cls(**user_data))
         return users
     
@@ -140,7 +219,8 @@ class User(UserMixin):
                package=PACKAGE_STANDARD, status=STATUS_ACTIVE, 
                created_at=None, updated_at=None, last_login=None, 
                reset_token=None, reset_token_expires=None, supervisor_id=None,
-               is_nobetmatik_pro=False, terminal_no=None, business_name=None, **kwargs):
+               is_nobetmatik_pro=False, terminal_no=None, business_name=None,
+               notification_settings=None, **kwargs):
         """Yeni bir kullanıcı nesnesi başlat"""
         self.id = str(_id)
         self.email = email
@@ -158,13 +238,14 @@ class User(UserMixin):
         self.is_nobetmatik_pro = is_nobetmatik_pro
         self.terminal_no = terminal_no
         self.business_name = business_name
+        self.notification_settings = notification_settings
         
-        # Ekstra özellikleri de ekle
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+        # Ekstra alanlar erişildiğinde _extra'dan okunur
+        self._extra = kwargs or None
     
     def update(self, **kwargs):
         """Kullanıcı bilgilerini güncelle"""
+        identity_map.discard('users', self.id)
         updates = {"updated_at": datetime.now()}
         
         # Güncellenebilir alanlar
@@ -188,11 +269,14 @@ class User(UserMixin):
     
     def delete(self):
         """Kullanıcıyı sil"""
+        identity_map.discard('users', self.id)
         mongo.db.users.delete_one({"_id": ObjectId(self.id)})
         return True
     
     def verify_password(self, password):
         """Şifreyi doğrula"""
+        if not self.password_hash:
+            return False
         return check_password_hash(self.password_hash, password)
     
     def set_password(self, password):
@@ -204,7 +288,7 @@ class User(UserMixin):
         return self.update(last_login=datetime.now())
     
     def get_id(self):
-        """UserMixin için gerekli ID döndürme fonksiyonu"""
+        """Flask-Login için gerekli ID döndürme fonksiyonu"""
         return self.id
     
     def is_admin(self):
@@ -216,7 +300,7 @@ class User(UserMixin):
         return self.role == self.ROLE_SUPERVISOR
     
     def is_active(self):
-        """UserMixin için gerekli, kullanıcının aktif olup olmadığını kontrol et"""
+        """Flask-Login için gerekli, kullanıcının aktif olup olmadığını kontrol et"""
         return self.status == self.STATUS_ACTIVE
     
     def get_allowed_screen_count(self):
@@ -4,7 +4,9 @@ from app.models.screen import Screen
 from app.models.media import Media
 from app.models.logs import Log
 from app.models.screen_media import ScreenMedia
+from app.utils.counters import counters
 from app.utils.decorators import admin_required
+from app.utils.pagination import cursor_arg, paginate
 import secrets
 import string
 import os
@@ -50,14 +52,15 @@ def get_system_stats():
 @admin_required
 def dashboard():
     """Admin dashboard sayfası"""
-    user_count = len(User.find_all())
-    screen_count = len(Screen.find_all())
-    media_count = len(Media.find_all())
-    pending_media_count = len(Media.find_pending())
+    # Sayılar belge yüklenmeden sayaç servisinden okunur
+    user_count = counters.total('users')
+    screen_count = counters.total('screens')
+    media_count = counters.total('media')
+    pending_media_count = counters.tally('media.status', Media.STATUS_PROCESSING)
     
     # Playlist istatistiklerini ekle
     from app.models.playlist import Playlist
-    playlist_count = mongo.db.playlists.count_documents({})
+    playlist_count = counters.total('playlists')
     recent_playlists = list(mongo.db.playlists.find().sort('created_at', -1).limit(5))
     
     # Playlist nesnelerini oluştur
@@ -66,21 +69,16 @@ def dashboard():
         playlist_objects.append(Playlist(**playlist_data))
     
     # Kullanıcı bilgilerini ekle
+    User.prefetch([playlist.user_id for playlist in playlist_objects])
     for playlist in playlist_objects:
         user = User.find_by_id(playlist.user_id)
         playlist.user_name = f"{user.name}" if user else "Bilinmiyor"
     
-    # Son kullanıcıları oluşturma tarihine göre sırala (en yeni en üstte)
-    all_users = User.find_all()
-    all_users.sort(key=lambda x: x.created_at if hasattr(x, 'created_at') and x.created_at else datetime.min, reverse=True)
-    recent_users = all_users[:5]
+    # Son kullanıcılar ve medyalar (en yeni en üstte)
+    recent_users = User.find_recent(5, projection='list')
+    recent_media = Media.find_all(limit=5, projection='list')
     
-    # Son medyaları oluşturma tarihine göre sırala (en yeni en üstte)
-    all_media = Media.find_all()
-    all_media.sort(key=lambda x: x.created_at if hasattr(x, 'created_at') and x.created_at else datetime.min, reverse=True)
-    recent_media = all_media[:5]
-    
-    recent_screens = Screen.find_all()[:5]
+    recent_screens = Screen.find_all(limit=5, projection='list')
     
     # Sistem performans bilgilerini ekle
     system_stats = get_system_stats()
@@ -104,7 +102,7 @@ def dashboard():
 @admin_required
 def users():
     """Kullanıcı listesi sayfası"""
-    users = User.find_all()
+    users = User.find_all(projection='list')
     return render_template('admin/users.html', users=users)
 
 @bp.route('/users/create', methods=['GET', 'POST'])
@@ -224,7 +222,7 @@ def edit_user(user_id):
     view_count = 0  # İleriki aşamalarda görüntülenme sayısı için
     
     # Supervisor listesini ekle
-    supervisors = User.find_all(role=User.ROLE_SUPERVISOR)
+    supervisors = User.find_all(role=User.ROLE_SUPERVISOR, projection='option')
     
     # Atanmış supervisor'ı bul
     assigned_supervisor = None
@@ -320,10 +318,11 @@ def reset_password(user_id):
 def screens():
     """Ekranlar listesi"""
     # Tüm kullanıcıları getir
-    users = User.find_all()
+    users = User.find_all(projection='option')
     
-    # Tüm ekranları getir
-    all_screens = Screen.find_all()
+    # Ekranları sayfa sayfa getir (imleç tabanlı)
+    cursor = cursor_arg()
+    all_screens = Screen.find_all(cursor=cursor, projection='list')
     
     # Kullanıcılara göre ekranları gruplayacak sözlük
     screens_by_user = {}
@@ -379,7 +378,8 @@ def screens():
     if search or status or user_id:
         screens_by_user = filtered_screens_by_user
     
-    return render_template('admin/screens.html', screens_by_user=screens_by_user, users=users, hasattr=hasattr)
+    return render_template('admin/screens.html', screens_by_user=screens_by_user, users=users, hasattr=hasattr,
+                           cursor=cursor, next_cursor=all_screens.next_cursor)
 
 @bp.route('/screens/view/')
 @admin_required
@@ -517,6 +517,7 @@ def view_screen(screen_id):
     
     # Medya detaylarını al ve sırala
     assigned_media = []
+    Media.prefetch([relation.media_id for relation in screen_media_relations or []])
     for relation in screen_media_relations:
         media = Media.find_by_id(relation.media_id)
         if media:
@@ -570,7 +571,7 @@ def view_screen(screen_id):
     available_media = []
     
     # Önce tüm medyaları getir, sonra aktif olanları filtrele
-    all_media = Media.find_all()
+    all_media = Media.find_all(projection='list')
     
     # Aktif medyaları getir ve zaten atanmışları filtrele
     for media in all_media:
@@ -590,6 +591,55 @@ def view_screen(screen_id):
                           enhanced_details=enhanced_details,  # Yeni gelişmiş detaylar
                           hasattr=hasattr)
 
+@bp.route('/screens/telemetry/<screen_id>')
+@admin_required
+def screen_telemetry(screen_id):
+    """Ekran telemetri grafiği için ölçümleri JSON formatında döner"""
+    from app.models.screen_telemetry import ScreenTelemetry
+    from datetime import timedelta
+    
+    try:
+        hours = min(max(int(request.args.get('hours', 24)), 1), 24 * 90)
+    except ValueError:
+        hours = 24
+    
+    start = datetime.utcnow() - timedelta(hours=hours)
+    result = ScreenTelemetry.get_range(screen_id, start, resolution=request.args.get('resolution'))
+    latest = ScreenTelemetry.get_latest(screen_id)
+    
+    # Zamanlar UTC olarak saklanır; tarayıcı yerel saate çevirir
+    return jsonify({
+        'resolution': result['resolution'],
+        'points': [
+            dict(point, t=point['t'].isoformat() + 'Z')
+            for point in result['points']
+        ],
+        'latest': dict(latest, t=latest['t'].isoformat() + 'Z') if latest else None
+    })
+
+@bp.route('/screens/uptime/<screen_id>')
+@admin_required
+def screen_uptime(screen_id):
+    """Ekranın günlük erişilebilirlik raporunu JSON formatında döner"""
+    from app.models.screen_offline_period import ScreenOfflinePeriod
+    
+    try:
+        days = min(max(int(request.args.get('days', 30)), 1), 365)
+    except ValueError:
+        days = 30
+    
+    report = ScreenOfflinePeriod.get_uptime(screen_id, days=days)
+    
+    # Günler UTC gün başlangıcıdır
+    return jsonify({
+        'days': [
+            dict(day, day=day['day'].strftime('%Y-%m-%d'))
+            for day in report['days']
+        ],
+        'offline_seconds': report['offline_seconds'],
+        'uptime_percent': report['uptime_percent']
+    })
+
 @bp.route('/screens/status/<screen_id>', methods=['POST'])
 @admin_required
 def toggle_screen_status(screen_id):
@@ -718,9 +768,11 @@ def disable_screen(screen_id):
 @admin_required
 def media():
     """Medya listesi sayfası"""
-    media_list = Media.find_all()
+    cursor = cursor_arg()
+    media_list = Media.find_all(cursor=cursor, projection='list')
     
     # Her medya için kullanıcı bilgilerini ekleyelim
+    User.prefetch([media.get('user_id') for media in media_list])
     for media in media_list:
         if media.get('user_id'):
             user = User.find_by_id(media.get('user_id'))
@@ -739,7 +791,8 @@ def media():
     # Onay bekleyen medya sayısını hesapla
     pending_media_count = Media.count_pending() if hasattr(Media, 'count_pending') else 0
     
-    return render_template('admin/media.html', media_list=media_list, pending_media_count=pending_media_count)
+    return render_template('admin/media.html', media_list=media_list, pending_media_count=pending_media_count,
+                           cursor=cursor, next_cursor=media_list.next_cursor)
 
 @bp.route('/media/view/<media_id>')
 @admin_required
@@ -758,6 +811,7 @@ def view_media(media_id):
     
     # Ekran detaylarını al
     assigned_screens = []
+    Screen.prefetch([relation.screen_id for relation in screen_media_relations])
     for relation in screen_media_relations:
         screen = Screen.find_by_id(relation.screen_id)
         if screen:
@@ -906,8 +960,9 @@ def delete_media(media_id):
 @admin_required
 def logs():
     """Log listeleme sayfası"""
-    logs = Log.find_latest(200)
-    return render_template('admin/logs.html', logs=logs)
+    cursor = cursor_arg()
+    logs = Log.find_latest(200, cursor=cursor)
+    return render_template('admin/logs.html', logs=logs, cursor=cursor, next_cursor=logs.next_cursor)
 
 @bp.route('/screens/assign_media/<screen_id>', methods=['POST'])
 @admin_required
@@ -931,21 +986,16 @@ def assign_media_to_screen(screen_id):
         flash('Medya aktif değil veya bulunamadı.', 'danger')
         return redirect(url_for('admin.view_screen', screen_id=screen_id))
     
-    # Sırayı belirle (mevcut son medyadan sonra)
-    screen_media_list = ScreenMedia.find_by_screen(screen_id)
-    order = len(screen_media_list)
-    
     # Display_time'ı sayıya çevir
     try:
         display_time = int(display_time) if display_time else None
     except ValueError:
         display_time = None
     
-    # Ekran-medya ilişkisi oluştur
+    # Ekran-medya ilişkisi oluştur (sıra ekranın sayacından alınır, sona eklenir)
     ScreenMedia.create(
         screen_id=screen_id,
         media_id=media_id,
-        order=order,
         display_time=display_time
     )
     
@@ -971,18 +1021,9 @@ def remove_media_from_screen(screen_id, media_id):
         flash('Ekran veya medya bulunamadı.', 'danger')
         return redirect(url_for('admin.screens'))
     
-    # İlişkiyi kaldır
+    # İlişkiyi kaldır (kalan öğelerin sıraları aralıklı olabilir, yeniden numaralanmaz)
     ScreenMedia.remove_from_screen(screen_id, media_id)
     
-    # Sıralamayı yeniden düzenle
-    screen_media_list = ScreenMedia.find_by_screen(screen_id)
-    media_order = []
-    for i, relation in enumerate(sorted(screen_media_list, key=lambda x: x.order)):
-        media_order.append({"media_id": relation.media_id, "order": i})
-    
-    if media_order:
-        ScreenMedia.reorder_screen_media(screen_id, media_order)
-    
     Log.log_action(
         action="screen_media_remove",
         user_id=session['user_id'],
@@ -1035,12 +1076,10 @@ def profile():
         return redirect(url_for('admin.dashboard'))
     
     # Kullanıcı istatistikleri
-    total_screens = Screen.count()
-    total_media = Media.count()
-    active_media = Media.count(status=Media.STATUS_ACTIVE)
-    total_views = 0  # Tüm görüntülenmeleri hesapla
-    for media in Media.find_all():
-        total_views += media.view_count if hasattr(media, 'view_count') and media.view_count else 0
+    total_screens = counters.total('screens')
+    total_media = counters.total('media')
+    active_media = counters.tally('media.status', Media.STATUS_ACTIVE)
+    total_views = counters.tally('media.views')
     
     stats = {
         'total_screens': total_screens,
@@ -1378,7 +1417,7 @@ def upload_media():
             return redirect(request.url)
         
     # GET isteği için kullanıcı listesini getir
-    users = User.find_all(role=User.ROLE_USER)
+    users = User.find_all(role=User.ROLE_USER, projection='option')
     
     return render_template('admin/upload_media.html', users=users)
 
@@ -1454,7 +1493,7 @@ def make_media_private(media_id):
 @admin_required
 def api_users_list():
     """Kullanıcı listesini JSON olarak döndürür (JavaScript için API)"""
-    users = User.find_all(role=User.ROLE_USER)
+    users = User.find_all(role=User.ROLE_USER, projection='option')
     users_list = []
     
     for user in users:
@@ -1466,6 +1505,37 @@ def api_users_list():
     
     return jsonify({"users": users_list})
 
+@bp.route('/api/admin/db-metrics', methods=['GET', 'POST'])
+@admin_required
+def api_db_metrics():
+    """İstek başına veritabanı komut muhasebesini görüntüle veya aç/kapat"""
+    from app.utils.db_metrics import command_accounting
+    
+    if request.method == 'GET':
+        return jsonify(command_accounting.settings())
+    
+    data = request.get_json(silent=True) or request.form
+    enabled = data.get('enabled')
+    if isinstance(enabled, str):
+        enabled = enabled.lower() in ('1', 'true', 'yes', 'on')
+    
+    warn_threshold = data.get('warn_threshold')
+    try:
+        warn_threshold = int(warn_threshold) if warn_threshold not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'warn_threshold sayı olmalıdır'}), 400
+    
+    settings = command_accounting.save(mongo.db, enabled=enabled, warn_threshold=warn_threshold)
+    
+    Log.log_action(
+        action=Log.TYPE_USER_UPDATE,
+        user_id=session['user_id'],
+        ip_address=request.remote_addr,
+        details={"setting": "db_metrics", "value": settings}
+    )
+    
+    return jsonify(settings)
+
 @bp.route('/media/assign-to-user', methods=['POST'])
 @admin_required
 def assign_media_to_user():
@@ -1556,23 +1626,20 @@ def admin_playlists():
     """Admin - Tüm playlistleri listeler"""
     from app.models.playlist import Playlist
     from app.models.user import User
-    from app.models.playlist_media import PlaylistMedia
     from app.models.screen_playlist import ScreenPlaylist
     
-    # Tüm playlistleri getir
-    playlists = Playlist.find_all()
+    # Playlistleri sayfa sayfa getir (imleç tabanlı)
+    cursor = cursor_arg()
+    playlists = Playlist.find_all(cursor=cursor, projection='list')
     
-    # Playlistler için kullanıcı bilgisi ve medya sayısını ekle
+    # Playlistler için kullanıcı bilgisini ekle (medya sayısı belgede tutulur)
+    User.prefetch([playlist.user_id for playlist in playlists])
     for playlist in playlists:
         # Kullanıcı adını ekle
         user_id = playlist.user_id
         user = User.find_by_id(user_id)
         playlist.user_name = user.name if user else "Bilinmiyor"
         
-        # Medya sayısını ekle
-        playlist_media = PlaylistMedia.find_by_playlist(playlist.id)
-        playlist.media_count = len(playlist_media) if playlist_media else 0
-        
         # Playlist'in atandığı ekran sayısını ekle
         try:
             screen_playlists = ScreenPlaylist.find_by_playlist_id(playlist.id)
@@ -1581,7 +1648,8 @@ def admin_playlists():
             current_app.logger.error(f"Ekran sayısı alınırken hata: {str(e)}")
             playlist.screen_count = 0
     
-    return render_template('admin/playlists.html', playlists=playlists)
+    return render_template('admin/playlists.html', playlists=playlists,
+                           cursor=cursor, next_cursor=playlists.next_cursor)
 
 @bp.route('/playlists/view/<playlist_id>')
 @admin_required
@@ -1610,6 +1678,10 @@ def view_playlist(playlist_id):
     playlist_media_relations = PlaylistMedia.find_by_playlist(playlist_id)
     media_list = []
     
+    Media.prefetch([
+        relation['media_id'] if isinstance(relation, dict) else relation.media_id
+        for relation in playlist_media_relations
+    ])
     for relation in playlist_media_relations:
         # PlaylistMedia sözlük olarak döndüğü için, media_id'ye sözlük erişimi ile ulaşacağız
         media_id = relation['media_id'] if isinstance(relation, dict) else relation.media_id
@@ -1636,6 +1708,7 @@ def view_playlist(playlist_id):
         screen_playlists = ScreenPlaylist.find_by_playlist_id(playlist_id)
         screens = []
         
+        Screen.prefetch([sp['screen_id'] if isinstance(sp, dict) else sp.screen_id for sp in screen_playlists])
         for sp in screen_playlists:
             # ScreenPlaylist için de aynı kontrolü yapalım
             screen_id = sp['screen_id'] if isinstance(sp, dict) else sp.screen_id
@@ -1666,43 +1739,18 @@ def update_playlist_counts():
         
     try:
         from app.models.playlist import Playlist
-        from app.models.playlist_media import PlaylistMedia
         import traceback
         
-        updated_count = 0
-        total_media = 0
-        updates = {}
-        
-        # Tüm playlistleri getir
-        all_playlists = list(mongo.db.playlists.find())
-        
-        # Her playlist için medya sayısını güncelle
-        for playlist in all_playlists:
-            playlist_id = playlist['_id']
-            
-            # Medya sayısını hesapla
-            query = {"$or": [{"playlist_id": playlist_id}, {"playlist_id": str(playlist_id)}]}
-            media_count = mongo.db.playlist_media.count_documents(query)
-            old_count = playlist.get('media_count', 0)
-            
-            if old_count != media_count:
-                # Veritabanını güncelle
-                mongo.db.playlists.update_one(
-                    {"_id": playlist_id},
-                    {"$set": {"media_count": media_count}}
-                )
-                updated_count += 1
-                updates[playlist.get('name', str(playlist_id))] = {
-                    'old': old_count, 
-                    'new': media_count
-                }
-            
-            total_media += media_count
+        result = Playlist.reconcile_media_counts()
+        updates = {
+            item['name']: {'old': item['old'] or 0, 'new': item['new']}
+            for item in result['corrections']
+        }
         
         # Sonuç sayfasını göster
         return render_template('admin/update_success.html',
                               title="Playlist Medya Sayıları Güncellendi",
-                              message=f"Toplam {updated_count} playlist güncellendi. Sistemde toplam {total_media} medya var.",
+                              message=f"Toplam {len(updates)} playlist güncellendi. Sistemde toplam {result['total_media']} medya var.",
                               updates=updates)
         
     except Exception as e:
@@ -1715,10 +1763,16 @@ def update_playlist_counts():
 @bp.route('/api/logs/recent', methods=['GET'])
 @admin_required
 def api_recent_logs():
-    """Son 5 log kaydını getir"""
-    recent_logs = mongo.db.logs.find().sort('timestamp', -1).limit(5)
+    """
+    Son log kayıtlarını getir (varsayılan 5)
+    
+    Sonraki sayfanın imleci X-Next-Cursor başlığında döner; ?cursor= ile istenir.
+    """
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 100)
+    recent_logs = paginate(mongo.db.logs, {}, 'timestamp', -1, limit, cursor_arg())
     logs_data = []
     
+    User.prefetch([log.get('user_id') for log in recent_logs])
     for log in recent_logs:
         user = User.find_by_id(log.get('user_id')) if log.get('user_id') else None
         log_data = {
@@ -1728,5 +1782,8 @@ def api_recent_logs():
             'detail': log.get('details', {}).get('summary', '-')
         }
         logs_data.append(log_data)
-        
-    return jsonify(logs_data) 
\ No newline at end of file
+    
+    response = jsonify(logs_data)
+    if recent_logs.next_cursor:
+        response.headers['X-Next-Cursor'] = recent_logs.next_cursor
+    return response
@@ -1,119 +1,125 @@
-from flask import Blueprint, request, jsonify, current_app, session
+from flask import Blueprint, request, jsonify, current_app, session, make_response
+from app import csrf
 from app.models.screen import Screen
 from app.models.screen_content import ScreenContent
+from app.models.screen_manifest import ScreenManifest
 from app.models.media import Media
+from app.models.play_stat import PlayStat
+from app.models.screen_telemetry import ScreenTelemetry
 from app.models.playlist import Playlist
 from app.models.logs import Log
+from app.utils.manifest_watcher import manifest_watcher
+from app.utils.tracing import tracer
+from app.utils.telemetry import telemetry_buffer
+from bson import ObjectId
 import datetime
 import json
 import traceback
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
+def _manifest_not_modified(manifest):
+    """
+    Player'ın gönderdiği If-None-Match başlığı manifest sürümüyle eşleşiyorsa
+    304 yanıtı döndürür, aksi halde None
+    """
+    if not request.if_none_match.contains(manifest['version']):
+        return None
+    
+    response = make_response('', 304)
+    response.set_etag(manifest['version'])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _manifest_response(manifest, payload):
+    """
+    Manifest sürümünü ETag olarak taşıyan JSON yanıtı oluşturur
+    """
+    response = jsonify(payload)
+    response.set_etag(manifest['version'])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @bp.route('/screen/<api_key>', methods=['GET'])
 def get_screen_content(api_key):
     """
     Ekran içeriklerini API ile getir
     """
     try:
-        print(f"DEBUG - API isteği başladı: /screen/{api_key}")
-        
-        screen = Screen.find_by_api_key(api_key)
-        
-        if not screen:
-            print(f"DEBUG - Geçersiz API anahtarı: {api_key}")
-            return jsonify({'error': 'Geçersiz API anahtarı'}), 401
-        
-        print(f"DEBUG - Ekran bulundu: {screen.id}")
-        
-        # Ekran durumunu kontrol et
-        if screen.status != Screen.STATUS_ACTIVE:
-            print(f"DEBUG - Ekran aktif değil: {screen.status}")
-            return jsonify({'error': 'Bu ekran aktif değil'}), 403
-        
-        # Ekranın son etkinlik zamanını güncelle
-        screen.update_last_active()
-        
-        # Ekrana ait içerikleri getir
-        content_list = ScreenContent.find_by_screen_id(screen.id)
-        print(f"DEBUG - Ekran içerik sayısı: {len(content_list)}")
-        
-        # İçerik listesini oluştur
-        items = []
-        for index, content in enumerate(content_list):
-            try:
-                print(f"DEBUG - İçerik işleniyor: {index}, ID: {content.get('_id')}, Media ID: {content.get('media_id')}")
-                
-                media = Media.find_by_id(content.get('media_id'))
-                
-                if not media:
-                    print(f"DEBUG - Media bulunamadı: {content.get('media_id')}")
-                    continue
-                    
-                if media.get('status') != Media.STATUS_ACTIVE:
-                    print(f"DEBUG - Media aktif değil: {media.get('status')}")
-                    continue
-                
-                display_time = content.get('display_time') or media.get('display_time', 10)
-                
-                # İçerik bilgileri
-                item = {
-                    'id': str(content.get('_id')),
+        with tracer.span('api.get_screen_content', api_key=api_key) as span:
+            # Önceden derlenmiş manifest tek sorgu ile okunur
+            manifest = ScreenManifest.find_by_api_key(api_key)
+        
+            if not manifest:
+                span.set(status=401)
+                return jsonify({'error': 'Geçersiz API anahtarı'}), 401
+        
+            screen = manifest['screen']
+        
+            # Ekran durumunu kontrol et
+            if screen.get('status') != Screen.STATUS_ACTIVE:
+                span.set(status=403, screen_status=screen.get('status'))
+                return jsonify({'error': 'Bu ekran aktif değil'}), 403
+        
+            # Ekranın son etkinlik zamanını güncelle
+            Screen.update_last_active_by_id(manifest['screen_id'])
+        
+            # Player'daki içerik güncelse medya ve içerik listesine dokunmadan 304 döndür
+            not_modified = _manifest_not_modified(manifest)
+            if not_modified:
+                span.set(status=304)
+                return not_modified
+        
+            # İçerik listesini oluştur
+            items = []
+            for item in manifest['items']:
+                items.append({
+                    'id': item['id'],
                     'media': {
-                        'id': str(media.get('_id')),
-                        'title': media.get('title', ''),
-                        'description': media.get('description', ''),
-                        'file_type': media.get('file_type', ''),
-                        'width': media.get('width', 0),
-                        'height': media.get('height', 0),
-                        'duration': media.get('duration', 0),
-                        'file_url': f"/uploads/{media.get('filename', '')}"
+                        'id': item['media_id'],
+                        'title': item['title'],
+                        'description': item['description'],
+                        'file_type': item['file_type'],
+                        'width': item['width'],
+                        'height': item['height'],
+                        'duration': item['duration'],
+                        'file_url': item['file_url']
                     },
-                    'display_time': display_time,
-                    'order': content.get('order', index)
-                }
-                
-                items.append(item)
-                print(f"DEBUG - Eklenen içerik: ID: {item['id']}, Media: {item['media']['title']}, Dosya tipi: {item['media']['file_type']}, URL: {item['media']['file_url']}, Sıra: {item['order']}")
-            except Exception as e:
-                print(f"DEBUG - İçerik işleme hatası: {str(e)}")
-                print(traceback.format_exc())
-        
-        # İçerikler sıraya göre sıralanıyor
-        items.sort(key=lambda x: x['order'])
-        
-        # Medya görüntülenme sayılarını artır (async olarak)
-        if items:
-            media_ids = [content.get('media_id') for content in content_list]
-            Media.increment_views(media_ids)
+                    'display_time': item['display_time'],
+                    'order': item['order']
+                })
         
-        # Ekran bilgileri ve içerik listesi
-        response = {
-            'success': True,
-            'screen': {
-                'id': screen.id,
-                'name': screen.name,
-                'orientation': screen.orientation,
-                'resolution': screen.resolution,
-                'refresh_rate': screen.refresh_rate,
-                'show_clock': screen.show_clock
-            },
-            'content': items,
-            'timestamp': datetime.datetime.utcnow().isoformat()
-        }
+            # Ekran bilgileri ve içerik listesi
+            response = {
+                'success': True,
+                'screen': {
+                    'id': screen['id'],
+                    'name': screen['name'],
+                    'orientation': screen['orientation'],
+                    'resolution': screen['resolution'],
+                    'refresh_rate': screen['refresh_rate'],
+                    'show_clock': screen['show_clock']
+                },
+                'content': items,
+                'timestamp': datetime.datetime.utcnow().isoformat()
+            }
         
-        print(f"DEBUG - API yanıtı: İçerik sayısı: {len(items)}")
+            span.set(status=200, count=len(items))
         
-        return jsonify(response)
+            return _manifest_response(manifest, response)
     except Exception as e:
-        print(f"DEBUG - API genel hatası: {str(e)}")
+        print(f"API genel hatası: {str(e)}")
         print(traceback.format_exc())
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/screen/<api_key>/status', methods=['POST'])
+@csrf.exempt
 def update_screen_status(api_key):
     """
     Ekran durumunu güncellemek için kullanılır (Raspberry Pi'dan)
+    
+    Sıcaklık, bellek, işlemci ve oynatılan medya bilgileri telemetri tamponuna
+    eklenir ve saatlik kovalara toplu olarak yazılır.
     """
     try:
         data = request.get_json()
@@ -124,26 +130,13 @@ def update_screen_status(api_key):
         if not screen:
             return jsonify({'success': False, 'message': 'Ekran bulunamadı'}), 404
         
-        # Ekran son aktivite zamanını ve varsa diğer durum bilgilerini güncelle
-        update_data = {
-            'last_active': datetime.datetime.utcnow()
-        }
-        
-        # Ekran sıcaklığı, bellek durumu vb. bilgiler varsa ekle
-        if 'temperature' in data:
-            update_data['temperature'] = data['temperature']
-        
-        if 'memory_usage' in data:
-            update_data['memory_usage'] = data['memory_usage']
-        
-        if 'cpu_usage' in data:
-            update_data['cpu_usage'] = data['cpu_usage']
-        
-        if 'current_media' in data:
-            update_data['current_media'] = data['current_media']
+        # Ekran son aktivite zamanını güncelle (heartbeat tamponu üzerinden)
+        screen.update_last_active()
         
-        # Ekranı güncelle
-        Screen.update(screen['_id'], update_data)
+        # Ölçümleri telemetri tamponuna ekle
+        sample = ScreenTelemetry.build_sample(data)
+        if sample:
+            telemetry_buffer.record(ObjectId(screen.id), sample)
         
         return jsonify({
             'success': True,
@@ -158,48 +151,45 @@ def screen_preview(api_key):
     Ekran önizleme için HTML içeriği döndürür
     """
     try:
-        screen = Screen.find_by_api_key(api_key)
-        if not screen:
+        # Önceden derlenmiş manifest tek sorgu ile okunur
+        manifest = ScreenManifest.find_by_api_key(api_key)
+        if not manifest:
             return "Ekran bulunamadı", 404
         
-        # Ekran içeriklerini al
-        content_list = ScreenContent.find_by_screen_id(screen['_id'])
+        not_modified = _manifest_not_modified(manifest)
+        if not_modified:
+            return not_modified
         
         # Her içerik için medya detaylarını ekle
         content_with_media = []
-        for content in content_list:
-            media = Media.find_by_id(content['media_id'])
-            if media and media.get('status') == 'active':
-                content_data = {
-                    'id': str(content['_id']),
-                    'display_time': content.get('display_time', media.get('display_time', 10)),
-                    'order': content.get('order', 0),
-                    'media': {
-                        'id': str(media['_id']),
-                        'title': media.get('title', ''),
-                        'file_type': media.get('file_type', ''),
-                        'file_url': f"/uploads/{media.get('filename', '')}",
-                        'display_time': media.get('display_time', 10)
-                    }
+        for item in manifest['items']:
+            content_with_media.append({
+                'id': item['id'],
+                'display_time': item['display_time'],
+                'order': item['order'],
+                'media': {
+                    'id': item['media_id'],
+                    'title': item['title'],
+                    'file_type': item['file_type'],
+                    'file_url': item['file_url'],
+                    'display_time': item['media_display_time']
                 }
-                content_with_media.append(content_data)
-        
-        # İçerikleri sıraya göre sırala
-        content_with_media.sort(key=lambda x: x['order'])
+            })
         
         # Ekran ve içerik bilgilerini HTML template'e gönder
+        screen = manifest['screen']
         screen_data = {
-            'id': str(screen['_id']),
-            'name': screen.get('name', ''),
-            'orientation': screen.get('orientation', 'horizontal'),
-            'resolution': screen.get('resolution', '1920x1080'),
-            'refresh_rate': screen.get('refresh_rate', 15),
-            'show_clock': screen.get('show_clock', True),
+            'id': screen['id'],
+            'name': screen['name'],
+            'orientation': screen['orientation'],
+            'resolution': screen['resolution'],
+            'refresh_rate': screen['refresh_rate'],
+            'show_clock': screen['show_clock'],
             'api_key': api_key
         }
         
         # JSON formatında içerik bilgilerini döndür
-        return jsonify({
+        return _manifest_response(manifest, {
             'screen': screen_data,
             'content': content_with_media
         })
@@ -286,76 +276,239 @@ def player_healthcheck(api_key):
     
     return jsonify(response)
 
+def _player_screen(screen):
+    """
+    Manifestteki ekran bilgilerini player içerik formatına çevirir
+    """
+    return {
+        'id': screen['id'],
+        'name': screen['name'],
+        'orientation': screen['orientation'],
+        'resolution': screen['resolution'],
+        'refresh_rate': screen['refresh_rate'],
+        'show_clock': screen['show_clock']
+    }
+
+def _player_item(item):
+    """
+    Manifest öğesini player içerik formatına çevirir
+    """
+    return {
+        'id': item['id'],
+        'media_id': item['media_id'],
+        'title': item['title'],
+        'description': item['description'],
+        'file_type': item['file_type'],
+        'width': item['width'],
+        'height': item['height'],
+        'duration': item['duration'],
+        'display_time': item['display_time'],
+        'file_url': item['file_url'],
+        'orientation': item['orientation'],
+        'category': item['category'],
+        'public': item['public'],
+        'created_at': item['created_at']
+    }
+
 @bp.route('/player/content/<api_key>', methods=['GET'])
 def get_player_content(api_key):
     """
     Player için içerik getir
     """
-    screen = Screen.find_by_api_key(api_key)
+    # Önceden derlenmiş manifest tek sorgu ile okunur
+    manifest = ScreenManifest.find_by_api_key(api_key)
     
-    if not screen:
+    if not manifest:
         return jsonify({'error': 'Geçersiz API anahtarı'}), 401
     
+    screen = manifest['screen']
+    
     # Ekran durumunu kontrol et
-    if screen.status != Screen.STATUS_ACTIVE:
+    if screen.get('status') != Screen.STATUS_ACTIVE:
         return jsonify({'error': 'Bu ekran aktif değil'}), 403
     
     # Ekranın son etkinlik zamanını güncelle
-    screen.update_last_active()
-    
-    # Ekrana ait içerikleri getir
-    content_list = ScreenContent.find_by_screen_id(screen.id)
-    
-    # İçerik listesini oluştur
-    items = []
-    for content in content_list:
-        media = Media.find_by_id(content.get('media_id'))
-        
-        if not media or media.get('status') != Media.STATUS_ACTIVE:
-            continue
-        
-        display_time = content.get('display_time') or media.get('display_time', 10)
-        
-        # İçerik bilgileri
-        item = {
-            'id': str(content.get('_id')),
-            'title': media.get('title', ''),
-            'description': media.get('description', ''),
-            'file_type': media.get('file_type', ''),
-            'width': media.get('width', 0),
-            'height': media.get('height', 0),
-            'duration': media.get('duration', 0),
-            'display_time': display_time,
-            'file_url': f"/uploads/{media.get('filename', '')}",
-            'orientation': media.get('orientation', 'horizontal'),
-            'category': media.get('category', ''),
-            'public': media.get('public', False),
-            'created_at': media.get('created_at')
-        }
-        
-        items.append(item)
+    Screen.update_last_active_by_id(manifest['screen_id'])
     
-    # Medya görüntülenme sayılarını artır (async olarak)
-    if items:
-        media_ids = [content.get('media_id') for content in content_list]
-        Media.increment_views(media_ids)
+    # Player'daki içerik güncelse medya ve içerik listesine dokunmadan 304 döndür
+    not_modified = _manifest_not_modified(manifest)
+    if not_modified:
+        return not_modified
     
     # Ekran bilgileri ve içerik listesi
     response = {
-        'screen': {
-            'id': screen.id,
-            'name': screen.name,
-            'orientation': screen.orientation,
-            'resolution': screen.resolution,
-            'refresh_rate': screen.refresh_rate,
-            'show_clock': screen.show_clock
-        },
-        'items': items
+        'screen': _player_screen(screen),
+        'items': [_player_item(item) for item in manifest['items']]
     }
     
-    return jsonify(response)
+    return _manifest_response(manifest, response)
+
+@bp.route('/player/content/<api_key>/delta', methods=['GET'])
+def get_player_content_delta(api_key):
+    """
+    Player için içerik farkı (delta) getir
+    
+    Player bildiği manifest sürümünü 'version' parametresi veya If-None-Match
+    başlığı ile gönderir. Sürüm güncelse 304 döner. Sürüm geçmişte bulunuyorsa
+    sadece eklenen, silinen, değişen öğeler ve gerekiyorsa yeni sıra gönderilir;
+    sürüm bilinmiyorsa veya çok eskiyse get_player_content ile aynı içerik
+    'full': true olarak döner.
+    """
+    manifest = ScreenManifest.find_by_api_key(api_key)
+    
+    if not manifest:
+        return jsonify({'error': 'Geçersiz API anahtarı'}), 401
+    
+    screen = manifest['screen']
+    
+    # Ekran durumunu kontrol et
+    if screen.get('status') != Screen.STATUS_ACTIVE:
+        return jsonify({'error': 'Bu ekran aktif değil'}), 403
+    
+    # Ekranın son etkinlik zamanını güncelle
+    Screen.update_last_active_by_id(manifest['screen_id'])
+    
+    not_modified = _manifest_not_modified(manifest)
+    if not_modified:
+        return not_modified
+    
+    known_version = request.args.get('version')
+    if not known_version and request.if_none_match:
+        known_version = next(iter(request.if_none_match), None)
+    
+    if known_version == manifest['version']:
+        response = make_response('', 304)
+        response.set_etag(manifest['version'])
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    items = [_player_item(item) for item in manifest['items']]
+    
+    base = ScreenManifest.find_version(manifest['screen_id'], known_version)
+    if not base:
+        # Sürüm bilinmiyor veya geçmişten düşmüş: tam senkronizasyon
+        return _manifest_response(manifest, {
+            'full': True,
+            'version': manifest['version'],
+            'screen': _player_screen(screen),
+            'items': items
+        })
+    
+    delta = ScreenManifest.diff_items(
+        [_player_item(item) for item in base.get('items', [])],
+        items
+    )
+    
+    response = {
+        'full': False,
+        'base_version': known_version,
+        'version': manifest['version'],
+        'added': delta['added'],
+        'removed': delta['removed'],
+        'modified': delta['modified'],
+        'order': delta['order']
+    }
+    
+    # Ekran ayarları değiştiyse onlar da gönderilir
+    if base.get('screen') != screen:
+        response['screen'] = _player_screen(screen)
+    
+    return _manifest_response(manifest, response)
+
+@bp.route('/player/<api_key>/plays', methods=['POST'])
+@csrf.exempt
+def report_player_plays(api_key):
+    """
+    Player'ın gerçek oynatma olaylarını (proof-of-play) toplu olarak kaydeder
+    
+    Beklenen gövde: {"events": [{"media_id": "...", "played_at": "ISO 8601 veya epoch", "duration": saniye}, ...]}
+    Olaylar medya/ekran/saat bazında sayaçlara işlenir; medyanın görüntülenme
+    sayısı da bu sayaçlardan beslenir.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('events'), list):
+            return jsonify({'success': False, 'message': 'Geçersiz veri'}), 400
+        
+        manifest = ScreenManifest.find_by_api_key(api_key)
+        if not manifest:
+            return jsonify({'success': False, 'message': 'Geçersiz API anahtarı'}), 401
+        
+        events = data['events']
+        max_batch = current_app.config.get('PLAY_EVENTS_MAX_BATCH', 1000)
+        if len(events) > max_batch:
+            return jsonify({
+                'success': False,
+                'message': f'Tek istekte en fazla {max_batch} olay gönderilebilir'
+            }), 413
+        
+        # Manifestteki medyalar doğrudan, diğerleri ekran sahibine görünürse kabul edilir
+        accepted, rejected = PlayStat.record_batch(
+            manifest['screen_id'],
+            events,
+            allowed_media_ids=manifest['media_ids']
+        )
+        
+        Screen.update_last_active_by_id(manifest['screen_id'])
+        
+        return jsonify({
+            'success': True,
+            'accepted': accepted,
+            'rejected': rejected
+        })
+        
+    except Exception as e:
+        print(f"Oynatma olayları kaydedilirken hata: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({'success': False, 'message': 'Sunucu hatası'}), 500
+
+@bp.route('/player/<api_key>/changes', methods=['GET'])
+def wait_for_player_changes(api_key):
+    """
+    Player için long-poll: ekranın içerik sürümü değişene kadar bağlantıyı açık tutar
+    
+    Player bildiği sürümü 'version' parametresi veya If-None-Match başlığı ile gönderir.
+    Sürüm değiştiğinde yeni sürüm ile hemen 200 döner; zaman aşımında 304 döner ve
+    player aynı isteği tekrar açar.
+    """
+    manifest = ScreenManifest.find_by_api_key(api_key)
+    
+    if not manifest:
+        return jsonify({'error': 'Geçersiz API anahtarı'}), 401
+    
+    known_version = request.args.get('version')
+    if not known_version and request.if_none_match:
+        known_version = next(iter(request.if_none_match), None)
+    
+    current_version = manifest['version']
+    
+    # Player'ın sürümü zaten eskiyse beklemeden bildir
+    if known_version == current_version:
+        max_timeout = current_app.config.get('PLAYER_LONGPOLL_TIMEOUT', 25)
+        try:
+            timeout = min(float(request.args.get('timeout', max_timeout)), max_timeout)
+        except ValueError:
+            timeout = max_timeout
+        
+        current_version = manifest_watcher.wait(manifest['screen_id'], known_version, timeout)
+        
+        if current_version == known_version:
+            response = make_response('', 304)
+            response.set_etag(current_version)
+            return response
+    
+    if current_version is None:
+        return jsonify({'error': 'Geçersiz API anahtarı'}), 401
+    
+    response = jsonify({
+        'changed': True,
+        'version': current_version
+    })
+    response.set_etag(current_version)
+    return response
 
 @bp.route('/screen/report_offline', methods=['POST'])
+@csrf.exempt
 def report_offline_period():
     """
     Ekranın offline kalma süresini raporlamak için kullanılır
@@ -383,14 +536,14 @@ def report_offline_period():
         
         if result:
             # Log ekle
-            Log.create({
-                'action': 'offline_period_reported',
-                'user_id': None,
-                'screen_id': screen.id,
-                'details': {
+            Log.log_action(
+                action='offline_period_reported',
+                ip_address=request.remote_addr,
+                details={
+                    'screen_id': screen.id,
                     'offline_period': offline_period
                 }
-            })
+            )
             
             return jsonify({
                 'success': True,
@@ -399,8 +552,8 @@ def report_offline_period():
         else:
             return jsonify({
                 'success': False,
-                'message': 'Offline süre kaydedilemedi'
-            }), 500
+                'message': 'Offline dönem bilgisi yorumlanamadı'
+            }), 400
     except Exception as e:
         print(f"Offline süre raporlama hatası: {str(e)}")
         print(traceback.format_exc())
@@ -144,9 +144,7 @@ def first_login():
         if password != password_confirm:
             flash('Şifreler eşleşmiyor.', 'danger')
         else:
-            user.password = User.hash_password(password)
-            user.status = User.STATUS_ACTIVE
-            user.save()
+            user.update(password=password, status=User.STATUS_ACTIVE)
             
             flash('Şifreniz başarıyla güncellendi.', 'success')
             
@@ -4,7 +4,10 @@ from app.models.screen import Screen
 from app.models.media import Media
 from app.models.logs import Log
 from app.models.screen_media import ScreenMedia
+from app.utils.counters import counters
 from app.utils.decorators import supervisor_required
+from app.utils.ids import to_object_ids
+from app import mongo
 import os
 from bson import ObjectId
 from functools import wraps
@@ -16,37 +19,34 @@ bp = Blueprint('supervisor', __name__)
 @supervisor_required
 def dashboard():
     """Denetmen dashboard sayfası"""
-    pending_media_count = len(Media.find_pending())
+    pending_media_count = counters.tally('media.status', Media.STATUS_PROCESSING)
     
     user = User.find_by_id(session['user_id'])
     
     # Admin tüm medyaları görüntüleyebilir
     if user.is_admin():
-        media_list = Media.find_all()
-        pending_media = Media.find_pending()
+        media_count = counters.total('media')
+        # Son eklenen medyalar (en fazla 4 tane)
+        recent_media = Media.find_all(limit=4, projection='list')
+        pending_media = Media.find_pending(projection='list')
     else:
         # Denetmenler sadece kendilerine atanmış kullanıcıların medyalarını görüntüleyebilir
         # TODO: Denetmene atanmış kullanıcıları getirme
-        managed_users = User.find_all()  # Şimdilik tüm kullanıcılar
-        managed_user_ids = [user.id for user in managed_users]
+        managed_users = User.find_all(projection='option')  # Şimdilik tüm kullanıcılar
+        media_query = {'user_id': {'$in': to_object_ids(user.id for user in managed_users)}}
         
-        media_list = []
-        for media in Media.find_all():
-            if media.user_id in managed_user_ids:
-                media_list.append(media)
-                
-        pending_media = []
-        for media in Media.find_pending():
-            if media.user_id in managed_user_ids:
-                pending_media.append(media)
+        media_count = mongo.db.media.count_documents(media_query)
+        recent_media = list(
+            mongo.db.media.find(media_query, Media.PROJECTIONS['list']).sort('created_at', -1).limit(4)
+        )
+        pending_media = list(
+            mongo.db.media.find(dict(media_query, status=Media.STATUS_PROCESSING), Media.PROJECTIONS['list'])
+            .sort('created_at', -1).limit(100)
+        )
     
     # Kullanıcı ve ekran sayıları
-    user_count = len(User.find_all())
-    screen_count = len(Screen.find_all())
-    media_count = len(media_list)
-    
-    # Son eklenen medyaları getir (en fazla 4 tane)
-    recent_media = sorted(media_list, key=lambda x: x.created_at, reverse=True)[:4]
+    user_count = counters.total('users')
+    screen_count = counters.total('screens')
     
     # Örnek etkinlik verileri
     import datetime
@@ -109,7 +109,7 @@ def media():
     else:
         # Denetmenler sadece kendilerine atanmış kullanıcıların medyalarını görüntüleyebilir
         # TODO: Denetmene atanmış kullanıcıları getirme
-        managed_users = User.find_all()  # Şimdilik tüm kullanıcılar
+        managed_users = User.find_all(projection='option')  # Şimdilik tüm kullanıcılar
         managed_user_ids = [user.id for user in managed_users]
         
         media_list = []
@@ -131,7 +131,7 @@ def pending_media():
     else:
         # Denetmenler sadece kendilerine atanmış kullanıcıların medyalarını görüntüleyebilir
         # TODO: Denetmene atanmış kullanıcıları getirme
-        managed_users = User.find_all()  # Şimdilik tüm kullanıcılar
+        managed_users = User.find_all(projection='option')  # Şimdilik tüm kullanıcılar
         managed_user_ids = [user.id for user in managed_users]
         
         media_list = []
@@ -182,6 +182,7 @@ def view_media(media_id):
     
     # Ekran detaylarını al
     assigned_screens = []
+    Screen.prefetch([relation.screen_id for relation in screen_media_relations])
     for relation in screen_media_relations:
         screen = Screen.find_by_id(relation.screen_id)
         if screen:
@@ -318,7 +319,7 @@ def approve_all_media():
     else:
         # Denetmenler sadece kendilerine atanmış kullanıcıların medyalarını görüntüleyebilir
         # TODO: Denetmene atanmış kullanıcıları getirme
-        managed_users = User.find_all()  # Şimdilik tüm kullanıcılar
+        managed_users = User.find_all(projection='option')  # Şimdilik tüm kullanıcılar
         managed_user_ids = [user.id for user in managed_users]
         
         pending_media = []
@@ -383,6 +384,7 @@ def view_screen(screen_id):
     
     # Medya detaylarını al ve sırala
     assigned_media = []
+    Media.prefetch([relation.media_id for relation in screen_media_relations])
     for relation in screen_media_relations:
         media = Media.find_by_id(relation.media_id)
         if media:
@@ -445,21 +447,16 @@ def assign_media_to_screen(screen_id):
         flash('Bu medyayı atama yetkiniz yok.', 'danger')
         return redirect(url_for('supervisor.view_screen', screen_id=screen_id))
     
-    # Sırayı belirle (mevcut son medyadan sonra)
-    screen_media_list = ScreenMedia.find_by_screen(screen_id)
-    order = len(screen_media_list)
-    
     # Display_time'ı sayıya çevir
     try:
         display_time = int(display_time) if display_time else None
     except ValueError:
         display_time = None
     
-    # Ekran-medya ilişkisi oluştur
+    # Ekran-medya ilişkisi oluştur (sıra ekranın sayacından alınır, sona eklenir)
     ScreenMedia.create(
         screen_id=screen_id,
         media_id=media_id,
-        order=order,
         display_time=display_time
     )
     
@@ -490,18 +487,9 @@ def remove_media_from_screen(screen_id, media_id):
         flash('Bu ekranda değişiklik yapma yetkiniz yok.', 'danger')
         return redirect(url_for('supervisor.screens'))
     
-    # İlişkiyi kaldır
+    # İlişkiyi kaldır (kalan öğelerin sıraları aralıklı olabilir, yeniden numaralanmaz)
     ScreenMedia.remove_from_screen(screen_id, media_id)
     
-    # Sıralamayı yeniden düzenle
-    screen_media_list = ScreenMedia.find_by_screen(screen_id)
-    media_order = []
-    for i, relation in enumerate(sorted(screen_media_list, key=lambda x: x.order)):
-        media_order.append({"media_id": relation.media_id, "order": i})
-    
-    if media_order:
-        ScreenMedia.reorder_screen_media(screen_id, media_order)
-    
     Log.log_action(
         action="screen_media_remove",
         user_id=session['user_id'],
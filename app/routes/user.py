@@ -13,13 +13,16 @@ from functools import wraps
 import time
 from flask_login import login_required, current_user
 from app.utils.decorators import user_required, supervisor_required
+from app.utils.ids import to_object_id
+from app.utils.pagination import cursor_arg
 from app import mongo
-import math
-from pymongo import MongoClient
 from bson.objectid import ObjectId
 
 bp = Blueprint('user', __name__)
 
+# Bağlı (linked) ekranlarda elle içerik düzenlemesi reddedilir
+LINKED_SCREEN_MESSAGE = "Bu ekran bir playlist'e bağlı; içerikleri playlist üzerinden düzenleyin."
+
 def login_required(f):
     """Giriş yapılmış mı kontrolü yapan decorator"""
     @wraps(f)
@@ -48,8 +51,8 @@ def dashboard():
         return redirect(url_for('auth.logout'))
     
     # Kullanıcının ekranlarını ve medyalarını getir
-    screens = Screen.find_by_user(user_id)
-    media_items = Media.find_by_user(user_id)
+    screens = Screen.find_by_user(user_id, projection='list')
+    media_items = Media.find_by_user(user_id, projection='list')
     
     # Görüntülenecek istatistikler
     media_count = len(media_items)
@@ -116,8 +119,8 @@ def profile():
             return redirect(url_for('auth.logout'))
         
         # Kullanıcı istatistikleri
-        total_screens = len(Screen.find_by_user(user_id))
-        media_items = Media.find_by_user(user_id)
+        total_screens = len(Screen.find_by_user(user_id, projection='list'))
+        media_items = Media.find_by_user(user_id, projection='list')
         total_media = len(media_items)
         active_media = sum(1 for m in media_items if hasattr(m, 'status') and m.status == Media.STATUS_ACTIVE)
         
@@ -336,15 +339,20 @@ def screens():
     user_id = session['user_id']
     user = User.find_by_id(user_id)
     
-    # Kullanıcının ekranlarını getir
-    screens_list = Screen.find_by_user(user_id)
-    
-    # İstatistikler - Screen nesnesine uygun olarak güncellendi
-    active_count = sum(1 for screen in screens_list if screen.status == Screen.STATUS_ACTIVE)
-    inactive_count = sum(1 for screen in screens_list if screen.status == Screen.STATUS_INACTIVE)
+    # Kullanıcının ekranlarını sayfa sayfa getir (imleç tabanlı)
+    cursor = cursor_arg()
+    screens_list = Screen.find_by_user(user_id, cursor=cursor, projection='list')
     
-    # Paket limitleri için
-    screen_count = len(screens_list)
+    # İstatistikler ve paket limiti tüm ekranlar üzerinden; tek sayfalık
+    # listelerde sayım sorgusu gerekmez
+    if cursor or screens_list.next_cursor:
+        active_count = Screen.count_by_user(user_id, status=Screen.STATUS_ACTIVE)
+        inactive_count = Screen.count_by_user(user_id, status=Screen.STATUS_INACTIVE)
+        screen_count = Screen.count_by_user(user_id)
+    else:
+        active_count = sum(1 for screen in screens_list if screen.status == Screen.STATUS_ACTIVE)
+        inactive_count = sum(1 for screen in screens_list if screen.status == Screen.STATUS_INACTIVE)
+        screen_count = len(screens_list)
     
     # Kullanıcının paket bilgisini kontrol et
     if not hasattr(user, 'package') or not user.package or user.package not in ['standard', 'pro', 'enterprise']:
@@ -365,7 +373,9 @@ def screens():
                           active_count=active_count,
                           inactive_count=inactive_count,
                           screen_count=screen_count,
-                          allowed_screen_count=allowed_screen_count)
+                          allowed_screen_count=allowed_screen_count,
+                          cursor=cursor,
+                          next_cursor=screens_list.next_cursor)
 
 @bp.route('/screens/create', methods=['GET', 'POST'])
 @user_required
@@ -436,7 +446,7 @@ def create_screen():
         
         # Kullanıcının playlistleri var mı kontrol et
         from app.models.playlist import Playlist
-        user_playlists = Playlist.find_by_user(user_id, status=Playlist.STATUS_ACTIVE)
+        user_playlists = Playlist.find_by_user(user_id, status=Playlist.STATUS_ACTIVE, projection='option')
         
         # Playlist varsa içerik yönetim sayfasına, yoksa playlist oluşturma sayfasına yönlendir
         if user_playlists and len(user_playlists) > 0:
@@ -546,9 +556,6 @@ def edit_screen(screen_id):
 @user_required
 def delete_screen(screen_id):
     """Ekran silme"""
-    from bson.objectid import ObjectId
-    from app.models.screen_content import ScreenContent  # İlişkili içerik modeli
-    
     screen = Screen.find_by_id(screen_id)
     
     if not screen:
@@ -568,22 +575,8 @@ def delete_screen(screen_id):
     )
     
     try:
-        # 1. İlişkili içerikleri doğrudan silelim
-        ScreenContent.delete_by_screen(screen_id)
-        
-        # 2. Ekranı silelim
-        if isinstance(screen_id, str):
-            try:
-                obj_id = ObjectId(screen_id)
-            except:
-                obj_id = screen_id
-        else:
-            obj_id = screen_id
-            
-        # Ekranı sil
-        result = mongo.db.screens.delete_one({'_id': obj_id})
-        
-        if result.deleted_count > 0:
+        # İlişkili içerikleri, ekranı ve player manifestini sil
+        if screen.delete():
             flash('Ekran başarıyla silindi.', 'success')
         else:
             flash('Ekran silinirken bir hata oluştu.', 'danger')
@@ -602,37 +595,25 @@ def delete_screen(screen_id):
 def media():
     """Kullanıcı medya sayfası"""
     from app.models.media import Media, MediaShare
-    page = request.args.get('page', 1, type=int)
     limit = 12
-    skip = (page - 1) * limit
+    cursor = cursor_arg()
     
     user_id = session['user_id']
     
     # Filtre parametrelerini al
     media_type = request.args.get('type')
-    status = request.args.get('status')
+    status = request.args.get('status') or None
     category = request.args.get('category')
     
-    # Kullanıcının medyalarını getir - MediaShare sistemini kullanır
-    media_items = Media.find_by_user(user_id, status=status, limit=limit, skip=skip)
-    
-    # Filtreleme işlemleri
-    if media_type:
-        media_items = [m for m in media_items if m.get('file_type') == media_type]
-    
-    if category:
-        media_items = [m for m in media_items if m.get('category') == category]
-    
-    # Toplam medya sayısını getir
-    total_count = Media.count_by_user(user_id)
-    
-    # Sayfalandırma
-    total_pages = math.ceil(total_count / limit)
+    # Kullanıcının medyalarını getir - MediaShare sistemini kullanır. Filtreler
+    # sorguda uygulanır ki her sayfa dolu gelsin
+    media_items = Media.find_by_user(user_id, status=status, limit=limit, cursor=cursor,
+                                     file_type=media_type, category=category)
     
     return render_template('user/media.html', 
                           media_list=media_items,  # Burayı media_list olarak düzelttim
-                          total_pages=total_pages, 
-                          current_page=page,
+                          cursor=cursor,
+                          next_cursor=media_items.next_cursor,
                           active_page='media')
 
 @bp.route('/media/upload', methods=['GET', 'POST'])
@@ -956,16 +937,16 @@ def edit_screen_content(screen_id):
             resolution = request.form.get('resolution')
         
         # Ekranı güncelle
-        Screen.update(screen_id, {
-            'name': name,
-            'orientation': orientation,
-            'resolution': resolution,
-            'location': location,
-            'description': description,
-            'status': status,
-            'refresh_rate': refresh_rate,
-            'show_clock': show_clock
-        })
+        screen.update(
+            name=name,
+            orientation=orientation,
+            resolution=resolution,
+            location=location,
+            description=description,
+            status=status,
+            refresh_rate=refresh_rate,
+            show_clock=show_clock
+        )
         
         flash(f'"{name}" ekranı başarıyla güncellendi.', 'success')
         return redirect(url_for('user.screens'))
@@ -983,7 +964,7 @@ def delete_screen_content(screen_id):
         return redirect(url_for('user.screens'))
     
     name = screen.name
-    Screen.delete(screen_id)
+    screen.delete()
     
     flash(f'"{name}" ekranı ve ilişkili tüm içerikler başarıyla silindi.', 'success')
     return redirect(url_for('user.screens'))
@@ -1007,33 +988,20 @@ def preview_screen(screen_id):
             flash('Bu ekrana erişim izniniz yok.', 'danger')
             return redirect(url_for('user.screens'))
         
-        # Ekran içeriğini al
-        from app.models.screen_content import ScreenContent
-        screen_content_list = ScreenContent.find_by_screen_id(screen_id)
+        # Ekran içeriğini al (bağlı ekranlarda doğrudan playlist'ten)
+        from app.models.screen_playlist import ScreenPlaylist
+        linked_playlist = ScreenPlaylist.find_linked(screen_id)
+        if linked_playlist:
+            from app.models.playlist_media import PlaylistMedia
+            screen_content_list = PlaylistMedia.find_with_media(linked_playlist.get('playlist_id'), media_status=None)
+        else:
+            from app.models.screen_content import ScreenContent
+            screen_content_list = ScreenContent.find_with_media(screen_id, media_status=None)
         
         print(f"DEBUG - preview_screen: Bulunan içerik sayısı: {len(screen_content_list)}")
         
-        # Her içerik için medya bilgilerini ekle
-        screen_contents_with_media = []
-        for content in screen_content_list:
-            try:
-                media_id = content.get('media_id')
-                print(f"DEBUG - preview_screen: İçerik için medya getiriliyor: {media_id}")
-                
-                media = Media.find_by_id(media_id)
-                if not media:
-                    print(f"DEBUG - preview_screen: Medya bulunamadı: {media_id}")
-                    continue
-                
-                # İçerik nesnesine medya bilgisini ekle
-                content_with_media = dict(content)
-                content_with_media['media'] = media
-                screen_contents_with_media.append(content_with_media)
-                
-                print(f"DEBUG - preview_screen: İçerik eklendi: ID: {content.get('_id')}, Media: {media.get('title')}")
-            except Exception as e:
-                print(f"DEBUG - preview_screen: İçerik işleme hatası: {str(e)}")
-                print(traceback.format_exc())
+        # Medyası bulunan içerikleri al
+        screen_contents_with_media = [content for content in screen_content_list if content.get('media')]
         
         print(f"DEBUG - preview_screen: İşlenen toplam içerik sayısı: {len(screen_contents_with_media)}")
         
@@ -1072,11 +1040,11 @@ def regenerate_api_key(screen_id):
     # Veritabanında güncelle
     if screen.update(api_key=new_api_key):
         # Log oluştur
-        Log.create(
+        Log.log_action(
+            action=Log.TYPE_SCREEN_UPDATE,
             user_id=session['user_id'],
-            action='API anahtarı yenilendi',
-            details=f'Ekran ID: {screen_id}',
-            ip_address=request.remote_addr
+            ip_address=request.remote_addr,
+            details={'screen_id': screen_id, 'message': 'API anahtarı yenilendi'}
         )
         flash('API anahtarı başarıyla yenilendi.', 'success')
     else:
@@ -1104,6 +1072,11 @@ def save_screen_content_order(screen_id):
         flash('Bu ekrana erişim izniniz yok.', 'danger')
         return redirect(url_for('user.screens'))
     
+    from app.models.screen_playlist import ScreenPlaylist
+    if ScreenPlaylist.find_linked(screen_id):
+        flash(LINKED_SCREEN_MESSAGE, 'warning')
+        return redirect(url_for('user.manage_screen_content', screen_id=screen_id))
+    
     # İçerik sıralamasını al - JSON veya form verisi olarak gönderilebilir
     content_order = []
     
@@ -1116,14 +1089,14 @@ def save_screen_content_order(screen_id):
         if content_ids:
             content_order = content_ids
     
-    # Her bir içerik için sıra numarasını güncelle
-    from app.models.screen_media import ScreenMedia
+    # Sıralamayı uygula (tek taşıma tek belge, diğerleri tek bulk_write)
+    from app.models.screen_content import ScreenContent
     success = True
-    for index, content_id in enumerate(content_order):
-        screen_media = ScreenMedia.find_by_id(content_id)
-        if screen_media and screen_media.screen_id == int(screen_id):
-            if not screen_media.update(order=index + 1):
-                success = False
+    try:
+        ScreenContent.reorder_screen_contents(screen_id, content_order)
+    except Exception as e:
+        print(f"İçerik sıralaması kaydedilemedi: {str(e)}")
+        success = False
     
     if success:
         flash('İçerik sıralaması güncellendi.', 'success')
@@ -1159,34 +1132,23 @@ def manage_screen_content(screen_id):
         
         # Ekran içeriklerini getir
         from app.models.screen_content import ScreenContent
+        from app.models.screen_playlist import ScreenPlaylist
         try:
-            screen_content_list = ScreenContent.find_by_screen_id(screen_id)
+            # İçerikler medya bilgileriyle birlikte tek $in sorgusu ile getirilir;
+            # bağlı ekranların kopyası olmadığı için playlist öğeleri okunur
+            linked_playlist = ScreenPlaylist.find_linked(screen_id)
+            if linked_playlist:
+                from app.models.playlist_media import PlaylistMedia
+                screen_content_list = PlaylistMedia.find_with_media(linked_playlist.get('playlist_id'), media_status=None)
+            else:
+                screen_content_list = ScreenContent.find_with_media(screen_id, media_status=None)
             print(f"DEBUG - Ekran içerikleri bulundu: {len(screen_content_list)}")
         except Exception as e:
             print(f"DEBUG - Ekran içerik getirme hatası: {str(e)}")
             traceback.print_exc()
+            linked_playlist = None
             screen_content_list = []
         
-        # Medya bilgilerini ekle - her content için ilgili medyayı getir
-        from app.models.media import Media
-        for content in screen_content_list:
-            try:
-                # İçerik dict yada object olabilir
-                if isinstance(content, dict):
-                    media_id = content.get('media_id')
-                    media = Media.find_by_id(media_id)
-                    if media:
-                        content['media'] = media
-                else:  # Nesne ise
-                    media_id = content.media_id if hasattr(content, 'media_id') else None
-                    if media_id:
-                        media = Media.find_by_id(media_id)
-                        if media:
-                            content.media = media
-            except Exception as e:
-                print(f"DEBUG - Medya bilgisi ekleme hatası: {str(e)}")
-                traceback.print_exc()
-        
         # Kullanıcının tüm medyalarını getir
         try:
             from app.models.media import Media
@@ -1232,33 +1194,6 @@ def manage_screen_content(screen_id):
         # Kullanıcının kendi oluşturduğu public playlist'leri filtrele
         public_playlists = [p for p in public_playlists if str(p.user_id) != str(session['user_id'])]
         
-        # DENEME P3 playlistini özel olarak bul ve güncelle
-        from app.models.playlist_media import PlaylistMedia
-        for playlist in user_playlists + public_playlists:
-            if 'DENEME P3' in playlist.name:
-                print(f"DEBUG - DENEME P3 playlist bulundu: id={playlist.id}, eski media_count={playlist.media_count}")
-                # Gerçek medya sayısını hesapla
-                media_list = PlaylistMedia.find_by_playlist(playlist.id)
-                real_count = len(media_list)
-                # Güncelle
-                if playlist.media_count != real_count:
-                    print(f"DEBUG - Medya sayısını güncelliyorum: {playlist.media_count} -> {real_count}")
-                    # Bellek nesnesini güncelle
-                    playlist.media_count = real_count
-                    # Veritabanını güncelle (çalışmazsa hata vermemesi için ObjectId kontrolünü es geçiyoruz)
-                    try:
-                        # Direkt MongoDB güncellemesi
-                        mongo.db.playlists.update_one(
-                            {"$or": [
-                                {"_id": playlist.id}, 
-                                {"_id": ObjectId(playlist.id) if isinstance(playlist.id, str) else str(playlist.id)}
-                            ]},
-                            {"$set": {"media_count": real_count}}
-                        )
-                        print(f"DEBUG - Veritabanı güncellendi: {playlist.name} ID: {playlist.id} count={real_count}")
-                    except Exception as db_error:
-                        print(f"DEBUG - Veritabanı güncellemesi başarısız: {str(db_error)}")
-        
         # Şablona verileri gönder
         print("DEBUG - Şablon render ediliyor")
         return render_template('user/manage_screen_content.html',
@@ -1268,7 +1203,8 @@ def manage_screen_content(screen_id):
                               public_media=public_media,
                               user_playlists=user_playlists,
                               public_playlists=public_playlists,
-                              assigned_playlist=assigned_playlist)
+                              assigned_playlist=assigned_playlist,
+                              playlist_linked=linked_playlist is not None)
                               
     except Exception as e:
         print(f"DEBUG - manage_screen_content genel hata: {str(e)}")
@@ -1285,6 +1221,10 @@ def add_screen_content(screen_id):
     if not screen or screen.user_id != session['user_id']:
         return jsonify({'success': False, 'message': 'Ekrana erişim izniniz yok.'}), 403
     
+    from app.models.screen_playlist import ScreenPlaylist
+    if ScreenPlaylist.find_linked(screen_id):
+        return jsonify({'success': False, 'message': LINKED_SCREEN_MESSAGE}), 409
+    
     data = request.get_json()
     media_id = data.get('media_id')
     display_time = data.get('display_time')
@@ -1311,11 +1251,11 @@ def add_screen_content(screen_id):
     
     # İçerik ekle
     from app.models.screen_content import ScreenContent
-    content = ScreenContent.create(
-        screen_id=screen_id,
-        media_id=media_id,
-        display_time=display_time
-    )
+    content = ScreenContent.create({
+        'screen_id': screen_id,
+        'media_id': media_id,
+        'display_time': display_time
+    })
     
     # Oluşturulan içeriğin ID'sini döndür
     content_id = str(content.get('_id') if isinstance(content, dict) else content.id if hasattr(content, 'id') else None)
@@ -1331,6 +1271,10 @@ def remove_screen_content(screen_id):
     if not screen or screen.user_id != session['user_id']:
         return jsonify({'success': False, 'message': 'Ekrana erişim izniniz yok.'}), 403
     
+    from app.models.screen_playlist import ScreenPlaylist
+    if ScreenPlaylist.find_linked(screen_id):
+        return jsonify({'success': False, 'message': LINKED_SCREEN_MESSAGE}), 409
+    
     data = request.get_json()
     content_id = data.get('content_id')
     
@@ -1362,6 +1306,11 @@ def update_screen_content(screen_id):
         flash('Bu ekrana erişim izniniz yok.', 'danger')
         return redirect(url_for('user.screens'))
     
+    from app.models.screen_playlist import ScreenPlaylist
+    if ScreenPlaylist.find_linked(screen_id):
+        flash(LINKED_SCREEN_MESSAGE, 'warning')
+        return redirect(url_for('user.manage_screen_content', screen_id=screen_id))
+    
     content_id = request.form.get('content_id')
     display_time = request.form.get('display_time')
     
@@ -1395,6 +1344,11 @@ def save_screen_content(screen_id):
         flash('Bu ekrana erişim izniniz yok.', 'danger')
         return redirect(url_for('user.screens'))
     
+    from app.models.screen_playlist import ScreenPlaylist
+    if ScreenPlaylist.find_linked(screen_id):
+        flash(LINKED_SCREEN_MESSAGE, 'warning')
+        return redirect(url_for('user.manage_screen_content', screen_id=screen_id))
+    
     content_ids = request.form.getlist('content_ids[]')
     
     # İçerik sıralamasını güncelle
@@ -1641,20 +1595,6 @@ def playlists():
     # Kullanıcının kendi oluşturduğu public playlist'leri filtrele
     public_playlists = [p for p in public_playlists if str(p.user_id) != str(user_id)]
     
-    # Tüm playlist medya sayılarını güncelle
-    from app.models.playlist_media import PlaylistMedia
-    all_playlists = user_playlists + public_playlists
-    for playlist in all_playlists:
-        try:
-            # Veritabanında medya sayısını güncelle
-            media_count = playlist.update_media_count()
-            # Nesne özelliğine güncel sayıyı ata
-            playlist.media_count = media_count
-            print(f"DEBUG - Playlist medya sayısı güncellendi: id={playlist.id}, name={playlist.name}, count={media_count}")
-        except Exception as e:
-            print(f"DEBUG - Playlist medya sayısı güncellenirken hata: {str(e)}")
-            traceback.print_exc()
-    
     return render_template('user/playlists.html', 
                           user_playlists=user_playlists,
                           public_playlists=public_playlists,
@@ -1765,31 +1705,15 @@ def edit_playlist(playlist_id):
             details={"playlist_id": playlist_id, "name": name}
         )
         
-        # Playlist'i kullanan ekranları bul ve güncelle
+        # Playlist'i kullanan ekranları arka planda güncelle (job_worker.py)
         try:
             from app.models.screen_playlist import ScreenPlaylist
             import traceback
             
-            # Bu playlist'in atanmış olduğu ekranları bul
-            screen_playlists = ScreenPlaylist.find_by_playlist_id(playlist_id)
+            batch_id, queued_screens = ScreenPlaylist.enqueue_playlist_sync(playlist_id)
             
-            if screen_playlists:
-                updated_screens = 0
-                
-                for screen_playlist in screen_playlists:
-                    screen_id = screen_playlist.get('screen_id') if isinstance(screen_playlist, dict) else getattr(screen_playlist, 'screen_id', None)
-                    
-                    if screen_id:
-                        # Ekranı güncelle
-                        refresh_result = ScreenPlaylist.refresh_screen_playlist(screen_id)
-                        
-                        if refresh_result['success']:
-                            updated_screens += 1
-                
-                if updated_screens > 0:
-                    flash(f'Playlist güncellendi ve {updated_screens} ekran otomatik olarak yenilendi.', 'success')
-                else:
-                    flash('Playlist başarıyla güncellendi.', 'success')
+            if queued_screens > 0:
+                flash(f'Playlist güncellendi; {queued_screens} ekran arka planda yenileniyor.', 'success')
             else:
                 flash('Playlist başarıyla güncellendi.', 'success')
         except Exception as e:
@@ -2141,38 +2065,25 @@ def reorder_playlist_media(playlist_id):
         result = PlaylistMedia.reorder_playlist_media(playlist_id, media_order)
         
         if result:
-            # Playlist'i kullanan ekranları bul ve güncelle
+            # Playlist'i kullanan ekranları arka planda güncelle (job_worker.py)
             try:
                 from app.models.screen_playlist import ScreenPlaylist
                 
-                # Bu playlist'in atanmış olduğu ekranları bul
-                screen_playlists = ScreenPlaylist.find_by_playlist_id(playlist_id)
+                batch_id, queued_screens = ScreenPlaylist.enqueue_playlist_sync(playlist_id)
                 
-                updated_screens = 0
-                if screen_playlists:
-                    for screen_playlist in screen_playlists:
-                        screen_id = screen_playlist.get('screen_id') if isinstance(screen_playlist, dict) else getattr(screen_playlist, 'screen_id', None)
-                        
-                        if screen_id:
-                            # Ekranı güncelle
-                            refresh_result = ScreenPlaylist.refresh_screen_playlist(screen_id)
-                            
-                            if refresh_result['success']:
-                                updated_screens += 1
-                    
                 # Log kaydı
-                from app.models.log import Log
                 Log.log_action(
                     action="playlist_reorder",
                     user_id=session['user_id'],
                     ip_address=request.remote_addr,
-                    details={"playlist_id": playlist_id, "updated_screens": updated_screens}
+                    details={"playlist_id": playlist_id, "queued_screens": queued_screens}
                 )
                 
                 return jsonify({
                     'success': True, 
                     'message': 'Sıralama güncellendi',
-                    'updated_screens': updated_screens
+                    'queued_screens': queued_screens,
+                    'sync_batch_id': str(batch_id) if batch_id else None
                 })
             except Exception as e:
                 print(f"ERROR - Sıralama sonrası ekran güncelleme hatası: {str(e)}")
@@ -2187,6 +2098,23 @@ def reorder_playlist_media(playlist_id):
         traceback.print_exc()
         return jsonify({'success': False, 'message': f'Bir hata oluştu: {str(e)}'})
 
+@bp.route('/playlists/<playlist_id>/sync_status/<batch_id>')
+@user_required
+def playlist_sync_status(playlist_id, batch_id):
+    """Playlist değişikliğinin ekranlara yayılma ilerlemesini JSON olarak döner"""
+    from app.models.job import Job
+    from app.models.playlist import Playlist
+    
+    playlist = Playlist.find_by_id(playlist_id)
+    if not playlist or str(playlist.user_id) != str(session['user_id']):
+        return jsonify({'success': False, 'message': 'Playlist bulunamadı'}), 404
+    
+    progress = Job.get_progress(batch_id)
+    if not progress or progress['label'] != str(playlist.id):
+        return jsonify({'success': False, 'message': 'Güncelleme bulunamadı'}), 404
+    
+    return jsonify(dict(progress, success=True))
+
 @bp.route('/screens/<screen_id>/assign_playlist', methods=['GET', 'POST'])
 @user_required
 def assign_playlist_to_screen(screen_id):
@@ -2230,136 +2158,11 @@ def assign_playlist_to_screen(screen_id):
                 return redirect(url_for('user.assign_playlist_to_screen', screen_id=screen_id))
             
             try:
-                # Önce ekrandaki tüm içerikleri temizle
-                from app.models.screen_content import ScreenContent
-                print(f"Mevcut ekran içeriklerini temizleme: {screen_id}")
-                delete_count = ScreenContent.delete_by_screen(screen_id)
-                print(f"Silinen içerik sayısı: {delete_count}")
-                
-                # Playlist'teki medyaları ekrana ekle
-                from app.models.playlist_media import PlaylistMedia
-                playlist_media = PlaylistMedia.find_by_playlist(playlist_id)
-                print(f"Playlist medya sayısı: {len(playlist_media)}")
-                
-                created_contents = []
-                for index, item in enumerate(playlist_media):
-                    print(f"Ekrana eklenecek medya işleniyor: {index+1}/{len(playlist_media)}")
-                    print(f"İşlenen öğe tipi: {type(item)}, içerik: {item}")
-                    
-                    # Media ID alınması
-                    media_id = None
-                    try:
-                        if isinstance(item, dict) and 'media_id' in item:
-                            media_id = item['media_id']
-                            print(f"Item'dan (dict) medya ID: {media_id}")
-                        elif hasattr(item, 'media_id'):
-                            media_id = item.media_id
-                            print(f"Item'dan (object) medya ID: {media_id}")
-                    except Exception as e:
-                        print(f"Media ID alınırken hata: {str(e)}")
-                        
-                    # Media nesnesine erişim
-                    media = None
-                    try:
-                        if isinstance(item, dict) and 'media' in item:
-                            media = item['media']
-                            print(f"Media item içinden bulundu (dict)")
-                        elif hasattr(item, 'media'):
-                            media = item.media
-                            print(f"Media item içinden bulundu (object)")
-                    except Exception as e:
-                        print(f"Media nesnesi alınırken hata: {str(e)}")
-                    
-                    # Media ID kontrolü - media nesnesi varsa ondan da alabiliriz
-                    if not media_id and media:
-                        try:
-                            if hasattr(media, 'id'):
-                                media_id = media.id
-                                print(f"Media.id: {media_id}")
-                            elif hasattr(media, '_id'):
-                                media_id = media._id
-                                print(f"Media._id: {media_id}")
-                            elif isinstance(media, dict):
-                                if '_id' in media:
-                                    media_id = media['_id']
-                                    print(f"Media['_id']: {media_id}")
-                                elif 'id' in media:
-                                    media_id = media['id']
-                                    print(f"Media['id']: {media_id}")
-                        except Exception as e:
-                            print(f"Media nesnesinden ID alınırken hata: {str(e)}")
-                    
-                    if not media_id:
-                        print(f"Geçersiz medya ID, bu içerik atlanıyor: {item}")
-                        continue
-                        
-                    # String formatına çevir
-                    if not isinstance(media_id, str):
-                        media_id = str(media_id)
-                        
-                    # Display time kontrolü
-                    display_time = None
-                    try:
-                        if isinstance(item, dict) and 'display_time' in item:
-                            display_time = item['display_time']
-                        elif hasattr(item, 'display_time'):
-                            display_time = item.display_time
-                    except Exception as e:
-                        print(f"Display time alınırken hata: {str(e)}")
-                    
-                    # Varsayılan gösterim süresi 10 saniye
-                    if not display_time:
-                        display_time = 10
-                    
-                    # Sıralama
-                    order = index
-                    try:
-                        if isinstance(item, dict) and 'order' in item:
-                            order = item['order']
-                        elif hasattr(item, 'order'):
-                            order = item.order
-                    except Exception as e:
-                        print(f"Order alınırken hata: {str(e)}")
-                    
-                    # Yeni içerik oluştur
-                    try:
-                        print(f"Ekrana içerik ekleniyor: media_id={media_id}, display_time={display_time}, order={order}")
-                        content = ScreenContent.create({
-                            'screen_id': screen_id,
-                            'media_id': media_id,
-                            'display_time': display_time,
-                            'order': order
-                        })
-                        
-                        content_id = None
-                        if isinstance(content, dict) and '_id' in content:
-                            content_id = content['_id']
-                        elif hasattr(content, 'id'):
-                            content_id = content.id
-                        elif hasattr(content, '_id'):
-                            content_id = content._id
-                        
-                        print(f"İçerik eklendi: {content_id}")
-                        created_contents.append(content)
-                    except Exception as e:
-                        print(f"İçerik ekleme hatası: {str(e)}")
-                        print(traceback.format_exc())
-                
-                print(f"Toplam oluşturulan içerik sayısı: {len(created_contents)}")
-                if len(created_contents) != len(playlist_media):
-                    print(f"DİKKAT: Playlist'teki tüm medyalar ekrana aktarılamadı! Playlist: {len(playlist_media)}, Eklenen: {len(created_contents)}")
-                
-                # Ekran-Playlist ilişkisi oluştur/güncelle
+                # Playlist'i ata (copy modunda içerikler tek toplu yazmada eşitlenir,
+                # linked modunda manifest doğrudan playlist'ten okunur)
                 from app.models.screen_playlist import ScreenPlaylist
-                try:
-                    screen_playlist = ScreenPlaylist.create({
-                        'screen_id': screen_id,
-                        'playlist_id': playlist_id
-                    })
-                    print(f"Ekran-Playlist ilişkisi oluşturuldu: {screen_playlist.get('_id') if isinstance(screen_playlist, dict) else screen_playlist}")
-                except Exception as e:
-                    print(f"Ekran-Playlist ilişkisi oluşturma hatası: {str(e)}")
-                    print(traceback.format_exc())
+                screen_playlist, content_count = ScreenPlaylist.assign(screen_id, playlist_id)
+                print(f"Ekran-Playlist ilişkisi oluşturuldu: {screen_playlist.get('_id')} ({screen_playlist.get('mode')})")
                 
                 # Log kaydı
                 Log.log_action(
@@ -2369,7 +2172,7 @@ def assign_playlist_to_screen(screen_id):
                     details={"screen_id": screen_id, "playlist_id": playlist_id}
                 )
                 
-                flash(f'Playlist ekrana başarıyla atandı. Toplam {len(created_contents)} medya içeriği eklendi.', 'success')
+                flash(f'Playlist ekrana başarıyla atandı. Toplam {content_count} medya içeriği eklendi.', 'success')
                 return redirect(url_for('user.manage_screen_content', screen_id=screen_id))
             except Exception as e:
                 print(f"Genel hata: {str(e)}")
@@ -2387,27 +2190,6 @@ def assign_playlist_to_screen(screen_id):
         # Kullanıcının kendi oluşturduğu public playlist'leri filtrele
         public_playlists = [p for p in public_playlists if str(p.user_id) != str(session['user_id'])]
         
-        # Playlist'lere medya sayısı ekle
-        from app.models.playlist_media import PlaylistMedia
-        for playlist in user_playlists + public_playlists:
-            try:
-                # PlaylistMedia.find_by_playlist ile gerçek sayıyı al
-                media_list = PlaylistMedia.find_by_playlist(playlist.id)
-                
-                # Medya sayısını güncelle ve belleğe al
-                real_count = len(media_list) if media_list else 0
-                playlist.media_count = real_count
-                
-                # Veritabanında da güncelle
-                from app.models.playlist import Playlist
-                Playlist.update_media_count(playlist.id)
-                
-                print(f"DEBUG - Playlist medya sayısı güncellendi: playlist_id={playlist.id}, name={playlist.name}, count={real_count}")
-            except Exception as e:
-                print(f"DEBUG - Playlist medya sayısı alınırken hata: {str(e)}")
-                traceback.print_exc()
-                playlist.media_count = 0
-        
         return render_template('user/assign_playlist.html',
                               screen=screen,
                               user_playlists=user_playlists,
@@ -2550,29 +2332,15 @@ def add_to_playlists():
                     already_exists_count += 1
                     continue
                 
-                # Medyayı playlist'e ekle
-                # Playlist'teki son sırayı bul
-                last_order = PlaylistMedia.get_max_order(playlist_id)
-                order = last_order + 1 if last_order is not None else 0
-                
-                playlist_media = {
-                    'playlist_id': playlist_id,
-                    'media_id': media_id,
-                    'order': order,
-                    'display_time': display_time,
-                    'created_at': datetime.datetime.utcnow()
-                }
-                
-                created_item = PlaylistMedia.create(playlist_media)
+                # Medyayı playlist'in sonuna ekle (sıra playlist sayacından alınır)
+                created_item = PlaylistMedia.create(
+                    playlist_id=playlist_id,
+                    media_id=media_id,
+                    display_time=display_time
+                )
                 
                 if created_item:
-                    print(f"DEBUG - Medya playliste eklendi: playlist_id={playlist_id}, media_id={media_id}, order={order}")
-                    # Playlist medya sayısını güncelle
-                    try:
-                        Playlist.update_media_count(playlist_id)
-                        print(f"DEBUG - Playlist medya sayısı güncellendi")
-                    except Exception as count_error:
-                        print(f"DEBUG - Playlist medya sayısı güncellenirken hata: {str(count_error)}")
+                    print(f"DEBUG - Medya playliste eklendi: playlist_id={playlist_id}, media_id={media_id}, order={created_item['order']}")
                     
                     success_count += 1
                     
@@ -2644,13 +2412,12 @@ def add_to_playlists():
 @bp.route('/playlists/refresh-counts', methods=['POST'])
 @user_required
 def refresh_playlist_counts():
-    """Tüm playlistlerin medya sayılarını yeniler"""
+    """Tüm playlistlerin medya sayılarını doğrular ve kaymaları düzeltir"""
     from app.models.playlist import Playlist
     
-    # Tüm playlist'lerin medya sayılarını güncelle
-    result = Playlist.update_all_media_counts()
+    result = Playlist.reconcile_media_counts()
     
-    flash(f"{result['updated_playlist_count']} playlist'in medya sayısı güncellendi.", 'success')
+    flash(f"{len(result['corrections'])} playlist'in medya sayısı güncellendi.", 'success')
     return redirect(url_for('user.playlists'))
 
 @bp.route('/screens/<screen_id>/refresh_playlist', methods=['POST'])
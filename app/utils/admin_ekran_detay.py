@@ -1,10 +1,9 @@
 import os
-import pymongo
 from bson.objectid import ObjectId
-import urllib.parse
 from flask import current_app
 from datetime import datetime
 import json
+from app.utils.db import get_client, get_db
 
 class MongoJSONEncoder(json.JSONEncoder):
     """MongoDB ObjectId ve datetime nesnelerini JSON'a çevirmek için encoder"""
@@ -16,25 +15,12 @@ class MongoJSONEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 def get_mongo_connection():
-    """MongoDB bağlantısı oluşturur"""
-    # MongoDB bağlantı bilgilerini al
-    mongo_user = current_app.config.get("MONGO_USER", os.getenv("MONGO_USER", "elektrobil_admin"))
-    mongo_pass = current_app.config.get("MONGO_PASS", os.getenv("MONGO_PASS", "Eb@2254097*"))
-    mongo_host = current_app.config.get("MONGO_HOST", os.getenv("MONGO_HOST", "localhost"))
-    mongo_port = current_app.config.get("MONGO_PORT", os.getenv("MONGO_PORT", "27017"))
-    mongo_db = current_app.config.get("MONGO_DB", os.getenv("MONGO_DB", "bulutvizyondb"))
-
-    # Şifreyi URL için encode et
-    encoded_password = urllib.parse.quote_plus(mongo_pass)
-
-    # Bağlantı URL'ini oluştur
-    mongo_uri = f"mongodb://{mongo_user}:{encoded_password}@{mongo_host}:{mongo_port}/{mongo_db}?authSource=admin"
-
-    # MongoDB'ye bağlan
-    client = pymongo.MongoClient(mongo_uri)
-    db = client.get_database()
+    """
+    Uygulamanın paylaşılan MongoDB bağlantısını döndürür
     
-    return client, db
+    İstemci uygulama genelinde tek havuzdur; çağıranlar kapatmamalıdır.
+    """
+    return get_client(), get_db()
 
 def get_user_screens_detail(user_id=None):
     """Kullanıcının ekranlarını ve ilişkili playlist ve medya detaylarını alır.
@@ -81,7 +67,7 @@ def get_user_screens_detail(user_id=None):
                     }
             
             # Bu ekrana atanmış playlist'leri bul
-            screen_playlists = db.screen_playlists.find({"screen_id": str(screen["_id"])})
+            screen_playlists = db.screen_playlists.find({"screen_id": screen["_id"]})
             
             for sp in screen_playlists:
                 playlist_id = sp.get("playlist_id")
@@ -103,18 +89,8 @@ def get_user_screens_detail(user_id=None):
                             "media_listesi": []
                         }
                         
-                        # Medya ilişkilerini sorgula - İki farklı biçimi kontrol et
-                        query_media = []
-                        
-                        # 1. String ID ile kontrol
-                        if isinstance(playlist["_id"], ObjectId):
-                            playlist_id_str = str(playlist["_id"])
-                            pm_items1 = list(db.playlist_media.find({"playlist_id": playlist_id_str}))
-                            query_media.extend(pm_items1)
-                        
-                        # 2. ObjectId ile kontrol
-                        pm_items2 = list(db.playlist_media.find({"playlist_id": playlist["_id"]}))
-                        query_media.extend(pm_items2)
+                        # Medya ilişkilerini sorgula
+                        query_media = list(db.playlist_media.find({"playlist_id": playlist["_id"]}))
                         
                         # Medya bilgilerini ekle
                         for pm in query_media:
@@ -153,10 +129,6 @@ def get_user_screens_detail(user_id=None):
     except Exception as e:
         current_app.logger.error(f"Ekran detayları getirilirken hata: {str(e)}")
         return []
-    finally:
-        # Bağlantıyı kapat
-        if 'client' in locals():
-            client.close()
 
 def get_screen_detail(screen_id):
     """Belirli bir ekranın detaylarını ve ilişkili playlist ve medya bilgilerini alır
@@ -197,7 +169,7 @@ def get_screen_detail(screen_id):
                 }
         
         # Bu ekrana atanmış playlist'leri bul
-        screen_playlists = db.screen_playlists.find({"screen_id": str(screen["_id"])})
+        screen_playlists = db.screen_playlists.find({"screen_id": screen["_id"]})
         
         for sp in screen_playlists:
             playlist_id = sp.get("playlist_id")
@@ -219,18 +191,8 @@ def get_screen_detail(screen_id):
                         "media_listesi": []
                     }
                     
-                    # Medya ilişkilerini sorgula - İki farklı biçimi kontrol et
-                    query_media = []
-                    
-                    # 1. String ID ile kontrol
-                    if isinstance(playlist["_id"], ObjectId):
-                        playlist_id_str = str(playlist["_id"])
-                        pm_items1 = list(db.playlist_media.find({"playlist_id": playlist_id_str}))
-                        query_media.extend(pm_items1)
-                    
-                    # 2. ObjectId ile kontrol
-                    pm_items2 = list(db.playlist_media.find({"playlist_id": playlist["_id"]}))
-                    query_media.extend(pm_items2)
+                    # Medya ilişkilerini sorgula
+                    query_media = list(db.playlist_media.find({"playlist_id": playlist["_id"]}))
                     
                     # Medya bilgilerini ekle
                     for pm in query_media:
@@ -268,7 +230,3 @@ def get_screen_detail(screen_id):
     except Exception as e:
         current_app.logger.error(f"Ekran detayı getirilirken hata: {str(e)}")
         return None
-    finally:
-        # Bağlantıyı kapat
-        if 'client' in locals():
-            client.close() 
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+İşlem içi önbellek yardımcıları
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Boyut sınırlı, süre aşımlı (TTL) LRU önbellek
+
+    Her gunicorn worker'ı kendi kopyasını tutar; worker'lar arası tutarlılık TTL
+    ile sınırlandırılır. Okuma yolu kilitsiz bir dict erişimi ve LRU sırası için
+    kısa bir kilitten ibarettir.
+
+    Args:
+        maxsize: Azami kayıt sayısı (aşılırsa en eski kullanılan silinir)
+        ttl: Kayıt ömrü (saniye)
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Geçerli kaydı döndür, yoksa veya süresi dolmuşsa default"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            self.pop(key)
+            return default
+
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                pass
+        return value
+
+    def set(self, key, value):
+        """Kaydı ekle veya güncelle"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Kaydı sil ve değerini döndür"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else default
+
+    def pop_where(self, predicate):
+        """Değeri koşulu sağlayan tüm kayıtları sil, silinen kayıt sayısını döndür"""
+        with self._lock:
+            keys = [key for key, (value, _) in self._data.items() if predicate(value)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        """Tüm kayıtları sil"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,200 @@
+"""
+Dashboard sayaçları: Belgeleri yüklemeden toplam ve durum sayıları
+
+Üç tür sayaç vardır:
+- total(): Koleksiyonun toplam belge sayısı (estimated_document_count; koleksiyon
+  meta verisinden okunur, koleksiyon boyutundan bağımsızdır)
+- count(): Filtreli sayım (count_documents)
+- tally(): Model sınıflarının TALLIES ile bildirdiği, yazma anında $inc ile
+  güncellenen sayaçlar (durum dağılımı, toplam görüntülenme gibi). Her sayaç
+  counters koleksiyonunda tek bir belgedir; okuması tek _id sorgusudur.
+
+Tüm okumalar worker başına kısa süreli (TTL) önbellekten geçer. Artımlı
+sayaçlar henüz oluşturulmamışsa ilk okumada tek bir aggregate ile hesaplanır;
+olası kaymalar `flask reconcile-counters` ile düzeltilir.
+"""
+from app.utils.cache import TTLCache
+
+# Artımlı sayaç belgelerinin tutulduğu koleksiyon
+COLLECTION = 'counters'
+
+# sum sayaçlarında toplamın saklandığı anahtar
+TOTAL = 'total'
+
+
+class Counters:
+    """
+    Önbellekli sayaç servisi
+
+    Sayaç okumaları dashboard'larda, artırımlar model yazma yollarında
+    yapılır. Artırım hataları yazma işlemini asla bozmaz.
+    """
+
+    def __init__(self, ttl=30):
+        self._cache = TTLCache(maxsize=512, ttl=ttl)
+        self._specs = None
+
+    @property
+    def ttl(self):
+        return self._cache.ttl
+
+    @ttl.setter
+    def ttl(self, value):
+        self._cache.ttl = value
+
+    @staticmethod
+    def _db():
+        from app import mongo
+        return mongo.db
+
+    # --- okuma ---
+
+    def total(self, collection_name):
+        """Koleksiyonun yaklaşık toplam belge sayısı"""
+        key = ('total', collection_name)
+        value = self._cache.get(key)
+        if value is None:
+            value = self._db()[collection_name].estimated_document_count()
+            self._cache.set(key, value)
+        return value
+
+    def count(self, collection_name, query):
+        """Filtreye uyan belge sayısı"""
+        key = ('count', collection_name, repr(sorted(query.items())))
+        value = self._cache.get(key)
+        if value is None:
+            value = self._db()[collection_name].count_documents(query)
+            self._cache.set(key, value)
+        return value
+
+    def tally(self, name, bucket=TOTAL):
+        """
+        Artımlı sayaç değeri
+
+        Args:
+            name: TALLIES ile bildirilen sayaç adı (örn. 'media.status')
+            bucket: Grup sayaçlarında grup değeri (örn. 'active'); sum sayaçlarında
+                varsayılan 'total'
+        """
+        return self.tallies(name).get(bucket, 0)
+
+    def tallies(self, name):
+        """Sayacın tüm grup değerleri: {grup: değer}"""
+        key = ('tally', name)
+        values = self._cache.get(key)
+        if values is None:
+            document = self._db()[COLLECTION].find_one({'_id': name})
+            if document is None or not document.get('seeded', True):
+                values = self._seed(name)
+            else:
+                values = document.get('values', {})
+            self._cache.set(key, values)
+        return values
+
+    # --- yazma ---
+
+    def incr(self, name, bucket=TOTAL, amount=1):
+        """Sayaç grubunu artır (negatif amount azaltır)"""
+        if not amount or bucket is None:
+            return
+        self._apply(name, {f'values.{bucket}': amount})
+
+    def move(self, name, old_bucket, new_bucket):
+        """Bir belgenin grup değişikliğini yansıt (örn. durum değişimi)"""
+        if old_bucket == new_bucket:
+            return
+        changes = {}
+        if old_bucket is not None:
+            changes[f'values.{old_bucket}'] = -1
+        if new_bucket is not None:
+            changes[f'values.{new_bucket}'] = 1
+        self._apply(name, changes)
+
+    def _apply(self, name, changes):
+        """
+        $inc uygula
+
+        Belge henüz yoksa (sayaç hiç okunmamış) artırım atlanır; ilk okuma tam
+        değeri hesaplar. Böylece upsert ile sıfırdan başlayan yanlış sayaçlar oluşmaz.
+        """
+        if not changes:
+            return
+        try:
+            self._db()[COLLECTION].update_one({'_id': name}, {'$inc': changes})
+        except Exception as e:
+            print(f"Sayaç güncellenemedi ({name}): {str(e)}")
+        # Bu worker'daki eski değer hemen düşürülür
+        self._cache.pop(('tally', name))
+
+    # --- hesaplama ---
+
+    def specs(self):
+        """Model sınıflarının TALLIES bildirimleri: {ad: spec}"""
+        if self._specs is None:
+            from app.utils.indexes import load_models
+
+            specs = {}
+            for model in load_models():
+                specs.update(getattr(model, 'TALLIES', {}))
+            self._specs = specs
+        return self._specs
+
+    def compute(self, name):
+        """Sayacı kaynak koleksiyondan aggregate ile hesapla"""
+        spec = self.specs()[name]
+        collection = self._db()[spec['collection']]
+
+        if 'group' in spec:
+            pipeline = [{'$group': {'_id': f"${spec['group']}", 'n': {'$sum': 1}}}]
+        else:
+            pipeline = [{'$group': {'_id': None, 'n': {'$sum': f"${spec['sum']}"}}}]
+
+        values = {}
+        for row in collection.aggregate(pipeline):
+            if 'group' in spec:
+                if row['_id'] is not None:
+                    values[str(row['_id'])] = row['n']
+            else:
+                values[TOTAL] = row['n']
+        return values
+
+    def _seed(self, name):
+        """
+        Eksik sayaç belgesini oluştur ve hesapla
+
+        Belge önce boş olarak eklenir; böylece hesaplama sürerken gelen
+        artırımlar atlanmaz (bkz. _apply) ve aggregate sonucuna yansır.
+        Hesaplanan değerleri yalnızca belgeyi ekleyen worker yazar; tohumlama
+        sürerken (seeded: False) okuyan worker'lar değeri kendisi hesaplar.
+        """
+        collection = self._db()[COLLECTION]
+        result = collection.update_one(
+            {'_id': name},
+            {'$setOnInsert': {'values': {}, 'seeded': False}},
+            upsert=True
+        )
+        values = self.compute(name)
+        if result.upserted_id is not None:
+            collection.update_one({'_id': name}, {'$set': {'values': values, 'seeded': True}})
+        return values
+
+    def reconcile(self):
+        """
+        Tüm artımlı sayaçları baştan hesapla ve kaydet
+
+        Returns:
+            [(ad, eski değerler, yeni değerler), ...]
+        """
+        collection = self._db()[COLLECTION]
+        results = []
+        for name in sorted(self.specs()):
+            document = collection.find_one({'_id': name}) or {}
+            values = self.compute(name)
+            collection.update_one({'_id': name}, {'$set': {'values': values, 'seeded': True}}, upsert=True)
+            results.append((name, document.get('values'), values))
+        self._cache.clear()
+        return results
+
+
+# Worker başına paylaşılan sayaç servisi
+counters = Counters()
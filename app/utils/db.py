@@ -0,0 +1,64 @@
+"""
+Veritabanı bağlantı yardımcıları: Uygulamanın tüm model ve yardımcıları tek bir
+paylaşılan MongoClient bağlantı havuzunu kullanır
+"""
+
+
+def client_options(config):
+    """
+    Uygulama yapılandırmasından MongoClient seçeneklerini oluştur
+
+    connect=False ile istemci ilk sorguya kadar sunucuya bağlanmaz ve izleme
+    thread'lerini başlatmaz; böylece gunicorn worker'ları fork edildikten sonra
+    her worker kendi havuzunu ilk istekte açar.
+
+    Args:
+        config: Flask uygulama yapılandırması
+
+    Returns:
+        MongoClient'a iletilecek anahtar kelime argümanları
+    """
+    options = {
+        'connect': False,
+        'maxPoolSize': config.get('MONGO_MAX_POOL_SIZE', 100),
+        'minPoolSize': config.get('MONGO_MIN_POOL_SIZE', 0),
+        'connectTimeoutMS': config.get('MONGO_CONNECT_TIMEOUT_MS', 5000),
+        'serverSelectionTimeoutMS': config.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000),
+        'retryWrites': config.get('MONGO_RETRY_WRITES', True),
+    }
+
+    # Tanımlanmamış seçenekler pymongo varsayılanlarında kalır
+    optional = {
+        'socketTimeoutMS': 'MONGO_SOCKET_TIMEOUT_MS',
+        'waitQueueTimeoutMS': 'MONGO_WAIT_QUEUE_TIMEOUT_MS',
+        'maxIdleTimeMS': 'MONGO_MAX_IDLE_TIME_MS',
+        'w': 'MONGO_WRITE_CONCERN',
+        'readConcernLevel': 'MONGO_READ_CONCERN',
+        'readPreference': 'MONGO_READ_PREFERENCE',
+    }
+    for option, key in optional.items():
+        value = config.get(key)
+        if value is not None and value != '':
+            options[option] = value
+
+    # Sayısal write concern ('1', '2') metin olarak gelebilir
+    if isinstance(options.get('w'), str) and options['w'].isdigit():
+        options['w'] = int(options['w'])
+
+    # İstek başına komut muhasebesi; kapalıyken maliyeti yok denecek kadar azdır
+    from app.utils.db_metrics import command_accounting
+    options['event_listeners'] = [command_accounting]
+
+    return options
+
+
+def get_client():
+    """Paylaşılan MongoClient nesnesini döndür"""
+    from app import mongo
+    return mongo.cx
+
+
+def get_db():
+    """Paylaşılan bağlantı havuzu üzerinden uygulama veritabanını döndür"""
+    from app import mongo
+    return mongo.db
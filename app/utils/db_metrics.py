@@ -0,0 +1,262 @@
+"""
+İstek başına MongoDB komut muhasebesi
+
+pymongo CommandListener ile her Flask isteğinin veritabanına kaç komut
+gönderdiği, toplam veritabanı süresi ve aynı biçimdeki (shape) sorguların kaç
+kez tekrarlandığı sayılır. Sonuç Server-Timing başlığı ve tek satırlık JSON log
+olarak yayınlanır; aynı biçimde warn_threshold'dan fazla sorgu gönderen istekler
+(satır başına find_by_id döngüleri gibi) N+1 uyarısı üretir.
+
+Muhasebe çalışma anında açılıp kapatılabilir. Ayar app_settings koleksiyonunda
+tutulur ve her worker tarafından refresh_interval saniyede bir okunur; böylece
+tüm worker'lar yeniden başlatma gerekmeden aynı ayara geçer. Kapalıyken
+dinleyicinin maliyeti komut başına tek bir öznitelik kontrolüdür.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from pymongo import monitoring
+
+logger = logging.getLogger('app.db')
+
+# app_settings koleksiyonundaki ayar belgesi
+SETTINGS_ID = 'db_metrics'
+
+# Filtresi sorgu biçimine dahil edilen komutlar ve filtrenin konumu
+_FILTER_FIELDS = {
+    'find': 'filter',
+    'count': 'query',
+    'distinct': 'query',
+    'findAndModify': 'query',
+}
+
+
+def _shape(value):
+    """Sorgu değerini, değerlerden arındırılmış biçim metnine çevir"""
+    if isinstance(value, dict):
+        return '{' + ','.join(f'{key}:{_shape(value[key])}' for key in sorted(value)) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[?]'
+    return '?'
+
+
+def query_shape(command_name, command):
+    """
+    Komutun biçimini çıkar: komut adı, koleksiyon ve filtre yapısı
+
+    Örn. find media {_id:?} veya find media {_id:{$in:[?]}}
+    """
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        return command_name
+
+    query = None
+    if command_name in _FILTER_FIELDS:
+        query = command.get(_FILTER_FIELDS[command_name])
+    elif command_name == 'aggregate':
+        pipeline = command.get('pipeline') or []
+        if pipeline and '$match' in pipeline[0]:
+            query = pipeline[0]['$match']
+    elif command_name == 'update':
+        updates = command.get('updates') or []
+        query = updates[0].get('q') if updates else None
+    elif command_name == 'delete':
+        deletes = command.get('deletes') or []
+        query = deletes[0].get('q') if deletes else None
+
+    if query is None:
+        return f'{command_name} {collection}'
+    return f'{command_name} {collection} {_shape(query)}'
+
+
+class RequestStats:
+    """Tek bir isteğin veritabanı komut sayaçları"""
+
+    __slots__ = ('commands', 'failed', 'duration_micros', 'shapes', 'pending')
+
+    def __init__(self):
+        self.commands = 0
+        self.failed = 0
+        self.duration_micros = 0
+        self.shapes = Counter()
+        self.pending = {}
+
+    @property
+    def duration_ms(self):
+        return self.duration_micros / 1000.0
+
+    def repeated(self, threshold):
+        """threshold'dan fazla tekrarlanan sorgu biçimlerini getir"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+class CommandAccounting(monitoring.CommandListener):
+    """
+    İstek başına komut sayan pymongo dinleyicisi
+
+    Dinleyici MongoClient oluşturulurken kaydedilir (bkz. db.client_options).
+    Sayaçlar begin() ile başlatılan isteğin thread'ine (gevent altında
+    greenlet'ine) bağlıdır; istek dışındaki komutlar (arka plan flush
+    döngüleri gibi) sayılmaz.
+    """
+
+    def __init__(self, enabled=False, warn_threshold=10, refresh_interval=30):
+        self.enabled = enabled
+        self.warn_threshold = warn_threshold
+        self.refresh_interval = refresh_interval
+        self._local = threading.local()
+        self._last_refresh = 0
+
+    # --- pymongo dinleyici arayüzü ---
+
+    def started(self, event):
+        stats = getattr(self._local, 'stats', None)
+        if stats is None:
+            return
+        stats.pending[event.request_id] = query_shape(event.command_name, event.command)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed):
+        stats = getattr(self._local, 'stats', None)
+        if stats is None:
+            return
+        shape = stats.pending.pop(event.request_id, event.command_name)
+        stats.commands += 1
+        stats.duration_micros += event.duration_micros
+        stats.shapes[shape] += 1
+        if failed:
+            stats.failed += 1
+
+    # --- istek yaşam döngüsü ---
+
+    def begin(self):
+        """Mevcut istek için sayaçları başlat"""
+        self._local.stats = RequestStats() if self.enabled else None
+
+    def end(self):
+        """Mevcut isteğin sayaçlarını bitir ve döndür"""
+        stats = getattr(self._local, 'stats', None)
+        self._local.stats = None
+        return stats
+
+    # --- çalışma anı ayarı ---
+
+    def configure(self, enabled=None, warn_threshold=None, refresh_interval=None):
+        """Ayarları bu worker için değiştir"""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if warn_threshold is not None:
+            self.warn_threshold = max(1, int(warn_threshold))
+        if refresh_interval is not None:
+            self.refresh_interval = refresh_interval
+
+    def refresh(self, db):
+        """Paylaşılan ayarı en fazla refresh_interval'da bir veritabanından oku"""
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+
+        try:
+            settings = db.app_settings.find_one({'_id': SETTINGS_ID})
+        except Exception as e:
+            print(f"Komut muhasebesi ayarı okunamadı: {str(e)}")
+            return
+        if settings:
+            self.configure(enabled=settings.get('enabled'), warn_threshold=settings.get('warn_threshold'))
+
+    def save(self, db, enabled=None, warn_threshold=None):
+        """Ayarı tüm worker'lar için kaydet ve bu worker'a hemen uygula"""
+        self.configure(enabled=enabled, warn_threshold=warn_threshold)
+        db.app_settings.update_one(
+            {'_id': SETTINGS_ID},
+            {'$set': {'enabled': self.enabled, 'warn_threshold': self.warn_threshold}},
+            upsert=True
+        )
+        return self.settings()
+
+    def settings(self):
+        return {'enabled': self.enabled, 'warn_threshold': self.warn_threshold}
+
+    # --- raporlama ---
+
+    def report(self, stats, request, response):
+        """İsteğin sayaçlarını Server-Timing başlığına ve log'a yaz"""
+        timing = f'db;dur={stats.duration_ms:.1f};desc="{stats.commands} komut"'
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        repeated = stats.repeated(self.warn_threshold)
+        record = {
+            'op': 'db.request',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'commands': stats.commands,
+            'failed': stats.failed,
+            'db_ms': round(stats.duration_ms, 2),
+            'shapes': len(stats.shapes),
+        }
+        if repeated:
+            record['repeated'] = [{'shape': shape, 'count': count} for shape, count in repeated]
+
+        try:
+            logger.log(
+                logging.WARNING if repeated else logging.INFO,
+                json.dumps(record, default=str, ensure_ascii=False)
+            )
+        except Exception:
+            # Muhasebe asla isteği bozmamalı
+            pass
+
+
+# Worker başına paylaşılan dinleyici
+command_accounting = CommandAccounting()
+
+
+def init_app(app):
+    """İstek kancalarını ve başlangıç ayarlarını uygula"""
+    from flask import request
+    from app import mongo
+
+    command_accounting.configure(
+        enabled=app.config.get('DB_METRICS_ENABLED', False),
+        warn_threshold=app.config.get('DB_METRICS_WARN_THRESHOLD', 10),
+        refresh_interval=app.config.get('DB_METRICS_REFRESH_INTERVAL', 30)
+    )
+
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    @app.before_request
+    def _db_metrics_begin():
+        # Statik dosyalar veritabanına gitmez
+        if request.endpoint == 'static':
+            return
+        command_accounting.refresh(mongo.db)
+        command_accounting.begin()
+
+    @app.after_request
+    def _db_metrics_report(response):
+        stats = command_accounting.end()
+        if stats is not None:
+            command_accounting.report(stats, request, response)
+        return response
+
+    @app.teardown_request
+    def _db_metrics_teardown(exc):
+        # after_request çalışmadan biten isteklerde sayaçları temizle
+        command_accounting.end()
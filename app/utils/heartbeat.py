@@ -0,0 +1,114 @@
+"""
+Ekran heartbeat tamponu: last_active güncellemelerini worker içinde biriktirip
+periyodik olarak tek bir toplu yazma ile veritabanına aktarır
+"""
+import atexit
+import os
+import threading
+import traceback
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+
+class HeartbeatBuffer:
+    """
+    Worker başına heartbeat tamponu
+
+    Her player isteğinde screens koleksiyonuna ayrı bir update_one yapmak yerine
+    ekran başına en son zaman damgası bellekte tutulur. Arka plandaki döngü her
+    flush_interval saniyede bir tamponu sırasız (unordered) tek bir bulk_write ile
+    yazar; $max operatörü sayesinde farklı worker'lardan gelen yazmalar daha yeni
+    bir zamanı asla geri almaz. last_active en fazla flush_interval kadar gecikir.
+    """
+
+    def __init__(self, flush_interval=15):
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        """Flush döngüsünü (fork sonrası dahil) gerektiğinde başlat"""
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            # Fork sonrası ebeveyn işlemin tamponu bu worker'a ait değildir
+            if self._pid is not None and self._pid != os.getpid():
+                self._pending = {}
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='heartbeat-flush', daemon=True)
+            self._thread.start()
+
+    def record(self, screen_id, timestamp=None):
+        """
+        Ekranın aktif olduğunu kaydet
+
+        Args:
+            screen_id: Ekran ID (ObjectId)
+            timestamp: Aktivite zamanı (varsayılan: şimdi)
+        """
+        timestamp = timestamp or datetime.now()
+
+        self._ensure_started()
+        with self._lock:
+            current = self._pending.get(screen_id)
+            if current is None or timestamp > current:
+                self._pending[screen_id] = timestamp
+
+    def flush(self):
+        """
+        Tampondaki heartbeat'leri veritabanına yaz
+
+        Returns:
+            Yazılan ekran sayısı
+        """
+        from app import mongo
+
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+        operations = [
+            UpdateOne({'_id': screen_id}, {'$max': {'last_active': timestamp}})
+            for screen_id, timestamp in pending.items()
+        ]
+
+        try:
+            mongo.db.screens.bulk_write(operations, ordered=False)
+        except PyMongoError as e:
+            print(f"Heartbeat yazma hatası: {str(e)}")
+            # Yazılamayan kayıtları bir sonraki flush için geri koy
+            with self._lock:
+                for screen_id, timestamp in pending.items():
+                    current = self._pending.get(screen_id)
+                    if current is None or timestamp > current:
+                        self._pending[screen_id] = timestamp
+            return 0
+
+        return len(operations)
+
+    def _run(self):
+        """Arka plan flush döngüsü"""
+        stop = threading.Event()
+        while not stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Heartbeat flush hatası: {str(e)}")
+                print(traceback.format_exc())
+
+
+# Worker başına paylaşılan tampon
+heartbeat_buffer = HeartbeatBuffer()
+
+# Worker kapanırken bekleyen heartbeat'leri kaybetme
+atexit.register(heartbeat_buffer.flush)
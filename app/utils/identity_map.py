@@ -0,0 +1,129 @@
+"""
+İstek kapsamlı kimlik haritası (identity map): Aynı istek içinde aynı kullanıcı,
+ekran, playlist veya medya belgesinin veritabanından yalnızca bir kez okunmasını sağlar
+"""
+from functools import wraps
+
+from flask import g, has_request_context
+
+from app.utils.ids import to_object_id, to_object_ids
+
+# Haritada bulunmayan kayıtları None sonuçlardan ayırmak için
+_MISSING = object()
+
+
+def _registry():
+    """
+    İsteğe ait haritayı getir
+
+    İstek dışında (arka plan thread'leri, CLI komutları, betikler) None döner ve
+    sorgular önbelleğe alınmadan doğrudan çalışır.
+    """
+    if not has_request_context():
+        return None
+    registry = g.get('_identity_map')
+    if registry is None:
+        registry = g._identity_map = {}
+    return registry
+
+
+def get(kind, obj_id):
+    """Haritadaki kaydı döndür, yoksa _MISSING"""
+    registry = _registry()
+    if registry is None:
+        return _MISSING
+    return registry.get(kind, {}).get(obj_id, _MISSING)
+
+
+def put(kind, obj_id, value):
+    """Kaydı haritaya ekle (bulunamayan kayıtlar için value None olabilir)"""
+    registry = _registry()
+    if registry is not None:
+        registry.setdefault(kind, {})[obj_id] = value
+
+
+def discard(kind, obj_id):
+    """
+    Kaydı haritadan çıkar
+
+    Güncelleme ve silme işlemlerinden sonra çağrılır; böylece aynı istekte
+    sonraki find_by_id çağrısı güncel belgeyi okur.
+    """
+    registry = _registry()
+    obj_id = to_object_id(obj_id)
+    if registry is not None and obj_id is not None:
+        registry.get(kind, {}).pop(obj_id, None)
+
+
+def clear():
+    """İsteğe ait haritayı tamamen temizle"""
+    if has_request_context():
+        g.pop('_identity_map', None)
+
+
+def identity_mapped(kind):
+    """
+    find_by_id sınıf metotlarını kimlik haritasından geçiren decorator
+
+    Aynı istekte aynı ID ile yapılan ikinci çağrı veritabanına gitmeden ilk
+    çağrının sonucunu (bulunamadıysa None) döndürür.
+
+    Kullanım:
+        @classmethod
+        @identity_mapped('users')
+        def find_by_id(cls, user_id): ...
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(cls, record_id, *args, **kwargs):
+            obj_id = to_object_id(record_id)
+            if obj_id is None:
+                return func(cls, record_id, *args, **kwargs)
+
+            cached = get(kind, obj_id)
+            if cached is not _MISSING:
+                return cached
+
+            result = func(cls, record_id, *args, **kwargs)
+            put(kind, obj_id, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def prefetch(kind, collection, ids, factory=None):
+    """
+    Birden çok kaydı tek bir $in sorgusuyla haritaya yükle
+
+    Liste sayfalarında satır başına find_by_id çağırmadan önce kullanılır;
+    ardından gelen find_by_id çağrıları veritabanına gitmez.
+
+    Args:
+        kind: Harita türü (koleksiyon adı)
+        collection: MongoDB koleksiyonu
+        ids: ID listesi (metin veya ObjectId, tekrarlar ve geçersizler atlanır)
+        factory: Belgeyi model nesnesine çeviren fonksiyon (varsayılan: belge)
+
+    Returns:
+        {ObjectId: nesne veya None}
+    """
+    obj_ids = to_object_ids(ids)
+    result = {}
+    pending = []
+
+    for obj_id in obj_ids:
+        cached = get(kind, obj_id)
+        if cached is _MISSING:
+            pending.append(obj_id)
+        else:
+            result[obj_id] = cached
+
+    if pending:
+        found = {doc['_id']: doc for doc in collection.find({'_id': {'$in': pending}})}
+        for obj_id in pending:
+            doc = found.get(obj_id)
+            value = factory(doc) if doc is not None and factory else doc
+            put(kind, obj_id, value)
+            result[obj_id] = value
+
+    return result
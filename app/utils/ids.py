@@ -0,0 +1,61 @@
+"""
+ID dönüştürme katmanı: Referans alanları (screen_id, playlist_id, media_id)
+veritabanında her zaman ObjectId olarak saklanır ve sorgulanır
+"""
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Veritabanında ObjectId olarak tutulan referans alanları
+REFERENCE_FIELDS = ('screen_id', 'playlist_id', 'media_id')
+
+
+def to_object_id(value):
+    """
+    Değeri ObjectId'ye çevir
+
+    Args:
+        value: ObjectId, 24 karakterlik hex metin veya None
+
+    Returns:
+        ObjectId veya çevrilemiyorsa None
+    """
+    if isinstance(value, ObjectId):
+        return value
+    if value is None:
+        return None
+    try:
+        return ObjectId(str(value))
+    except (InvalidId, TypeError):
+        return None
+
+
+def to_object_ids(values):
+    """
+    Değer listesini ObjectId listesine çevir; çevrilemeyenler atlanır,
+    sıra korunur ve tekrarlar çıkarılır
+    """
+    result = []
+    seen = set()
+    for value in values or ():
+        obj_id = to_object_id(value)
+        if obj_id is not None and obj_id not in seen:
+            seen.add(obj_id)
+            result.append(obj_id)
+    return result
+
+
+def normalize_refs(data, fields=REFERENCE_FIELDS):
+    """
+    Belgedeki referans alanlarını yerinde ObjectId'ye çevir
+
+    Çevrilemeyen değerler olduğu gibi bırakılır.
+
+    Returns:
+        Aynı sözlük
+    """
+    for field in fields:
+        if field in data:
+            obj_id = to_object_id(data[field])
+            if obj_id is not None:
+                data[field] = obj_id
+    return data
@@ -0,0 +1,233 @@
+"""
+İndeks yöneticisi: Model sınıflarında tanımlanan INDEXES ve HOT_QUERIES
+bildirimlerini toplar, indeksleri idempotent olarak uygular ve sık sorguların
+explain() planlarını raporlar
+"""
+from bson import SON
+from pymongo.errors import OperationFailure, PyMongoError
+
+# İndeks, sık sorgu ve sayaç bildirimleri bu model sınıflarından toplanır
+MODEL_CLASSES = (
+    'app.models.user.User',
+    'app.models.screen.Screen',
+    'app.models.media.Media',
+    'app.models.media.MediaShare',
+    'app.models.logs.Log',
+    'app.models.playlist.Playlist',
+    'app.models.playlist_media.PlaylistMedia',
+    'app.models.screen_content.ScreenContent',
+    'app.models.screen_playlist.ScreenPlaylist',
+    'app.models.screen_manifest.ScreenManifest',
+    'app.models.play_stat.PlayStat',
+    'app.models.screen_telemetry.ScreenTelemetry',
+    'app.models.screen_offline_period.ScreenOfflinePeriod',
+    'app.models.job.Job',
+)
+
+# İndeks karşılaştırmasında dikkate alınan seçenekler
+INDEX_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+
+def load_models():
+    """Model sınıflarını içe aktar"""
+    import importlib
+
+    models = []
+    for path in MODEL_CLASSES:
+        module_name, class_name = path.rsplit('.', 1)
+        models.append(getattr(importlib.import_module(module_name), class_name))
+    return models
+
+
+def collect_indexes():
+    """
+    Tüm modellerin indeks bildirimlerini topla
+
+    Returns:
+        {koleksiyon adı: [IndexModel, ...]}
+    """
+    specs = {}
+    for model in load_models():
+        for collection_name, indexes in getattr(model, 'INDEXES', {}).items():
+            specs.setdefault(collection_name, []).extend(indexes)
+    return specs
+
+
+def collect_hot_queries():
+    """Tüm modellerin sık sorgu bildirimlerini topla"""
+    queries = []
+    for model in load_models():
+        queries.extend(getattr(model, 'HOT_QUERIES', []))
+    return queries
+
+
+def _key_of(index_document):
+    """İndeks anahtarını karşılaştırılabilir bir demete çevir"""
+    return tuple(
+        (field, direction if isinstance(direction, str) else int(direction))
+        for field, direction in index_document['key'].items()
+    )
+
+
+def _options_of(index_document):
+    """İndeks seçeneklerini karşılaştırılabilir bir sözlüğe çevir"""
+    return {option: index_document[option] for option in INDEX_OPTIONS if index_document.get(option)}
+
+
+def _existing_indexes(collection):
+    """Koleksiyondaki indeksleri anahtarlarına göre getir"""
+    try:
+        return {_key_of(index): index for index in collection.list_indexes()}
+    except OperationFailure:
+        # Koleksiyon henüz oluşturulmamış
+        return {}
+
+
+def ensure_indexes(db, dry_run=False):
+    """
+    Bildirilen indeksleri veritabanına uygula
+
+    Aynı anahtar ve seçeneklere sahip bir indeks zaten varsa (adı farklı olsa
+    bile) dokunulmaz; bu yüzden komut her dağıtımda güvenle tekrar çalıştırılabilir.
+    Anahtarı aynı fakat seçenekleri farklı bir indeks çakışma olarak raporlanır
+    ve elle müdahale gerektirir.
+
+    Args:
+        db: Veritabanı nesnesi
+        dry_run: True ise yalnızca yapılacakları raporla
+
+    Returns:
+        [{'collection', 'name', 'status', 'detail'}, ...]
+        status: 'exists', 'created', 'missing' (dry_run), 'conflict' veya 'error'
+    """
+    results = []
+    for collection_name, indexes in collect_indexes().items():
+        collection = db[collection_name]
+        existing = _existing_indexes(collection)
+
+        for index in indexes:
+            document = index.document
+            result = {'collection': collection_name, 'name': document['name'], 'detail': ''}
+            current = existing.get(_key_of(document))
+
+            if current is not None:
+                if _options_of(current) == _options_of(document):
+                    result['status'] = 'exists'
+                    if current['name'] != document['name']:
+                        result['detail'] = f"mevcut adı: {current['name']}"
+                else:
+                    result['status'] = 'conflict'
+                    result['detail'] = f"mevcut {current['name']} seçenekleri: {_options_of(current)}"
+            elif dry_run:
+                result['status'] = 'missing'
+            else:
+                try:
+                    collection.create_indexes([index])
+                    result['status'] = 'created'
+                except PyMongoError as e:
+                    # Örn. unique indeks için yinelenen kayıtlar
+                    result['status'] = 'error'
+                    result['detail'] = str(e)
+
+            results.append(result)
+
+    return results
+
+
+def missing_indexes(db):
+    """
+    Veritabanında bulunmayan veya çakışan indeksleri getir
+
+    Returns:
+        [{'collection', 'name', 'status', 'detail'}, ...]
+    """
+    return [
+        result for result in ensure_indexes(db, dry_run=True)
+        if result['status'] != 'exists'
+    ]
+
+
+def _plan_stages(plan):
+    """Sorgu planındaki aşamaları (stage) sırayla topla"""
+    stages = []
+    if not plan:
+        return stages
+
+    # Yeni sunucularda (SBE) plan queryPlan altında döner
+    plan = plan.get('queryPlan', plan)
+    stages.append((plan.get('stage'), plan.get('indexName')))
+    if 'inputStage' in plan:
+        stages.extend(_plan_stages(plan['inputStage']))
+    for child in plan.get('inputStages', []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def explain_hot_queries(db):
+    """
+    Sık sorguların explain() planlarını incele
+
+    Koleksiyon taraması (COLLSCAN) yapan veya sonucu bellekte sıralayan (SORT)
+    sorgular işaretlenir.
+
+    Returns:
+        [{'name', 'collection', 'indexes', 'stages', 'issues'}, ...]
+    """
+    report = []
+    for query in collect_hot_queries():
+        command = SON([('find', query['collection']), ('filter', query.get('filter', {}))])
+        if query.get('sort'):
+            command['sort'] = SON(query['sort'])
+        command['limit'] = query.get('limit', 20)
+
+        entry = {
+            'name': query['name'],
+            'collection': query['collection'],
+            'indexes': [],
+            'stages': [],
+            'issues': []
+        }
+
+        try:
+            explain = db.command(SON([('explain', command), ('verbosity', 'queryPlanner')]))
+        except PyMongoError as e:
+            entry['issues'].append(f"explain hatası: {str(e)}")
+            report.append(entry)
+            continue
+
+        stages = _plan_stages(explain.get('queryPlanner', {}).get('winningPlan'))
+        entry['stages'] = [stage for stage, _ in stages]
+        entry['indexes'] = [index_name for _, index_name in stages if index_name]
+
+        if 'COLLSCAN' in entry['stages']:
+            entry['issues'].append('koleksiyon taraması (COLLSCAN)')
+        if 'SORT' in entry['stages']:
+            entry['issues'].append('bellekte sıralama (SORT)')
+
+        report.append(entry)
+
+    return report
+
+
+def verify_indexes(app):
+    """
+    Uygulama başlarken eksik indeksleri log'a yaz
+
+    İndeks oluşturmaz; yalnızca flask ensure-indexes komutunun çalıştırılması
+    gerektiğini hatırlatır.
+    """
+    from app import mongo
+
+    with app.app_context():
+        try:
+            missing = missing_indexes(mongo.db)
+        except Exception as e:
+            app.logger.warning(f"İndeks doğrulaması yapılamadı: {str(e)}")
+            return
+
+        if missing:
+            names = ', '.join(f"{result['collection']}.{result['name']}" for result in missing)
+            app.logger.warning(
+                f"{len(missing)} indeks eksik veya çakışıyor: {names}. "
+                "'flask ensure-indexes' komutunu çalıştırın."
+            )
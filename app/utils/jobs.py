@@ -0,0 +1,87 @@
+"""
+Arka plan iş worker'ı: Job kuyruğundaki işleri gruplar halinde alıp paralel çalıştırır
+"""
+import importlib
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo.errors import PyMongoError
+
+
+class JobWorker:
+    """
+    Kuyruk işleyicisi
+
+    Her turda en fazla batch_size iş kilitlenir ve concurrency kadar iş
+    parçacığında paralel çalıştırılır. Çalışma zamanı gelmiş iş yoksa
+    poll_interval kadar beklenir. Uygulama bağlamı çağıran tarafından açılmalıdır
+    (bkz. job_worker.py).
+    """
+
+    def __init__(self, app, concurrency=8, batch_size=50, poll_interval=1.0):
+        self.app = app
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._handlers = {}
+        self._stop = threading.Event()
+
+    def _handler(self, job_type):
+        """İş tipinin işleyicisini (noktalı yoldan) çöz"""
+        from app.models.job import Job
+
+        if job_type not in self._handlers:
+            module_name, class_name, method_name = Job.HANDLERS[job_type].rsplit('.', 2)
+            model = getattr(importlib.import_module(module_name), class_name)
+            self._handlers[job_type] = getattr(model, method_name)
+        return self._handlers[job_type]
+
+    def _execute(self, job):
+        """Tek bir işi çalıştır ve sonucunu kaydet"""
+        from app.models.job import Job
+
+        with self.app.app_context():
+            try:
+                result = self._handler(job['type'])(**job.get('payload', {}))
+            except Exception as e:
+                print(f"İş hatası ({job.get('key')}): {str(e)}")
+                print(traceback.format_exc())
+                Job.fail(job, str(e))
+                return False
+
+            Job.complete(job, result)
+            return True
+
+    def run_once(self, executor):
+        """
+        Bir tur iş al ve çalıştır
+
+        Returns:
+            Çalıştırılan iş sayısı
+        """
+        from app.models.job import Job
+
+        jobs = Job.claim(self.batch_size)
+        if jobs:
+            list(executor.map(self._execute, jobs))
+        return len(jobs)
+
+    def run(self):
+        """stop() çağrılana kadar kuyruğu işle"""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job') as executor:
+            while not self._stop.is_set():
+                try:
+                    with self.app.app_context():
+                        processed = self.run_once(executor)
+                except PyMongoError as e:
+                    print(f"Kuyruk okuma hatası: {str(e)}")
+                    processed = 0
+
+                if not processed:
+                    self._stop.wait(self.poll_interval)
+
+    def stop(self):
+        """Mevcut tur bittikten sonra döngüyü durdur"""
+        self._stop.set()
@@ -0,0 +1,142 @@
+"""
+Manifest değişiklik izleyicisi: Long-poll ile bekleyen player bağlantılarını,
+ekranın içerik sürümü değiştiğinde uyandırır
+"""
+import os
+import threading
+import time
+import traceback
+
+
+class _Waiter:
+    """Bekleyen tek bir player bağlantısı"""
+
+    __slots__ = ('version', 'event', 'new_version')
+
+    def __init__(self, version):
+        self.version = version
+        self.event = threading.Event()
+        self.new_version = version
+
+
+class ManifestWatcher:
+    """
+    İşlem (worker) başına tek bir izleyici
+
+    Bekleyen bağlantılar sadece bir Event üzerinde uyur; veritabanını her bağlantı
+    ayrı ayrı sorgulamaz. Arka plandaki tek bir döngü, izlenen tüm ekranların
+    manifest sürümlerini periyodik olarak tek bir $in sorgusu ile okur ve sürümü
+    değişen ekranların bekleyenlerini uyandırır. Aynı worker içindeki değişiklikler
+    notify() ile döngüyü hemen tetikler; diğer worker'lardaki değişiklikler en geç
+    bir poll aralığı içinde fark edilir.
+
+    gevent worker'ları altında Event ve thread'ler greenlet'e dönüştüğü için
+    binlerce boşta bekleyen bağlantı worker'ı meşgul etmez.
+    """
+
+    def __init__(self, poll_interval=2.0):
+        self.poll_interval = poll_interval
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        """İzleme döngüsünü (fork sonrası dahil) gerektiğinde başlat"""
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            # Fork sonrası ebeveyn işlemden kalan bekleyenler geçersizdir
+            if self._pid != os.getpid():
+                self._waiters = {}
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='manifest-watcher', daemon=True)
+            self._thread.start()
+
+    def wait(self, screen_id, version, timeout):
+        """
+        Ekranın manifest sürümü verilen sürümden farklı olana kadar bekle
+
+        Args:
+            screen_id: Ekran ID (ObjectId)
+            version: Player'ın bildiği manifest sürümü
+            timeout: Azami bekleme süresi (saniye)
+
+        Returns:
+            Yeni sürüm (ekran silindiyse None) veya zaman aşımında verilen sürüm
+        """
+        self._ensure_started()
+
+        waiter = _Waiter(version)
+        with self._lock:
+            self._waiters.setdefault(screen_id, set()).add(waiter)
+
+        try:
+            waiter.event.wait(timeout)
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(screen_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[screen_id]
+
+        return waiter.new_version
+
+    def notify(self):
+        """Bu worker'da bir manifest değişti; izleme döngüsünü hemen çalıştır"""
+        self._wakeup.set()
+
+    def _run(self):
+        """Arka plan izleme döngüsü"""
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+            with self._lock:
+                screen_ids = list(self._waiters)
+
+            if not screen_ids:
+                continue
+
+            try:
+                self._check(screen_ids)
+            except Exception as e:
+                print(f"Manifest izleme hatası: {str(e)}")
+                print(traceback.format_exc())
+                time.sleep(self.poll_interval)
+
+    def _check(self, screen_ids):
+        """İzlenen ekranların güncel sürümlerini oku ve değişenleri uyandır"""
+        from app.models.screen_manifest import ScreenManifest
+
+        current = {}
+        cursor = ScreenManifest.get_collection().find(
+            {'screen_id': {'$in': screen_ids}},
+            {'screen_id': 1, 'version': 1, 'stale': 1}
+        )
+        for manifest in cursor:
+            if manifest.get('stale') or not manifest.get('version'):
+                rebuilt = ScreenManifest.find_by_screen_id(manifest['screen_id'])
+                current[manifest['screen_id']] = rebuilt['version'] if rebuilt else None
+            else:
+                current[manifest['screen_id']] = manifest['version']
+
+        with self._lock:
+            for screen_id in screen_ids:
+                # Manifesti olmayan ekran silinmiş demektir
+                version = current.get(screen_id)
+                for waiter in self._waiters.get(screen_id, ()):
+                    if waiter.version != version:
+                        waiter.new_version = version
+                        waiter.event.set()
+
+
+# Worker başına paylaşılan izleyici
+manifest_watcher = ManifestWatcher()
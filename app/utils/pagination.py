@@ -0,0 +1,147 @@
+"""
+Keyset (cursor) sayfalama: skip/limit yerine (sıralama alanı, _id) anahtarıyla
+sayfa sayfa ilerleyen sorgular için yardımcılar
+
+Sayfa imleci (cursor) son kaydın sıralama değeri ve _id'sinden oluşan opak bir
+metindir. Sonraki sayfa, imleçten sonra gelen kayıtları indeks üzerinde doğrudan
+arar; bu yüzden derin sayfalar da ilk sayfa kadar ucuzdur.
+"""
+import base64
+
+from bson import json_util
+
+
+class Page(list):
+    """
+    Sayfa sonucu
+
+    Liste gibi kullanılır; ek olarak sonraki sayfanın imlecini taşır
+    (son sayfada None).
+    """
+
+    __slots__ = ('next_cursor',)
+
+    def __init__(self, items=(), next_cursor=None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(value, obj_id):
+    """Sıralama değeri ve _id'den opak imleç üret"""
+    raw = json_util.dumps([value, obj_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    İmleci (sıralama değeri, _id) ikilisine çevir
+
+    Raises:
+        ValueError: İmleç bozuk veya elle değiştirilmişse
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, obj_id = json_util.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Geçersiz sayfa imleci')
+    return value, obj_id
+
+
+def cursor_arg(name='cursor'):
+    """
+    İstek parametresindeki imleci getir
+
+    Bozuk imleçler yok sayılır (None döner) ve liste ilk sayfadan başlar.
+    """
+    from flask import request
+
+    cursor = request.args.get(name)
+    if not cursor:
+        return None
+    try:
+        decode_cursor(cursor)
+    except ValueError:
+        return None
+    return cursor
+
+
+def keyset_filter(field, cursor, direction=-1):
+    """
+    İmleçten sonra gelen kayıtları seçen filtre
+
+    Sıralama (field, _id) ikilisine göre yapılır; aynı değere sahip kayıtlar
+    _id ile ayrışır. Eksik/None değerler BSON sıralamasında en küçük olduğu için
+    azalan sıralamada en sona düşer.
+    """
+    value, obj_id = decode_cursor(cursor)
+    op = '$lt' if direction < 0 else '$gt'
+
+    if value is None:
+        if direction < 0:
+            return {field: None, '_id': {op: obj_id}}
+        return {'$or': [{field: {'$ne': None}}, {field: None, '_id': {op: obj_id}}]}
+
+    clauses = [{field: {op: value}}, {field: value, '_id': {op: obj_id}}]
+    if direction > 0:
+        return {'$or': clauses}
+    # Azalan sıralamada değeri olmayan kayıtlar en sonda gelir
+    return {'$or': clauses + [{field: None}]}
+
+
+def keyset_sort(field, direction=-1):
+    """find().sort() için (field, _id) sıralaması"""
+    return [(field, direction), ('_id', direction)]
+
+
+def merge_filter(query, extra):
+    """Sorguyu keyset filtresiyle birleştir (mevcut $or koşullarını bozmadan)"""
+    if not extra:
+        return query
+    if not query:
+        return extra
+    return {'$and': [query, extra]}
+
+
+def paginate(collection, query=None, field='created_at', direction=-1, limit=20,
+             cursor=None, projection=None, factory=None):
+    """
+    Koleksiyondan bir sayfa getir
+
+    Args:
+        collection: MongoDB koleksiyonu
+        query: Temel filtre
+        field: Sıralama alanı (created_at, timestamp ...)
+        direction: -1 azalan, 1 artan
+        limit: Sayfa boyutu
+        cursor: Önceki sayfanın next_cursor değeri (ilk sayfa için None)
+        projection: find() projeksiyonu
+        factory: Belgeyi model nesnesine çeviren fonksiyon (varsayılan: belge)
+
+    Returns:
+        Page
+    """
+    query = query or {}
+    if cursor:
+        query = merge_filter(query, keyset_filter(field, cursor, direction))
+
+    # Bir fazla kayıt okunarak sonraki sayfanın varlığı anlaşılır
+    documents = list(
+        collection.find(query, projection).sort(keyset_sort(field, direction)).limit(limit + 1)
+    )
+    return page_from(documents, field, limit, factory)
+
+
+def page_from(documents, field, limit, factory=None):
+    """limit + 1 kadar sıralı belgeden Page oluştur"""
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        last = documents[-1]
+        next_cursor = encode_cursor(last.get(field), last['_id'])
+
+    items = [factory(document) for document in documents] if factory else documents
+    return Page(items, next_cursor)
@@ -0,0 +1,38 @@
+"""
+Projeksiyon profilleri: Liste ve dashboard sorgularında belgenin yalnızca
+gereken alanlarını okumak için model sınıflarındaki PROJECTIONS tanımlarını çözer
+"""
+
+# Bilinen profiller
+#   detail:   Tüm belge (varsayılan)
+#   list:     Liste ve admin sayfaları; sınırsız büyüyen ve hassas alanlar hariç
+#   option:   Seçim kutuları ve sayımlar için kimlik ve ad alanları
+#   manifest: Player manifestinin ihtiyaç duyduğu alanlar
+#   stats:    İstatistik döngüleri için sayısal alanlar
+DETAIL = 'detail'
+
+
+def projection_for(model, profile=None):
+    """
+    Profil adını MongoDB projeksiyonuna çevir
+
+    Args:
+        model: PROJECTIONS sözlüğü tanımlayan model sınıfı
+        profile: Profil adı; None veya 'detail' tüm belgeyi döndürür
+
+    Returns:
+        find() için projeksiyon sözlüğü veya None (tüm belge)
+
+    Raises:
+        ValueError: Model bu profili tanımlamıyorsa
+    """
+    if profile is None or profile == DETAIL:
+        return None
+
+    try:
+        projection = model.PROJECTIONS[profile]
+    except (AttributeError, KeyError):
+        raise ValueError(f"{model.__name__} için tanımsız projeksiyon profili: {profile}")
+
+    # Sorgular sözlüğü değiştirmesin diye kopyası verilir
+    return dict(projection) if projection is not None else None
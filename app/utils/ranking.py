@@ -0,0 +1,195 @@
+"""
+Sıra anahtarları: Playlist ve ekran içeriklerinin order alanını az yazımla yönetir
+
+order alanı kesirli bir sıra anahtarıdır (rank); değerlerin ardışık olması
+gerekmez, yalnızca göreli sıraları önemlidir:
+- Sona ekleme: Üst belgedeki (playlist veya ekran) sayaç tek bir $inc ile
+  artırılır ve dönen değer kullanılır; en büyük sırayı okuyup yazmak gerekmez,
+  eşzamanlı eklemeler farklı sıralar alır.
+- Tek öğe taşıma: Öğeye yeni komşularının ortasındaki değer verilir; yalnızca
+  taşınan belge yazılır.
+- Diğer sıralamalar: Tüm öğeler STEP aralıklarla yeniden numaralanır ve
+  değişenler tek bir bulk_write ile yazılır. Ortadaki değer kayan nokta
+  hassasiyetini tükettiğinde de bu yola düşülür.
+"""
+from datetime import datetime
+
+from pymongo import ReturnDocument, UpdateOne
+
+# Ardışık iki öğe arasındaki varsayılan aralık
+STEP = 1.0
+
+# Sıra anahtarının saklandığı alan
+FIELD = 'order'
+
+
+def between(before, after):
+    """
+    İki sıra arasındaki değeri döndür
+
+    Args:
+        before: Önceki öğenin sırası (başa taşımada None)
+        after: Sonraki öğenin sırası
+
+    Returns:
+        Yeni sıra veya araya değer sığmıyorsa None
+    """
+    if before is None:
+        return after - STEP
+    middle = (before + after) / 2
+    if before < middle < after:
+        return middle
+    return None
+
+
+def next_rank(parents, parent_id, counter, items, scope):
+    """
+    Listenin sonuna eklenecek öğe için benzersiz sıra al
+
+    Sayaç üst belgede tutulur ve find_one_and_update ile atomik artırılır.
+    Sayacı henüz olmayan listelerde sayaç bir kez mevcut en büyük sıradan
+    başlatılır; $max kullanıldığı için eşzamanlı başlatmalar birbirini ezmez.
+
+    Args:
+        parents: Üst belge koleksiyonu (playlists, screens)
+        parent_id: Üst belge ID (ObjectId)
+        counter: Üst belgedeki sayaç alanı
+        items: Öğe koleksiyonu
+        scope: Listenin öğelerini seçen sorgu
+
+    Returns:
+        Yeni sıra
+    """
+    document = parents.find_one_and_update(
+        {'_id': parent_id, counter: {'$exists': True}},
+        {'$inc': {counter: STEP}},
+        projection={counter: 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if document:
+        return document[counter]
+
+    last = items.find_one(scope, {FIELD: 1}, sort=[(FIELD, -1)])
+    seed = float((last or {}).get(FIELD) or 0)
+    parents.update_one({'_id': parent_id}, {'$max': {counter: seed}})
+
+    document = parents.find_one_and_update(
+        {'_id': parent_id},
+        {'$inc': {counter: STEP}},
+        projection={counter: 1},
+        return_document=ReturnDocument.AFTER
+    )
+    # Üst belge yoksa sayaç tutulamaz; yine de sona ekle
+    return document[counter] if document else seed + STEP
+
+
+def reserve(parents, parent_id, counter, rank):
+    """Sayacı en az verilen sıraya çıkar (toplu yeniden numaralamadan sonra)"""
+    parents.update_one({'_id': parent_id}, {'$max': {counter: rank}})
+
+
+def plan(current, desired):
+    """
+    Mevcut sıradan istenen sıraya geçmek için yazılacak sıraları hesapla
+
+    Args:
+        current: Mevcut sıraya göre [(anahtar, sıra), ...]
+        desired: İstenen sırada anahtarlar (current ile aynı küme)
+
+    Returns:
+        ({anahtar: yeni sıra}, yeniden numaralandı mı); sona taşınan tek
+        öğenin sırası None'dır (next_rank ile alınır)
+    """
+    order = [key for key, _ in current]
+    if order == desired:
+        return {}, False
+
+    ranks = dict(current)
+    count = len(desired)
+
+    # Değişen pencere: baştan ve sondan aynı kalan öğeler atlanır
+    low = 0
+    while order[low] == desired[low]:
+        low += 1
+    high = count - 1
+    while order[high] == desired[high]:
+        high -= 1
+
+    moved = None
+    if order[low + 1:high + 1] == desired[low:high]:
+        moved = order[low]
+    elif order[low:high] == desired[low + 1:high + 1]:
+        moved = order[high]
+
+    if moved is not None:
+        position = desired.index(moved)
+        if position == count - 1:
+            return {moved: None}, False
+        before = ranks[desired[position - 1]] if position > 0 else None
+        rank = between(before, ranks[desired[position + 1]])
+        if rank is not None:
+            return {moved: rank}, False
+
+    return {
+        key: (index + 1) * STEP
+        for index, key in enumerate(desired)
+        if ranks[key] != (index + 1) * STEP
+    }, True
+
+
+def reorder(items, scope, desired, parents, parent_id, counter, key='_id'):
+    """
+    Listeyi istenen sıraya getir
+
+    Args:
+        items: Öğe koleksiyonu
+        scope: Listenin öğelerini seçen sorgu
+        desired: İstenen sırada öğe anahtarları; listede olmayan öğeler
+            mevcut sıralarıyla sona eklenir, bilinmeyen anahtarlar atlanır
+        parents, parent_id, counter: Sıra sayacı (bkz. next_rank)
+        key: Öğeleri eşleştiren alan (örn. '_id' veya 'media_id')
+
+    Returns:
+        Yazılan öğe sayısı
+    """
+    documents = list(items.find(scope, {key: 1, FIELD: 1}).sort([(FIELD, 1), ('_id', 1)]))
+
+    # Anahtarlar metin olarak karşılaştırılır (ObjectId veya metin gelebilir);
+    # aynı anahtara ait fazla belgeler listede yerinde kalır
+    by_key = {}
+    current = []
+    for document in documents:
+        name = str(document.get(key))
+        if name in by_key:
+            name = str(document['_id'])
+        by_key[name] = document
+        current.append((name, document.get(FIELD) or 0))
+
+    wanted = []
+    listed = set()
+    for value in desired:
+        name = str(value)
+        if name in by_key and name not in listed:
+            listed.add(name)
+            wanted.append(name)
+    wanted.extend(name for name, _ in current if name not in listed)
+
+    changes, renumbered = plan(current, wanted)
+    if not changes:
+        return 0
+
+    now = datetime.utcnow()
+    if not renumbered:
+        name, rank = next(iter(changes.items()))
+        if rank is None:
+            rank = next_rank(parents, parent_id, counter, items, scope)
+        items.update_one({'_id': by_key[name]['_id']}, {'$set': {FIELD: rank, 'updated_at': now}})
+        return 1
+
+    # Sonradan eklenecek öğeler yeni numaraların ardına düşsün
+    reserve(parents, parent_id, counter, len(wanted) * STEP)
+    items.bulk_write([
+        UpdateOne({'_id': by_key[name]['_id']}, {'$set': {FIELD: rank, 'updated_at': now}})
+        for name, rank in changes.items()
+    ], ordered=False)
+    return len(changes)
@@ -0,0 +1,123 @@
+"""
+Ekran telemetri tamponu: Player durum raporlarını worker içinde biriktirip
+periyodik olarak saatlik kovalara toplu yazar
+"""
+import atexit
+import os
+import threading
+import time
+import traceback
+
+from pymongo.errors import PyMongoError
+
+
+class TelemetryBuffer:
+    """
+    Worker başına telemetri tamponu
+
+    Her durum raporu ayrı bir yazma yerine bellekte biriktirilir; arka plandaki
+    döngü her flush_interval saniyede bir tamponu ScreenTelemetry.write_samples
+    ile tek bir bulk_write olarak yazar. Aynı döngü saatte bir saklama
+    politikasını (ham örneklerin indirgenmesi ve eski kovaların silinmesi) uygular.
+    """
+
+    # Yazılamayan örnekler için tamponun azami boyutu
+    MAX_PENDING = 50000
+
+    def __init__(self, flush_interval=30, retention_interval=3600):
+        self.flush_interval = flush_interval
+        self.retention_interval = retention_interval
+        self.raw_retention_days = None
+        self.retention_days = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._last_retention = 0
+
+    def _ensure_started(self):
+        """Flush döngüsünü (fork sonrası dahil) gerektiğinde başlat"""
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            # Fork sonrası ebeveyn işlemin tamponu bu worker'a ait değildir
+            if self._pid is not None and self._pid != os.getpid():
+                self._pending = []
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='telemetry-flush', daemon=True)
+            self._thread.start()
+
+    def record(self, screen_id, sample):
+        """
+        Ekranın telemetri örneğini kaydet
+
+        Args:
+            screen_id: Ekran ID (ObjectId)
+            sample: ScreenTelemetry.build_sample ile oluşturulmuş örnek
+        """
+        self._ensure_started()
+        with self._lock:
+            self._pending.append((screen_id, sample))
+            if len(self._pending) > self.MAX_PENDING:
+                del self._pending[:len(self._pending) - self.MAX_PENDING]
+
+    def flush(self):
+        """
+        Tampondaki örnekleri veritabanına yaz
+
+        Returns:
+            Yazılan örnek sayısı
+        """
+        from app.models.screen_telemetry import ScreenTelemetry
+
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, []
+
+        try:
+            ScreenTelemetry.write_samples(pending)
+        except PyMongoError as e:
+            print(f"Telemetri yazma hatası: {str(e)}")
+            # Yazılamayan örnekleri bir sonraki flush için geri koy
+            with self._lock:
+                self._pending[:0] = pending
+                if len(self._pending) > self.MAX_PENDING:
+                    del self._pending[:len(self._pending) - self.MAX_PENDING]
+            return 0
+
+        return len(pending)
+
+    def apply_retention(self):
+        """Saklama politikasını retention_interval'da en fazla bir kez uygula"""
+        from app.models.screen_telemetry import ScreenTelemetry
+
+        now = time.monotonic()
+        if now - self._last_retention < self.retention_interval:
+            return
+        self._last_retention = now
+
+        ScreenTelemetry.apply_retention(self.raw_retention_days, self.retention_days)
+
+    def _run(self):
+        """Arka plan flush döngüsü"""
+        stop = threading.Event()
+        while not stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self.apply_retention()
+            except Exception as e:
+                print(f"Telemetri flush hatası: {str(e)}")
+                print(traceback.format_exc())
+
+
+# Worker başına paylaşılan tampon
+telemetry_buffer = TelemetryBuffer()
+
+# Worker kapanırken bekleyen örnekleri kaybetme
+atexit.register(telemetry_buffer.flush)
@@ -0,0 +1,161 @@
+"""
+Yapılandırılmış, seviyeli ve örneklemeli izleme (tracing) katmanı
+
+Model ve API modüllerindeki sıcak yollar bu katman üzerinden işlem süresi ve
+sayaç bilgisi yayınlar. İzleme kapalıyken span() her çağrıda aynı boş nesneyi
+döndürür; alan hesaplama, metin biçimlendirme ve stdout yazımı yapılmaz.
+
+Kullanım:
+    with tracer.span('Screen.find_by_id', screen_id=screen_id) as span:
+        ...
+        span.set(found=True)
+
+Pahalı alanlar için önce tracer.enabled kontrol edilmelidir.
+"""
+import json
+import logging
+import random
+import time
+
+logger = logging.getLogger('app.trace')
+
+
+class _NoopSpan:
+    """İzleme kapalıyken kullanılan, hiçbir şey yapmayan span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **fields):
+        return self
+
+    def incr(self, key, value=1):
+        return self
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Tek bir işlemin süresini ve alanlarını toplayan span"""
+
+    __slots__ = ('tracer', 'name', 'level', 'fields', 'started')
+
+    def __init__(self, tracer, name, level, fields):
+        self.tracer = tracer
+        self.name = name
+        self.level = level
+        self.fields = fields
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fields['ms'] = round((time.perf_counter() - self.started) * 1000, 3)
+        level = self.level
+        if exc_type is not None:
+            self.fields['error'] = f"{exc_type.__name__}: {exc}"
+            level = max(level, logging.WARNING)
+        self.tracer.emit(level, self.name, self.fields)
+        return False
+
+    def set(self, **fields):
+        """Span'e alan ekle"""
+        self.fields.update(fields)
+        return self
+
+    def incr(self, key, value=1):
+        """Span'deki bir sayacı artır"""
+        self.fields[key] = self.fields.get(key, 0) + value
+        return self
+
+
+class Tracer:
+    """
+    İşlem (worker) başına izleyici
+
+    Args:
+        enabled: İzleme açık mı?
+        level: Bu seviyenin altındaki span ve olaylar yayınlanmaz
+        sample_rate: Yayınlanacak span oranı (0.0 - 1.0)
+    """
+
+    def __init__(self, enabled=False, level=logging.DEBUG, sample_rate=1.0):
+        self.level = level
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+
+    def configure(self, enabled=None, level=None, sample_rate=None):
+        """İzleme ayarlarını çalışma anında değiştir"""
+        if level is not None:
+            self.level = self._parse_level(level)
+        if sample_rate is not None:
+            self.sample_rate = max(0.0, min(float(sample_rate), 1.0))
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+        if self.enabled and not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.propagate = False
+        logger.setLevel(self.level)
+
+    @staticmethod
+    def _parse_level(level):
+        """
+        Seviye adını veya sayısını logging seviyesine çevir
+
+        Tanınmayan değerler (örn. hatalı TRACE_LEVEL) uygulamanın açılışını
+        bozmamalı; uyarı yazılır ve DEBUG kullanılır.
+        """
+        if isinstance(level, str):
+            name = level.strip().upper()
+            value = int(name) if name.isdigit() else logging.getLevelName(name)
+        else:
+            value = level
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            return value
+        logging.getLogger(__name__).warning(f"Geçersiz izleme seviyesi: {level!r}; DEBUG kullanılıyor")
+        return logging.DEBUG
+
+    def _sampled(self, level):
+        if not self.enabled or level < self.level:
+            return False
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def span(self, name, level=logging.DEBUG, **fields):
+        """
+        Süresi ölçülecek bir işlem başlat
+
+        İzleme kapalıysa veya örneklemeye girmezse boş span döner.
+        """
+        if not self._sampled(level):
+            return _NOOP_SPAN
+        return Span(self, name, level, fields)
+
+    def event(self, name, level=logging.DEBUG, **fields):
+        """Süresiz tek bir olay yayınla"""
+        if self._sampled(level):
+            self.emit(level, name, fields)
+
+    def emit(self, level, name, fields):
+        """Olayı tek satırlık JSON olarak yaz"""
+        record = {'op': name, 'level': logging.getLevelName(level)}
+        record.update(fields)
+        try:
+            logger.log(level, json.dumps(record, default=str, ensure_ascii=False))
+        except Exception:
+            # İzleme asla asıl işlemi bozmamalı
+            pass
+
+
+# Uygulama genelinde paylaşılan izleyici
+tracer = Tracer()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+MongoDB bağlantı havuzu regresyon testi
+
+Uygulamanın login kontrolü ve medya listesi gibi sık kullanılan yollarını
+paralel thread'lerle yük altında çalıştırır ve pymongo izleme olayları ile
+açılan havuz ve bağlantı sayılarını sayar. Paylaşılan tek MongoClient
+kullanıldığı sürece havuz sayısı sunucu sayısına eşit kalmalı ve bağlantı
+sayısı MONGO_MAX_POOL_SIZE'ı aşmamalıdır; yük arttıkça büyüyen bir sayı,
+bir yerde yeniden her istekte MongoClient oluşturulduğunu gösterir.
+
+Kullanım:
+    python benchmark_connections.py [--threads 32] [--iterations 200]
+
+Çalışan bir MongoDB ve .env içindeki bağlantı bilgileri gerekir.
+"""
+import argparse
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+from pymongo import monitoring
+
+
+class PoolCounter(monitoring.ConnectionPoolListener):
+    """Açılan havuz ve bağlantıları sayan pymongo dinleyicisi"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools_created = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+
+    def pool_created(self, event):
+        with self.lock:
+            self.pools_created += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self.lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def connection_checked_out(self, event):
+        with self.lock:
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.checked_out -= 1
+
+    def open_connections(self):
+        return self.connections_created - self.connections_closed
+
+
+def run_workload(app, iterations, errors):
+    """Tek bir thread'in yükü: login kontrolü ve medya listesi"""
+    from app import mongo
+    from app.models.user import User
+    from app.models.media import Media
+
+    with app.app_context():
+        user = mongo.db.users.find_one({}, {'_id': 1})
+        user_id = str(user['_id']) if user else '000000000000000000000000'
+
+        for _ in range(iterations):
+            try:
+                User.find_by_id(user_id)
+                Media.find_by_user(user_id, limit=5)
+            except Exception as e:
+                errors.append(str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MongoDB bağlantı havuzu regresyon testi')
+    parser.add_argument('--threads', type=int, default=32, help='Paralel thread sayısı')
+    parser.add_argument('--iterations', type=int, default=200, help='Thread başına tekrar sayısı')
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    # Dinleyici, istemci oluşturulmadan önce kaydedilmelidir
+    counter = PoolCounter()
+    monitoring.register(counter)
+
+    from app import create_app
+    app = create_app()
+    max_pool_size = app.config.get('MONGO_MAX_POOL_SIZE', 100)
+
+    # Isınma: havuzun ilk bağlantıları açılsın
+    run_workload(app, 1, [])
+    baseline_pools = counter.pools_created
+    baseline_connections = counter.open_connections()
+
+    errors = []
+    threads = [
+        threading.Thread(target=run_workload, args=(app, args.iterations, errors))
+        for _ in range(args.threads)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    operations = args.threads * args.iterations * 2
+    print(f"İşlem sayısı:            {operations}")
+    print(f"Süre:                    {elapsed:.2f} sn ({operations / elapsed:.0f} işlem/sn)")
+    print(f"Açılan havuz:            {baseline_pools} -> {counter.pools_created}")
+    print(f"Açık bağlantı:           {baseline_connections} -> {counter.open_connections()}")
+    print(f"Toplam açılan bağlantı:  {counter.connections_created}")
+    print(f"Eşzamanlı en fazla:      {counter.max_checked_out} (sınır: {max_pool_size})")
+    if errors:
+        print(f"Hata sayısı:             {len(errors)} (ilk: {errors[0]})")
+
+    failed = False
+    if counter.pools_created != baseline_pools:
+        print("HATA: Yük altında yeni bağlantı havuzu açıldı; paylaşılmayan bir MongoClient var.")
+        failed = True
+    if counter.open_connections() > max_pool_size:
+        print("HATA: Açık bağlantı sayısı havuz sınırını aştı.")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+
+    print("Bağlantı sayısı yük altında sabit kaldı.")
+
+
+if __name__ == '__main__':
+    main()
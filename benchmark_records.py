@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Model kaydı bellek ve oluşturma süresi karşılaştırması
+
+Media, Screen, Playlist, User ve ScreenContent sınıflarının __slots__ tabanlı
+güncel hallerini, nesne başına __dict__ kullanan önceki halleriyle (aşağıdaki
+Legacy* sınıfları, önceki kurucuların birebir kopyasıdır) karşılaştırır. Her
+sınıf için sentetik MongoDB belgelerinden nesne oluşturulur; oluşturma süresi
+(üç denemenin en iyisi) ve nesnelerin tuttuğu bellek (tracemalloc) yazdırılır.
+
+Veritabanı bağlantısı gerekmez.
+
+Kullanım:
+    python benchmark_records.py [--count 50000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+from bson import ObjectId
+
+
+class LegacyMedia:
+    STATUS_PENDING = 'pending'
+
+    def __init__(self, **kwargs):
+        self.id = kwargs.get('_id')
+        self._id = kwargs.get('_id')
+        self.title = kwargs.get('title')
+        self.description = kwargs.get('description')
+        self.filename = kwargs.get('filename')
+        self.file_type = kwargs.get('file_type')
+        self.file_size = kwargs.get('file_size')
+        self.file_path = kwargs.get('file_path')
+        self.category = kwargs.get('category')
+        self.tags = kwargs.get('tags', [])
+        self.status = kwargs.get('status', self.STATUS_PENDING)
+        self.user_id = kwargs.get('user_id')
+        self.width = kwargs.get('width')
+        self.height = kwargs.get('height')
+        self.duration = kwargs.get('duration')
+        self.display_time = kwargs.get('display_time')
+        self.created_at = kwargs.get('created_at', datetime.utcnow())
+        self.updated_at = kwargs.get('updated_at', self.created_at)
+        self.is_public = kwargs.get('is_public', False)
+        self.views = kwargs.get('views', 0)
+        self.orientation = kwargs.get('orientation', 'horizontal')
+
+        for key, value in kwargs.items():
+            if not hasattr(self, key):
+                setattr(self, key, value)
+
+
+class LegacyScreen:
+    def __init__(self, _id, user_id, name, orientation, resolution, api_key,
+                 status='active', location=None, description=None, refresh_rate=15,
+                 show_clock=True, preview_image=None, created_at=None,
+                 updated_at=None, last_active=None, offline_periods=None, playlist_id=None,
+                 screen_type=None, panel_type=None, width_cm=None, height_cm=None, **kwargs):
+        self.id = str(_id)
+        self.user_id = user_id
+        self.name = name
+        self.orientation = orientation
+        self.resolution = resolution
+        self.location = location
+        self.description = description
+        self.status = status
+        self.refresh_rate = refresh_rate
+        self.show_clock = show_clock
+        self.api_key = api_key
+        self.preview_image = preview_image
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.last_active = last_active
+        self.offline_periods = offline_periods if offline_periods else []
+        self.playlist_id = playlist_id
+        self.screen_type = screen_type
+        self.panel_type = panel_type
+        self.width_cm = width_cm
+        self.height_cm = height_cm
+
+
+class LegacyPlaylist:
+    def __init__(self, _id, name, user_id, description=None, is_public=False,
+                 status='active', created_at=None, updated_at=None, media_count=0, **kwargs):
+        self.id = str(_id)
+        self.name = name
+        self.description = description
+        self.user_id = user_id
+        self.is_public = is_public
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.media_count = media_count
+
+
+class LegacyUser:
+    def __init__(self, _id, email, password_hash, name, role,
+                 package='standard', status='active',
+                 created_at=None, updated_at=None, last_login=None,
+                 reset_token=None, reset_token_expires=None, supervisor_id=None,
+                 is_nobetmatik_pro=False, terminal_no=None, business_name=None, **kwargs):
+        self.id = str(_id)
+        self.email = email
+        self.password_hash = password_hash
+        self.name = name
+        self.role = role
+        self.package = package
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.last_login = last_login
+        self.reset_token = reset_token
+        self.reset_token_expires = reset_token_expires
+        self.supervisor_id = supervisor_id
+        self.is_nobetmatik_pro = is_nobetmatik_pro
+        self.terminal_no = terminal_no
+        self.business_name = business_name
+
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+class LegacyScreenContent:
+    def __init__(self, _id, screen_id, media_id, order=1, display_time=None,
+                 created_at=None, updated_at=None, **kwargs):
+        self.id = str(_id)
+        self.screen_id = screen_id
+        self.media_id = media_id
+        self.order = order
+        self.display_time = display_time
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.media = None
+
+
+def media_document(i, now):
+    return {
+        '_id': ObjectId(), 'title': f'Medya {i}', 'description': '', 'filename': f'{i}.jpg',
+        'file_type': 'image', 'file_size': 204800, 'file_path': f'uploads/{i}.jpg',
+        'category': 'genel', 'tags': [], 'status': 'active', 'user_id': ObjectId(),
+        'width': 1920, 'height': 1080, 'display_time': 10, 'created_at': now,
+        'updated_at': now, 'is_public': False, 'views': i, 'orientation': 'horizontal'
+    }
+
+
+def screen_document(i, now):
+    return {
+        '_id': ObjectId(), 'user_id': str(ObjectId()), 'name': f'Ekran {i}',
+        'orientation': 'horizontal', 'resolution': '1920x1080', 'api_key': f'key-{i}',
+        'status': 'active', 'location': 'Lobi', 'refresh_rate': 15, 'show_clock': True,
+        'created_at': now, 'updated_at': now, 'last_active': now
+    }
+
+
+def playlist_document(i, now):
+    return {
+        '_id': ObjectId(), 'name': f'Playlist {i}', 'user_id': str(ObjectId()),
+        'description': '', 'is_public': False, 'status': 'active',
+        'created_at': now, 'updated_at': now, 'media_count': 5
+    }
+
+
+def user_document(i, now):
+    return {
+        '_id': ObjectId(), 'email': f'kullanici{i}@ornek.com', 'password_hash': 'pbkdf2:sha256:x',
+        'name': f'Kullanıcı {i}', 'role': 'user', 'package': 'standard', 'status': 'active',
+        'created_at': now, 'updated_at': now, 'last_login': now, 'notification_settings': {}
+    }
+
+
+def content_document(i, now):
+    return {
+        '_id': ObjectId(), 'screen_id': ObjectId(), 'media_id': ObjectId(), 'order': i,
+        'display_time': 10, 'status': 'active', 'created_at': now, 'updated_at': now
+    }
+
+
+def measure(cls, documents):
+    """(en iyi süre sn, nesnelerin tuttuğu bellek bayt) döndür"""
+    best = None
+    for _ in range(3):
+        gc.collect()
+        started = time.perf_counter()
+        objects = [cls(**document) for document in documents]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        del objects
+
+    gc.collect()
+    tracemalloc.start()
+    objects = [cls(**document) for document in documents]
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+
+    return best, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Model kaydı bellek ve süre karşılaştırması')
+    parser.add_argument('--count', type=int, default=50000, help='Sınıf başına belge sayısı')
+    args = parser.parse_args()
+
+    from app.models.media import Media
+    from app.models.screen import Screen
+    from app.models.playlist import Playlist
+    from app.models.user import User
+    from app.models.screen_content import ScreenContent
+
+    cases = [
+        ('Media', LegacyMedia, Media, media_document),
+        ('Screen', LegacyScreen, Screen, screen_document),
+        ('Playlist', LegacyPlaylist, Playlist, playlist_document),
+        ('User', LegacyUser, User, user_document),
+        ('ScreenContent', LegacyScreenContent, ScreenContent, content_document),
+    ]
+
+    now = datetime.utcnow()
+    print(f"{args.count} belge, süre: 3 denemenin en iyisi, bellek: yalnızca nesneler (tracemalloc)")
+    print(f"{'Sınıf':<14} {'önce ms':>9} {'sonra ms':>9} {'önce MB':>9} {'sonra MB':>9} {'bellek':>8}")
+
+    for name, legacy_cls, record_cls, factory in cases:
+        documents = [factory(i, now) for i in range(args.count)]
+        legacy_time, legacy_memory = measure(legacy_cls, documents)
+        record_time, record_memory = measure(record_cls, documents)
+        print(
+            f"{name:<14} {legacy_time * 1000:>9.1f} {record_time * 1000:>9.1f} "
+            f"{legacy_memory / 1e6:>9.2f} {record_memory / 1e6:>9.2f} "
+            f"{(record_memory - legacy_memory) / legacy_memory * 100:>+7.0f}%"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
 bind = "0.0.0.0:5006"
 workers = 2
+# Player long-poll bağlantıları boşta beklerken worker'ı meşgul etmesin
+worker_class = "gevent"
+worker_connections = 2000
 wsgi_app = "app:app"
 accesslog = "logs/access.log"
 errorlog = "logs/error.log"
@@ -54,4 +57,12 @@ logconfig_dict = {
             'propagate': False,
         },
     }
-} 
\ No newline at end of file
+}
+
+
+def worker_exit(server, worker):
+    """Worker kapanırken tampondaki heartbeat ve telemetri kayıtlarını veritabanına yaz"""
+    from app.utils.heartbeat import heartbeat_buffer
+    from app.utils.telemetry import telemetry_buffer
+    heartbeat_buffer.flush()
+    telemetry_buffer.flush()
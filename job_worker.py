@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Arka plan iş worker'ı
+
+Playlist değişikliklerinin ekranlara yayılması gibi HTTP isteği içinde
+çalıştırılamayacak kadar uzun işleri jobs koleksiyonundan alıp işler
+(bkz. app/models/job.py). Birden fazla worker aynı anda çalıştırılabilir;
+işler kilitlenerek alındığı için aynı iş iki kez işlenmez.
+
+Kullanım:
+    python job_worker.py [--concurrency 8] [--batch-size 50] [--once]
+"""
+import argparse
+import signal
+
+from dotenv import load_dotenv
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Arka plan iş kuyruğunu işler')
+    parser.add_argument('--concurrency', type=int, default=None, help='Paralel çalışan iş sayısı')
+    parser.add_argument('--batch-size', type=int, default=None, help='Her turda alınan azami iş sayısı')
+    parser.add_argument('--once', action='store_true', help='Çalışma zamanı gelmiş işleri işleyip çık')
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    from app import create_app
+    from app.utils.jobs import JobWorker
+
+    app = create_app()
+    worker = JobWorker(
+        app,
+        concurrency=args.concurrency or app.config.get('JOB_WORKER_CONCURRENCY', 8),
+        batch_size=args.batch_size or app.config.get('JOB_WORKER_BATCH_SIZE', 50),
+        poll_interval=app.config.get('JOB_WORKER_POLL_INTERVAL', 1.0)
+    )
+
+    if args.once:
+        from concurrent.futures import ThreadPoolExecutor
+
+        total = 0
+        with ThreadPoolExecutor(max_workers=worker.concurrency) as executor:
+            while True:
+                with app.app_context():
+                    processed = worker.run_once(executor)
+                if not processed:
+                    break
+                total += processed
+        print(f"{total} iş işlendi")
+        return
+
+    # systemd durdururken yarım kalan tur tamamlansın
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+
+    print(f"İş worker'ı başladı (eşzamanlılık: {worker.concurrency}, grup: {worker.batch_size})")
+    worker.run()
+    print("İş worker'ı durdu")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Referans ID'lerini ObjectId'ye dönüştürme betiği
+
+screen_contents, screen_playlists ve playlist_media koleksiyonlarında metin
+olarak saklanmış screen_id, playlist_id ve media_id alanlarını ObjectId'ye
+çevirir. Modeller artık bu alanları yalnızca ObjectId eşitliği ile sorguladığı
+için uygulamanın yeni sürümü yayına alınmadan önce çalıştırılmalıdır.
+
+Belgeler _id sırasına göre gruplar halinde işlenir ve her gruptan sonra son
+işlenen _id migrations koleksiyonuna yazılır; yarıda kesilen bir çalışma aynı
+komutla kaldığı yerden devam eder. Çevrilemeyen (geçersiz) değerler
+değiştirilmez ve raporda ayrıca gösterilir.
+
+Kullanım:
+    python migrate_object_ids.py [--batch-size 1000] [--dry-run] [--restart]
+"""
+import argparse
+from datetime import datetime
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from app.utils.ids import to_object_id
+
+MIGRATION_NAME = 'object_id_references'
+
+# Koleksiyon -> ObjectId'ye çevrilecek referans alanları
+TARGETS = {
+    'screen_contents': ('screen_id', 'media_id'),
+    'screen_playlists': ('screen_id', 'playlist_id'),
+    'playlist_media': ('playlist_id', 'media_id'),
+}
+
+
+def load_checkpoint(db, collection_name):
+    """Koleksiyon için en son işlenen _id'yi getir"""
+    state = db.migrations.find_one({'_id': MIGRATION_NAME})
+    if not state:
+        return None
+    return state.get('checkpoints', {}).get(collection_name)
+
+
+def save_checkpoint(db, collection_name, last_id, done=False):
+    """Koleksiyon için ilerlemeyi kaydet"""
+    update = {
+        f'checkpoints.{collection_name}': last_id,
+        'updated_at': datetime.utcnow()
+    }
+    if done:
+        update[f'completed.{collection_name}'] = datetime.utcnow()
+    db.migrations.update_one({'_id': MIGRATION_NAME}, {'$set': update}, upsert=True)
+
+
+def migrate_collection(db, collection_name, fields, batch_size, dry_run):
+    """
+    Bir koleksiyondaki metin referansları ObjectId'ye çevir
+
+    Returns:
+        (taranan belge, güncellenen belge, çevrilemeyen değer) sayıları
+    """
+    collection = db[collection_name]
+    query = {'$or': [{field: {'$type': 'string'}} for field in fields]}
+    projection = {field: 1 for field in fields}
+
+    last_id = None if dry_run else load_checkpoint(db, collection_name)
+    scanned = updated = invalid = 0
+
+    while True:
+        batch_query = dict(query)
+        if last_id is not None:
+            batch_query['_id'] = {'$gt': last_id}
+
+        batch = list(collection.find(batch_query, projection).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            changes = {}
+            for field in fields:
+                value = doc.get(field)
+                if not isinstance(value, str):
+                    continue
+                obj_id = to_object_id(value)
+                if obj_id is None:
+                    invalid += 1
+                    print(f"  Çevrilemeyen değer: {collection_name} {doc['_id']} {field}={value!r}")
+                    continue
+                changes[field] = obj_id
+            if changes:
+                # Eşzamanlı bir yazma alanı zaten değiştirdiyse dokunma
+                match = {'_id': doc['_id']}
+                for field in changes:
+                    match[field] = doc[field]
+                operations.append(UpdateOne(match, {'$set': changes}))
+
+        scanned += len(batch)
+        last_id = batch[-1]['_id']
+
+        if operations:
+            if dry_run:
+                updated += len(operations)
+            else:
+                result = collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+
+        if not dry_run:
+            save_checkpoint(db, collection_name, last_id)
+
+        print(f"  {collection_name}: {scanned} belge tarandı, {updated} güncellendi")
+
+    if not dry_run:
+        save_checkpoint(db, collection_name, last_id, done=True)
+
+    return scanned, updated, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Referans ID alanlarını ObjectId\'ye dönüştürür')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Grup başına belge sayısı')
+    parser.add_argument('--dry-run', action='store_true', help='Veritabanını değiştirmeden yalnızca say')
+    parser.add_argument('--restart', action='store_true', help='Kayıtlı ilerlemeyi yok sayıp baştan başla')
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    from app import create_app, mongo
+    app = create_app()
+
+    with app.app_context():
+        db = mongo.db
+
+        if args.restart and not args.dry_run:
+            db.migrations.delete_one({'_id': MIGRATION_NAME})
+
+        total_updated = total_invalid = 0
+        for collection_name, fields in TARGETS.items():
+            print(f"{collection_name} ({', '.join(fields)}) işleniyor...")
+            scanned, updated, invalid = migrate_collection(
+                db, collection_name, fields, args.batch_size, args.dry_run
+            )
+            total_updated += updated
+            total_invalid += invalid
+
+        mode = " (deneme çalıştırması, değişiklik yapılmadı)" if args.dry_run else ""
+        print(f"Tamamlandı{mode}: {total_updated} belge güncellendi, {total_invalid} değer çevrilemedi")
+
+
+if __name__ == '__main__':
+    main()
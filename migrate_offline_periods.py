@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Offline dönemleri ekran belgelerinden ayrı koleksiyona taşıma betiği
+
+screens belgelerinde offline_periods dizisi olarak biriken dönemleri
+screen_offline_periods koleksiyonuna yazar, günlük erişilebilirlik özetlerini
+(screen_uptime_daily) günceller ve diziyi ekran belgesinden kaldırır.
+
+Ekranlar _id sırasına göre gruplar halinde işlenir ve her gruptan sonra son
+işlenen _id migrations koleksiyonuna yazılır; yarıda kesilen bir çalışma aynı
+komutla kaldığı yerden devam eder. Bir ekranın dönemleri yazıldıktan hemen
+sonra dizi kaldırıldığı için aynı dönem iki kez taşınmaz. Yorumlanamayan
+dönemler atlanır ve raporda ayrıca gösterilir.
+
+Kullanım:
+    python migrate_offline_periods.py [--batch-size 200] [--dry-run] [--restart]
+"""
+import argparse
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+MIGRATION_NAME = 'offline_periods_collection'
+
+
+def load_checkpoint(db):
+    """En son işlenen ekran _id'sini getir"""
+    state = db.migrations.find_one({'_id': MIGRATION_NAME})
+    return state.get('checkpoint') if state else None
+
+
+def save_checkpoint(db, last_id, done=False):
+    """İlerlemeyi kaydet"""
+    update = {'checkpoint': last_id, 'updated_at': datetime.utcnow()}
+    if done:
+        update['completed_at'] = datetime.utcnow()
+    db.migrations.update_one({'_id': MIGRATION_NAME}, {'$set': update}, upsert=True)
+
+
+def migrate(db, batch_size, dry_run):
+    """
+    offline_periods dizilerini taşı
+
+    Returns:
+        (işlenen ekran, taşınan dönem, yorumlanamayan dönem) sayıları
+    """
+    from app.models.screen_offline_period import ScreenOfflinePeriod
+
+    query = {'offline_periods': {'$exists': True}}
+    last_id = None if dry_run else load_checkpoint(db)
+    screens = moved = invalid = 0
+
+    while True:
+        batch_query = dict(query)
+        if last_id is not None:
+            batch_query['_id'] = {'$gt': last_id}
+
+        batch = list(
+            db.screens.find(batch_query, {'offline_periods': 1}).sort('_id', 1).limit(batch_size)
+        )
+        if not batch:
+            break
+
+        for screen in batch:
+            periods = screen.get('offline_periods') or []
+            if dry_run:
+                valid = sum(1 for period in periods if ScreenOfflinePeriod.build_period(period))
+                inserted, skipped = valid, len(periods) - valid
+            else:
+                inserted, skipped = ScreenOfflinePeriod.insert_many(screen['_id'], periods)
+                db.screens.update_one({'_id': screen['_id']}, {'$unset': {'offline_periods': ''}})
+
+            if skipped:
+                print(f"  Yorumlanamayan dönem: ekran {screen['_id']}, {skipped} adet")
+            moved += inserted
+            invalid += skipped
+
+        screens += len(batch)
+        last_id = batch[-1]['_id']
+
+        if not dry_run:
+            save_checkpoint(db, last_id)
+
+        print(f"  {screens} ekran işlendi, {moved} dönem taşındı")
+
+    if not dry_run:
+        save_checkpoint(db, last_id, done=True)
+
+    return screens, moved, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline dönemleri ayrı koleksiyona taşır')
+    parser.add_argument('--batch-size', type=int, default=200, help='Grup başına ekran sayısı')
+    parser.add_argument('--dry-run', action='store_true', help='Veritabanını değiştirmeden yalnızca say')
+    parser.add_argument('--restart', action='store_true', help='Kayıtlı ilerlemeyi yok sayıp baştan başla')
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    from app import create_app, mongo
+    app = create_app()
+
+    with app.app_context():
+        db = mongo.db
+
+        if args.restart and not args.dry_run:
+            db.migrations.delete_one({'_id': MIGRATION_NAME})
+
+        print("screens.offline_periods işleniyor...")
+        screens, moved, invalid = migrate(db, args.batch_size, args.dry_run)
+
+        mode = " (deneme çalıştırması, değişiklik yapılmadı)" if args.dry_run else ""
+        print(f"Tamamlandı{mode}: {screens} ekran, {moved} dönem taşındı, {invalid} dönem yorumlanamadı")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Ortak test ayarları
+
+Testler gerçek bir MongoDB gerektirmez; veritabanına ihtiyaç duyan modeller
+ve route'lar mongomock üzerinde çalıştırılır.
+"""
+import os
+import sys
+
+import mongomock
+import pytest
+
+# Depo kökü (app paketi) doğrudan `pytest` ile çalıştırıldığında da bulunsun
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db():
+    """Her test için boş bir mongomock veritabanı"""
+    return mongomock.MongoClient().db
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Test yapılandırmasıyla uygulama (oturum boyunca tek örnek)"""
+    from app import create_app
+    return create_app({'TESTING': True, 'WTF_CSRF_ENABLED': False})
+
+
+@pytest.fixture
+def mongo_db(app):
+    """
+    Uygulamanın mongo.db'sini boş bir mongomock veritabanıyla değiştir
+
+    Worker başına tutulan önbellekler de temizlenir ki testler birbirinin
+    kayıtlarını görmesin.
+    """
+    from app import mongo
+    from app.models import playlist_media, screen
+    from app.utils.counters import counters
+
+    mongo.db = mongomock.MongoClient().db
+    screen._api_key_cache.clear()
+    playlist_media._items_cache.clear()
+    counters._cache.clear()
+
+    with app.app_context():
+        yield mongo.db
+
+
+@pytest.fixture
+def client(app, mongo_db):
+    return app.test_client()
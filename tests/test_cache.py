@@ -0,0 +1,101 @@
+"""
+app/utils/cache.py: TTLCache
+"""
+import pytest
+
+from app.utils import cache as cache_module
+from app.utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.monotonic yerine elle ilerletilen saat"""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_get_set_and_default():
+    cache = TTLCache()
+    assert cache.get('a') is None
+    assert cache.get('a', 'yok') == 'yok'
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    cache.set('a', 2)
+    assert cache.get('a') == 2
+    assert len(cache) == 1
+
+
+def test_falsy_values_are_cached():
+    cache = TTLCache()
+    cache.set('zero', 0)
+    cache.set('empty', {})
+    assert cache.get('zero', 'yok') == 0
+    assert cache.get('empty', 'yok') == {}
+
+
+def test_entries_expire(clock):
+    cache = TTLCache(ttl=10)
+    cache.set('a', 1)
+    clock[0] += 9.9
+    assert cache.get('a') == 1
+    clock[0] += 0.2
+    assert cache.get('a') is None
+    # Süresi dolan kayıt okunurken silinir
+    assert len(cache) == 0
+
+
+def test_set_refreshes_expiry(clock):
+    cache = TTLCache(ttl=10)
+    cache.set('a', 1)
+    clock[0] += 8
+    cache.set('a', 2)
+    clock[0] += 8
+    assert cache.get('a') == 2
+
+
+def test_ttl_change_applies_to_new_entries(clock):
+    cache = TTLCache(ttl=10)
+    cache.set('old', 1)
+    cache.ttl = 1
+    cache.set('new', 2)
+    clock[0] += 5
+    assert cache.get('old') == 1
+    assert cache.get('new') is None
+
+
+def test_least_recently_used_evicted():
+    cache = TTLCache(maxsize=3)
+    for key in 'abc':
+        cache.set(key, key)
+    # 'a' okunduğu için en son kullanılan olur; 'b' düşer
+    cache.get('a')
+    cache.set('d', 'd')
+    assert len(cache) == 3
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in 'acd'] == ['a', 'c', 'd']
+
+
+def test_pop():
+    cache = TTLCache()
+    cache.set('a', 1)
+    assert cache.pop('a') == 1
+    assert cache.pop('a', 'yok') == 'yok'
+    assert cache.get('a') is None
+
+
+def test_pop_where():
+    cache = TTLCache()
+    for number in range(6):
+        cache.set(number, number)
+    assert cache.pop_where(lambda value: value % 2 == 0) == 3
+    assert sorted(key for key in range(6) if cache.get(key) is not None) == [1, 3, 5]
+
+
+def test_clear():
+    cache = TTLCache()
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get('a') is None
@@ -0,0 +1,100 @@
+"""
+app/utils/heartbeat.py: last_active güncellemelerinin toplu yazılması
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import PyMongoError
+
+from app.utils.heartbeat import HeartbeatBuffer
+
+T0 = datetime(2026, 5, 1, 9, 0, 0)
+
+
+@pytest.fixture
+def buffer():
+    # Arka plan döngüsü test süresince flush etmez
+    return HeartbeatBuffer(flush_interval=3600)
+
+
+@pytest.fixture
+def screens(mongo_db):
+    return [mongo_db.screens.insert_one({'name': f's{index}'}).inserted_id for index in range(3)]
+
+
+def last_active(mongo_db, screen_id):
+    return mongo_db.screens.find_one({'_id': screen_id}).get('last_active')
+
+
+def test_records_coalesce_to_latest_timestamp(mongo_db, buffer, screens, monkeypatch):
+    writes = []
+    bulk_write = mongo_db.screens.bulk_write
+    monkeypatch.setattr(mongo_db.screens, 'bulk_write', lambda ops, **kw: writes.append(ops) or bulk_write(ops, **kw))
+
+    for minute in (3, 1, 5, 2):
+        buffer.record(screens[0], T0 + timedelta(minutes=minute))
+    buffer.record(screens[1], T0)
+
+    assert buffer.flush() == 2
+    assert len(writes) == 1 and len(writes[0]) == 2
+    assert last_active(mongo_db, screens[0]) == T0 + timedelta(minutes=5)
+    assert last_active(mongo_db, screens[1]) == T0
+    assert last_active(mongo_db, screens[2]) is None
+
+
+def test_flush_never_moves_last_active_back(mongo_db, buffer, screens):
+    newer = T0 + timedelta(hours=1)
+    mongo_db.screens.update_one({'_id': screens[0]}, {'$set': {'last_active': newer}})
+    buffer.record(screens[0], T0)
+    buffer.flush()
+    assert last_active(mongo_db, screens[0]) == newer
+
+
+def test_empty_flush_writes_nothing(mongo_db, buffer):
+    assert buffer.flush() == 0
+
+
+def test_flush_empties_buffer(mongo_db, buffer, screens):
+    buffer.record(screens[0], T0)
+    assert buffer.flush() == 1
+    assert buffer.flush() == 0
+
+
+def test_failed_write_is_retried_on_next_flush(mongo_db, buffer, screens, monkeypatch):
+    buffer.record(screens[0], T0)
+
+    def failing(*args, **kwargs):
+        raise PyMongoError('bağlantı yok')
+
+    bulk_write = mongo_db.screens.bulk_write
+    monkeypatch.setattr(mongo_db.screens, 'bulk_write', failing)
+    assert buffer.flush() == 0
+
+    # Bu arada gelen daha yeni heartbeat korunur
+    buffer.record(screens[0], T0 + timedelta(minutes=1))
+    monkeypatch.setattr(mongo_db.screens, 'bulk_write', bulk_write)
+    assert buffer.flush() == 1
+    assert last_active(mongo_db, screens[0]) == T0 + timedelta(minutes=1)
+
+
+def test_pending_records_dropped_after_fork(mongo_db, buffer, screens):
+    buffer.record(screens[0], T0)
+    # Ebeveyn işlemden kalmış tampon
+    buffer._pid = -1
+    buffer.record(screens[1], T0)
+    assert buffer.flush() == 1
+    assert last_active(mongo_db, screens[0]) is None
+
+
+def test_screen_update_last_active_goes_through_buffer(mongo_db, screens, monkeypatch):
+    from app.models import screen as screen_module
+    from app.models.screen import Screen
+
+    buffer = HeartbeatBuffer(flush_interval=3600)
+    monkeypatch.setattr(screen_module, 'heartbeat_buffer', buffer)
+
+    assert Screen.update_last_active_by_id(str(screens[0]), T0)
+    assert last_active(mongo_db, screens[0]) is None
+    buffer.flush()
+    assert last_active(mongo_db, screens[0]) == T0
+    assert Screen.update_last_active_by_id('geçersiz') is False
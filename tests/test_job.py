@@ -0,0 +1,169 @@
+"""
+Job: MongoDB tabanlı iş kuyruğu (tekilleştirme, kilitleme, yeniden deneme)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.models.job import Job
+
+TYPE = Job.TYPE_SCREEN_SYNC
+
+
+@pytest.fixture
+def jobs(mongo_db):
+    # mongomock partialFilterExpression'ı desteklemez; key_pending_unique
+    # indeksi çalışan işleri de kapsayacağı için oluşturulmaz
+    return mongo_db.jobs
+
+
+def pending_key_unique(jobs, monkeypatch):
+    """Bekleyen işe dönüşen güncellemede key_pending_unique ihlalini taklit et"""
+    update_one = jobs.update_one
+
+    def checked_update_one(query, update, *args, **kwargs):
+        status = update.get('$set', {}).get('status')
+        if status == Job.STATUS_PENDING:
+            current = jobs.find_one(query)
+            if current and jobs.find_one({'key': current['key'], 'status': status, '_id': {'$ne': current['_id']}}):
+                raise DuplicateKeyError('E11000 duplicate key error', 11000)
+        return update_one(query, update, *args, **kwargs)
+
+    monkeypatch.setattr(jobs, 'update_one', checked_update_one)
+
+
+def later(seconds=60):
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+
+def test_same_key_joins_pending_job(jobs):
+    assert Job.enqueue(TYPE, 'screen_sync:1', {'n': 1}) is True
+    assert Job.enqueue(TYPE, 'screen_sync:1', {'n': 2}) is False
+    assert Job.enqueue(TYPE, 'screen_sync:2') is True
+
+    assert jobs.count_documents({}) == 2
+    # Son isteğin parametreleri kullanılır
+    assert jobs.find_one({'key': 'screen_sync:1'})['payload'] == {'n': 2}
+
+
+def test_joining_pushes_run_after(jobs):
+    Job.enqueue(TYPE, 'k', delay=0)
+    first = jobs.find_one({'key': 'k'})['run_after']
+    Job.enqueue(TYPE, 'k', delay=30)
+    assert jobs.find_one({'key': 'k'})['run_after'] > first
+
+
+def test_batch_total_counts_each_job_once(jobs):
+    batch_id = Job.create_batch(TYPE, label='playlist')
+    Job.enqueue(TYPE, 'a', batch_id=batch_id)
+    Job.enqueue(TYPE, 'a', batch_id=batch_id)
+    Job.enqueue(TYPE, 'b', batch_id=batch_id)
+    progress = Job.get_progress(batch_id)
+    assert progress['total'] == 2
+    assert progress['pending'] == 2 and progress['finished'] is False
+
+
+def test_running_job_does_not_absorb_new_request(jobs):
+    Job.enqueue(TYPE, 'k', delay=0)
+    [job] = Job.claim(10, worker='w1')
+    # Çalışan işe katılmak son değişikliği kaçırır; yeni bekleyen iş açılır
+    assert Job.enqueue(TYPE, 'k') is True
+    assert jobs.count_documents({'key': 'k'}) == 2
+    assert jobs.find_one({'_id': job['_id']})['status'] == Job.STATUS_RUNNING
+
+
+def test_claim_respects_run_after_and_limit(jobs):
+    Job.enqueue(TYPE, 'a', delay=0)
+    Job.enqueue(TYPE, 'b', delay=0)
+    Job.enqueue(TYPE, 'c', delay=0)
+    Job.enqueue(TYPE, 'gelecek', delay=600)
+
+    claimed = Job.claim(2, worker='w1', now=later(1))
+    assert [job['key'] for job in claimed] == ['a', 'b']
+    assert all(job['status'] == Job.STATUS_RUNNING and job['locked_by'] == 'w1' for job in claimed)
+    assert all(job['attempts'] == 1 for job in claimed)
+
+    assert [job['key'] for job in Job.claim(10, worker='w2', now=later(1))] == ['c']
+    assert Job.claim(10, worker='w2', now=later(1)) == []
+
+
+def test_expired_lease_is_reclaimed(jobs):
+    Job.enqueue(TYPE, 'k', delay=0)
+    [job] = Job.claim(1, worker='w1', now=later(1))
+
+    # Kilit süresi dolmadan başka worker alamaz
+    assert Job.claim(1, worker='w2', now=later(Job.LEASE_SECONDS - 10)) == []
+
+    [reclaimed] = Job.claim(1, worker='w2', now=later(Job.LEASE_SECONDS + 10))
+    assert reclaimed['_id'] == job['_id']
+    assert reclaimed['locked_by'] == 'w2'
+    assert reclaimed['attempts'] == 2
+
+    # Eski worker'ın sonucu yok sayılır
+    Job.complete(job)
+    assert jobs.find_one({'_id': job['_id']})['status'] == Job.STATUS_RUNNING
+    Job.complete(reclaimed)
+    assert jobs.find_one({'_id': job['_id']})['status'] == Job.STATUS_DONE
+
+
+def test_complete_advances_batch(jobs):
+    batch_id = Job.create_batch(TYPE)
+    Job.enqueue(TYPE, 'k', batch_id=batch_id, delay=0)
+    [job] = Job.claim(1, worker='w1', now=later(1))
+    Job.complete(job, result={'ok': True})
+    progress = Job.get_progress(batch_id)
+    assert progress['done'] == 1 and progress['finished'] is True
+
+
+def test_fail_retries_with_backoff(jobs):
+    Job.enqueue(TYPE, 'k', delay=0)
+    [job] = Job.claim(1, worker='w1', now=later(1))
+
+    before = datetime.utcnow()
+    assert Job.fail(job, 'zaman aşımı') is True
+    stored = jobs.find_one({'_id': job['_id']})
+    assert stored['status'] == Job.STATUS_PENDING
+    assert stored['error'] == 'zaman aşımı'
+    assert 'locked_by' not in stored
+    # Kayıtlı zaman milisaniyeye yuvarlanır
+    assert 29 < (stored['run_after'] - before).total_seconds() <= 30
+
+    # İkinci denemede bekleme iki katına çıkar
+    [job] = Job.claim(1, worker='w1', now=later(3600))
+    before = datetime.utcnow()
+    Job.fail(job, 'yine')
+    assert 59 < (jobs.find_one({'_id': job['_id']})['run_after'] - before).total_seconds() <= 60
+
+
+def test_fail_after_max_attempts_marks_failed(jobs):
+    batch_id = Job.create_batch(TYPE)
+    Job.enqueue(TYPE, 'k', batch_id=batch_id, delay=0)
+    jobs.update_one({'key': 'k'}, {'$set': {'attempts': Job.MAX_ATTEMPTS - 1}})
+    [job] = Job.claim(1, worker='w1', now=later(1))
+
+    assert Job.fail(job, 'kalıcı hata') is False
+    stored = jobs.find_one({'_id': job['_id']})
+    assert stored['status'] == Job.STATUS_FAILED
+    assert stored['finished_at']
+    assert Job.get_progress(batch_id)['failed'] == 1
+
+
+def test_failed_retry_hands_batches_to_newer_pending_job(jobs, monkeypatch):
+    pending_key_unique(jobs, monkeypatch)
+    first_batch = Job.create_batch(TYPE)
+    Job.enqueue(TYPE, 'k', batch_id=first_batch, delay=0)
+    [job] = Job.claim(1, worker='w1', now=later(1))
+
+    second_batch = Job.create_batch(TYPE)
+    Job.enqueue(TYPE, 'k', batch_id=second_batch)
+
+    assert Job.fail(job, 'hata') is True
+    remaining = list(jobs.find({'key': 'k'}))
+    assert len(remaining) == 1
+    assert remaining[0]['status'] == Job.STATUS_PENDING
+    assert set(remaining[0]['batch_ids']) == {first_batch, second_batch}
+
+
+def test_unknown_batch_progress(jobs):
+    assert Job.get_progress('yok') is None
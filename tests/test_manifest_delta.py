@@ -0,0 +1,110 @@
+"""
+Manifest deltası: ScreenManifest.diff_items ve player delta uç noktası
+"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.models.screen_manifest import ScreenManifest
+
+API_KEY = 'delta-key'
+URL = f'/api/player/content/{API_KEY}/delta'
+
+
+def item(item_id, **fields):
+    return {'id': item_id, 'display_time': 10, **fields}
+
+
+def test_identical_lists_have_no_changes():
+    items = [item('a'), item('b')]
+    assert ScreenManifest.diff_items(items, list(items)) == {
+        'added': [], 'removed': [], 'modified': [], 'order': None
+    }
+
+
+def test_added_item_sends_full_order():
+    delta = ScreenManifest.diff_items([item('a'), item('b')], [item('a'), item('c'), item('b')])
+    assert delta['added'] == [item('c')]
+    assert delta['removed'] == [] and delta['modified'] == []
+    assert delta['order'] == ['a', 'c', 'b']
+
+
+def test_removed_item_keeps_order_unchanged():
+    delta = ScreenManifest.diff_items([item('a'), item('b'), item('c')], [item('a'), item('c')])
+    assert delta['removed'] == ['b']
+    assert delta['added'] == [] and delta['modified'] == []
+    assert delta['order'] is None
+
+
+def test_modified_item_sent_in_full():
+    delta = ScreenManifest.diff_items([item('a'), item('b')], [item('a'), item('b', display_time=30)])
+    assert delta['modified'] == [item('b', display_time=30)]
+    assert delta['order'] is None
+
+
+def test_reordered_items_send_order_only():
+    delta = ScreenManifest.diff_items([item('a'), item('b'), item('c')], [item('c'), item('a'), item('b')])
+    assert delta['added'] == [] and delta['removed'] == [] and delta['modified'] == []
+    assert delta['order'] == ['c', 'a', 'b']
+
+
+def test_custom_key():
+    old = [{'media_id': 'm1', 'n': 1}]
+    new = [{'media_id': 'm1', 'n': 2}, {'media_id': 'm2', 'n': 1}]
+    delta = ScreenManifest.diff_items(old, new, key='media_id')
+    assert delta['added'] == [{'media_id': 'm2', 'n': 1}]
+    assert delta['modified'] == [{'media_id': 'm1', 'n': 2}]
+
+
+@pytest.fixture
+def screen(mongo_db):
+    user_id = ObjectId()
+    screen_id = mongo_db.screens.insert_one({
+        'name': 'Kafe', 'api_key': API_KEY, 'user_id': user_id, 'status': 'active',
+        'orientation': 'horizontal', 'resolution': '1920x1080', 'refresh_rate': 15,
+        'show_clock': True, 'created_at': datetime.utcnow()
+    }).inserted_id
+    add_content(mongo_db, screen_id, user_id, 'ilk', 1.0)
+    return screen_id
+
+
+def add_content(mongo_db, screen_id, user_id, title, order):
+    media_id = mongo_db.media.insert_one({
+        'title': title, 'filename': f'{title}.jpg', 'file_type': 'image', 'status': 'active',
+        'user_id': user_id, 'display_time': 10
+    }).inserted_id
+    mongo_db.screen_contents.insert_one({
+        'screen_id': screen_id, 'media_id': media_id, 'order': order, 'status': 'active', 'display_time': 10
+    })
+    return media_id
+
+
+def test_known_version_returns_delta(client, mongo_db, screen):
+    old_version = ScreenManifest.find_by_api_key(API_KEY)['version']
+
+    user_id = mongo_db.screens.find_one({'_id': screen})['user_id']
+    add_content(mongo_db, screen, user_id, 'ikinci', 2.0)
+    ScreenManifest.invalidate(screen)
+
+    body = client.get(URL, query_string={'version': old_version}).get_json()
+    assert body['full'] is False
+    assert body['base_version'] == old_version
+    assert body['version'] != old_version
+    assert [added['title'] for added in body['added']] == ['ikinci']
+    assert body['removed'] == [] and body['modified'] == []
+    assert len(body['order']) == 2
+    assert 'screen' not in body
+
+
+def test_current_version_returns_304(client, mongo_db, screen):
+    version = ScreenManifest.find_by_api_key(API_KEY)['version']
+    response = client.get(URL, query_string={'version': version})
+    assert response.status_code == 304
+
+
+def test_unknown_version_falls_back_to_full_sync(client, mongo_db, screen):
+    body = client.get(URL, query_string={'version': 'bilinmeyen'}).get_json()
+    assert body['full'] is True
+    assert len(body['items']) == 1
+    assert body['screen']
@@ -0,0 +1,38 @@
+"""
+Media.delete: silme ile istek kimlik haritasının tutarlılığı
+"""
+import pytest
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from app.models.media import Media
+
+
+@pytest.fixture
+def media_id(mongo_db):
+    return mongo_db.media.insert_one({'title': 'afiş', 'status': 'active', 'views': 3}).inserted_id
+
+
+def test_deleted_media_dropped_from_identity_map(app, mongo_db, media_id):
+    with app.test_request_context():
+        assert Media.find_by_id(media_id)
+        assert Media.delete(str(media_id)) is True
+        assert Media.find_by_id(media_id) is None
+
+
+def test_failed_delete_keeps_identity_map(app, mongo_db, media_id, monkeypatch):
+    def failing(*args, **kwargs):
+        raise PyMongoError('bağlantı koptu')
+
+    with app.test_request_context():
+        assert Media.find_by_id(media_id)
+        monkeypatch.setattr(mongo_db.media, 'delete_one', failing)
+        assert Media.delete(media_id) is False
+        # Belge silinmedi; istekteki kopya hâlâ geçerli
+        monkeypatch.setattr(mongo_db.media, 'find_one', failing)
+        assert Media.find_by_id(media_id)['_id'] == media_id
+
+
+def test_unknown_media_not_deleted(app, mongo_db):
+    with app.test_request_context():
+        assert Media.delete(ObjectId()) is False
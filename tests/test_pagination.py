@@ -0,0 +1,86 @@
+"""
+app/utils/pagination.py: imleç tabanlı sayfalama
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_filter, paginate
+
+BASE = datetime(2026, 1, 1)
+
+
+def seed(db):
+    """Aynı ve eksik (None / alan yok) sıralama değerleri içeren belgeler"""
+    documents = []
+    for index in range(23):
+        document = {'_id': ObjectId(), 'n': index}
+        if index % 5 == 0:
+            document['created_at'] = None
+        elif index % 7 == 0:
+            pass  # alan hiç yok
+        else:
+            # Aynı değerler _id ile ayrışmalı
+            document['created_at'] = BASE + timedelta(minutes=index // 3)
+        documents.append(document)
+    db.items.insert_many(documents)
+    return documents
+
+
+def expected_order(documents, direction):
+    """BSON sıralaması: None/eksik değerler en küçük, eşitlikte _id"""
+    def key(document):
+        value = document.get('created_at')
+        return (value is not None, value or BASE, document['_id'])
+    return [document['_id'] for document in sorted(documents, key=key, reverse=direction < 0)]
+
+
+def walk(db, direction, limit):
+    seen = []
+    cursor = None
+    while True:
+        page = paginate(db.items, {}, 'created_at', direction, limit, cursor)
+        seen.extend(document['_id'] for document in page)
+        if not page.has_more:
+            return seen
+        cursor = page.next_cursor
+
+
+def test_cursor_round_trip():
+    obj_id = ObjectId()
+    for value in (None, 5, 'metin', BASE):
+        assert decode_cursor(encode_cursor(value, obj_id)) == (value, obj_id)
+
+
+def test_decode_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor('bozuk-imlec')
+
+
+@pytest.mark.parametrize('direction', [-1, 1])
+@pytest.mark.parametrize('limit', [1, 2, 4, 5, 23, 50])
+def test_pages_cover_null_sort_values(db, direction, limit):
+    """Her belge bir kez ve sıralı gelir; None değerler sayfalar arasında kaybolmaz"""
+    documents = seed(db)
+    assert walk(db, direction, limit) == expected_order(documents, direction)
+
+
+def test_descending_null_cursor_stays_in_null_block():
+    obj_id = ObjectId()
+    assert keyset_filter('created_at', encode_cursor(None, obj_id), -1) == {
+        'created_at': None, '_id': {'$lt': obj_id}
+    }
+
+
+def test_ascending_null_cursor_includes_all_values():
+    obj_id = ObjectId()
+    assert keyset_filter('created_at', encode_cursor(None, obj_id), 1) == {
+        '$or': [{'created_at': {'$ne': None}}, {'created_at': None, '_id': {'$gt': obj_id}}]
+    }
+
+
+def test_descending_value_cursor_reaches_null_block():
+    obj_id = ObjectId()
+    query = keyset_filter('created_at', encode_cursor(BASE, obj_id), -1)
+    assert {'created_at': None} in query['$or']
@@ -0,0 +1,123 @@
+"""
+PlayStat.record_batch: oynatma olaylarının saatlik sayaçlara işlenmesi
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.play_stat import PlayStat
+
+
+@pytest.fixture
+def owner():
+    return ObjectId()
+
+
+@pytest.fixture
+def screen(mongo_db, owner):
+    return mongo_db.screens.insert_one({'name': 'Lobi', 'user_id': owner}).inserted_id
+
+
+@pytest.fixture
+def media(mongo_db, owner):
+    return mongo_db.media.insert_one({'title': 'afiş', 'user_id': owner, 'views': 0}).inserted_id
+
+
+@pytest.fixture
+def hour():
+    """İki saat önceki saatin başı; olaylar bu saatin içine düşer"""
+    return (datetime.utcnow() - timedelta(hours=2)).replace(minute=0, second=0, microsecond=0)
+
+
+def event(media_id, played_at, duration=10):
+    return {'media_id': str(media_id), 'played_at': played_at.isoformat() + 'Z', 'duration': duration}
+
+
+def buckets(mongo_db):
+    return {
+        (stat['media_id'], stat['hour']): (stat['plays'], stat['duration'])
+        for stat in mongo_db.play_stats.find()
+    }
+
+
+def test_events_grouped_into_hourly_buckets(mongo_db, screen, media, hour):
+    events = [
+        event(media, hour + timedelta(minutes=5), 10),
+        event(media, hour + timedelta(minutes=50), 15),
+        event(media, hour + timedelta(minutes=70), 20),
+    ]
+    assert PlayStat.record_batch(screen, events) == (3, 0)
+    assert buckets(mongo_db) == {
+        (media, hour): (2, 25.0),
+        (media, hour + timedelta(hours=1)): (1, 20.0),
+    }
+    assert mongo_db.media.find_one({'_id': media})['views'] == 3
+
+
+def test_later_batches_increment_existing_bucket(mongo_db, screen, media, hour):
+    PlayStat.record_batch(screen, [event(media, hour + timedelta(minutes=1), 10)])
+    PlayStat.record_batch(screen, [event(media, hour + timedelta(minutes=2), 5)])
+    assert buckets(mongo_db) == {(media, hour): (2, 15.0)}
+    assert mongo_db.play_stats.count_documents({}) == 1
+
+
+def test_epoch_milliseconds_accepted(mongo_db, screen, media, hour):
+    played_at = hour + timedelta(minutes=30)
+    epoch_ms = (played_at - datetime(1970, 1, 1)).total_seconds() * 1000
+    events = [{'media_id': str(media), 'played_at': epoch_ms, 'duration': 3}]
+    assert PlayStat.record_batch(screen, events) == (1, 0)
+    assert buckets(mongo_db) == {(media, hour): (1, 3.0)}
+
+
+def test_invalid_old_and_future_events_rejected(mongo_db, screen, media, hour):
+    now = datetime.utcnow()
+    events = [
+        'olay değil',
+        {'media_id': 'geçersiz'},
+        event(media, now - timedelta(hours=100)),
+        event(media, now + timedelta(hours=1)),
+        event(media, hour),
+    ]
+    assert PlayStat.record_batch(screen, events) == (1, 4)
+    assert buckets(mongo_db) == {(media, hour): (1, 10.0)}
+
+
+def test_bad_duration_counts_as_zero(mongo_db, screen, media, hour):
+    events = [
+        {'media_id': str(media), 'played_at': hour.isoformat(), 'duration': 'uzun'},
+        {'media_id': str(media), 'played_at': hour.isoformat(), 'duration': -5},
+    ]
+    assert PlayStat.record_batch(screen, events) == (2, 0)
+    assert buckets(mongo_db) == {(media, hour): (2, 0.0)}
+
+
+def test_nothing_written_when_all_rejected(mongo_db, screen, media):
+    assert PlayStat.record_batch(screen, [{'media_id': 'x'}]) == (0, 1)
+    assert mongo_db.play_stats.count_documents({}) == 0
+    assert mongo_db.media.find_one({'_id': media})['views'] == 0
+
+
+def test_media_outside_manifest_checked_for_visibility(mongo_db, screen, media, hour):
+    other_user = ObjectId()
+    public = mongo_db.media.insert_one({'user_id': other_user, 'is_public': True}).inserted_id
+    shared = mongo_db.media.insert_one({'user_id': other_user}).inserted_id
+    private = mongo_db.media.insert_one({'user_id': other_user}).inserted_id
+    missing = ObjectId()
+    owner = mongo_db.screens.find_one({'_id': screen})['user_id']
+    mongo_db.media_shares.insert_one({'media_id': shared, 'user_id': owner})
+
+    events = [event(media_id, hour) for media_id in (media, public, shared, private, missing)]
+    # Manifestte hiçbiri yok: sahip, herkese açık ve paylaşılan medyalar kabul edilir
+    assert PlayStat.record_batch(screen, events, allowed_media_ids=[]) == (3, 2)
+    assert {media_id for media_id, _ in buckets(mongo_db)} == {media, public, shared}
+
+
+def test_manifest_media_accepted_without_lookup(mongo_db, screen, hour, monkeypatch):
+    manifest_media = ObjectId()
+    monkeypatch.setattr(PlayStat, '_visible_media_ids', staticmethod(lambda screen_id, media_ids: set()))
+    assert PlayStat.record_batch(screen, [event(manifest_media, hour)], allowed_media_ids=[str(manifest_media)]) == (1, 0)
+
+
+def test_unknown_screen_sees_no_media(mongo_db, media, hour):
+    assert PlayStat.record_batch(ObjectId(), [event(media, hour)], allowed_media_ids=[]) == (0, 1)
@@ -0,0 +1,71 @@
+"""
+Player içerik uç noktaları: ETag / If-None-Match ile koşullu GET
+"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.models.screen_manifest import ScreenManifest
+
+API_KEY = 'etag-key'
+
+ENDPOINTS = [f'/api/screen/{API_KEY}', f'/api/player/content/{API_KEY}']
+
+
+@pytest.fixture
+def screen(mongo_db):
+    user_id = ObjectId()
+    screen_id = mongo_db.screens.insert_one({
+        'name': 'Giriş', 'api_key': API_KEY, 'user_id': user_id, 'status': 'active',
+        'orientation': 'horizontal', 'resolution': '1920x1080', 'refresh_rate': 15,
+        'show_clock': True, 'created_at': datetime.utcnow()
+    }).inserted_id
+    media_id = mongo_db.media.insert_one({
+        'title': 'afiş', 'filename': 'afis.jpg', 'file_type': 'image', 'status': 'active',
+        'user_id': user_id, 'display_time': 8
+    }).inserted_id
+    mongo_db.screen_contents.insert_one({
+        'screen_id': screen_id, 'media_id': media_id, 'order': 1.0, 'status': 'active', 'display_time': 8
+    })
+    return screen_id
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_response_carries_manifest_version_as_etag(client, screen, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_etag()[0] == ScreenManifest.find_by_screen_id(screen)['version']
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_matching_if_none_match_returns_304(client, screen, url):
+    etag = client.get(url).get_etag()[0]
+    response = client.get(url, headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.get_etag()[0] == etag
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_stale_etag_returns_full_content(client, screen, url):
+    response = client.get(url, headers={'If-None-Match': '"eski-surum"'})
+    assert response.status_code == 200
+    assert response.get_json()
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_content_change_changes_etag(client, mongo_db, screen, url):
+    etag = client.get(url).get_etag()[0]
+
+    mongo_db.screen_contents.update_one({'screen_id': screen}, {'$set': {'display_time': 20}})
+    ScreenManifest.invalidate(screen)
+
+    response = client.get(url, headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_unknown_key_rejected(client, mongo_db, url):
+    assert client.get(url.replace(API_KEY, 'yok')).status_code == 401
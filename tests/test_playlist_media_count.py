@@ -0,0 +1,138 @@
+"""
+Playlist media_count: PlaylistMedia işlemlerindeki artımlı sayaç ve düzeltmesi
+"""
+import logging
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from app.models.playlist import Playlist
+from app.models.playlist_media import PlaylistMedia
+
+
+def new_playlist(mongo_db, name='liste', **fields):
+    return mongo_db.playlists.insert_one({'name': name, 'user_id': ObjectId(), 'media_count': 0, **fields}).inserted_id
+
+
+def new_media(mongo_db):
+    return mongo_db.media.insert_one({'title': 'afiş', 'status': 'active'}).inserted_id
+
+
+def media_count(mongo_db, playlist_id):
+    return mongo_db.playlists.find_one({'_id': playlist_id}).get('media_count')
+
+
+def test_create_and_remove_keep_count(mongo_db):
+    playlist_id = new_playlist(mongo_db)
+    first, second = new_media(mongo_db), new_media(mongo_db)
+    PlaylistMedia.create(playlist_id, first)
+    PlaylistMedia.create(str(playlist_id), str(second))
+    assert media_count(mongo_db, playlist_id) == 2
+
+    assert PlaylistMedia.remove_from_playlist(playlist_id, first) is True
+    assert PlaylistMedia.remove_from_playlist(playlist_id, first) is False
+    assert media_count(mongo_db, playlist_id) == 1
+
+
+def test_remove_media_from_all_playlists_decrements_each_playlist(mongo_db):
+    media_id = new_media(mongo_db)
+    other = ObjectId()
+    one, two = new_playlist(mongo_db, media_count=2), new_playlist(mongo_db, media_count=3)
+    mongo_db.playlist_media.insert_many([
+        {'playlist_id': one, 'media_id': media_id, 'order': 1.0},
+        {'playlist_id': one, 'media_id': other, 'order': 2.0},
+        {'playlist_id': two, 'media_id': media_id, 'order': 1.0},
+        {'playlist_id': two, 'media_id': media_id, 'order': 2.0},
+        {'playlist_id': two, 'media_id': other, 'order': 3.0},
+    ])
+
+    assert PlaylistMedia.remove_media_from_all_playlists(media_id) == 3
+    assert media_count(mongo_db, one) == 1
+    assert media_count(mongo_db, two) == 1
+    assert mongo_db.playlist_media.count_documents({'media_id': media_id}) == 0
+
+
+def test_rows_deleted_elsewhere_not_decremented_twice(mongo_db, monkeypatch):
+    media_id = new_media(mongo_db)
+    playlist_id = new_playlist(mongo_db, media_count=2)
+    rows = mongo_db.playlist_media.insert_many([
+        {'playlist_id': playlist_id, 'media_id': media_id, 'order': 1.0},
+        {'playlist_id': playlist_id, 'media_id': media_id, 'order': 2.0},
+    ]).inserted_ids
+
+    # Satırlar okunduktan sonra başka bir istek birini silip sayacı düşürür
+    find = mongo_db.playlist_media.find
+
+    def racing_find(*args, **kwargs):
+        found = list(find(*args, **kwargs))
+        monkeypatch.setattr(mongo_db.playlist_media, 'find', find)
+        PlaylistMedia.delete(rows[0])
+        return found
+
+    monkeypatch.setattr(mongo_db.playlist_media, 'find', racing_find)
+    assert PlaylistMedia.remove_media_from_all_playlists(media_id) == 1
+    assert media_count(mongo_db, playlist_id) == 0
+
+
+def test_counter_failure_is_logged_and_raised(mongo_db, monkeypatch, caplog):
+    playlist_id = new_playlist(mongo_db)
+    media_id = new_media(mongo_db)
+    PlaylistMedia.create(playlist_id, media_id)
+
+    def failing(*args, **kwargs):
+        raise PyMongoError('bağlantı koptu')
+
+    monkeypatch.setattr(mongo_db.playlists, 'update_one', failing)
+    with caplog.at_level(logging.ERROR, logger='app.models.playlist_media'):
+        with pytest.raises(PyMongoError):
+            PlaylistMedia.remove_from_playlist(playlist_id, media_id)
+    assert 'içerik sürümü güncellenemedi' in caplog.text
+
+
+def test_reconcile_corrects_only_drifted_playlists(mongo_db):
+    correct = new_playlist(mongo_db, 'doğru', media_count=1)
+    drifted = new_playlist(mongo_db, 'kaymış', media_count=5)
+    missing = new_playlist(mongo_db, 'alansız')
+    mongo_db.playlists.update_one({'_id': missing}, {'$unset': {'media_count': ''}})
+    mongo_db.playlist_media.insert_many([
+        {'playlist_id': correct, 'media_id': ObjectId()},
+        {'playlist_id': drifted, 'media_id': ObjectId()},
+        {'playlist_id': drifted, 'media_id': ObjectId()},
+    ])
+
+    report = Playlist.reconcile_media_counts(dry_run=True)
+    assert report['checked'] == 3 and report['total_media'] == 3
+    assert {(item['name'], item['old'], item['new']) for item in report['corrections']} == {
+        ('kaymış', 5, 2), ('alansız', None, 0)
+    }
+    # Deneme çalıştırması yazmaz
+    assert media_count(mongo_db, drifted) == 5
+
+    Playlist.reconcile_media_counts()
+    assert media_count(mongo_db, correct) == 1
+    assert media_count(mongo_db, drifted) == 2
+    assert media_count(mongo_db, missing) == 0
+    assert Playlist.reconcile_media_counts()['corrections'] == []
+
+
+def test_reconcile_does_not_overwrite_concurrent_increment(mongo_db, monkeypatch):
+    playlist_id = new_playlist(mongo_db, media_count=7)
+    mongo_db.playlist_media.insert_one({'playlist_id': playlist_id, 'media_id': ObjectId()})
+
+    # Sayım okunduktan sonra yeni bir öğe eklenir
+    bulk_write = mongo_db.playlists.bulk_write
+
+    def racing_bulk_write(*args, **kwargs):
+        mongo_db.playlist_media.insert_one({'playlist_id': playlist_id, 'media_id': ObjectId()})
+        mongo_db.playlists.update_one({'_id': playlist_id}, {'$inc': {'media_count': 1}})
+        return bulk_write(*args, **kwargs)
+
+    monkeypatch.setattr(mongo_db.playlists, 'bulk_write', racing_bulk_write)
+    Playlist.reconcile_media_counts()
+    # Koşullu düzeltme eşleşmez; kayma bir sonraki çalıştırmada giderilir
+    assert media_count(mongo_db, playlist_id) == 8
+
+    monkeypatch.setattr(mongo_db.playlists, 'bulk_write', bulk_write)
+    Playlist.reconcile_media_counts()
+    assert media_count(mongo_db, playlist_id) == 2
@@ -0,0 +1,139 @@
+"""
+app/utils/ranking.py: sıra anahtarlarının planlanması ve uygulanması
+"""
+from itertools import permutations
+
+import pytest
+from bson import ObjectId
+
+from app.utils import ranking
+
+SCOPE = {'playlist_id': 'p1'}
+COUNTER = 'order_seq'
+
+
+def make_list(db, count, ranks=None):
+    """count öğelik bir liste oluştur; öğe anahtarları 'k0', 'k1', ..."""
+    ranks = ranks or [(index + 1) * ranking.STEP for index in range(count)]
+    db.playlists.insert_one({'_id': 'p1', COUNTER: ranks[-1] if ranks else 0.0})
+    for index, rank in enumerate(ranks):
+        db.items.insert_one({'_id': f'k{index}', 'playlist_id': 'p1', 'order': rank})
+
+
+def current_order(db):
+    documents = db.items.find(SCOPE).sort([('order', 1), ('_id', 1)])
+    return [document['_id'] for document in documents]
+
+
+def reorder(db, desired):
+    return ranking.reorder(db.items, SCOPE, desired, db.playlists, 'p1', COUNTER)
+
+
+class TestBetween:
+    def test_midpoint(self):
+        assert ranking.between(1.0, 2.0) == 1.5
+
+    def test_front(self):
+        assert ranking.between(None, 1.0) == 1.0 - ranking.STEP
+
+    def test_exhausted_precision(self):
+        before = 1.0
+        after = before + 2 ** -52
+        assert ranking.between(before, after) is None
+
+
+class TestPlan:
+    def test_unchanged(self):
+        current = [('a', 1.0), ('b', 2.0)]
+        assert ranking.plan(current, ['a', 'b']) == ({}, False)
+
+    def test_move_to_end_uses_next_rank(self):
+        current = [('a', 1.0), ('b', 2.0), ('c', 3.0)]
+        assert ranking.plan(current, ['b', 'c', 'a']) == ({'a': None}, False)
+
+    def test_move_to_front(self):
+        current = [('a', 1.0), ('b', 2.0), ('c', 3.0)]
+        assert ranking.plan(current, ['c', 'a', 'b']) == ({'c': 0.0}, False)
+
+    def test_move_between_neighbours(self):
+        current = [('a', 1.0), ('b', 2.0), ('c', 3.0), ('d', 4.0)]
+        assert ranking.plan(current, ['a', 'd', 'b', 'c']) == ({'d': 1.5}, False)
+
+    def test_swap_renumbers(self):
+        current = [('a', 1.0), ('b', 2.0), ('c', 3.0), ('d', 4.0)]
+        changes, renumbered = ranking.plan(current, ['b', 'a', 'd', 'c'])
+        assert renumbered
+        assert changes == {'b': 1.0, 'a': 2.0, 'd': 3.0, 'c': 4.0}
+
+    def test_renumber_skips_unchanged_ranks(self):
+        current = [('a', 1.0), ('b', 2.0), ('c', 3.0), ('d', 4.0)]
+        changes, renumbered = ranking.plan(current, ['b', 'a', 'c', 'd'])
+        # Tek taşıma: yalnızca bir öğe yazılır
+        assert not renumbered and len(changes) == 1
+
+    def test_exhausted_precision_renumbers(self):
+        current = [('a', 1.0), ('b', 1.0 + 2 ** -52), ('c', 3.0), ('d', 4.0)]
+        changes, renumbered = ranking.plan(current, ['a', 'd', 'b', 'c'])
+        assert renumbered
+        assert changes == {'d': 2.0, 'b': 3.0, 'c': 4.0}
+
+
+@pytest.mark.parametrize('count', range(1, 7))
+def test_reorder_all_permutations(db, count):
+    """Her permütasyon istenen sırayı üretir; tek taşımalar tek belge yazar"""
+    keys = [f'k{index}' for index in range(count)]
+    for desired in permutations(keys):
+        desired = list(desired)
+        db.items.drop()
+        db.playlists.drop()
+        make_list(db, count)
+
+        _, renumbered = ranking.plan([(key, float(index + 1)) for index, key in enumerate(keys)], desired)
+        written = reorder(db, desired)
+
+        assert current_order(db) == desired
+        ranks = [document['order'] for document in db.items.find(SCOPE)]
+        assert len(set(ranks)) == count
+        if not renumbered:
+            assert written <= 1
+
+        # Sona eklenen öğe tüm mevcut öğelerin ardına düşer
+        rank = ranking.next_rank(db.playlists, 'p1', COUNTER, db.items, SCOPE)
+        assert rank > max(ranks)
+
+
+def test_reorder_sequence_keeps_order(db):
+    """Art arda taşımalar (yeniden numaralama dahil) sırayı bozmaz"""
+    make_list(db, 6)
+    expected = current_order(db)
+    moves = [(0, 5), (5, 0), (2, 3), (1, 4), (4, 1), (3, 3), (0, 1)] * 20
+    for source, target in moves:
+        expected.insert(target, expected.pop(source))
+        reorder(db, expected)
+        assert current_order(db) == expected
+
+
+def test_reorder_ignores_unknown_and_appends_unlisted(db):
+    make_list(db, 4)
+    written = reorder(db, ['k3', 'missing', 'k1'])
+    assert current_order(db) == ['k3', 'k1', 'k0', 'k2']
+    assert written > 0
+
+
+def test_reorder_matches_keys_as_strings(db):
+    """ObjectId olarak saklanan anahtarlar metin olarak gönderilebilir"""
+    make_list(db, 3)
+    media_ids = {}
+    for document in db.items.find():
+        media_ids[document['_id']] = ObjectId()
+        db.items.update_one({'_id': document['_id']}, {'$set': {'media_id': media_ids[document['_id']]}})
+    desired = [str(media_ids[key]) for key in ('k2', 'k0', 'k1')]
+    ranking.reorder(db.items, SCOPE, desired, db.playlists, 'p1', COUNTER, key='media_id')
+    assert current_order(db) == ['k2', 'k0', 'k1']
+
+
+def test_next_rank_seeds_missing_counter(db):
+    make_list(db, 3, ranks=[4.0, 7.0, 9.5])
+    db.playlists.update_one({'_id': 'p1'}, {'$unset': {COUNTER: ''}})
+    assert ranking.next_rank(db.playlists, 'p1', COUNTER, db.items, SCOPE) == 9.5 + ranking.STEP
+    assert ranking.next_rank(db.playlists, 'p1', COUNTER, db.items, SCOPE) == 9.5 + 2 * ranking.STEP
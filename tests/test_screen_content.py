@@ -0,0 +1,59 @@
+"""
+ScreenContent: ekran içeriklerinin medyalarla birlikte okunması
+"""
+import pytest
+from bson import ObjectId
+
+from app.models.screen_content import ScreenContent
+
+
+@pytest.fixture
+def screen(mongo_db):
+    """Aktif, pasif ve silinmiş medyaya bağlı içerikleri olan bir ekran"""
+    screen_id = ObjectId()
+    active = mongo_db.media.insert_one({'title': 'aktif', 'status': 'active', 'filename': 'a.jpg', 'views': 5}).inserted_id
+    inactive = mongo_db.media.insert_one({'title': 'pasif', 'status': 'inactive', 'filename': 'p.jpg'}).inserted_id
+    missing = ObjectId()
+    for order, media_id in enumerate([inactive, active, missing]):
+        mongo_db.screen_contents.insert_one({
+            'screen_id': screen_id, 'media_id': media_id, 'order': float(order + 1), 'status': 'active'
+        })
+    return screen_id
+
+
+def count_media_queries(mongo_db, monkeypatch):
+    calls = []
+    find = mongo_db.media.find
+
+    def counting_find(*args, **kwargs):
+        calls.append(args)
+        return find(*args, **kwargs)
+
+    monkeypatch.setattr(mongo_db.media, 'find', counting_find)
+    return calls
+
+
+def test_media_resolved_with_one_query(mongo_db, screen, monkeypatch):
+    calls = count_media_queries(mongo_db, monkeypatch)
+    contents = ScreenContent.find_with_media(screen, media_status=None)
+    assert len(calls) == 1
+    assert [content['media'] and content['media']['title'] for content in contents] == ['pasif', 'aktif', None]
+
+
+def test_media_status_filter_applied_in_query(mongo_db, screen):
+    contents = ScreenContent.find_with_media(screen)
+    assert [content['media'] and content['media']['title'] for content in contents] == [None, 'aktif', None]
+
+
+def test_projection_profile_limits_media_fields(mongo_db, screen):
+    contents = ScreenContent.find_with_media(screen, projection='manifest')
+    media = contents[1]['media']
+    assert media['title'] == 'aktif'
+    assert 'filename' in media
+    assert 'views' not in media
+
+
+def test_screen_without_contents_skips_media_query(mongo_db, monkeypatch):
+    calls = count_media_queries(mongo_db, monkeypatch)
+    assert ScreenContent.find_with_media(ObjectId()) == []
+    assert calls == []
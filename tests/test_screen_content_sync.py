@@ -0,0 +1,115 @@
+"""
+ScreenContent.sync: ekran içeriklerinin hedef listeyle fark üzerinden eşitlenmesi
+"""
+import pytest
+from bson import ObjectId
+
+from app.models.screen_content import ScreenContent
+from app.models.screen_manifest import ScreenManifest
+
+
+@pytest.fixture
+def screen(mongo_db):
+    return mongo_db.screens.insert_one({'name': 'Vitrin', 'status': 'active'}).inserted_id
+
+
+def rows(mongo_db, screen_id):
+    return [
+        (content['media_id'], content['order'], content['display_time'])
+        for content in mongo_db.screen_contents.find({'screen_id': screen_id}).sort('order', 1)
+    ]
+
+
+def test_empty_screen_gets_all_items_inserted(mongo_db, screen):
+    a, b = ObjectId(), ObjectId()
+    stats = ScreenContent.sync(screen, [
+        {'media_id': a, 'display_time': 5, 'order': 1.0},
+        {'media_id': str(b), 'display_time': 8, 'order': 2.0},
+    ])
+    assert stats == {'inserted': 2, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+    assert rows(mongo_db, screen) == [(a, 1.0, 5), (b, 2.0, 8)]
+
+
+def test_only_differences_written(mongo_db, screen):
+    a, b, c, d = (ObjectId() for _ in range(4))
+    ScreenContent.sync(screen, [
+        {'media_id': a, 'display_time': 5, 'order': 1.0},
+        {'media_id': b, 'display_time': 5, 'order': 2.0},
+        {'media_id': c, 'display_time': 5, 'order': 3.0},
+    ])
+    ids = {content['media_id']: content['_id'] for content in mongo_db.screen_contents.find()}
+
+    stats = ScreenContent.sync(screen, [
+        {'media_id': a, 'display_time': 5, 'order': 1.0},
+        {'media_id': c, 'display_time': 9, 'order': 3.0},
+        {'media_id': d, 'display_time': 5, 'order': 4.0},
+    ])
+    assert stats == {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1}
+    assert rows(mongo_db, screen) == [(a, 1.0, 5), (c, 3.0, 9), (d, 4.0, 5)]
+    # Mevcut satırlar yeniden kullanılır
+    assert mongo_db.screen_contents.find_one({'media_id': a})['_id'] == ids[a]
+    assert mongo_db.screen_contents.find_one({'media_id': c})['_id'] == ids[c]
+
+
+def test_repeated_media_reuses_rows_in_order(mongo_db, screen):
+    a, b = ObjectId(), ObjectId()
+    items = [
+        {'media_id': a, 'display_time': 5, 'order': 1.0},
+        {'media_id': b, 'display_time': 5, 'order': 2.0},
+        {'media_id': a, 'display_time': 5, 'order': 3.0},
+    ]
+    ScreenContent.sync(screen, items)
+    assert ScreenContent.sync(screen, items) == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 3}
+
+    stats = ScreenContent.sync(screen, items[:2])
+    assert stats == {'inserted': 0, 'updated': 0, 'deleted': 1, 'unchanged': 2}
+    assert rows(mongo_db, screen) == [(a, 1.0, 5), (b, 2.0, 5)]
+
+
+def test_missing_or_non_increasing_order_follows_previous(mongo_db, screen):
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    ScreenContent.sync(screen, [
+        {'media_id': a, 'display_time': 5, 'order': 4.0},
+        {'media_id': b, 'display_time': 5},
+        {'media_id': c, 'display_time': 5, 'order': 2.0},
+    ])
+    assert [order for _, order, _ in rows(mongo_db, screen)] == [4.0, 5.0, 6.0]
+
+
+def test_invalid_media_ids_skipped(mongo_db, screen):
+    stats = ScreenContent.sync(screen, [{'media_id': 'geçersiz', 'display_time': 5}])
+    assert stats == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+
+def test_empty_list_clears_screen(mongo_db, screen):
+    ScreenContent.sync(screen, [{'media_id': ObjectId(), 'display_time': 5}])
+    assert ScreenContent.sync(screen, [])['deleted'] == 1
+    assert rows(mongo_db, screen) == []
+
+
+def test_manifest_invalidated_before_and_after_write(mongo_db, screen, monkeypatch):
+    mongo_db.screen_manifests.insert_one({'screen_id': screen, 'stale': False, 'generation': 0})
+    seen = []
+    bulk_write = mongo_db.screen_contents.bulk_write
+
+    def recording_bulk_write(*args, **kwargs):
+        manifest = mongo_db.screen_manifests.find_one({'screen_id': screen})
+        seen.append((manifest['stale'], manifest['generation']))
+        return bulk_write(*args, **kwargs)
+
+    monkeypatch.setattr(mongo_db.screen_contents, 'bulk_write', recording_bulk_write)
+    ScreenContent.sync(screen, [{'media_id': ObjectId(), 'display_time': 5}])
+
+    # Yazma sırasında manifest zaten geçersiz; yazmadan sonra nesil tekrar artar
+    assert seen == [(True, 1)]
+    assert mongo_db.screen_manifests.find_one({'screen_id': screen})['generation'] == 2
+
+
+def test_unchanged_list_leaves_manifest_alone(mongo_db, screen, monkeypatch):
+    items = [{'media_id': ObjectId(), 'display_time': 5, 'order': 1.0}]
+    ScreenContent.sync(screen, items)
+
+    calls = []
+    monkeypatch.setattr(ScreenManifest, 'invalidate', classmethod(lambda cls, screen_id: calls.append(screen_id)))
+    ScreenContent.sync(screen, items)
+    assert calls == []
@@ -0,0 +1,134 @@
+"""
+ScreenManifest: ön-derlenmiş manifestin derlenmesi ve geçersiz kılınması
+"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.models.screen_manifest import ScreenManifest
+
+
+@pytest.fixture
+def screen(mongo_db):
+    """İki içerikli bir ekran"""
+    user_id = ObjectId()
+    screen_id = mongo_db.screens.insert_one({
+        'name': 'Lobi', 'api_key': 'manifest-key', 'user_id': user_id, 'status': 'active',
+        'orientation': 'horizontal', 'resolution': '1920x1080', 'refresh_rate': 15,
+        'show_clock': True, 'created_at': datetime.utcnow()
+    }).inserted_id
+    for order in range(2):
+        media_id = mongo_db.media.insert_one({
+            'title': f'm{order}', 'filename': f'm{order}.jpg', 'file_type': 'image',
+            'status': 'active', 'user_id': user_id, 'display_time': 5
+        }).inserted_id
+        mongo_db.screen_contents.insert_one({
+            'screen_id': screen_id, 'media_id': media_id, 'order': float(order + 1),
+            'status': 'active', 'display_time': 5
+        })
+    return screen_id
+
+
+def stored(mongo_db, screen_id):
+    return mongo_db.screen_manifests.find_one({'screen_id': screen_id})
+
+
+def test_build_stores_fresh_manifest(mongo_db, screen):
+    manifest = ScreenManifest.find_by_screen_id(screen)
+    assert [item['title'] for item in manifest['items']] == ['m0', 'm1']
+    document = stored(mongo_db, screen)
+    assert document['stale'] is False
+    assert document['version'] == manifest['version']
+
+
+def test_fresh_manifest_served_without_rebuild(mongo_db, screen, monkeypatch):
+    ScreenManifest.find_by_screen_id(screen)
+    monkeypatch.setattr(ScreenManifest, '_compile', pytest.fail)
+    assert ScreenManifest.find_by_api_key('manifest-key')['screen_id'] == screen
+
+
+def test_invalidate_marks_stale_and_bumps_generation(mongo_db, screen):
+    ScreenManifest.find_by_screen_id(screen)
+    generation = stored(mongo_db, screen)['generation']
+    ScreenManifest.invalidate(screen)
+    document = stored(mongo_db, screen)
+    assert document['stale'] is True
+    assert document['generation'] == generation + 1
+
+
+def test_screen_change_between_reads_is_not_saved_as_fresh(mongo_db, screen):
+    """Çağıranın okuduğu ekran belgesi ile nesil okuması arasındaki güncelleme"""
+    ScreenManifest.find_by_screen_id(screen)
+    screen_data = ScreenManifest._find_screen({'_id': screen})
+
+    # Screen.update: alan yazılır ve manifest geçersiz kılınır
+    mongo_db.screens.update_one({'_id': screen}, {'$set': {'name': 'Yeni Ad'}})
+    ScreenManifest.invalidate(screen)
+
+    ScreenManifest.build(screen_data)
+    document = stored(mongo_db, screen)
+    assert document['stale'] or document['screen']['name'] == 'Yeni Ad'
+    assert ScreenManifest.find_by_screen_id(screen)['screen']['name'] == 'Yeni Ad'
+
+
+def test_invalidate_during_compile_retries(mongo_db, screen, monkeypatch):
+    ScreenManifest.find_by_screen_id(screen)
+    ScreenManifest.invalidate(screen)
+
+    compile_ = ScreenManifest._compile
+    calls = []
+
+    def racing_compile(screen_data):
+        manifest = compile_(screen_data)
+        if not calls:
+            # İlk derleme sürerken içerik silinir
+            mongo_db.screen_contents.delete_one({'screen_id': screen})
+            ScreenManifest.invalidate(screen)
+        calls.append(1)
+        return manifest
+
+    monkeypatch.setattr(ScreenManifest, '_compile', racing_compile)
+    manifest = ScreenManifest.find_by_screen_id(screen)
+
+    assert len(calls) == 2
+    assert len(manifest['items']) == 1
+    document = stored(mongo_db, screen)
+    assert document['stale'] is False and len(document['items']) == 1
+
+
+def test_always_racing_build_leaves_manifest_stale(mongo_db, screen, monkeypatch):
+    ScreenManifest.find_by_screen_id(screen)
+    ScreenManifest.invalidate(screen)
+
+    compile_ = ScreenManifest._compile
+
+    def racing_compile(screen_data):
+        manifest = compile_(screen_data)
+        ScreenManifest.invalidate(screen)
+        return manifest
+
+    monkeypatch.setattr(ScreenManifest, '_compile', racing_compile)
+    assert ScreenManifest.find_by_screen_id(screen) is not None
+    assert stored(mongo_db, screen)['stale'] is True
+
+
+def test_deleted_screen_returns_none(mongo_db, screen):
+    screen_data = ScreenManifest._find_screen({'_id': screen})
+    mongo_db.screens.delete_one({'_id': screen})
+    assert ScreenManifest.build(screen_data) is None
+    assert stored(mongo_db, screen) is None
+
+
+def test_legacy_manifest_without_generation_rebuilds(mongo_db, screen):
+    mongo_db.screen_manifests.insert_one({'screen_id': screen, 'api_key': 'manifest-key', 'stale': True})
+    manifest = ScreenManifest.find_by_api_key('manifest-key')
+    assert len(manifest['items']) == 2
+    assert stored(mongo_db, screen)['stale'] is False
+
+
+def test_public_flag_read_from_is_public(mongo_db, screen):
+    media_id = mongo_db.screen_contents.find_one({'screen_id': screen, 'order': 1.0})['media_id']
+    mongo_db.media.update_one({'_id': media_id}, {'$set': {'is_public': True}})
+    items = ScreenManifest.find_by_screen_id(screen)['items']
+    assert [item['public'] for item in items] == [True, False]
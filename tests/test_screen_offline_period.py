@@ -0,0 +1,81 @@
+"""
+ScreenOfflinePeriod.build_period: player bildiriminden offline dönem çıkarımı
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.screen_offline_period import ScreenOfflinePeriod
+
+NOW = datetime(2026, 3, 10, 12, 0, 0)
+
+
+def build(data):
+    return ScreenOfflinePeriod.build_period(data, now=NOW)
+
+
+def test_duration_only_ends_now():
+    assert build({'duration': 90}) == (NOW - timedelta(seconds=90), NOW)
+
+
+def test_bare_number_is_duration():
+    assert build(30) == (NOW - timedelta(seconds=30), NOW)
+
+
+def test_start_and_end():
+    start = NOW - timedelta(hours=2)
+    end = NOW - timedelta(hours=1)
+    assert build({'start': start.isoformat() + 'Z', 'end': end.isoformat()}) == (start, end)
+
+
+def test_start_with_duration():
+    start = NOW - timedelta(hours=3)
+    assert build({'start_time': start, 'duration_seconds': 600}) == (start, start + timedelta(seconds=600))
+
+
+def test_end_with_duration():
+    end = NOW - timedelta(minutes=10)
+    assert build({'end': end, 'duration': 60}) == (end - timedelta(seconds=60), end)
+
+
+def test_start_only_ends_now():
+    start = NOW - timedelta(minutes=5)
+    assert build({'start': start}) == (start, NOW)
+
+
+def test_epoch_milliseconds():
+    start = NOW - timedelta(minutes=5)
+    epoch_ms = (start - datetime(1970, 1, 1)).total_seconds() * 1000
+    assert build({'start': epoch_ms, 'end': NOW}) == (start, NOW)
+
+
+def test_timezone_offset_converted_to_utc():
+    assert build({'start': '2026-03-10T13:00:00+02:00', 'end': NOW}) == (datetime(2026, 3, 10, 11, 0), NOW)
+
+
+def test_end_clamped_to_now():
+    start = NOW - timedelta(minutes=5)
+    assert build({'start': start, 'end': NOW + timedelta(hours=1)}) == (start, NOW)
+
+
+def test_long_period_clamped():
+    start = NOW - timedelta(days=400)
+    assert build({'start': start, 'end': NOW}) == (NOW - ScreenOfflinePeriod.MAX_PERIOD, NOW)
+
+
+@pytest.mark.parametrize('data', [
+    # Gelecekte başlayan dönem kırpılınca boş kalır
+    {'start': NOW + timedelta(hours=1), 'duration': 60},
+    {'start': NOW + timedelta(hours=1), 'end': NOW + timedelta(hours=2)},
+    # Sıfır süre
+    {'duration': 0},
+    # Bitiş başlangıçtan önce
+    {'start': NOW - timedelta(minutes=1), 'end': NOW - timedelta(minutes=2)},
+])
+def test_empty_or_negative_periods_rejected(data):
+    assert build(data) is None
+
+
+@pytest.mark.parametrize('data', [None, True, 'metin', [], {}, {'start': 'tarih değil'}, {'duration': 'uzun'}])
+def test_unusable_data_rejected(data):
+    assert build(data) is None